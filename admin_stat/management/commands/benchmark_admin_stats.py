@@ -0,0 +1,127 @@
+import time
+import tracemalloc
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from admin_stat.serializers import ConversationDataSerializer
+from admin_stat.views import AdminConversationsStatsView
+from chat.benchmarks import synthetic
+from chat.models import Conversation
+from user.models import User
+
+# Fixed so every run writes the same history
+SYNTHETIC_TAG = '501'
+SYNTHETIC_UNTIL = date(2026, 1, 15)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Peak Python memory and wall time of the platform conversation stats: building the '
+        'whole date range as a list (the old response) against walking every keyset page of '
+        '/api/admin_stat/conversations/. Writes a synthetic history (chat/benchmarks/synthetic.py) '
+        'inside a transaction that is rolled back, or measures the data already there with --existing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=10,
+                            help='Synthetic hotels to write; each adds ~6k conversations at the defaults (default: 10)')
+        parser.add_argument('--rooms', type=int, default=60, help='Median rooms per synthetic hotel (default: 60)')
+        parser.add_argument('--days', type=int, default=180, help='Days of synthetic history (default: 180)')
+        parser.add_argument('--seed', type=int, default=0, help='Synthetic data seed (default: 0)')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size (default: 10000)')
+        parser.add_argument('--existing', action='store_true',
+                            help='Write nothing and measure the database as it is, e.g. after '
+                                 'generate_synthetic_data --workers for millions of conversations')
+        parser.add_argument('--page-size', type=int, default=500, help='Keyset page size (default: 500)')
+        parser.add_argument('--skip-full-list', action='store_true',
+                            help='Only measure the paginated walk (the full list needs several GB at 1M rows)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if not options['existing']:
+                    synthetic.generate(synthetic.Options(
+                        hotels=options['hotels'], rooms=options['rooms'], days=options['days'],
+                        seed=options['seed'], tag=SYNTHETIC_TAG, until=SYNTHETIC_UNTIL,
+                        batch_size=options['batch_size'],
+                    ))
+                span = Conversation.objects.aggregate(
+                    conversations=Count('id'), first=Min('created_at'), last=Max('created_at'),
+                )
+                conversations = span['conversations']
+                # The stats view defaults to the last 30 days; walk the whole history instead
+                date_range = {
+                    'start_date': f"{span['first']:%Y-%m-%d}", 'end_date': f"{span['last']:%Y-%m-%d}",
+                } if conversations else {}
+                results = []
+                if not options['skip_full_list']:
+                    results.append(('full list (previous response)', *self._measure(self._full_list)))
+                results.append((
+                    f"keyset pages of {options['page_size']}",
+                    *self._measure(lambda: self._walk_pages(options['page_size'], date_range)),
+                ))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{conversations} conversations"))
+        for label, elapsed, peak, rows in results:
+            self.stdout.write(
+                f"  {label:<32} {elapsed:7.2f}s  peak {peak / 2**20:9.1f} MiB  {rows} rows"
+            )
+
+    def _measure(self, fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            rows = fn()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return elapsed, peak, rows
+
+    def _full_list(self):
+        conversation_data = [
+            {
+                'id': conv.id,
+                'hotel_name': conv.hotel.name if conv.hotel else 'N/A',
+                'guest_name': conv.guest.full_name if conv.guest else 'N/A',
+                'status': conv.status,
+                'conversation_type': conv.conversation_type,
+                'created_at': conv.created_at,
+                'last_message_at': conv.last_message_at,
+                'message_count': 0,
+                'is_fulfilled': conv.is_request_fulfilled,
+            }
+            for conv in Conversation.objects.select_related('hotel', 'guest').order_by('-created_at')
+        ]
+        return len(ConversationDataSerializer(conversation_data, many=True).data)
+
+    def _walk_pages(self, page_size, date_range):
+        factory = APIRequestFactory()
+        view = AdminConversationsStatsView.as_view()
+        user = User(username='benchmark', is_superuser=True)
+        rows = 0
+        cursor = None
+        with override_settings(RESPONSE_CACHE_ENABLED=False):
+            while True:
+                params = {'page_size': page_size, **date_range}
+                if cursor:
+                    params['cursor'] = cursor
+                request = factory.get('/api/admin_stat/conversations/', params)
+                force_authenticate(request, user=user)
+                data = view(request).data['data']
+                rows += len(data['data'])
+                cursor = data['next_cursor']
+                if not cursor:
+                    return rows
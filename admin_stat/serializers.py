@@ -54,7 +54,8 @@ class HotelDataSerializer(serializers.Serializer):
 
 class HotelsStatsResponseSerializer(serializers.Serializer):
     period = StatisticsPeriodSerializer()
-    summary = HotelStatsSerializer()
+    summary = HotelStatsSerializer(required=False)  # first page only
+    next_cursor = serializers.CharField(allow_null=True)
     data = HotelDataSerializer(many=True)
 
 
@@ -72,7 +73,8 @@ class ConversationDataSerializer(serializers.Serializer):
 
 class ConversationsStatsResponseSerializer(serializers.Serializer):
     period = StatisticsPeriodSerializer()
-    summary = ConversationStatsSerializer()
+    summary = ConversationStatsSerializer(required=False)  # first page only
+    next_cursor = serializers.CharField(allow_null=True)
     data = ConversationDataSerializer(many=True)
 
 
@@ -88,5 +90,6 @@ class TransactionDataSerializer(serializers.Serializer):
 
 class PaymentsStatsResponseSerializer(serializers.Serializer):
     period = StatisticsPeriodSerializer()
-    summary = RevenueStatsSerializer()
+    summary = RevenueStatsSerializer(required=False)  # first page only
+    next_cursor = serializers.CharField(allow_null=True)
     data = TransactionDataSerializer(many=True)
\ No newline at end of file
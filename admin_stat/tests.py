@@ -1,3 +1,75 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from chat.models import Conversation, Message
+from guest.models import Guest
+from hotel.models import Hotel
+from payments.models import HotelSubscription, SubscriptionPlan, Transaction
+from user.models import User
+
+
+class AdminStatsPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Stats Hotel")
+        self.staff = User.objects.create_user(
+            username="platformstats", email="platformstats@example.com", password="password123",
+            user_type="platform_staff",
+        )
+        self.conversations = []
+        for n in range(5):
+            guest = Guest.objects.create(full_name=f"Stats Guest {n}", whatsapp_number=f"+1555600{n:04d}")
+            self.conversations.append(Conversation.objects.create(
+                hotel=self.hotel if n else None, guest=guest, status="closed" if n % 2 else "active",
+            ))
+        for content in ("hi", "need towels"):
+            Message.objects.create(conversation=self.conversations[3], sender_type="guest", content=content)
+        self.client.force_authenticate(user=self.staff)
+
+    def test_conversation_pages_follow_cursor_without_gaps(self):
+        url = "/api/admin_stat/conversations/?page_size=2"
+        first = self.client.get(url).data["data"]
+
+        self.assertEqual(first["summary"]["total"], 5)
+        self.assertEqual(first["summary"]["closed"], 2)
+        seen = [row["id"] for row in first["data"]]
+        rows = {row["id"]: row for row in first["data"]}
+        cursor = first["next_cursor"]
+        while cursor:
+            with self.assertNumQueries(1):
+                page = self.client.get(f"{url}&cursor={cursor}").data["data"]
+            self.assertNotIn("summary", page)
+            seen.extend(row["id"] for row in page["data"])
+            rows.update({row["id"]: row for row in page["data"]})
+            cursor = page["next_cursor"]
+
+        self.assertEqual(seen, [str(conv.id) for conv in reversed(self.conversations)])
+        self.assertEqual(rows[str(self.conversations[3].id)]["message_count"], 2)
+        self.assertEqual(rows[str(self.conversations[0].id)]["hotel_name"], "N/A")
+        self.assertEqual(rows[str(self.conversations[1].id)]["guest_name"], "Stats Guest 1")
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/admin_stat/conversations/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+    def test_payments_rows_and_summary(self):
+        plan = SubscriptionPlan.objects.create(name="Standard", price=Decimal("999.00"), duration_days=30)
+        Transaction.objects.create(hotel=self.hotel, plan=plan, amount=Decimal("999.00"), status="completed")
+        Transaction.objects.create(hotel=self.hotel, plan=plan, amount=Decimal("999.00"), status="pending")
+        HotelSubscription.objects.create(
+            hotel=self.hotel, plan=plan, start_date=timezone.now(), end_date=timezone.now() + timedelta(days=30),
+        )
+
+        data = self.client.get("/api/admin_stat/payments/?page_size=1").data["data"]
+
+        self.assertEqual(data["summary"]["completed_transactions"], 1)
+        self.assertEqual(data["summary"]["active_subscriptions"], 1)
+        self.assertEqual(Decimal(data["summary"]["total_revenue"]), Decimal("999.00"))
+        self.assertEqual(len(data["data"]), 1)
+        self.assertEqual(data["data"][0]["plan_name"], "Standard")
+        self.assertEqual(data["data"][0]["hotel_name"], "Stats Hotel")
+        self.assertIsNotNone(data["next_cursor"])
@@ -1,14 +1,18 @@
 from datetime import datetime, timedelta
-from django.db.models import Sum, Count, Q
+from django.conf import settings
+from django.db.models import Sum, Count, Q, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.views import APIView
 
+from lobbybee.utils.pagination import InvalidCursor, KeysetPaginator
+from lobbybee.utils.response_cache import PLATFORM_STATS, cache_response
 from lobbybee.utils.responses import success_response, error_response
 
 from hotel.models import Hotel
-from chat.models import Conversation, Message
+from chat.models import ArchivedMessage, Conversation, Message
 from payments.models import Transaction, HotelSubscription
 from hotel.permissions import CanManagePlatform
 from .serializers import (
@@ -61,6 +65,7 @@ class AdminOverviewView(DateFilterMixin, APIView):
     """
     permission_classes = [CanManagePlatform]
     
+    @cache_response('admin_stats.overview', scope='platform', tags=(PLATFORM_STATS,), ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def get(self, request):
         try:
             start_datetime, end_datetime = self.get_date_range(request)
@@ -138,57 +143,76 @@ class AdminOverviewView(DateFilterMixin, APIView):
             )
 
 
-class AdminHotelsStatsView(DateFilterMixin, APIView):
+class KeysetStatsMixin(DateFilterMixin):
+    """
+    Date-filtered statistics list served one keyset page at a time (see KeysetPaginator).
+    Rows come from a values() queryset, so no model instances are built. The summary is a
+    single aggregate over the whole range and is only computed for the first page;
+    follow-up pages pass back `next_cursor` and carry just `period` and `data`.
+    """
+    order_field = 'created_at'
+    response_serializer_class = None
+
+    def get_rows(self, start_datetime, end_datetime):
+        raise NotImplementedError
+
+    def get_summary(self, start_datetime, end_datetime):
+        raise NotImplementedError
+
+    def paginated_stats_response(self, request):
+        start_datetime, end_datetime = self.get_date_range(request)
+        paginator = KeysetPaginator(self.order_field)
+        try:
+            rows, next_cursor = paginator.paginate(self.get_rows(start_datetime, end_datetime), request)
+        except InvalidCursor as e:
+            return error_response(str(e), status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = {
+            'period': self.get_period_data(request),
+            'data': rows,
+            'next_cursor': next_cursor,
+        }
+        if not request.query_params.get('cursor'):
+            response_data['summary'] = self.get_summary(start_datetime, end_datetime)
+
+        serializer = self.response_serializer_class(response_data)
+        return success_response(data=serializer.data)
+
+
+class AdminHotelsStatsView(KeysetStatsMixin, APIView):
     """
     Hotel statistics with detailed data and date filtering
     """
     permission_classes = [CanManagePlatform]
-    
+    order_field = 'registration_date'
+    response_serializer_class = HotelsStatsResponseSerializer
+
+    def get_rows(self, start_datetime, end_datetime):
+        # Filter hotels by registration date range
+        return Hotel.objects.filter(
+            registration_date__range=(start_datetime, end_datetime)
+        ).values(
+            'id', 'name', 'email', 'status', 'is_verified', 'is_active',
+            'registration_date', 'city', 'country',
+        )
+
+    def get_summary(self, start_datetime, end_datetime):
+        return Hotel.objects.filter(
+            registration_date__range=(start_datetime, end_datetime)
+        ).aggregate(
+            total=Count('id'),
+            registered=Count('id'),
+            verified=Count('id', filter=Q(is_verified=True)),
+            unverified=Count('id', filter=Q(is_verified=False)),
+            inactive=Count('id', filter=Q(is_active=False)),
+            suspended=Count('id', filter=Q(status='suspended')),
+            rejected=Count('id', filter=Q(status='rejected'))
+        )
+
+    @cache_response('admin_stats.hotels', scope='platform', tags=(PLATFORM_STATS,), ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def get(self, request):
         try:
-            start_datetime, end_datetime = self.get_date_range(request)
-            
-            # Filter hotels by registration date range
-            hotels = Hotel.objects.filter(
-                registration_date__range=(start_datetime, end_datetime)
-            ).select_related().order_by('-registration_date')
-            
-            # Get summary statistics
-            summary_stats = Hotel.objects.filter(
-                registration_date__range=(start_datetime, end_datetime)
-            ).aggregate(
-                total=Count('id'),
-                registered=Count('id'),
-                verified=Count('id', filter=Q(is_verified=True)),
-                unverified=Count('id', filter=Q(is_verified=False)),
-                inactive=Count('id', filter=Q(is_active=False)),
-                suspended=Count('id', filter=Q(status='suspended')),
-                rejected=Count('id', filter=Q(status='rejected'))
-            )
-            
-            # Prepare detailed hotel data
-            hotel_data = []
-            for hotel in hotels:
-                hotel_data.append({
-                    'id': hotel.id,
-                    'name': hotel.name,
-                    'email': hotel.email,
-                    'status': hotel.status,
-                    'is_verified': hotel.is_verified,
-                    'is_active': hotel.is_active,
-                    'registration_date': hotel.registration_date,
-                    'city': hotel.city,
-                    'country': hotel.country
-                })
-            
-            response_data = {
-                'period': self.get_period_data(request),
-                'summary': summary_stats,
-                'data': hotel_data
-            }
-            
-            serializer = HotelsStatsResponseSerializer(response_data)
-            return success_response(data=serializer.data)
+            return self.paginated_stats_response(request)
         except Exception as e:
             return error_response(
                 f"Failed to fetch hotel stats: {str(e)}",
@@ -196,57 +220,48 @@ class AdminHotelsStatsView(DateFilterMixin, APIView):
             )
 
 
-class AdminConversationsStatsView(DateFilterMixin, APIView):
+class AdminConversationsStatsView(KeysetStatsMixin, APIView):
     """
     Conversation statistics with detailed data and date filtering
     """
     permission_classes = [CanManagePlatform]
-    
+    response_serializer_class = ConversationsStatsResponseSerializer
+
+    def get_rows(self, start_datetime, end_datetime):
+        # Message counts for the page's conversations only, as a correlated count
+        message_count = Message.objects.filter(
+            conversation=OuterRef('pk')
+        ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+        archived_count = ArchivedMessage.objects.filter(
+            conversation=OuterRef('pk')
+        ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+
+        return Conversation.objects.filter(
+            created_at__range=(start_datetime, end_datetime)
+        ).values(
+            'id', 'status', 'conversation_type', 'created_at', 'last_message_at',
+            hotel_name=Coalesce(F('hotel__name'), Value('N/A')),
+            guest_name=Coalesce(F('guest__full_name'), Value('N/A')),
+            message_count=Coalesce(Subquery(message_count), 0) + Coalesce(Subquery(archived_count), 0),
+            is_fulfilled=F('is_request_fulfilled'),
+        )
+
+    def get_summary(self, start_datetime, end_datetime):
+        return Conversation.objects.filter(
+            created_at__range=(start_datetime, end_datetime)
+        ).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            closed=Count('id', filter=Q(status='closed')),
+            archived=Count('id', filter=Q(status='archived')),
+            fulfilled=Count('id', filter=Q(is_request_fulfilled=True))
+        )
+
+    # Conversations and messages change too often to tag; the TTL bounds staleness.
+    @cache_response('admin_stats.conversations', scope='platform', ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def get(self, request):
         try:
-            start_datetime, end_datetime = self.get_date_range(request)
-            
-            # Filter conversations by creation date range
-            conversations = Conversation.objects.filter(
-                created_at__range=(start_datetime, end_datetime)
-            ).select_related('hotel', 'guest').prefetch_related('messages').order_by('-created_at')
-            
-            # Get summary statistics
-            summary_stats = Conversation.objects.filter(
-                created_at__range=(start_datetime, end_datetime)
-            ).aggregate(
-                total=Count('id'),
-                active=Count('id', filter=Q(status='active')),
-                closed=Count('id', filter=Q(status='closed')),
-                archived=Count('id', filter=Q(status='archived')),
-                fulfilled=Count('id', filter=Q(is_request_fulfilled=True))
-            )
-            
-            # Prepare detailed conversation data
-            conversation_data = []
-            for conv in conversations:
-                message_count = conv.messages.count()
-                
-                conversation_data.append({
-                    'id': conv.id,
-                    'hotel_name': conv.hotel.name if conv.hotel else 'N/A',
-                    'guest_name': conv.guest.full_name if conv.guest else 'N/A',
-                    'status': conv.status,
-                    'conversation_type': conv.conversation_type,
-                    'created_at': conv.created_at,
-                    'last_message_at': conv.last_message_at,
-                    'message_count': message_count,
-                    'is_fulfilled': conv.is_request_fulfilled
-                })
-            
-            response_data = {
-                'period': self.get_period_data(request),
-                'summary': summary_stats,
-                'data': conversation_data
-            }
-            
-            serializer = ConversationsStatsResponseSerializer(response_data)
-            return success_response(data=serializer.data)
+            return self.paginated_stats_response(request)
         except Exception as e:
             return error_response(
                 f"Failed to fetch conversation stats: {str(e)}",
@@ -254,66 +269,52 @@ class AdminConversationsStatsView(DateFilterMixin, APIView):
             )
 
 
-class AdminPaymentsStatsView(DateFilterMixin, APIView):
+class AdminPaymentsStatsView(KeysetStatsMixin, APIView):
     """
     Payment/Revenue statistics with detailed data and date filtering
     """
     permission_classes = [CanManagePlatform]
-    
+    response_serializer_class = PaymentsStatsResponseSerializer
+
+    def get_rows(self, start_datetime, end_datetime):
+        return Transaction.objects.filter(
+            created_at__range=(start_datetime, end_datetime)
+        ).values(
+            'id', 'amount', 'status', 'transaction_type', 'created_at',
+            hotel_name=F('hotel__name'),
+            plan_name=F('plan__name'),
+        )
+
+    def get_summary(self, start_datetime, end_datetime):
+        revenue_stats = Transaction.objects.filter(
+            created_at__range=(start_datetime, end_datetime)
+        ).aggregate(
+            total_revenue=Sum('amount', filter=Q(status='completed')),
+            completed_transactions=Count('id', filter=Q(status='completed')),
+            pending_transactions=Count('id', filter=Q(status='pending')),
+            failed_transactions=Count('id', filter=Q(status='failed'))
+        )
+
+        # Get active subscriptions count
+        active_subscriptions = HotelSubscription.objects.filter(
+            is_active=True,
+            end_date__gte=timezone.now()
+        ).count()
+
+        return {
+            'total_revenue': revenue_stats['total_revenue'] or 0,
+            'completed_transactions': revenue_stats['completed_transactions'] or 0,
+            'pending_transactions': revenue_stats['pending_transactions'] or 0,
+            'failed_transactions': revenue_stats['failed_transactions'] or 0,
+            'active_subscriptions': active_subscriptions
+        }
+
+    @cache_response('admin_stats.payments', scope='platform', tags=(PLATFORM_STATS,), ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def get(self, request):
         try:
-            start_datetime, end_datetime = self.get_date_range(request)
-            
-            # Filter transactions by creation date range
-            transactions = Transaction.objects.filter(
-                created_at__range=(start_datetime, end_datetime)
-            ).select_related('hotel', 'plan').order_by('-created_at')
-            
-            # Get summary statistics
-            revenue_stats = Transaction.objects.filter(
-                created_at__range=(start_datetime, end_datetime)
-            ).aggregate(
-                total_revenue=Sum('amount', filter=Q(status='completed')),
-                completed_transactions=Count('id', filter=Q(status='completed')),
-                pending_transactions=Count('id', filter=Q(status='pending')),
-                failed_transactions=Count('id', filter=Q(status='failed'))
-            )
-            
-            # Get active subscriptions count
-            active_subscriptions = HotelSubscription.objects.filter(
-                is_active=True,
-                end_date__gte=timezone.now()
-            ).count()
-            
-            # Prepare detailed transaction data
-            transaction_data = []
-            for transaction in transactions:
-                transaction_data.append({
-                    'id': transaction.id,
-                    'hotel_name': transaction.hotel.name,
-                    'plan_name': transaction.plan.name,
-                    'amount': transaction.amount,
-                    'status': transaction.status,
-                    'transaction_type': transaction.transaction_type,
-                    'created_at': transaction.created_at
-                })
-            
-            response_data = {
-                'period': self.get_period_data(request),
-                'summary': {
-                    'total_revenue': revenue_stats['total_revenue'] or 0,
-                    'completed_transactions': revenue_stats['completed_transactions'] or 0,
-                    'pending_transactions': revenue_stats['pending_transactions'] or 0,
-                    'failed_transactions': revenue_stats['failed_transactions'] or 0,
-                    'active_subscriptions': active_subscriptions
-                },
-                'data': transaction_data
-            }
-            
-            serializer = PaymentsStatsResponseSerializer(response_data)
-            return success_response(data=serializer.data)
+            return self.paginated_stats_response(request)
         except Exception as e:
             return error_response(
                 f"Failed to fetch payment stats: {str(e)}",
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,234 @@
+"""
+Archival of old chat history out of the live Message and WebhookAttempt tables.
+
+- Messages of conversations that have been closed (or archived) for
+  CHAT_ARCHIVE_CONVERSATION_DAYS move to ArchivedMessage. The ids and columns stay the
+  same, and the conversation is marked 'archived'. On PostgreSQL that table is
+  range-partitioned by month of created_at (see migration 0022), and `ensure_partitions`
+  adds each month before rows for it are written.
+- Webhook attempts older than CHAT_ARCHIVE_WEBHOOK_DAYS are written to gzipped JSONL
+  segments in the CHAT_ARCHIVE_STORAGE storage, then deleted. Segments are named by day
+  and id range: `webhook_attempts/YYYY/MM/DD/<first id>-<last id>.jsonl.gz`. Keep the
+  window longer than WhatsApp's redelivery window, because deduplication only sees live rows.
+
+Both run in batches of CHAT_ARCHIVE_BATCH_SIZE rows, each batch in its own transaction,
+and a run stops after CHAT_ARCHIVE_MAX_BATCHES batches. The `archive_chat_history` Celery
+task runs both on a schedule; the `archive_chat_history` command runs them by hand.
+
+`conversation_messages` is the read side: it merges archived and live messages, so an
+archived conversation still opens with its full history.
+"""
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from lobbybee.utils.instrumentation import registry
+from .models import ArchivedMessage, Conversation, Message, WebhookAttempt
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENDPOINT = 'chat-archive'
+
+ARCHIVABLE_STATUSES = ('closed', 'archived')
+
+WEBHOOK_SEGMENT_PREFIX = 'webhook_attempts'
+
+_partitioned = None
+_known_partitions = set()
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(start):
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _is_partitioned():
+    global _partitioned
+    if _partitioned is None:
+        _partitioned = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+                    [ArchivedMessage._meta.db_table],
+                )
+                _partitioned = cursor.fetchone() is not None
+    return _partitioned
+
+
+def ensure_partitions(timestamps):
+    """Create the monthly ArchivedMessage partitions covering `timestamps` (PostgreSQL only)."""
+    if not _is_partitioned():
+        return
+    table = ArchivedMessage._meta.db_table
+    for start in sorted({_month_start(value.astimezone(dt_timezone.utc)) for value in timestamps}):
+        name = f"{table}_y{start.year}m{start.month:02d}"
+        if name in _known_partitions:
+            continue
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_next_month(start).isoformat()}')"
+                )
+            _known_partitions.add(name)
+        except Exception as e:
+            # Rows for this month already sit in the default partition; they stay there.
+            logger.warning(f"Could not create archive partition {name}: {e}")
+
+
+def archivable_conversations(cutoff):
+    """Closed/archived conversations untouched since `cutoff` that still have live messages."""
+    return Conversation.objects.filter(
+        status__in=ARCHIVABLE_STATUSES,
+        updated_at__lt=cutoff,
+    ).filter(
+        Exists(Message.objects.filter(conversation=OuterRef('pk')))
+    )
+
+
+def _archive_message_batch(conversation_ids, batch_size):
+    with transaction.atomic():
+        messages = list(
+            Message.objects.select_for_update(skip_locked=True)
+            .filter(conversation_id__in=conversation_ids)
+            .order_by('id')[:batch_size]
+        )
+        if not messages:
+            return 0
+        ensure_partitions(message.created_at for message in messages)
+        ArchivedMessage.objects.bulk_create(
+            [ArchivedMessage.from_message(message) for message in messages],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        Message.objects.filter(id__in=[message.id for message in messages]).delete()
+    return len(messages)
+
+
+def archive_conversations(days=None, batch_size=None, max_batches=None):
+    """Move the messages of long-closed conversations to ArchivedMessage. Returns counts."""
+    days = settings.CHAT_ARCHIVE_CONVERSATION_DAYS if days is None else days
+    batch_size = batch_size or settings.CHAT_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.CHAT_ARCHIVE_MAX_BATCHES
+    cutoff = timezone.now() - timedelta(days=days)
+
+    conversations = 0
+    moved = 0
+    batches = 0
+    while batches < max_batches:
+        conversation_ids = list(
+            archivable_conversations(cutoff).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not conversation_ids:
+            break
+        while batches < max_batches:
+            count = _archive_message_batch(conversation_ids, batch_size)
+            if not count:
+                break
+            moved += count
+            batches += 1
+        remaining = set(
+            Message.objects.filter(conversation_id__in=conversation_ids)
+            .values_list('conversation_id', flat=True).distinct()
+        )
+        done = [conversation_id for conversation_id in conversation_ids if conversation_id not in remaining]
+        # update() keeps updated_at, so the closing time is not lost.
+        Conversation.objects.filter(id__in=done).update(status='archived')
+        conversations += len(done)
+        if remaining:
+            break  # out of batches, or rows locked by another run
+
+    registry.increment(METRICS_ENDPOINT, 'messages_archived', moved)
+    if moved:
+        logger.info(f"Archived {moved} messages from {conversations} conversations")
+    return {'conversations': conversations, 'messages': moved}
+
+
+def _segment_name(attempts):
+    day = attempts[0].created_at.astimezone(dt_timezone.utc)
+    return f"{WEBHOOK_SEGMENT_PREFIX}/{day:%Y/%m/%d}/{attempts[0].id}-{attempts[-1].id}.jsonl.gz"
+
+
+def _serialize_attempt(attempt):
+    row = model_to_dict(attempt)
+    row['id'] = attempt.id
+    row['created_at'] = attempt.created_at
+    row['updated_at'] = attempt.updated_at
+    return json.dumps(row, cls=DjangoJSONEncoder)
+
+
+def write_segment(name, rows):
+    """Store serialized JSON rows as a gzipped JSONL segment; returns the stored name."""
+    payload = gzip.compress(('\n'.join(rows) + '\n').encode('utf-8'))
+    return storages[settings.CHAT_ARCHIVE_STORAGE].save(name, ContentFile(payload))
+
+
+def read_segment(name):
+    """Rows (dicts) of an archived JSONL segment."""
+    with storages[settings.CHAT_ARCHIVE_STORAGE].open(name, 'rb') as segment:
+        data = gzip.decompress(segment.read()).decode('utf-8')
+    return [json.loads(line) for line in data.splitlines() if line]
+
+
+def archive_webhook_attempts(days=None, batch_size=None, max_batches=None):
+    """Move webhook attempts older than the retention window to JSONL segments. Returns counts."""
+    days = settings.CHAT_ARCHIVE_WEBHOOK_DAYS if days is None else days
+    batch_size = batch_size or settings.CHAT_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.CHAT_ARCHIVE_MAX_BATCHES
+    cutoff = timezone.now() - timedelta(days=days)
+
+    moved = 0
+    segments = []
+    for _ in range(max_batches):
+        with transaction.atomic():
+            attempts = list(
+                WebhookAttempt.objects.select_for_update(skip_locked=True)
+                .filter(created_at__lt=cutoff)
+                .order_by('id')[:batch_size]
+            )
+            if not attempts:
+                break
+            # Written before the delete commits: a failed run leaves rows behind, never loses them.
+            segments.append(write_segment(_segment_name(attempts), [_serialize_attempt(a) for a in attempts]))
+            WebhookAttempt.objects.filter(id__in=[attempt.id for attempt in attempts]).delete()
+        moved += len(attempts)
+
+    registry.increment(METRICS_ENDPOINT, 'webhook_attempts_archived', moved)
+    if moved:
+        logger.info(f"Archived {moved} webhook attempts into {len(segments)} segments")
+    return {'webhook_attempts': moved, 'segments': segments}
+
+
+def conversation_messages(conversation):
+    """All messages of a conversation, oldest first, with archived ones restored as unsaved Messages."""
+    messages = list(conversation.messages.select_related('sender').order_by('created_at', 'id'))
+    if conversation.status != 'archived':
+        return messages
+    archived = [
+        row.to_message(conversation)
+        for row in conversation.archived_messages.select_related('sender').order_by('created_at', 'id')
+    ]
+    if not archived:
+        return messages
+    registry.increment(METRICS_ENDPOINT, 'archive_reads')
+    return sorted(archived + messages, key=lambda message: (message.created_at, message.id))
+
+
+def latest_archived_message(conversation):
+    """The newest archived message of a conversation as an unsaved Message, or None."""
+    row = conversation.archived_messages.select_related('sender').order_by('-created_at', '-id').first()
+    return row.to_message(conversation) if row else None
@@ -0,0 +1,9 @@
+"""
+Micro-benchmarks for the utilities that run per message or per row: phone normalization,
+template rendering and variable resolution, stay billing, invoice GST totals, ID document
+parsing and flow response -> WhatsApp payload conversion.
+
+`datasets` generates the inputs with Faker from a seed, `suite` defines the cases and
+compares a run with the stored baseline (`baseline.json`). Run them with
+`python manage.py benchmark_hot_paths`.
+"""
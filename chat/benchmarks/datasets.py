@@ -0,0 +1,249 @@
+"""
+Deterministic inputs for the hot-path benchmarks, generated with Faker (en_IN) from a seed.
+
+`build` returns everything in memory: hotels with their categories, rooms and stays are
+unsaved model instances wired together, so billing and invoice code runs without queries.
+The cases that query the database run over `write_history` instead: a short synthetic
+history of hotels the same size (chat/benchmarks/synthetic.py), written with the same
+generator as the scale fixture. Call it inside a transaction that is rolled back.
+
+Guest numbers are `915<9 digits>`: Indian mobile numbers start with 6-9, so they never
+collide with real guests.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from faker import Faker
+
+from guest.models import Guest, Stay
+from hotel.models import Hotel, Room, RoomCategory, default_gst_slabs
+
+# (name, nightly rate band, max occupancy): spans all three default GST slabs
+CATEGORIES = (
+    ('Standard', (900, 2500), 2),
+    ('Deluxe', (2500, 6000), 2),
+    ('Premium', (6000, 9000), 3),
+    ('Suite', (9000, 18000), 4),
+)
+
+# The database cases' history: fixed, so reruns write the same rows
+HISTORY_DAYS = 7
+HISTORY_UNTIL = date(2026, 1, 15)
+HISTORY_TAG = '500'
+
+TEMPLATES = (
+    'Hello {{guest_name}}, welcome to {{hotel_name}}! Your room {{room_number}} is ready. We hope you enjoy your stay.',
+    'Dear {{guest_name}}, your check-out is on {{checkout_time}}. We hope you enjoyed your stay at {{hotel_name}}!',
+    'Hi {guest_name}, breakfast is served {{breakfast_time}} to {{breakfast_end_time}}. '
+    'WiFi: {{wifi_name}} / {{wifi_password}}. Call {{hotel_phone}} for anything else.',
+    'Dear {{guest_name}}, we are working on the maintenance issue in room {{room_number}} '
+    '(floor {{room_floor}}). We apologize for any inconvenience.',
+)
+
+
+@dataclass
+class Dataset:
+    seed: int
+    hotels: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+    rooms: list = field(default_factory=list)
+    guests: list = field(default_factory=list)
+    stays: list = field(default_factory=list)
+    # Invoice lines per booking, shaped like build_invoice_lines output
+    invoices: list = field(default_factory=list)
+    gst_slabs: list = field(default_factory=default_gst_slabs)
+    phone_numbers: list = field(default_factory=list)
+    templates: list = field(default_factory=list)  # (content, context)
+    id_texts: list = field(default_factory=list)
+    flow_results: list = field(default_factory=list)
+
+
+def _guest_number(index):
+    return f"915{index:09d}"
+
+
+def _phone_variants(faker, rng, count):
+    """Numbers the way guests and staff type them: Faker's, plus spaced, dashed and bracketed."""
+    numbers = []
+    for _ in range(count):
+        digits = f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}"
+        numbers.append(rng.choice((
+            faker.phone_number(),
+            f"+91{digits}",
+            f"91{digits}",
+            digits,
+            f"+91 {digits[:5]} {digits[5:]}",
+            f"+91-{digits[:3]}-{digits[3:6]}-{digits[6:]}",
+            f"(0{digits[:3]}) {digits[3:]}",
+            f"+1 ({digits[:3]}) {digits[3:6]}-{digits[6:]}",
+        )))
+    return numbers
+
+
+def _id_text(faker, rng):
+    name = faker.name().upper()
+    dob = faker.date_of_birth(minimum_age=18, maximum_age=80).strftime('%d/%m/%Y')
+    kind = rng.choice(('aadhaar', 'pan', 'driving_license', 'voter_id', 'passport'))
+    if kind == 'aadhaar':
+        number = ' '.join(f"{rng.randrange(10000):04d}" for _ in range(3))
+        return (
+            f"GOVERNMENT OF INDIA\n{name}\nDOB: {dob}\n{rng.choice(('MALE', 'FEMALE'))}\n{number}\n"
+            f"Aadhaar - Aam Aadmi ka Adhikar\nUnique Identification Authority of India (UIDAI)\n"
+            f"Address: {faker.street_address()}, {faker.city()}, {faker.state()} - {faker.postcode()}"
+        )
+    if kind == 'pan':
+        pan = faker.bothify('?????####?').upper()
+        return (
+            f"INCOME TAX DEPARTMENT\nGOVT. OF INDIA\n{name}\n{faker.name().upper()}\n{dob}\n"
+            f"Permanent Account Number\n{pan}\nSignature"
+        )
+    if kind == 'driving_license':
+        return (
+            f"INDIAN UNION DRIVING LICENCE\nIssued by Government of {faker.state()}\n"
+            f"DL No: KL{rng.randrange(1, 80):02d} {rng.randrange(1990, 2024)}{rng.randrange(10 ** 7):07d}\n"
+            f"Name: {name}\nDOB: {dob}\nS/D/W of: {faker.name().upper()}\n"
+            f"Address: {faker.street_address()}, {faker.city()}\nValid Till: 12/08/2039"
+        )
+    if kind == 'voter_id':
+        return (
+            f"ELECTION COMMISSION OF INDIA\nIDENTITY CARD\nEPIC No: {faker.bothify('???#######').upper()}\n"
+            f"Name: {name}\nFather's Name: {faker.name().upper()}\nSex: {rng.choice(('Male', 'Female'))}\n"
+            f"Date of Birth: {dob}"
+        )
+    surname, _, given = name.partition(' ')
+    number = faker.bothify('?#######').upper()
+    return (
+        f"REPUBLIC OF INDIA\nPASSPORT\nType: P Country Code: IND Passport No: {number}\n"
+        f"Surname: {surname}\nGiven Name(s): {given}\nNationality: INDIAN\nDate of Birth: {dob}\n"
+        f"Place of Birth: {faker.city().upper()}\nFile No: {faker.bothify('??##########').upper()}\n"
+        f"P<IND{surname}<<{given.replace(' ', '<')}<<<<<<<<<<<<<<<"
+    )
+
+
+def _flow_result(faker, rng):
+    kind = rng.choice(('text', 'buttons', 'buttons', 'list', 'list', 'image', 'error'))
+    if kind == 'error':
+        return {'status': 'error', 'message': 'Flow failed'}
+    if kind == 'text':
+        return {'status': 'success', 'response': {'response_type': 'text', 'text': faker.paragraph()}}
+    if kind == 'image':
+        return {'status': 'success', 'response': {
+            'response_type': 'image', 'media_url': faker.image_url(), 'caption': faker.sentence(),
+        }}
+    options = [
+        {'id': f"{kind}_{n}", 'title': faker.word().title()}
+        for n in range(rng.randint(2, 3) if kind == 'buttons' else rng.randint(4, 10))
+    ]
+    return {'status': 'success', 'response': {
+        'response_type': kind, 'text': faker.sentence(), 'body_text': faker.sentence(),
+        'options': options, 'footer': 'LobbyBee',
+    }}
+
+
+def _template_context(hotel, room, guest, stay, rng):
+    return {
+        'hotel_name': hotel.name, 'hotel_phone': hotel.phone, 'hotel_email': hotel.email,
+        'hotel_address': hotel.address, 'hotel_city': hotel.city, 'time_zone': hotel.time_zone,
+        'breakfast_time': '7 AM', 'breakfast_end_time': '9:00 AM',
+        'guest_name': guest.full_name, 'guest_whatsapp_number': guest.whatsapp_number,
+        'guest_email': guest.email, 'guest_nationality': guest.nationality,
+        'room_number': room.room_number, 'room_floor': room.floor, 'room_status': 'Occupied',
+        'checkin_time': stay.check_in_date, 'checkout_time': stay.check_out_date,
+        'no_of_days': (stay.check_out_date.date() - stay.check_in_date.date()).days,
+        'wifi_name': f"{hotel.name.split()[0]}-{room.floor}F", 'wifi_password': f"stay{rng.randrange(10 ** 6):06d}",
+        'is_whatsapp_active': True, 'loyalty_points': rng.randrange(500), 'notes': None,
+        'current_date': '2025-01-15', 'current_time': '10:30 AM',
+    }
+
+
+def build(seed=0, hotels=2, rooms_per_hotel=2000, samples=500):
+    """Generate the dataset. The same arguments give the same data; dates are relative to now."""
+    faker = Faker('en_IN')
+    faker.seed_instance(seed)
+    rng = random.Random(seed)
+    dataset = Dataset(seed=seed)
+    now = timezone.now().replace(microsecond=0)
+
+    for hotel_index in range(hotels):
+        hotel = Hotel(
+            name=f"{faker.last_name()} {rng.choice(('Residency', 'Grand', 'Inn', 'Palace', 'Suites'))}",
+            unique_qr_code=f"benchmark_{seed}_{hotel_index}",
+            address=faker.street_address(), city=faker.city(), state=faker.state(), country='India',
+            pincode=faker.postcode(), phone=f"+91{rng.randrange(6, 10)}{rng.randrange(10 ** 9):09d}",
+            email=faker.company_email(), time_zone='Asia/Kolkata', status='verified', is_verified=True,
+            breakfast_time=time(7, 30), lunch_time=time(12, 30), dinner_time=time(19, 30),
+        )
+        dataset.hotels.append(hotel)
+        categories = [
+            RoomCategory(
+                hotel=hotel, name=name, max_occupancy=occupancy,
+                base_price=Decimal(rng.randrange(low, high, 50)).quantize(Decimal('0.01')),
+            )
+            for name, (low, high), occupancy in CATEGORIES
+        ]
+        dataset.categories.extend(categories)
+
+        floors = max(1, rooms_per_hotel // 40)
+        booking_rooms = []
+        for n in range(rooms_per_hotel):
+            floor = 1 + n % floors
+            room = Room(
+                hotel=hotel, room_number=f"{floor}{n // floors + 1:03d}", floor=floor, status='occupied',
+                # Cheaper categories make up most of the inventory
+                category=rng.choices(categories, (5, 3, 2, 1))[0],
+            )
+            guest_index = len(dataset.guests)
+            guest = Guest(
+                whatsapp_number=_guest_number(guest_index), full_name=faker.name(), email=faker.email(),
+                nationality=rng.choices(('Indian', faker.country()), (9, 1))[0], status='checked_in',
+            )
+            check_in = now - timedelta(days=rng.randint(0, 6), hours=rng.randint(0, 23))
+            stay = Stay(
+                hotel=hotel, guest=guest, room=room, status='active',
+                check_in_date=check_in, check_out_date=check_in + timedelta(days=rng.choices((1, 2, 3, 5, 7), (4, 3, 2, 1, 1))[0]),
+                actual_check_in=check_in + timedelta(minutes=rng.randint(0, 180)),
+                number_of_guests=rng.randint(1, room.category.max_occupancy),
+            )
+            dataset.rooms.append(room)
+            dataset.guests.append(guest)
+            dataset.stays.append(stay)
+            booking_rooms.append((room, stay))
+
+        # Most bookings are one room; groups and weddings take blocks of rooms.
+        while booking_rooms:
+            size = rng.choices((1, 2, 3, 8, 40), (70, 15, 8, 5, 2))[0]
+            block, booking_rooms = booking_rooms[:size], booking_rooms[size:]
+            lines = []
+            for room, stay in block:
+                nights = max(1, (stay.check_out_date - stay.actual_check_in).days)
+                rate = room.category.base_price
+                lines.append({'room_number': room.room_number, 'nights': nights, 'rate': rate, 'amount': rate * nights})
+            discount = rng.choice((0, 0, 0, 500, 1000)) if len(lines) < 8 else rng.choice((5000, 10000))
+            dataset.invoices.append((lines, discount))
+
+    for _ in range(samples):
+        stay = rng.choice(dataset.stays)
+        dataset.templates.append((
+            rng.choice(TEMPLATES), _template_context(stay.hotel, stay.room, stay.guest, stay, rng),
+        ))
+    dataset.phone_numbers = _phone_variants(faker, rng, samples)
+    dataset.id_texts = [_id_text(faker, rng) for _ in range(max(1, samples // 5))]
+    dataset.flow_results = [_flow_result(faker, rng) for _ in range(samples)]
+    return dataset
+
+
+def write_history(seed=0, hotels=2, rooms_per_hotel=2000, days=HISTORY_DAYS):
+    """Write a synthetic history ending on HISTORY_UNTIL; returns its active stays."""
+    from . import synthetic
+
+    options = synthetic.Options(
+        hotels=hotels, rooms=rooms_per_hotel, days=days, seed=seed, tag=HISTORY_TAG, until=HISTORY_UNTIL,
+    )
+    synthetic.generate(options)
+    return list(
+        Stay.objects.filter(status='active', guest__whatsapp_number__startswith=options.number_prefix)
+        .only('id', 'hotel_id', 'guest_id').order_by('id')
+    )
@@ -0,0 +1,186 @@
+"""
+The benchmark cases, the timer and the baseline comparison.
+
+Each case runs one utility over a slice of the dataset; times are reported per call of
+the utility. Rounds are timed like `timeit`: the garbage collector is off, and every round
+repeats the case enough times to last at least `min_time`.
+
+Every round is followed by a round of a fixed pure-Python reference workload, and cases
+are compared by their median ratio to it. Machine speed and load shifts cancel out of the
+ratio, so a baseline recorded on a laptop still applies on a slower, busier CI runner.
+"""
+import gc
+import itertools
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+
+from chat.utils.ocr.id_parser import IndianIDParser
+from chat.utils.phone_utils import get_guest_group_name, normalize_phone_number
+from chat.utils.template_util import _render_template, _resolve_variables
+from chat.utils.whatsapp_payload_utils import convert_flow_response_to_whatsapp_payload
+from guest.services import calculate_stay_billing
+from guest.services_invoice import compute_totals, resolve_gst
+
+BASELINE_VERSION = 1
+
+# Lookups per _resolve_variables round; each one runs about ten queries.
+RESOLVE_SAMPLE = 50
+
+
+@dataclass
+class Case:
+    name: str
+    func: object
+    calls: int  # utility calls per run of func
+
+
+def _each(func, items):
+    def run():
+        for item in items:
+            func(item)
+    return run
+
+
+def cases(dataset, stays=None):
+    """All cases over `dataset`; the database ones need the stays `datasets.write_history` wrote."""
+    slabs = dataset.gst_slabs
+    rates = [stay.room.category.base_price for stay in dataset.stays]
+
+    def render():
+        for content, context in dataset.templates:
+            _render_template(content, context)
+
+    def totals():
+        for lines, discount in dataset.invoices:
+            compute_totals(lines, discount, slabs)
+
+    def payloads():
+        for flow_result in dataset.flow_results:
+            convert_flow_response_to_whatsapp_payload(flow_result, "919876543210")
+
+    all_cases = [
+        Case('phone.normalize_phone_number', _each(normalize_phone_number, dataset.phone_numbers),
+             len(dataset.phone_numbers)),
+        Case('phone.get_guest_group_name', _each(get_guest_group_name, dataset.phone_numbers),
+             len(dataset.phone_numbers)),
+        Case('template._render_template', render, len(dataset.templates)),
+        Case('billing.calculate_stay_billing', _each(calculate_stay_billing, dataset.stays), len(dataset.stays)),
+        Case('invoice.resolve_gst', _each(lambda rate: resolve_gst(rate, slabs), rates), len(rates)),
+        Case('invoice.compute_totals', totals, len(dataset.invoices)),
+        Case('ocr.IndianIDParser.parse', _each(IndianIDParser.parse, dataset.id_texts), len(dataset.id_texts)),
+        Case('payload.convert_flow_response_to_whatsapp_payload', payloads, len(dataset.flow_results)),
+    ]
+
+    if stays:
+        lookups = itertools.cycle([(stay.hotel_id, stay.guest_id) for stay in stays])
+
+        def resolve():
+            for hotel_id, guest_id in itertools.islice(lookups, RESOLVE_SAMPLE):
+                _resolve_variables(hotel_id, guest_id, {})
+
+        all_cases.append(Case('template._resolve_variables', resolve, RESOLVE_SAMPLE))
+    return all_cases
+
+
+def _reference_workload():
+    # Dict, string and integer work in the proportions the cases mostly do
+    table = {}
+    for n in range(2000):
+        key = f"k{n % 97}"
+        table[key] = table.get(key, 0) + n * 3 // 7
+    return sum(table.values())
+
+
+def _time(func, loops):
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - started
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _loops(func, min_time):
+    """Repeats of `func` that take at least `min_time` seconds."""
+    loops = 1
+    while True:
+        elapsed = _time(func, loops)
+        if elapsed >= min_time:
+            return loops
+        loops = max(loops * 2, int(loops * min_time / elapsed * 1.1) if elapsed else loops * 10)
+
+
+def time_call(func, calls=1, rounds=7, min_time=0.05):
+    """
+    Per-call timings of `func` in microseconds (median, min, mean, stdev over the rounds),
+    and `relative`: the median ratio of a round to the reference round timed right after it.
+    """
+    func()  # warm up caches and lazy imports
+    loops = _loops(func, min_time)
+    reference_loops = _loops(_reference_workload, min_time)
+    samples = []
+    ratios = []
+    for _ in range(rounds):
+        sample = _time(func, loops) / loops / calls
+        reference = _time(_reference_workload, reference_loops) / reference_loops
+        samples.append(sample * 1e6)
+        ratios.append(sample / reference)
+    return {
+        'median_us': statistics.median(samples),
+        'min_us': min(samples),
+        'mean_us': statistics.fmean(samples),
+        'stdev_us': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'relative': statistics.median(ratios),
+        'rounds': rounds,
+        'loops': loops,
+        'calls': calls,
+    }
+
+
+def run(selected, rounds=7, min_time=0.05, on_case=None):
+    """Time the selected cases; returns a baseline-shaped dict."""
+    results = {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'cases': {},
+    }
+    for case in selected:
+        results['cases'][case.name] = time_call(case.func, calls=case.calls, rounds=rounds, min_time=min_time)
+        if on_case:
+            on_case(case, results['cases'][case.name])
+    return results
+
+
+@dataclass
+class Comparison:
+    name: str
+    median_us: float
+    baseline_us: float = None
+    change: float = None  # machine-adjusted, e.g. 0.3 = 30% slower than the baseline
+    status: str = 'new'  # new, ok, faster, regressed
+
+
+def compare(results, baseline, threshold):
+    """Compare run results with a baseline. `threshold` is a fraction: 0.25 flags cases 25% slower."""
+    comparisons = []
+    for name, result in results['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            comparisons.append(Comparison(name, result['median_us']))
+            continue
+        change = result['relative'] / base['relative'] - 1
+        if change > threshold:
+            status = 'regressed'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        comparisons.append(Comparison(name, result['median_us'], base['median_us'], change, status))
+    return comparisons
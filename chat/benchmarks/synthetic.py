@@ -0,0 +1,592 @@
+"""
+Synthetic production-scale data: hotels with staff, room categories and rooms, and a
+history of guests, bookings, stays, conversations, messages, feedback and reminder logs.
+
+Each hotel is simulated day by day over `days` days up to `until`. Rooms free up at
+check-out. Every day new bookings fill the hotel up to its occupancy target, which
+rises on weekends and in the October-February season. Most bookings are one room for
+1-3 nights; some are multi-room groups. About a sixth of arrivals are returning guests.
+Stays that end before `until` are completed or, rarely, cancelled. The others are still
+active, and a share of today's arrivals are still pending check-in.
+Around each stay the generator adds:
+- a check-in flow conversation;
+- service requests to the departments, roughly one every two nights;
+- the feedback prompt after check-out, with the guest's rating when they answer;
+- checkout and meal reminder logs.
+Timestamps are historical: auto_now fields are switched off while the generator writes.
+
+Rows are written through chunked bulk_create, one transaction per chunk. Each hotel
+draws from its own seeded random stream. The same seed, tag and `until` give the same
+data whatever the number of workers, and hotels can be generated in parallel processes.
+
+Guest numbers are `91<tag><hotel:4><serial:6>`. The tag (3 digits from the command, the
+load test's own 4-digit tag there) starts with 1-5, so the numbers never match a real
+Indian mobile number. Staff usernames are
+`synth_<tag>_<hotel>_<role><n>` and the hotel admin is `synth_<tag>_<hotel>_admin`.
+"""
+import math
+import multiprocessing
+import random
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connections, transaction
+from faker import Faker
+
+from chat.flows.checkin_flow import CheckinStep
+from chat.flows.feedback_flow import FeedbackStep
+from chat.models import Conversation, Message
+from guest.models import Booking, Feedback, Guest, ReminderLog, Stay
+from hotel.models import Hotel, Room, RoomCategory
+from user.models import User
+from .datasets import CATEGORIES
+
+# Models whose auto_now/auto_now_add fields are filled in by the generator.
+HISTORICAL_MODELS = (Hotel, RoomCategory, Room, User, Guest, Booking, Stay, Feedback,
+                     ReminderLog, Conversation, Message)
+
+# Models in the order a chunk writes them: parents before children.
+WRITE_ORDER = (Guest, Booking, Stay, Feedback, ReminderLog, Conversation, Message)
+
+# (department, share of service requests, staff role, staff per room)
+DEPARTMENTS = (
+    ('Reception', 30, 'receptionist', 1 / 25),
+    ('Housekeeping', 30, 'department_staff', 1 / 15),
+    ('Room Service', 25, 'department_staff', 1 / 30),
+    ('Restaurant', 10, 'department_staff', 1 / 40),
+    ('Management', 5, 'manager', 1 / 100),
+)
+
+GUEST_REQUESTS = {
+    'Reception': ("Can I get a late checkout tomorrow?", "Please arrange a taxi to the airport at 6am.",
+                  "Is there a pharmacy nearby?", "Can you extend my stay by one night?",
+                  "I need a copy of my invoice."),
+    'Housekeeping': ("Could I get two extra towels please?", "Please clean the room now.",
+                     "The AC is not cooling, can someone check?", "Need an extra pillow and blanket.",
+                     "The bathroom tap is leaking."),
+    'Room Service': ("Please send a pot of masala chai.", "Can I order two veg biryanis?",
+                     "Please send some ice and soda.", "What time does room service close?"),
+    'Restaurant': ("Table for four at 8pm please.", "Is breakfast included in my booking?",
+                   "Do you have Jain food options?"),
+    'Management': ("I want to speak to the manager about my bill.", "The staff were very helpful, thank you.",
+                   "Can we discuss a corporate rate?"),
+}
+
+STAFF_REPLIES = ("Sure, we'll take care of it right away.", "Noted, someone will be at your room shortly.",
+                 "Done! Anything else we can help with?", "Apologies for the trouble, we're on it.",
+                 "Thank you for letting us know.", "Your request has been completed.")
+
+FEEDBACK_NOTES = ("Room was noisy at night.", "Breakfast ran out early.", "Check-in took too long.",
+                  "AC was not working properly.", "Bathroom was not clean.")
+
+# (nights, weight) and (rooms, weight) of a booking
+NIGHTS = ((1, 30), (2, 28), (3, 18), (4, 9), (5, 7), (7, 6), (10, 2))
+BOOKING_ROOMS = ((1, 82), (2, 11), (3, 4), (4, 2), (8, 1))
+RATINGS = ((1, 3), (2, 4), (3, 10), (4, 30), (5, 53))
+
+CHECK_IN_TIME = time(14, 0)
+CHECK_OUT_TIME = time(11, 0)
+
+
+@dataclass
+class Options:
+    hotels: int
+    rooms: int = 60  # median rooms per hotel; sizes are log-normal around it
+    days: int = 180
+    occupancy: float = 0.68
+    seed: int = 0
+    tag: str = '100'  # digits, first one 1-5; prefixes guest numbers and usernames
+    until: date = None  # defaults to today (UTC)
+    batch_size: int = 5000
+
+    @property
+    def number_prefix(self):
+        return f"91{self.tag}"
+
+
+@dataclass
+class Names:
+    """Pools drawn once from Faker; per-row picks are plain `random` choices, which are far faster."""
+    first: list
+    last: list
+    cities: list
+    states: list
+    countries: list
+
+    @classmethod
+    def build(cls, seed):
+        faker = Faker('en_IN')
+        faker.seed_instance(seed)
+        return cls(
+            first=sorted({faker.first_name() for _ in range(3000)}),
+            last=sorted({faker.last_name() for _ in range(2000)}),
+            cities=sorted({faker.city() for _ in range(400)}),
+            states=sorted({faker.state() for _ in range(100)}),
+            countries=sorted({faker.country() for _ in range(200)}),
+        )
+
+    def full_name(self, rng):
+        return f"{rng.choice(self.first)} {rng.choice(self.last)}"
+
+
+@contextmanager
+def historical_timestamps():
+    """Let bulk_create keep the created_at/updated_at values the generator sets."""
+    fields = [
+        field for model in HISTORICAL_MODELS for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Writer:
+    """Buffers new rows and writes them in WRITE_ORDER, a chunk per transaction."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = defaultdict(list)
+        self.counts = Counter()
+
+    def add(self, obj):
+        self.pending[type(obj)].append(obj)
+
+    @property
+    def full(self):
+        return sum(len(rows) for rows in self.pending.values()) >= self.batch_size
+
+    def flush(self):
+        with transaction.atomic():
+            for model in WRITE_ORDER:
+                rows = self.pending.pop(model, None)
+                if rows:
+                    model.objects.bulk_create(rows, batch_size=self.batch_size)
+                    self.counts[model._meta.label] += len(rows)
+
+
+def _at(day, clock, minutes=0):
+    return datetime.combine(day, clock, tzinfo=dt_timezone.utc) + timedelta(minutes=minutes)
+
+
+def _season(day):
+    """Demand multiplier: peaks in late December, dips in the monsoon; weekends run fuller."""
+    factor = 1 + 0.2 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 355) / 365)
+    if day.weekday() in (4, 5):
+        factor += 0.12
+    return factor
+
+
+class HotelGenerator:
+    def __init__(self, index, options, names):
+        self.index = index
+        self.options = options
+        self.names = names
+        self.rng = random.Random(f"{options.seed}:{index}")
+        self.until = options.until
+        self.until_at = _at(options.until, time(0))
+        self.start = options.until - timedelta(days=options.days)
+        self.writer = Writer(options.batch_size)
+        self.guest_serial = 0
+        self.returning = []  # (guest id, busy until) of written guests
+        self.unwritten_guests = []
+        self.checked_in_returning = []
+        self.occupied = {}  # room index -> guest of the active stay
+
+    # Setup
+
+    def create_hotel(self):
+        rng = self.rng
+        self.size = max(5, min(1500, int(rng.lognormvariate(math.log(self.options.rooms), 0.6))))
+        registered = _at(self.start - timedelta(days=rng.randint(30, 900)), time(10, 0))
+        city = rng.choice(self.names.cities)
+        brand = rng.choice(('Residency', 'Grand', 'Inn', 'Palace', 'Suites', 'Regency'))
+        self.hotel = Hotel(
+            name=f"{rng.choice(self.names.last)} {brand}",
+            unique_qr_code=f"synthetic_{self.options.tag}_{self.index}",
+            address=f"{rng.randint(1, 400)}, {rng.choice(('MG Road', 'Station Road', 'Beach Road', 'Main Street'))}",
+            city=city, state=rng.choice(self.names.states), country='India',
+            pincode=f"{rng.randint(110000, 859999)}", phone=f"+91{rng.randint(6, 9)}{rng.randrange(10 ** 9):09d}",
+            email=f"frontdesk{self.index}@synthetic.invalid", time_zone='Asia/Kolkata',
+            status='verified', is_verified=True, is_active=True, verified_at=registered + timedelta(days=2),
+            breakfast_time=time(7, 30), lunch_time=time(12, 30), dinner_time=time(19, 30),
+            registration_date=registered, updated_at=registered,
+        )
+        self.hotel.id = uuid.uuid5(uuid.NAMESPACE_URL, f"lobbybee-synthetic/{self.options.tag}/{self.options.seed}/{self.index}")
+        Hotel.objects.bulk_create([self.hotel])
+
+        self.categories = RoomCategory.objects.bulk_create([
+            RoomCategory(
+                hotel=self.hotel, name=name, max_occupancy=occupancy, created_at=registered,
+                base_price=Decimal(rng.randrange(low, high, 50)).quantize(Decimal('0.01')),
+            )
+            for name, (low, high), occupancy in CATEGORIES[:rng.randint(2, len(CATEGORIES))]
+        ])
+        per_floor = rng.choice((10, 12, 16, 20))
+        weights = [2 ** (len(self.categories) - n) for n in range(len(self.categories))]
+        self.rooms = Room.objects.bulk_create([
+            Room(
+                hotel=self.hotel, room_number=f"{1 + n // per_floor}{n % per_floor + 1:02d}",
+                floor=1 + n // per_floor, category=rng.choices(self.categories, weights)[0],
+                status='available', created_at=registered, updated_at=registered,
+            )
+            for n in range(self.size)
+        ], batch_size=self.options.batch_size)
+
+        staff = [User(
+            username=self._username('admin'), user_type='hotel_admin', department=['Management'],
+        )]
+        self.staff = defaultdict(list)
+        for department, _, user_type, per_room in DEPARTMENTS:
+            for n in range(max(1, round(self.size * per_room))):
+                user = User(
+                    username=self._username(f"{department.lower().replace(' ', '')}{n}"),
+                    user_type=user_type, department=[department],
+                )
+                staff.append(user)
+                self.staff[department].append(user)
+        for user in staff:
+            user.email = f"{user.username}@synthetic.invalid"
+            user.first_name, user.last_name = rng.choice(self.names.first), rng.choice(self.names.last)
+            user.hotel = self.hotel
+            user.is_verified = True
+            user.date_joined = user.created_at = registered
+            user.set_unusable_password()
+        User.objects.bulk_create(staff)
+        self.staff = {department: [user.id for user in users] for department, users in self.staff.items()}
+        self.writer.counts.update({
+            'hotel.Hotel': 1, 'hotel.RoomCategory': len(self.categories),
+            'hotel.Room': len(self.rooms), 'user.User': len(staff),
+        })
+
+    def _username(self, role):
+        return f"synth_{self.options.tag}_{self.index}_{role}"
+
+    # Simulation
+
+    def run(self):
+        self.create_hotel()
+        rng = self.rng
+        free = list(range(self.size))
+        departures = defaultdict(list)
+        for offset in range(self.options.days):
+            day = self.start + timedelta(days=offset)
+            free.extend(departures.pop(day, ()))
+            target = min(0.97, self.options.occupancy * _season(day) * rng.uniform(0.9, 1.1))
+            to_fill = round(target * self.size) - (self.size - len(free))
+            while to_fill > 0 and free:
+                rooms = min(rng.choices(*zip(*BOOKING_ROOMS))[0], to_fill, len(free))
+                nights = rng.choices(*zip(*NIGHTS))[0]
+                picked = [free.pop(rng.randrange(len(free))) for _ in range(rooms)]
+                departures[day + timedelta(days=nights)].extend(picked)
+                self.book(day, nights, picked)
+                to_fill -= rooms
+            if self.writer.full:
+                self.flush()
+        self.flush()
+        self.finish()
+        return self.writer.counts
+
+    def flush(self):
+        self.writer.flush()
+        self.returning.extend((guest.id, busy_until) for guest, busy_until in self.unwritten_guests)
+        self.unwritten_guests = []
+
+    def guest_for(self, day, nights):
+        """A returning guest who is not staying right now, or a new one."""
+        rng = self.rng
+        if self.returning and rng.random() < 0.16:
+            for _ in range(3):
+                position = rng.randrange(len(self.returning))
+                guest_id, busy_until = self.returning[position]
+                if busy_until < day:
+                    self.returning[position] = (guest_id, day + timedelta(days=nights))
+                    return {'guest_id': guest_id}, False
+        number = f"{self.options.number_prefix}{self.index:04d}{self.guest_serial:06d}"
+        self.guest_serial += 1
+        first_contact = _at(day - timedelta(days=rng.randint(0, 20)), time(rng.randint(8, 22), rng.randrange(60)))
+        guest = Guest(
+            whatsapp_number=number, full_name=self.names.full_name(rng),
+            email=f"guest{number}@synthetic.invalid" if rng.random() < 0.4 else '',
+            date_of_birth=date(rng.randint(1950, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+            nationality='Indian' if rng.random() < 0.92 else rng.choice(self.names.countries),
+            preferred_language=rng.choices(('en', 'hi', 'ml', 'ta'), (70, 20, 5, 5))[0],
+            status='checked_out', first_contact_date=first_contact, last_activity=first_contact,
+        )
+        self.writer.add(guest)
+        self.unwritten_guests.append((guest, day + timedelta(days=nights)))
+        return {'guest': guest}, True
+
+    def book(self, day, nights, room_indices):
+        rng = self.rng
+        guest_ref, is_new = self.guest_for(day, nights)
+        check_in = _at(day, CHECK_IN_TIME, rng.randint(-120, 360))
+        check_out = _at(day + timedelta(days=nights), CHECK_OUT_TIME)
+        cancelled = rng.random() < 0.03
+        completed = check_out <= self.until_at
+        pending = not completed and not cancelled and day == self.until - timedelta(days=1) and rng.random() < 0.2
+
+        booking = Booking(
+            hotel=self.hotel, **{f"primary_{key}": value for key, value in guest_ref.items()},
+            booking_date=check_in - timedelta(days=rng.choices((0, 1, 3, 7, 14, 30), (30, 20, 20, 15, 10, 5))[0]),
+            check_in_date=check_in, check_out_date=check_out,
+            status='cancelled' if cancelled else 'confirmed', is_via_whatsapp=rng.random() < 0.6,
+        )
+        self.writer.add(booking)
+        if is_new:
+            guest_ref['guest'].first_contact_date = min(guest_ref['guest'].first_contact_date, booking.booking_date)
+
+        stays = []
+        for room_index in room_indices:
+            room = self.rooms[room_index]
+            category = room.category
+            occupants = rng.randint(1, category.max_occupancy)
+            actual_in = None if cancelled or pending else check_in + timedelta(minutes=rng.randint(0, 90))
+            actual_out = check_out - timedelta(minutes=rng.randint(0, 120)) if completed and not cancelled else None
+            stay = Stay(
+                booking=booking, hotel=self.hotel, **guest_ref, room=room,
+                check_in_date=check_in, check_out_date=check_out,
+                actual_check_in=actual_in, actual_check_out=actual_out,
+                number_of_guests=occupants,
+                guest_names=[self.names.full_name(rng) for _ in range(occupants - 1)],
+                status='cancelled' if cancelled else 'completed' if completed else 'pending' if pending else 'active',
+                total_amount=category.base_price * nights,
+                identity_verified=actual_in is not None, documents_uploaded=actual_in is not None,
+                internal_rating=rng.randint(1, 5) if rng.random() < 0.1 else None,
+                breakfast_reminder=rng.random() < 0.35, lunch_reminder=rng.random() < 0.1,
+                dinner_reminder=rng.random() < 0.1,
+                created_at=booking.booking_date, updated_at=actual_out or actual_in or booking.booking_date,
+            )
+            self.writer.add(stay)
+            stays.append(stay)
+            if stay.status == 'active':
+                self.occupied[room_index] = guest_ref
+            if actual_in is not None:
+                self.reminders(stay, nights)
+        booking.total_amount = sum(stay.total_amount for stay in stays)
+        booking.guest_names = [name for stay in stays for name in stay.guest_names]
+
+        if cancelled:
+            return
+        # Conversations follow the booking's first stay; the other rooms share the guest.
+        stay = stays[0]
+        last_message = self.conversations(stay, guest_ref, nights, pending)
+        if is_new:
+            guest = guest_ref['guest']
+            guest.status = {'active': 'checked_in', 'pending': 'pending_checkin'}.get(stay.status, 'checked_out')
+            guest.last_activity = guest.last_inbound_at = last_message
+        elif stay.status in ('active', 'pending'):
+            self.checked_in_returning.append((guest_ref['guest_id'], stay.status))
+
+    def reminders(self, stay, nights):
+        """Checkout and meal reminder logs of a checked-in stay."""
+        rng = self.rng
+        plan = [('checkout', stay.check_out_date.date(), time(9, 0))]
+        for reminder_type, enabled, clock in (('breakfast', stay.breakfast_reminder, time(7, 0)),
+                                              ('lunch', stay.lunch_reminder, time(12, 0)),
+                                              ('dinner', stay.dinner_reminder, time(19, 0))):
+            if enabled:
+                plan.extend((reminder_type, stay.check_in_date.date() + timedelta(days=n), clock)
+                            for n in range(1, nights + 1))
+        for reminder_type, day, clock in plan:
+            scheduled_for = _at(day, clock) - timedelta(hours=5, minutes=30)  # hotel clock is IST
+            if scheduled_for >= self.until_at:
+                status, sent_at = 'scheduled', None
+            else:
+                status = rng.choices(('sent', 'skipped', 'failed'), (90, 7, 3))[0]
+                sent_at = scheduled_for + timedelta(seconds=rng.randint(1, 90)) if status == 'sent' else None
+            self.writer.add(ReminderLog(
+                stay=stay, reminder_type=reminder_type, reminder_date=day, scheduled_for=scheduled_for,
+                status=status, sent_at=sent_at, delivery_attempts=0 if status == 'scheduled' else 1,
+                reason="Guest checked out early" if status == 'skipped' else
+                "WhatsApp send failed" if status == 'failed' else None,
+                created_at=stay.actual_check_in, updated_at=sent_at or scheduled_for,
+            ))
+
+    def _thread(self, conversation, messages):
+        """Write a conversation's messages: [(minutes after start, sender, fields)]. Returns the last time."""
+        rng = self.rng
+        started = conversation.created_at
+        at = started
+        for minutes, sender_type, fields in messages:
+            at = started + timedelta(minutes=minutes)
+            read = sender_type == 'staff' or at < self.until_at - timedelta(hours=1) or rng.random() < 0.5
+            self.writer.add(Message(
+                conversation=conversation, sender_type=sender_type, is_read=read,
+                read_at=at + timedelta(minutes=rng.randint(0, 10)) if read else None,
+                created_at=at, updated_at=at, **fields,
+            ))
+        content = messages[-1][2]['content']
+        conversation.last_message_at = at
+        conversation.last_message_preview = content[:255]
+        conversation.updated_at = at
+        return at
+
+    def conversations(self, stay, guest_ref, nights, pending):
+        """Check-in, service and feedback conversations of a stay; returns the last message time."""
+        rng = self.rng
+        hotel = self.hotel
+        last = stay.check_in_date
+        arrival = stay.actual_check_in or stay.check_in_date
+
+        # Check-in flow
+        checkin = Conversation(
+            hotel=hotel, **guest_ref, department='Reception', conversation_type='checkin',
+            status='active' if pending else 'closed', created_at=arrival - timedelta(minutes=25),
+        )
+        self.writer.add(checkin)
+        flow = [
+            (0, 'guest', {'message_type': 'text', 'content': f"/checkin-{hotel.id}", 'flow_step': CheckinStep.INITIAL}),
+            (1, 'staff', {'message_type': 'system', 'content': f"Welcome to {hotel.name}! Please upload your ID.",
+                          'flow_step': CheckinStep.ID_UPLOAD}),
+            (4, 'guest', {'message_type': 'image', 'content': "ID document (front)", 'flow_step': CheckinStep.ID_UPLOAD}),
+            (5, 'staff', {'message_type': 'system', 'content': "Thanks! Now the back side, please.",
+                          'flow_step': CheckinStep.ID_BACK_UPLOAD}),
+        ]
+        if not pending:
+            flow += [
+                (7, 'guest', {'message_type': 'image', 'content': "ID document (back)", 'flow_step': CheckinStep.ID_BACK_UPLOAD}),
+                (8, 'staff', {'message_type': 'system', 'content': "Your documents are being verified.",
+                              'flow_step': CheckinStep.COMPLETED}),
+            ]
+        for _, _, fields in flow:
+            fields.update(is_flow=True, flow_id='checkin', is_flow_step_success=True)
+        last = max(last, self._thread(checkin, flow))
+        if pending:
+            return last
+
+        # Service requests, roughly one every two nights of the stay so far
+        stay_end = min(stay.actual_check_out or self.until_at, self.until_at)
+        span = max(0.0, (stay_end - arrival).total_seconds())
+        requests = sum(1 for _ in range(nights * 2) if rng.random() < 0.25)
+        active_departments = set()
+        for _ in range(requests if span else 0):
+            department = rng.choices([d[0] for d in DEPARTMENTS], [d[1] for d in DEPARTMENTS])[0]
+            created = arrival + timedelta(seconds=rng.uniform(0, span))
+            open_ = stay.status == 'active' and department not in active_departments and rng.random() < 0.3
+            if open_:
+                active_departments.add(department)
+            conversation = Conversation(
+                hotel=hotel, **guest_ref, department=department, conversation_type='service',
+                status='active' if open_ else 'closed', created_at=created,
+                is_request_fulfilled=not open_ and rng.random() < 0.85,
+            )
+            if conversation.is_request_fulfilled:
+                conversation.fulfilled_at = created + timedelta(minutes=rng.randint(5, 90))
+            self.writer.add(conversation)
+            staff = self.staff[department]
+            thread = []
+            minutes = 0
+            for turn in range(rng.choices((2, 3, 4, 6, 10), (35, 25, 20, 15, 5))[0]):
+                if turn % 2 == 0:
+                    thread.append((minutes, 'guest', {'content': rng.choice(GUEST_REQUESTS[department])}))
+                else:
+                    thread.append((minutes, 'staff', {'content': rng.choice(STAFF_REPLIES),
+                                                      'sender_id': rng.choice(staff)}))
+                minutes += rng.randint(1, 25)
+            last = max(last, self._thread(conversation, thread))
+
+        # Feedback prompt after check-out
+        if stay.status == 'completed' and rng.random() < 0.7:
+            prompted = stay.actual_check_out + timedelta(minutes=rng.randint(5, 60))
+            if prompted < self.until_at:
+                conversation = Conversation(
+                    hotel=hotel, **guest_ref, department='Reception', conversation_type='feedback',
+                    status='closed', created_at=prompted,
+                )
+                self.writer.add(conversation)
+                thread = [(0, 'staff', {'message_type': 'system', 'content': f"How was your stay at {hotel.name}?",
+                                        'flow_step': FeedbackStep.RATING})]
+                if rng.random() < 0.65:
+                    rating = rng.choices(*zip(*RATINGS))[0]
+                    note = rng.choice(FEEDBACK_NOTES) if rating <= 3 and rng.random() < 0.7 else ''
+                    thread.append((rng.randint(1, 180), 'guest', {'content': "⭐" * rating,
+                                                                  'flow_step': FeedbackStep.RATING}))
+                    if note:
+                        thread.append((thread[-1][0] + 2, 'guest', {'content': note,
+                                                                     'flow_step': FeedbackStep.NOTE_INPUT}))
+                    thread.append((thread[-1][0] + 1, 'staff', {'message_type': 'system',
+                                                                 'content': "Thank you for your feedback!",
+                                                                 'flow_step': FeedbackStep.COMPLETED}))
+                    self.writer.add(Feedback(
+                        stay=stay, **guest_ref, rating=rating, note=note,
+                        created_at=prompted + timedelta(minutes=thread[1][0]),
+                    ))
+                for _, _, fields in thread:
+                    fields.update(is_flow=True, flow_id='feedback', is_flow_step_success=True)
+                last = max(last, self._thread(conversation, thread))
+        return last
+
+    def finish(self):
+        """Room and returning-guest state as of `until`."""
+        occupied = []
+        for room_index, guest_ref in self.occupied.items():
+            room = self.rooms[room_index]
+            room.status = 'occupied'
+            room.current_guest_id = guest_ref.get('guest_id') or guest_ref['guest'].id
+            occupied.append(room)
+        others = [room for index, room in enumerate(self.rooms) if index not in self.occupied]
+        for room in self.rng.sample(others, k=min(len(others), len(self.rooms) // 12)):
+            room.status = self.rng.choices(('cleaning', 'maintenance', 'out_of_order'), (70, 25, 5))[0]
+            occupied.append(room)
+        Room.objects.bulk_update(occupied, ['status', 'current_guest'], batch_size=self.options.batch_size)
+        for status in ('checked_in', 'pending_checkin'):
+            ids = [guest_id for guest_id, stay_status in self.checked_in_returning
+                   if (stay_status == 'active') == (status == 'checked_in')]
+            if ids:
+                Guest.objects.filter(id__in=ids).update(status=status)
+
+
+def generate_hotel(index, options, names):
+    """Generate one hotel and its history; returns row counts per model."""
+    return HotelGenerator(index, options, names).run()
+
+
+def _generate_in_worker(index, options, names):
+    try:
+        return generate_hotel(index, options, names)
+    finally:
+        # Worker processes keep no connection between hotels
+        connections.close_all()
+
+
+def generate(options, workers=1, on_hotel=None):
+    """
+    Generate `options.hotels` hotels; returns row counts per model. With several workers,
+    hotels are generated in forked processes (PostgreSQL: sqlite allows one writer).
+    A single worker writes on the caller's connection, so it can run inside a
+    transaction that the caller rolls back.
+    """
+    options.until = options.until or datetime.now(dt_timezone.utc).date()
+    names = Names.build(options.seed)
+    counts = Counter()
+    with historical_timestamps():
+        if workers <= 1:
+            results = (generate_hotel(index, options, names) for index in range(options.hotels))
+            for index, result in enumerate(results):
+                counts.update(result)
+                if on_hotel:
+                    on_hotel(index, result)
+            return counts
+
+        # Forked workers inherit the switched-off auto_now fields; they must not share connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {pool.submit(_generate_in_worker, index, options, names): index for index in range(options.hotels)}
+            for future in as_completed(futures):
+                result = future.result()
+                counts.update(result)
+                if on_hotel:
+                    on_hotel(futures[future], result)
+    return counts
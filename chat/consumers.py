@@ -1,18 +1,28 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from .models import Conversation, Message, ConversationParticipant
 from .utils.phone_utils import normalize_phone_number, get_guest_group_name
-from .utils.whatsapp_utils import send_whatsapp_message_with_media, send_whatsapp_media_with_link, send_whatsapp_button_message
+from .utils import whatsapp_async
 import logging
 from guest.name_utils import get_first_name_from_full_name
+from lobbybee.middleware import InstrumentedConsumerMixin
+from hotel.room_board import room_board_group_name
+from . import presence
+from .typing_indicators import TypingCoalescer
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Staff who get live room board diffs (see hotel/room_board.py)
+ROOM_BOARD_USER_TYPES = ['receptionist', 'manager', 'hotel_admin']
+
 
 def normalize_department_name(department):
     """
@@ -25,7 +35,7 @@ def normalize_department_name(department):
     return department.lower().replace(' ', '_')
 
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(InstrumentedConsumerMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for department-based chat system
     Handles real-time communication between hotel staff and guests
@@ -76,24 +86,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.info(f"User {self.user.username} added to group: {group_name}")
         logger.info(f"User {self.user.username} added to all groups: {self.department_group_names}")
 
+        if self.user.user_type in ROOM_BOARD_USER_TYPES and self.user.hotel_id:
+            self.room_board_group_name = room_board_group_name(self.user.hotel_id)
+            await self.channel_layer.group_add(self.room_board_group_name, self.channel_name)
+
         await self.accept()
         logger.info(f"WebSocket connection accepted for user {self.user.username} in departments: {self.departments}")
 
-        # Send connection confirmation to all departments
-        for department_name in self.departments:
-            group_name = f"department_{normalize_department_name(department_name)}"
-            await self.channel_layer.group_send(
-                group_name,
-                {
-                    'type': 'user_status',
-                    'message': {
-                        'type': 'user_connected',
-                        'user_id': self.user.id,
-                        'user_name': self.user.get_full_name() or self.user.username,
-                        'department': department_name
-                    }
-                }
-            )
+        # Presence: coalesced diffs to the hotel instead of a user_status per department
+        if self.user.hotel_id:
+            await self.start_presence()
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
@@ -105,26 +107,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     self.channel_name
                 )
 
-                # Extract department name from group name
-                department_name = group_name.replace('department_', '').lower()
+        if getattr(self, 'typing_coalescer', None) is not None:
+            await self.typing_coalescer.close()
 
-                # Notify other users about disconnection
-                await self.channel_layer.group_send(
-                    group_name,
-                    {
-                        'type': 'user_status',
-                        'message': {
-                            'type': 'user_disconnected',
-                            'user_id': self.user.id,
-                            'user_name': self.user.get_full_name() or self.user.username,
-                            'department': department_name
-                        }
-                    }
-                )
+        if hasattr(self, 'presence_group_name'):
+            await self.stop_presence()
+
+        if hasattr(self, 'room_board_group_name'):
+            await self.channel_layer.group_discard(self.room_board_group_name, self.channel_name)
 
         # Note: Conversation-specific groups are automatically cleaned up when
         # the WebSocket disconnects, so no manual cleanup needed
 
+    async def start_presence(self):
+        """Join the hotel's presence group, go online and keep heartbeating while connected"""
+        hotel_id = self.user.hotel_id
+        self.presence_group_name = presence.presence_group_name(hotel_id)
+        await self.channel_layer.group_add(self.presence_group_name, self.channel_name)
+        await sync_to_async(presence.touch)(hotel_id, self.user, self.departments, self.channel_name)
+        await presence.schedule_flush(hotel_id)
+        self.presence_heartbeat_task = asyncio.ensure_future(self.presence_heartbeat())
+
+        # Who is online right now, so the client does not wait for the next diff
+        online = await sync_to_async(presence.online_users)(hotel_id)
+        await self.send(text_data=json.dumps({
+            'type': 'presence_snapshot',
+            'data': {'hotel_id': str(hotel_id), 'online': list(online.values())}
+        }))
+
+    async def stop_presence(self):
+        self.presence_heartbeat_task.cancel()
+        hotel_id = self.user.hotel_id
+        await self.channel_layer.group_discard(self.presence_group_name, self.channel_name)
+        await sync_to_async(presence.release)(hotel_id, self.user.id, self.channel_name)
+        # Goes offline only once the grace period is over (and nothing reconnected)
+        await presence.schedule_flush(hotel_id, delay=settings.PRESENCE_DISCONNECT_GRACE + 1)
+
+    async def presence_heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL)
+            await self.handle_heartbeat({})
+
+    async def handle_heartbeat(self, data):
+        """Refresh this connection's presence (sent by the server loop, and accepted from clients)"""
+        if not hasattr(self, 'presence_group_name'):
+            return
+        try:
+            await sync_to_async(presence.touch)(self.user.hotel_id, self.user, self.departments, self.channel_name)
+            await presence.schedule_flush(self.user.hotel_id)
+        except Exception as e:
+            logger.warning(f"Presence heartbeat failed for user {self.user.id}: {e}")
+
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
@@ -147,6 +180,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.handle_close_conversation(data)
             elif message_type == 'reopen-temporary':
                 await self.handle_reopen_temporary(data)
+            elif message_type == 'heartbeat':
+                await self.handle_heartbeat(data)
             else:
                 await self.send_error('Invalid message type')
 
@@ -362,31 +397,47 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     async def handle_typing_indicator(self, data):
-        """Handle typing indicator"""
+        """Handle typing indicator (coalesced into start/stop transitions, see chat/typing_indicators.py)"""
         conversation_id = data.get('conversation_id')
         is_typing = data.get('is_typing', False)
 
         if not conversation_id:
             return
 
-        conversation = await self.get_conversation(conversation_id)
-        if conversation and await self.validate_conversation_access(conversation):
-            # Send to the specific department group for this conversation
-            conversation_department = normalize_department_name(conversation.department)
-            relevant_group = f"department_{conversation_department}"
-            
-            await self.channel_layer.group_send(
-                relevant_group,
-                {
-                    'type': 'typing_indicator',
-                    'message': {
-                        'conversation_id': conversation_id,
-                        'user_id': self.user.id,
-                        'user_name': self.user.get_full_name() or self.user.username,
-                        'is_typing': is_typing
-                    }
+        if not await self.can_signal_typing(conversation_id):
+            return
+        await self.get_typing_coalescer().update(str(conversation_id), bool(is_typing))
+
+    def get_typing_coalescer(self):
+        if getattr(self, 'typing_coalescer', None) is None:
+            self.typing_coalescer = TypingCoalescer(self.forward_typing_indicator)
+        return self.typing_coalescer
+
+    async def can_signal_typing(self, conversation_id):
+        """Conversation access, checked once per conversation instead of on every keystroke"""
+        if not hasattr(self, 'typing_access'):
+            self.typing_access = {}
+        key = str(conversation_id)
+        if key not in self.typing_access:
+            conversation = await self.get_conversation(conversation_id)
+            self.typing_access[key] = bool(conversation and await self.validate_conversation_access(conversation))
+        return self.typing_access[key]
+
+    async def forward_typing_indicator(self, conversation_id, is_typing):
+        """Send a typing transition to the sockets subscribed to the conversation"""
+        await self.channel_layer.group_send(
+            f"conversation_{conversation_id}",
+            {
+                'type': 'typing_indicator',
+                'sender_channel_name': self.channel_name,
+                'message': {
+                    'conversation_id': conversation_id,
+                    'user_id': self.user.id,
+                    'user_name': self.user.get_full_name() or self.user.username,
+                    'is_typing': is_typing
                 }
-            )
+            }
+        )
 
     async def chat_message(self, event):
         """Handle chat message broadcast"""
@@ -404,14 +455,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'data': message
         }))
 
+    async def presence_diff(self, event):
+        """Handle coalesced presence changes for this hotel"""
+        await self.send(text_data=json.dumps({
+            'type': 'presence_diff',
+            'data': event['data']
+        }))
+
     async def typing_indicator(self, event):
         """Handle typing indicator broadcasts"""
+        if event.get('sender_channel_name') == self.channel_name:
+            return  # no echo to the typing socket
         message = event['message']
         await self.send(text_data=json.dumps({
             'type': 'typing',
             'data': message
         }))
 
+    async def room_board_update(self, event):
+        """Handle room board diffs for this hotel"""
+        await self.send(text_data=json.dumps({
+            'type': 'room_board_diff',
+            'data': event['data']
+        }))
+
     async def conversation_notification(self, event):
         """Handle conversation update notifications"""
         notification = event['notification']
@@ -516,6 +583,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not conversation_id:
             return
 
+        # Leaving the conversation ends any typing state in it
+        if getattr(self, 'typing_coalescer', None) is not None:
+            await self.typing_coalescer.stop(str(conversation_id))
+
         # Remove user from conversation-specific group
         conversation_group = f"conversation_{conversation_id}"
         await self.channel_layer.group_discard(
@@ -628,25 +699,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
         ]
 
         try:
-            # Run the sync function in a thread to avoid blocking the async consumer
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            def send_button_message():
-                try:
-                    response = send_whatsapp_button_message(
-                        recipient_number=guest_whatsapp_number,
-                        message_text=message_text,
-                        buttons=buttons
-                    )
-                    logger.info(f"WhatsApp button message sent successfully for conversation {conversation.id}: {response}")
-                    return True, response
-                except Exception as e:
-                    logger.error(f"Failed to send WhatsApp button message: {e}")
-                    return False, str(e)
-            
-            success, result = await loop.run_in_executor(None, send_button_message)
-            
+            try:
+                response = await whatsapp_async.send_button_message(
+                    recipient_number=guest_whatsapp_number,
+                    message_text=message_text,
+                    buttons=buttons
+                )
+                logger.info(f"WhatsApp button message sent successfully for conversation {conversation.id}: {response}")
+                success, result = True, response
+            except Exception as e:
+                logger.error(f"Failed to send WhatsApp button message: {e}")
+                success, result = False, str(e)
+
             if success:
                 # Send acknowledgment to the staff member
                 await self.send(text_data=json.dumps({
@@ -815,27 +879,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # Send WhatsApp message using the utility function
             logger.info(f"Sending WhatsApp message to {guest_whatsapp_number} for conversation {conversation.id}")
             
-            # Run the sync function in a thread to avoid blocking the async consumer
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            def send_message():
-                try:
-                    response = send_whatsapp_message_with_media(
-                        recipient_number=guest_whatsapp_number,
-                        message_content=content,
-                        media_id=None,
-                        media_file=None
-                    )
-                    logger.info(f"WhatsApp message sent successfully: {response}")
-                    return True
-                except Exception as e:
-                    logger.error(f"Failed to send WhatsApp message: {e}")
-                    return False
-            
-            result = await loop.run_in_executor(None, send_message)
-            return result
-            
+            try:
+                response = await whatsapp_async.send_text_message(
+                    recipient_number=guest_whatsapp_number,
+                    message_text=content
+                )
+                logger.info(f"WhatsApp message sent successfully: {response}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send WhatsApp message: {e}")
+                return False
+
         except Exception as e:
             logger.error(f"Error in send_whatsapp_message: {e}", exc_info=True)
             return False
@@ -857,28 +911,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # Send WhatsApp media message using the utility function
             logger.info(f"Sending WhatsApp media message to {guest_whatsapp_number} for conversation {conversation.id}")
             
-            # Run the sync function in a thread to avoid blocking the async consumer
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            def send_media():
-                try:
-                    response = send_whatsapp_media_with_link(
-                        recipient_number=guest_whatsapp_number,
-                        media_url=media_url,
-                        media_type=media_type,
-                        caption=content,
-                        filename=filename
-                    )
-                    logger.info(f"WhatsApp media message sent successfully: {response}")
-                    return True
-                except Exception as e:
-                    logger.error(f"Failed to send WhatsApp media message: {e}")
-                    return False
-            
-            result = await loop.run_in_executor(None, send_media)
-            return result
-            
+            try:
+                response = await whatsapp_async.send_media_with_link(
+                    recipient_number=guest_whatsapp_number,
+                    media_url=media_url,
+                    media_type=media_type,
+                    caption=content,
+                    filename=filename
+                )
+                logger.info(f"WhatsApp media message sent successfully: {response}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send WhatsApp media message: {e}")
+                return False
+
         except Exception as e:
             logger.error(f"Error in send_whatsapp_media_with_link: {e}", exc_info=True)
             return False
@@ -916,26 +962,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 }
             ]
 
-            # Run the sync function in a thread to avoid blocking the async consumer
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            def send_feedback_message():
-                try:
-                    response = send_whatsapp_button_message(
-                        recipient_number=guest_whatsapp_number,
-                        message_text=message_text,
-                        buttons=buttons
-                    )
-                    logger.info(f"Fulfillment feedback message sent successfully for conversation {conversation.id}: {response}")
-                    return True, response
-                except Exception as e:
-                    logger.error(f"Failed to send fulfillment feedback message: {e}")
-                    return False, str(e)
-            
-            success, result = await loop.run_in_executor(None, send_feedback_message)
-            return success
-            
+            try:
+                response = await whatsapp_async.send_button_message(
+                    recipient_number=guest_whatsapp_number,
+                    message_text=message_text,
+                    buttons=buttons
+                )
+                logger.info(f"Fulfillment feedback message sent successfully for conversation {conversation.id}: {response}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send fulfillment feedback message: {e}")
+                return False
+
         except Exception as e:
             logger.error(f"Error in send_fulfillment_feedback_message: {e}", exc_info=True)
             return False
@@ -979,19 +1017,20 @@ async def notify_new_conversation_to_department(conversation):
         'last_message_at': conversation.last_message_at.isoformat() if conversation.last_message_at else None
     }
     
-    # Send to relevant department group
-    relevant_group = f"department_{normalize_department_name(conversation.department)}"
-    
-    await channel_layer.group_send(
-        relevant_group,
-        {
-            'type': 'new_conversation_notification',
-            'notification': {
-                'type': 'new_conversation',
-                'data': conversation_data
+    # Send to the conversation's department, and to the fallback department when
+    # nobody in it is online (see chat/presence.py)
+    departments = await sync_to_async(presence.route_departments)(conversation.hotel_id, conversation.department)
+    for department in departments:
+        await channel_layer.group_send(
+            f"department_{normalize_department_name(department)}",
+            {
+                'type': 'new_conversation_notification',
+                'notification': {
+                    'type': 'new_conversation',
+                    'data': conversation_data
+                }
             }
-        }
-    )
+        )
 
 
 async def notify_conversation_update_to_department(conversation, update_type='updated'):
@@ -1030,7 +1069,7 @@ async def notify_conversation_update_to_department(conversation, update_type='up
     )
 
 
-class GuestChatConsumer(AsyncWebsocketConsumer):
+class GuestChatConsumer(InstrumentedConsumerMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for guest connections
     Guests connect via their WhatsApp number
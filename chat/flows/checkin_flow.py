@@ -17,6 +17,7 @@ from faker import Faker
 
 from chat.utils.ocr.tasks.simple_ocr_tasks import extract_id_document, extract_id_document_task, extract_id_document_sync, detect_and_extract_id_document
 from guest.name_utils import get_first_name_from_full_name
+from hotel.config_snapshot import get_hotel_config
 from chat.utils.whatsapp_utils import send_whatsapp_text_message
 
 
@@ -352,9 +353,9 @@ def handle_unknown_step(conversation, guest, message_text, flow_data):
 def save_guest_message(conversation, message_text, message_id, media_id, flow_step):
     """Save incoming guest message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='guest',
         message_type='text',  # Will handle media later
         content=message_text,
@@ -362,17 +363,15 @@ def save_guest_message(conversation, message_text, message_id, media_id, flow_st
         is_flow=True,
         flow_id='checkin',
         flow_step=flow_step
-    )
-
-    conversation.update_last_message(message_text)
+    ), preview=message_text)
 
 
 def save_system_message(conversation, content, flow_step, is_success=True):
     """Save system/bot response message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='staff',
         message_type='system',
         content=content,
@@ -380,7 +379,7 @@ def save_system_message(conversation, content, flow_step, is_success=True):
         flow_id='checkin',
         flow_step=flow_step,
         is_flow_step_success=is_success
-    )
+    ))
 
 
 # Step handlers
@@ -764,24 +763,18 @@ def create_pending_stay_from_flow(conversation, guest):
 
     try:
         with transaction.atomic():
-            hotel_tz_name = conversation.hotel.time_zone or 'UTC'
-            try:
-                hotel_tz = ZoneInfo(hotel_tz_name)
-            except Exception:
-                logger.warning(
-                    f"Invalid hotel timezone '{hotel_tz_name}' for hotel {conversation.hotel_id}; using UTC"
-                )
-                hotel_tz = ZoneInfo('UTC')
+            hotel_config = get_hotel_config(conversation.hotel_id)
+            hotel_tz = hotel_config.tz
 
             now_local = timezone.now().astimezone(hotel_tz)
             check_in_local = datetime.combine(
                 now_local.date(),
-                conversation.hotel.check_in_time,
+                hotel_config.check_in_time,
                 tzinfo=hotel_tz
             )
             check_out_local = datetime.combine(
                 check_in_local.date(),
-                conversation.hotel.check_out_time,
+                hotel_config.check_out_time,
                 tzinfo=hotel_tz
             )
             if check_out_local <= check_in_local:
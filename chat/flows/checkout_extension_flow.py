@@ -1,7 +1,7 @@
 import logging
 from django.utils import timezone
-from zoneinfo import ZoneInfo
 from guest.name_utils import get_first_name_from_full_name
+from hotel.config_snapshot import hotel_timezone
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +40,7 @@ def process_checkout_extension_response(guest, message_text):
             "text": "This stay is no longer active. Please contact reception for assistance."
         }
 
-    hotel_tz = ZoneInfo(stay.hotel.time_zone or 'UTC')
+    hotel_tz = hotel_timezone(stay.hotel.time_zone)
 
     if message_text.startswith(no_prefix):
         checkout_local = stay.check_out_date.astimezone(hotel_tz) if stay.check_out_date else None
@@ -315,9 +315,9 @@ def handle_unknown_step(conversation, guest, message_text, flow_data):
 def save_guest_message(conversation, message_text, message_id, flow_step):
     """Save incoming guest message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='guest',
         message_type='text',
         content=message_text,
@@ -325,17 +325,15 @@ def save_guest_message(conversation, message_text, message_id, flow_step):
         is_flow=True,
         flow_id='demo',
         flow_step=flow_step
-    )
-
-    conversation.update_last_message(message_text)
+    ), preview=message_text)
 
 
 def save_system_message(conversation, content, flow_step, is_success=True):
     """Save system/bot response message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='staff',
         message_type='system',
         content=content,
@@ -343,4 +341,4 @@ def save_system_message(conversation, content, flow_step, is_success=True):
         flow_id='demo',
         flow_step=flow_step,
         is_flow_step_success=is_success
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
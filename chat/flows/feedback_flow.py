@@ -139,9 +139,9 @@ def handle_unknown_step(conversation, guest, message_text, flow_data):
 def save_guest_message(conversation, message_text, message_id, media_id, flow_step):
     """Save incoming guest message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='guest',
         message_type='text',
         content=message_text,
@@ -149,17 +149,15 @@ def save_guest_message(conversation, message_text, message_id, media_id, flow_st
         is_flow=True,
         flow_id='feedback',
         flow_step=flow_step
-    )
-
-    conversation.update_last_message(message_text)
+    ), preview=message_text)
 
 
 def save_system_message(conversation, content, flow_step, is_success=True):
     """Save system/bot response message."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='staff',
         message_type='system',
         content=content,
@@ -167,7 +165,7 @@ def save_system_message(conversation, content, flow_step, is_success=True):
         flow_id='feedback',
         flow_step=flow_step,
         is_flow_step_success=is_success
-    )
+    ))
 
 
 def handle_initial_step(conversation, guest, message_text, flow_data):
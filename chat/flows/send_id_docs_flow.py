@@ -52,9 +52,9 @@ def process_send_id_docs_flow(guest, conversation=None, flow_data=None):
             conversation,
             "Send ID Documents flow started",
             flow_step=SEND_ID_DOCS_INITIAL,
-            flow_id='send_id_docs'
+            flow_id='send_id_docs',
+            preview="Send ID Documents flow started"
         )
-        conversation.update_last_message("Send ID Documents flow started")
         return [{
             "type": "text",
             "text": (
@@ -70,7 +70,6 @@ def process_send_id_docs_flow(guest, conversation=None, flow_data=None):
     # STATE 2: Re-selection from menu - silent, flow continues
     if message_text == 'dept_send_id_docs':
         save_guest_message(conversation, message_text, None, None, SEND_ID_DOCS_RE_SELECTION)
-        conversation.update_last_message(message_text)
         return []
 
     # STATE 3: Image received - process silently
@@ -81,15 +80,14 @@ def process_send_id_docs_flow(guest, conversation=None, flow_data=None):
             conversation,
             "ID document image processed",
             flow_step=SEND_ID_DOCS_IMAGE_PROCESSED,
-            flow_id='send_id_docs'
+            flow_id='send_id_docs',
+            preview="ID document image processed"
         )
-        conversation.update_last_message("ID document image processed")
         return []  # Silent - no WhatsApp response
 
     # STATE 4: Non-image media - warn
     if message_type in ['video', 'audio', 'document']:
         save_guest_message(conversation, f"Unsupported media type: {message_type}", None, None, SEND_ID_DOCS_UNSUPPORTED)
-        conversation.update_last_message(f"Unsupported media type: {message_type}")
         return [{
             "type": "text",
             "text": (
@@ -110,6 +108,7 @@ def process_send_id_docs_flow(guest, conversation=None, flow_data=None):
 
     from ..utils.whatsapp_flow_utils import generate_department_menu_payload
     from guest.name_utils import get_first_name_from_full_name
+    from hotel.config_snapshot import get_hotel_departments
 
     guest_name = get_first_name_from_full_name(guest.full_name) if guest else 'Guest'
     recipient = guest.whatsapp_number if guest else ''
@@ -122,7 +121,7 @@ def process_send_id_docs_flow(guest, conversation=None, flow_data=None):
                 f"document(s) collected. You can continue using hotel services."
             )
         },
-        generate_department_menu_payload(recipient, guest_name)
+        generate_department_menu_payload(recipient, guest_name, get_hotel_departments(conversation.hotel_id))
     ]
 
 
@@ -278,12 +277,13 @@ def _find_or_create_accompanying_guest(primary_guest, name, id_number=''):
     )
 
 
-def save_system_message(conversation, content, flow_step=SEND_ID_DOCS_INITIAL, flow_id='send_id_docs', is_success=True):
+def save_system_message(conversation, content, flow_step=SEND_ID_DOCS_INITIAL, flow_id='send_id_docs', is_success=True,
+                        preview=None):
     """Save system/bot response message in the flow conversation."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='staff',
         message_type='system',
         content=content,
@@ -291,15 +291,15 @@ def save_system_message(conversation, content, flow_step=SEND_ID_DOCS_INITIAL, f
         flow_id=flow_id,
         flow_step=flow_step,
         is_flow_step_success=is_success
-    )
+    ), preview=preview)
 
 
 def save_guest_message(conversation, message_text, message_id, media_id, flow_step):
     """Save incoming guest message in the flow conversation."""
     from chat.models import Message
+    from chat.message_writer import queue_message
 
-    msg = Message.objects.create(
-        conversation=conversation,
+    queue_message(conversation, Message(
         sender_type='guest',
         message_type='text',
         content=message_text,
@@ -307,9 +307,4 @@ def save_guest_message(conversation, message_text, message_id, media_id, flow_st
         is_flow=True,
         flow_id='send_id_docs',
         flow_step=flow_step
-    )
-    if message_id:
-        msg.whatsapp_message_id = message_id
-        msg.save(update_fields=['whatsapp_message_id'])
-
-    conversation.update_last_message(message_text)
+    ), preview=message_text)
@@ -0,0 +1,17 @@
+"""
+Load testing of the WhatsApp -> flow -> reply pipeline.
+
+A run seeds its own hotels, staff and guests, then plays guest journeys against
+GuestConversationTypeView (`/api/chat/guest/conversation-type/`) while staff clients hold
+`ws/chat/` sockets open and answer service requests:
+
+- checkin: `/checkin-<hotel id>`, then the front and back of an ID (image messages);
+- service: department picked from the menu, then free-text requests that staff reply to;
+- feedback: a star rating on an open feedback conversation, then skipping the note.
+
+Everything runs in one process. Media downloads and replies go to a local Graph API stub
+(stubs.GraphAPIStub) and ID extraction to a fake OCR backend (stubs.fake_ocr), so a run
+needs neither Meta nor Gemini. Each request records its latency and SQL query count;
+the report gives p50/p95/p99, throughput and error rate per stage. Use the
+`loadtest_pipeline` management command; payloads.py builds the webhook bodies.
+"""
@@ -0,0 +1,63 @@
+"""
+WhatsApp Cloud API webhook bodies, as Meta delivers them, wrapped in the request
+GuestConversationTypeView expects ({"guest_whatsapp_number", "webhook_body"}).
+"""
+import time
+import uuid
+
+
+def _message(number, message_type, **content):
+    return {
+        "from": number,
+        "id": f"wamid.load.{uuid.uuid4().hex}",
+        "timestamp": str(int(time.time())),
+        "type": message_type,
+        **content,
+    }
+
+
+def webhook_request(number, message, phone_number_id='load'):
+    """Wrap one inbound message into the conversation-type request body."""
+    return {
+        "guest_whatsapp_number": number,
+        "webhook_body": {
+            "object": "whatsapp_business_account",
+            "entry": [{
+                "id": "load",
+                "changes": [{
+                    "field": "messages",
+                    "value": {
+                        "messaging_product": "whatsapp",
+                        "metadata": {"display_phone_number": "15550000000", "phone_number_id": phone_number_id},
+                        "contacts": [{"profile": {"name": "Load Guest"}, "wa_id": number}],
+                        "messages": [message],
+                    },
+                }],
+            }],
+        },
+    }
+
+
+def text_message(number, body):
+    return _message(number, "text", text={"body": body})
+
+
+def image_message(number, media_id, caption=None):
+    image = {"id": media_id, "mime_type": "image/jpeg", "sha256": uuid.uuid4().hex}
+    if caption:
+        image["caption"] = caption
+    return _message(number, "image", image=image)
+
+
+def button_reply(number, button_id, title):
+    return _message(number, "interactive", interactive={
+        "type": "button_reply",
+        "button_reply": {"id": button_id, "title": title},
+    })
+
+
+def list_reply(number, row_id, title):
+    return _message(number, "interactive", interactive={
+        "type": "list_reply",
+        "list_reply": {"id": row_id, "title": title},
+    })
@@ -0,0 +1,331 @@
+"""
+Plays the fixture's guest journeys against GuestConversationTypeView and drives the
+staff sockets, recording latency, SQL queries and errors per stage.
+
+HTTP requests go through Django's test Client on worker threads (one DB connection per
+thread), so the full middleware stack runs. The staff sockets run on the same event loop
+through channels' WebsocketCommunicator. Broadcasts a view makes with async_to_sync are
+scheduled back onto that loop, which is what lets the in-memory channel layer deliver them.
+
+Stages:
+    checkin_start, id_front, id_back            check-in journey (id_back includes OCR)
+    service_menu, service_message               service journey
+    feedback_rating, feedback_note              feedback journey
+    ws_delivery     guest service message posted -> first staff socket of the hotel receives it
+    staff_reply     staff reply sent on the socket -> acknowledgment received
+"""
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import Client
+from django.urls import path
+
+from chat.consumers import ChatConsumer
+from chat.utils import whatsapp_async
+from lobbybee.middleware import JWTAuthMiddlewareStack
+from lobbybee.utils.instrumentation import measure
+from . import payloads
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = '/api/chat/guest/conversation-type/'
+
+STAGES = (
+    'checkin_start', 'id_front', 'id_back',
+    'service_menu', 'service_message',
+    'feedback_rating', 'feedback_note',
+    'ws_delivery', 'staff_reply',
+)
+
+SERVICE_REQUESTS = (
+    "Could I get two extra towels please?",
+    "The AC is not cooling, can someone check?",
+    "Please send a pot of masala chai.",
+    "Can we get a late checkout tomorrow?",
+    "The wifi keeps disconnecting in my room.",
+    "Please arrange a taxi to the airport at 6am.",
+)
+
+FEEDBACK_NOTES = (
+    "Room was noisy at night.",
+    "Breakfast ran out early.",
+    "Check-in took too long.",
+)
+
+_TOKEN_RE = re.compile(r'^\[(lt-[0-9a-f]{12})\]')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _failed(status_code, data):
+    """
+    Whether a conversation-type response is a failure. A relay that went through also
+    carries `webhook_error` (process_guest_webhook answers without a `success` key), so
+    the flow/relay outcome is judged by its status code.
+    """
+    if status_code != 200 or 'error' in data:
+        return True
+    if data.get('webhook_executed') is False:
+        return True
+    return data.get('webhook_status_code', 200) >= 400
+
+
+class Stats:
+    """Latency samples, SQL query counts and errors per stage. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+        self._queries = {}
+        self._graph_ms = {}
+
+    def record(self, stage, latency_ms, queries=0, error=False, graph_ms=0.0):
+        with self._lock:
+            self._latencies.setdefault(stage, []).append(latency_ms)
+            self._errors[stage] = self._errors.get(stage, 0) + int(error)
+            self._queries[stage] = self._queries.get(stage, 0) + queries
+            self._graph_ms[stage] = self._graph_ms.get(stage, 0.0) + graph_ms
+
+    def error(self, stage):
+        """An operation that never completed (no latency sample)."""
+        with self._lock:
+            self._latencies.setdefault(stage, [])
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def report(self, elapsed):
+        stages = {}
+        with self._lock:
+            for stage in sorted(self._latencies, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+                latencies = sorted(self._latencies[stage])
+                errors = self._errors.get(stage, 0)
+                count = max(len(latencies), errors)
+                stages[stage] = {
+                    'count': count,
+                    'errors': errors,
+                    'error_rate': errors / count if count else 0.0,
+                    'throughput': len(latencies) / elapsed if elapsed else 0.0,
+                    'p50_ms': percentile(latencies, 50),
+                    'p95_ms': percentile(latencies, 95),
+                    'p99_ms': percentile(latencies, 99),
+                    'max_ms': latencies[-1] if latencies else None,
+                    'queries': self._queries.get(stage, 0),
+                    'queries_per_request': self._queries.get(stage, 0) / len(latencies) if latencies else 0.0,
+                    'graph_api_ms': self._graph_ms.get(stage, 0.0),
+                }
+        return stages
+
+
+class StaffSocket:
+    """One staff member's `ws/chat/` connection; answers the hotel's service requests it claims."""
+
+    def __init__(self, run, staff, application):
+        self.run = run
+        self.staff = staff
+        self.communicator = WebsocketCommunicator(application, f"/ws/chat/?token={staff.token}")
+        self.pending_replies = {}
+        self.reader = None
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect(timeout=10)
+        if not connected:
+            raise RuntimeError(f"Staff socket for user {self.staff.user_id} was rejected")
+        self.reader = asyncio.ensure_future(self.read())
+
+    async def read(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=None)
+            if output['type'] == 'websocket.close':
+                return
+            if output['type'] != 'websocket.send' or not output.get('text'):
+                continue
+            event = json.loads(output['text'])
+            if event.get('type') == 'message':
+                await self.on_message(event['data'])
+            elif event.get('type') == 'acknowledgment':
+                self.on_reply_done(event.get('conversation_id'), error=False)
+            elif event.get('type') == 'error':
+                self.on_reply_done(None, error=True)
+
+    async def on_message(self, message):
+        if message.get('sender_type') != 'guest':
+            return
+        match = _TOKEN_RE.match(message.get('content') or '')
+        if not match:
+            return
+        token = match.group(1)
+        if not self.run.claim_delivery(token, self.staff.hotel_id):
+            return
+        conversation_id = message['conversation_id']
+        self.pending_replies.setdefault(conversation_id, []).append(time.perf_counter())
+        await self.communicator.send_json_to({
+            'type': 'text',
+            'conversation_id': conversation_id,
+            'content': f"On it - re {token}",
+        })
+
+    def on_reply_done(self, conversation_id, error):
+        if conversation_id not in self.pending_replies:
+            # Errors do not name the conversation: settle the oldest outstanding reply.
+            pending = [(times[0], key) for key, times in self.pending_replies.items() if times]
+            if not pending:
+                return
+            conversation_id = min(pending)[1]
+        started = self.pending_replies[conversation_id].pop(0)
+        if not self.pending_replies[conversation_id]:
+            del self.pending_replies[conversation_id]
+        self.run.stats.record('staff_reply', (time.perf_counter() - started) * 1000, error=error)
+        self.run.replies_done += 1
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+            try:
+                await self.reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self.communicator.disconnect()
+
+
+class LoadTestRun:
+    def __init__(self, fixture, concurrency=16, service_messages=2, think_time=0.0, settle_timeout=15.0, seed=None):
+        self.fixture = fixture
+        self.concurrency = concurrency
+        self.service_messages = service_messages
+        self.think_time = think_time
+        self.settle_timeout = settle_timeout
+        self.rng = random.Random(seed)
+        self.stats = Stats()
+        self.deliveries = {}  # token -> (posted at, hotel id, delivered)
+        self.replies_done = 0
+        self._local = threading.local()
+        self._semaphore = None
+
+    # HTTP
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        return client
+
+    def _post_sync(self, body):
+        with measure() as measurement:
+            started = time.perf_counter()
+            response = self._client().post(WEBHOOK_PATH, json.dumps(body), content_type='application/json')
+            latency_ms = (time.perf_counter() - started) * 1000
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        error = _failed(response.status_code, data)
+        if error:
+            logger.warning(f"Load test request failed ({response.status_code}): {str(data)[:300]}")
+        return latency_ms, measurement.queries, measurement.external_ms.get('graph_api', 0.0), error
+
+    async def post(self, stage, number, message):
+        async with self._semaphore:
+            latency_ms, queries, graph_ms, error = await sync_to_async(self._post_sync, thread_sensitive=False)(
+                payloads.webhook_request(number, message)
+            )
+        self.stats.record(stage, latency_ms, queries=queries, error=error, graph_ms=graph_ms)
+        if self.think_time:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.think_time))
+
+    # Journeys
+
+    async def checkin(self, journey):
+        number = journey.number
+        await self.post('checkin_start', number, payloads.text_message(number, f"/checkin-{journey.hotel_id}"))
+        await self.post('id_front', number, payloads.image_message(number, f"media-{number}-front"))
+        await self.post('id_back', number, payloads.image_message(number, f"media-{number}-back"))
+
+    async def service(self, journey):
+        number = journey.number
+        slug = re.sub(r"[^a-z0-9]+", "_", journey.department.lower()).strip("_")
+        await self.post('service_menu', number, payloads.list_reply(number, f"dept_{slug}", journey.department))
+        for _ in range(self.service_messages):
+            token = f"lt-{uuid.uuid4().hex[:12]}"
+            self.deliveries[token] = (time.perf_counter(), journey.hotel_id, False)
+            text = f"[{token}] {self.rng.choice(SERVICE_REQUESTS)}"
+            await self.post('service_message', number, payloads.text_message(number, text))
+
+    async def feedback(self, journey):
+        number = journey.number
+        rating = self.rng.choices((1, 2, 3, 4, 5), (1, 1, 2, 4, 6))[0]
+        await self.post('feedback_rating', number, payloads.button_reply(number, f"rating_{rating}", "⭐" * rating))
+        if rating >= 3:
+            await self.post('feedback_note', number, payloads.button_reply(number, 'skip_note', "Skip"))
+        else:
+            await self.post('feedback_note', number, payloads.button_reply(number, 'add_note', "Add Note"))
+            await self.post('feedback_note', number, payloads.text_message(number, self.rng.choice(FEEDBACK_NOTES)))
+
+    async def play(self, journey):
+        try:
+            await getattr(self, journey.kind)(journey)
+        except Exception as e:
+            logger.error(f"Load test journey {journey.kind} for {journey.number} failed: {e}", exc_info=True)
+
+    # Staff sockets
+
+    def claim_delivery(self, token, hotel_id):
+        """First socket of the right hotel to see a request records its delivery and answers it."""
+        entry = self.deliveries.get(token)
+        if entry is None or entry[2] or entry[1] != hotel_id:
+            return False
+        posted_at = entry[0]
+        self.deliveries[token] = (posted_at, hotel_id, True)
+        self.stats.record('ws_delivery', (time.perf_counter() - posted_at) * 1000)
+        return True
+
+    async def _settle(self):
+        deadline = time.monotonic() + self.settle_timeout
+        while time.monotonic() < deadline:
+            delivered = sum(1 for entry in self.deliveries.values() if entry[2])
+            if delivered == len(self.deliveries) and self.replies_done >= delivered:
+                return
+            await asyncio.sleep(0.05)
+
+    async def run(self):
+        """Play every journey; returns the wall-clock time the journeys took, in seconds."""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='loadtest')
+        loop.set_default_executor(executor)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        application = JWTAuthMiddlewareStack(URLRouter([path('ws/chat/', ChatConsumer.as_asgi())]))
+        sockets = [StaffSocket(self, staff, application) for staff in self.fixture.staff]
+        try:
+            await asyncio.gather(*(socket.connect() for socket in sockets))
+            started = time.perf_counter()
+            await asyncio.gather(*(self.play(journey) for journey in self.fixture.journeys))
+            elapsed = time.perf_counter() - started
+            await self._settle()
+        finally:
+            await asyncio.gather(*(socket.close() for socket in sockets), return_exceptions=True)
+            await whatsapp_async.aclose()
+
+        for entry in self.deliveries.values():
+            if not entry[2]:
+                self.stats.error('ws_delivery')
+        for socket in sockets:
+            for times in socket.pending_replies.values():
+                for _ in times:
+                    self.stats.error('staff_reply')
+        return elapsed
@@ -0,0 +1,211 @@
+"""
+Fixture for a load test run: verified hotels with staff and rooms, and the guests whose
+journeys the run plays. Checked-in and checked-out guests are written up front; check-in
+guests only get a number, the flow creates them.
+
+Hotels, their staff and rooms come from the synthetic data generator
+(chat/benchmarks/synthetic.py), optionally with `history_days` of past stays and
+conversations so the run hits tables of a realistic size. The journeys' own rooms and
+stays are added on top.
+
+Every guest number is `91<tag><6 digits>`, where the 4-digit tag starts with 1-4 and so
+never matches a real Indian mobile number; the synthetic history's guests share the
+prefix. `cleanup` deletes by that prefix.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat.benchmarks import synthetic
+from chat.flows.feedback_flow import FeedbackStep
+from chat.models import Conversation, Message, WebhookAttempt
+from guest.models import Guest, Stay
+from hotel.models import Hotel, Room, RoomCategory
+from user.models import User
+
+JOURNEYS = ('checkin', 'service', 'feedback')
+
+STAFF_DEPARTMENTS = ('Reception', 'Housekeeping', 'Room Service')
+# Departments guests ask for; every one of them has staff on every hotel.
+SERVICE_DEPARTMENTS = STAFF_DEPARTMENTS
+
+FIRST_NAMES = ('Aarav', 'Diya', 'Ishaan', 'Meera', 'Kabir', 'Ananya', 'Rohan', 'Priya', 'Vikram', 'Sara')
+LAST_NAMES = ('Sharma', 'Iyer', 'Khan', 'Patel', 'Nair', 'Reddy', 'Das', 'Menon', 'Gupta', 'Singh')
+
+
+@dataclass
+class Journey:
+    kind: str
+    number: str
+    hotel_id: str
+    department: str = None
+
+
+@dataclass
+class StaffClient:
+    user_id: int
+    hotel_id: str
+    departments: list
+    token: str
+
+
+@dataclass
+class Fixture:
+    tag: str
+    hotel_ids: list = field(default_factory=list)
+    staff: list = field(default_factory=list)
+    journeys: list = field(default_factory=list)
+
+    @property
+    def number_prefix(self):
+        return f"91{self.tag}"
+
+
+def parse_mix(value):
+    """'checkin=1,service=2,feedback=1' -> {'checkin': 1, 'service': 2, 'feedback': 1}"""
+    mix = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in JOURNEYS:
+            raise ValueError(f"Unknown journey '{kind}' (expected one of {', '.join(JOURNEYS)})")
+        mix[kind] = float(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError("The journey mix is empty")
+    return mix
+
+
+def _full_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _create_hotels(tag, hotels, rooms, history_days, seed):
+    options = synthetic.Options(
+        hotels=hotels, rooms=rooms, days=history_days, seed=seed or 0, tag=tag,
+        until=timezone.now().date(),
+    )
+    synthetic.generate(options)
+    by_code = Hotel.objects.in_bulk(
+        [f"synthetic_{tag}_{index}" for index in range(hotels)], field_name='unique_qr_code',
+    )
+    return [by_code[f"synthetic_{tag}_{index}"] for index in range(hotels)]
+
+
+def _pick_staff(hotel, staff_per_hotel):
+    """`staff_per_hotel` of the hotel's staff, taken in turn from each of STAFF_DEPARTMENTS."""
+    by_department = {department: [] for department in STAFF_DEPARTMENTS}
+    for user in User.objects.filter(hotel=hotel).order_by('id'):
+        for department in user.department or ():
+            if department in by_department:
+                by_department[department].append(user)
+    picked = []
+    for n in range(staff_per_hotel):
+        users = by_department[STAFF_DEPARTMENTS[n % len(STAFF_DEPARTMENTS)]]
+        picked.append(users[(n // len(STAFF_DEPARTMENTS)) % len(users)])
+    return picked
+
+
+def seed(hotels, guests_per_hotel, mix, staff_per_hotel=3, seed=None, tag=None, rooms=20, history_days=0):
+    """Write the fixture and return it; journeys come out shuffled with `seed`."""
+    rng = random.Random(seed)
+    tag = tag or str(random.SystemRandom().randrange(1000, 5000))
+    fixture = Fixture(tag=tag)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    serial = 0
+
+    # Written first and in chunks of their own; `cleanup` removes them with the rest.
+    created_hotels = _create_hotels(tag, hotels, rooms, history_days, seed)
+    fixture.hotel_ids.extend(str(hotel.id) for hotel in created_hotels)
+    now = timezone.now()
+
+    with transaction.atomic():
+        for hotel in created_hotels:
+            hotel_id = str(hotel.id)
+            for user in _pick_staff(hotel, staff_per_hotel):
+                fixture.staff.append(StaffClient(
+                    user_id=user.id, hotel_id=hotel_id, departments=user.department,
+                    token=str(AccessToken.for_user(user)),
+                ))
+
+            journeys = []
+            for _ in range(guests_per_hotel):
+                kind = rng.choices(kinds, weights)[0]
+                journey = Journey(kind=kind, number=f"{fixture.number_prefix}{serial:06d}", hotel_id=hotel_id)
+                if kind == 'service':
+                    journey.department = rng.choice(SERVICE_DEPARTMENTS)
+                journeys.append(journey)
+                serial += 1
+
+            seeded = [journey for journey in journeys if journey.kind != 'checkin']
+            guests = Guest.objects.bulk_create([
+                Guest(
+                    whatsapp_number=journey.number,
+                    full_name=_full_name(rng),
+                    status='checked_in' if journey.kind == 'service' else 'checked_out',
+                )
+                for journey in seeded
+            ])
+
+            # Journey rooms sit apart from the synthetic ones, which the history may occupy
+            category = RoomCategory.objects.create(
+                hotel=hotel, name="Load Test", base_price=Decimal('3500.00'), max_occupancy=2,
+            )
+            journey_rooms = Room.objects.bulk_create([
+                Room(hotel=hotel, room_number=f"LT{n + 1:03d}", category=category, floor=0, status='occupied')
+                for n in range(len(seeded))
+            ])
+
+            stays = []
+            for journey, guest, room in zip(seeded, guests, journey_rooms):
+                if journey.kind == 'service':
+                    stays.append(Stay(
+                        hotel=hotel, guest=guest, room=room, status='active',
+                        check_in_date=now - timedelta(days=1), check_out_date=now + timedelta(days=2),
+                        actual_check_in=now - timedelta(days=1),
+                    ))
+                else:
+                    stays.append(Stay(
+                        hotel=hotel, guest=guest, room=room, status='completed',
+                        check_in_date=now - timedelta(days=3), check_out_date=now - timedelta(hours=2),
+                        actual_check_in=now - timedelta(days=3), actual_check_out=now - timedelta(hours=2),
+                    ))
+            Stay.objects.bulk_create(stays)
+
+            # Checked-out guests wait on the rating prompt that checkout sends.
+            feedback_guests = [guest for journey, guest in zip(seeded, guests) if journey.kind == 'feedback']
+            conversations = Conversation.objects.bulk_create([
+                Conversation(
+                    guest=guest, hotel=hotel, department='Reception', conversation_type='feedback',
+                    status='active', last_message_at=now, last_message_preview="How was your stay?",
+                )
+                for guest in feedback_guests
+            ])
+            Message.objects.bulk_create([
+                Message(
+                    conversation=conversation, sender_type='staff', message_type='system',
+                    content=f"How was your stay at {hotel.name}?", is_flow=True, flow_id='feedback',
+                    flow_step=FeedbackStep.RATING, is_flow_step_success=True,
+                )
+                for conversation in conversations
+            ])
+
+            fixture.journeys.extend(journeys)
+
+    rng.shuffle(fixture.journeys)
+    return fixture
+
+
+def cleanup(fixture):
+    """Delete everything the run created: guests by number prefix, then the hotels."""
+    with transaction.atomic():
+        WebhookAttempt.objects.filter(whatsapp_number__startswith=fixture.number_prefix).delete()
+        Guest.objects.filter(whatsapp_number__startswith=fixture.number_prefix).delete()
+        Hotel.objects.filter(id__in=fixture.hotel_ids).delete()
@@ -0,0 +1,156 @@
+"""
+Stand-ins for the external services the pipeline calls: the WhatsApp Graph API and the
+Gemini OCR backend.
+"""
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Smallest byte string that passes for a JPEG; nothing in the pipeline decodes it.
+STUB_JPEG = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00' + b'\x00' * 2048 + b'\xff\xd9'
+
+OCR_TARGETS = (
+    'chat.flows.checkin_flow.detect_and_extract_id_document',
+    'chat.flows.send_id_docs_flow.detect_and_extract_id_document',
+)
+
+
+class _GraphHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        time.sleep(stub.latency)
+        parts = self.path.strip('/').split('/')
+        if parts[0] == 'media-download':
+            stub.count('media_download')
+            self._reply(200, STUB_JPEG, content_type='image/jpeg')
+            return
+        # /<version>/<media id>: media info
+        stub.count('media_info')
+        media_id = parts[-1]
+        self._reply(200, {
+            'id': media_id,
+            'url': f"{stub.root_url}/media-download/{media_id}",
+            'mime_type': 'image/jpeg',
+            'file_size': len(STUB_JPEG),
+            'messaging_product': 'whatsapp',
+        })
+
+    def do_POST(self):
+        stub = self.server.stub
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(stub.latency)
+        if self.path.rstrip('/').endswith('/media'):
+            stub.count('media_upload')
+            self._reply(200, {'id': f"media.stub.{stub.next_id()}"})
+            return
+        stub.count('messages')
+        self._reply(200, {
+            'messaging_product': 'whatsapp',
+            'messages': [{'id': f"wamid.stub.{stub.next_id()}"}],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GraphAPIStub:
+    """
+    Local Graph API: media info, media download, message sends and media uploads, each
+    answered after `latency` seconds. Point WHATSAPP_GRAPH_API_BASE_URL at `base_url`.
+    """
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def count(self, kind):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+
+    def next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    @property
+    def root_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def base_url(self):
+        return f"{self.root_url}/v22.0"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _GraphHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+@contextmanager
+def fake_ocr(latency=0.5, failure_rate=0.0, seed=None):
+    """
+    Replace Gemini ID extraction with a canned result after `latency` seconds. A
+    `failure_rate` share of calls fail, which sends the check-in down its fallback path.
+    """
+    from faker import Faker
+
+    fake = Faker('en_IN')
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def detect_and_extract_id_document(image_path, back_image_path=None):
+        time.sleep(latency)
+        with lock:
+            failed = rng.random() < failure_rate
+            name = fake.name()
+            dob = fake.date_of_birth(minimum_age=18, maximum_age=70)
+            id_number = f"{rng.randrange(10 ** 11, 10 ** 12)}"
+        if failed:
+            return {'success': False, 'detected_type': 'other', 'error': 'Fake OCR failure'}
+        return {
+            'success': True,
+            'detected_type': 'aadhar_id',
+            'confidence': 0.95,
+            'data': {
+                'full_name': name,
+                'date_of_birth': dob.strftime('%d/%m/%Y'),
+                'id_number': id_number,
+                'nationality': 'Indian',
+            },
+        }
+
+    with mock.patch(OCR_TARGETS[0], detect_and_extract_id_document), \
+            mock.patch(OCR_TARGETS[1], detect_and_extract_id_document):
+        yield
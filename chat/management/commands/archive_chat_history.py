@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from chat.archive import archive_conversations, archive_webhook_attempts
+
+
+class Command(BaseCommand):
+    help = 'Move old messages and webhook attempts out of the live chat tables (see chat/archive.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conversation-days',
+            type=int,
+            default=None,
+            help='Archive conversations closed for more than this many days (default: CHAT_ARCHIVE_CONVERSATION_DAYS)'
+        )
+        parser.add_argument(
+            '--webhook-days',
+            type=int,
+            default=None,
+            help='Archive webhook attempts older than this many days (default: CHAT_ARCHIVE_WEBHOOK_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per batch (default: CHAT_ARCHIVE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches of each kind (default: CHAT_ARCHIVE_MAX_BATCHES)'
+        )
+        parser.add_argument(
+            '--skip-webhooks',
+            action='store_true',
+            help='Only archive conversation messages'
+        )
+
+    def handle(self, *args, **options):
+        batching = {'batch_size': options['batch_size'], 'max_batches': options['max_batches']}
+
+        result = archive_conversations(days=options['conversation_days'], **batching)
+        self.stdout.write(
+            f"Archived {result['messages']} messages from {result['conversations']} conversations"
+        )
+
+        if not options['skip_webhooks']:
+            result = archive_webhook_attempts(days=options['webhook_days'], **batching)
+            self.stdout.write(
+                f"Archived {result['webhook_attempts']} webhook attempts into {len(result['segments'])} segments"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Done'))
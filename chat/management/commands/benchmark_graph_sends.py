@@ -0,0 +1,107 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from chat.utils import whatsapp_async
+from chat.utils.whatsapp_utils import build_text_payload
+
+
+class _StubGraphHandler(BaseHTTPRequestHandler):
+    delay = 0.2
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(self.delay)
+        body = json.dumps({"messaging_product": "whatsapp", "messages": [{"id": "wamid.stub"}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent WhatsApp sends from an event loop: the old requests + '
+        'run_in_executor path against the pooled async client, against a local Graph API stub'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200, help='Number of sends per run (default: 200)')
+        parser.add_argument('--latency-ms', type=int, default=200, help='Stub Graph API latency (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Async client concurrency cap (default: 20)')
+
+    def handle(self, *args, **options):
+        _StubGraphHandler.delay = options['latency_ms'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StubGraphHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v22.0"
+
+        try:
+            with override_settings(
+                WHATSAPP_GRAPH_API_BASE_URL=base_url,
+                WHATSAPP_ASYNC_MAX_CONCURRENCY=options['concurrency'],
+                PHONE_NUMBER_ID='bench',
+                WHATSAPP_ACCESS_KEY='bench',
+            ):
+                executor_result = asyncio.run(self._run_executor(base_url, options['messages']))
+                async_result = asyncio.run(self._run_async(options['messages']))
+        finally:
+            server.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['messages']} sends, stub latency {options['latency_ms']}ms"
+        ))
+        for label, (elapsed, latencies) in (
+            ('requests + run_in_executor', executor_result),
+            ('httpx.AsyncClient', async_result),
+        ):
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            self.stdout.write(
+                f"  {label:<28} {elapsed:6.2f}s  {len(latencies) / elapsed:7.1f} msg/s  "
+                f"p50 {statistics.median(latencies) * 1000:6.0f}ms  p95 {p95 * 1000:6.0f}ms"
+            )
+
+    async def _run_executor(self, base_url, count):
+        loop = asyncio.get_running_loop()
+        url = f"{base_url}/bench/messages"
+
+        def send(i):
+            response = requests.post(url, json=build_text_payload(f"91900000{i:04d}", "hello"),
+                                     headers={"Authorization": "Bearer bench"})
+            response.raise_for_status()
+            return response.json()
+
+        async def timed(i):
+            start = time.perf_counter()
+            await loop.run_in_executor(None, send, i)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed(i) for i in range(count)))
+        return time.perf_counter() - start, list(latencies)
+
+    async def _run_async(self, count):
+        async def timed(i):
+            start = time.perf_counter()
+            await whatsapp_async.send_text_message(f"91900000{i:04d}", "hello")
+            return time.perf_counter() - start
+
+        try:
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(timed(i) for i in range(count)))
+            return time.perf_counter() - start, list(latencies)
+        finally:
+            await whatsapp_async.aclose()
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from chat.benchmarks import datasets, suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(suite.__file__), 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark the per-message and per-row utilities (phone normalization, templates, '
+        'billing, invoice GST, ID parsing, WhatsApp payloads) on a Faker dataset, and compare '
+        'with the stored baseline. Database cases run over a synthetic history written inside a '
+        'transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Dataset seed (default: 0)')
+        parser.add_argument('--hotels', type=int, default=2, help='Hotels in the dataset (default: 2)')
+        parser.add_argument('--rooms-per-hotel', type=int, default=2000,
+                            help='Rooms per hotel, each with an active stay in memory; the median '
+                                 'synthetic hotel size for the database cases (default: 2000)')
+        parser.add_argument('--samples', type=int, default=500,
+                            help='Phone numbers, templates and flow results in the dataset (default: 500)')
+        parser.add_argument('--history-days', type=int, default=datasets.HISTORY_DAYS,
+                            help='Days of synthetic history behind the database cases '
+                                 f'(default: {datasets.HISTORY_DAYS})')
+        parser.add_argument('--rounds', type=int, default=11, help='Timed rounds per case (default: 11)')
+        parser.add_argument('--min-time', type=float, default=0.05,
+                            help='Minimum seconds per round; fast cases repeat to fill it (default: 0.05)')
+        parser.add_argument('-k', '--filter', dest='filters', action='append', default=[],
+                            help='Only run cases whose name contains this (repeatable)')
+        parser.add_argument('--skip-db', action='store_true', help='Skip the cases that query the database')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                            help='Baseline JSON file (default: chat/benchmarks/baseline.json)')
+        parser.add_argument('--save', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--compare', action='store_true',
+                            help='Compare with the baseline and fail if a case regressed beyond --threshold')
+        parser.add_argument('--threshold', type=float, default=30.0,
+                            help='Allowed slowdown against the baseline, in percent (default: 30)')
+        parser.add_argument('--json', dest='json_path', help='Also write the run as JSON to this path')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except FileNotFoundError:
+                raise CommandError(f"No baseline at {options['baseline']}: record one with --save")
+            if baseline.get('version') != suite.BASELINE_VERSION:
+                raise CommandError(f"Baseline {options['baseline']} is from another suite version: re-record it")
+
+        dataset_options = {key: options[key] for key in ('seed', 'hotels', 'rooms_per_hotel', 'samples')}
+        recorded = {**dataset_options, 'history_days': options['history_days']}
+        if baseline and baseline.get('dataset') != recorded:
+            self.stdout.write(self.style.WARNING(
+                f"Dataset {recorded} differs from the baseline's {baseline.get('dataset')}"
+            ))
+        dataset = datasets.build(**dataset_options)
+        self.stdout.write(
+            f"Dataset: {len(dataset.hotels)} hotels, {len(dataset.rooms)} rooms and stays, "
+            f"{len(dataset.invoices)} invoices, {len(dataset.phone_numbers)} phone numbers, "
+            f"{len(dataset.id_texts)} ID texts (seed {options['seed']})"
+        )
+
+        # The parser and template helpers log every call; timing console output would swamp the code.
+        logging.disable(logging.INFO)
+        try:
+            with transaction.atomic():
+                stays = None if options['skip_db'] else datasets.write_history(
+                    options['seed'], options['hotels'], options['rooms_per_hotel'], options['history_days'],
+                )
+                if stays is not None:
+                    self.stdout.write(
+                        f"History: {options['history_days']} days, {len(stays)} active stays to resolve"
+                    )
+                selected = [
+                    case for case in suite.cases(dataset, stays)
+                    if not options['filters'] or any(f in case.name for f in options['filters'])
+                ]
+                if not selected:
+                    raise CommandError(f"No case matches {options['filters']}")
+                results = suite.run(
+                    selected, rounds=options['rounds'], min_time=options['min_time'],
+                    on_case=lambda case, result: self.stdout.write(
+                        f"  {case.name:<52}{result['median_us']:>11.2f} us  (±{result['stdev_us']:.2f})"
+                    ),
+                )
+                transaction.set_rollback(True)
+        finally:
+            logging.disable(logging.NOTSET)
+        results['dataset'] = recorded
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+        if options['save']:
+            with open(options['baseline'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+                output.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+
+        if baseline:
+            self._report(suite.compare(results, baseline, options['threshold'] / 100), options['threshold'])
+
+    def _report(self, comparisons, threshold):
+        self.stdout.write(f"  {'case':<52}{'median us':>11}{'baseline us':>13}{'change':>9}  status")
+        for c in comparisons:
+            baseline = f"{c.baseline_us:>13.2f}" if c.baseline_us is not None else f"{'-':>13}"
+            change = f"{c.change * 100:>+8.1f}%" if c.change is not None else f"{'-':>9}"
+            line = f"  {c.name:<52}{c.median_us:>11.2f}{baseline}{change}  {c.status}"
+            self.stdout.write(self.style.ERROR(line) if c.status == 'regressed' else line)
+
+        regressed = [c.name for c in comparisons if c.status == 'regressed']
+        if regressed:
+            raise CommandError(
+                f"{len(regressed)} case(s) regressed more than {threshold:g}% against the baseline: "
+                f"{', '.join(regressed)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"No case regressed more than {threshold:g}%"))
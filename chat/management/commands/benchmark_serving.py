@@ -0,0 +1,150 @@
+import os
+import socket
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lobbybee.serve import build_commands
+from user.models import User
+
+WEBHOOK_PATH = '/api/chat/guest/conversation-type/'
+STATS_PATH = '/api/hotel_stat/'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server on port {port} did not start within {timeout}s")
+
+
+def _webhook_body(number):
+    return {
+        "guest_whatsapp_number": number,
+        "webhook_body": {"entry": [{"changes": [{"value": {"messages": [{
+            "from": number,
+            "id": f"wamid.bench.{uuid.uuid4().hex}",
+            "type": "text",
+            "timestamp": str(int(time.time())),
+            "text": {"body": "hi"},
+        }]}}]}]},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare HTTP throughput of the single daphne process against the split topology '
+        '(gunicorn workers for HTTP, daphne for WebSockets) on the webhook and stats endpoints. '
+        'Webhook requests write guest messages: run against a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='single,split', help='Serving modes to compare (default: single,split)')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint per mode (default: 500)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections (default: 32)')
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn workers in split mode (default: 4)')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker (default: 4)')
+        parser.add_argument('--stats-user', help='Username whose JWT is used for the stats endpoint (skipped if omitted)')
+        parser.add_argument('--guest-number', default='919000000001', help='WhatsApp number the webhook posts come from')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        headers = {}
+        if options['stats_user']:
+            try:
+                user = User.objects.get(username=options['stats_user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['stats_user']}' not found")
+            headers['Authorization'] = f"Bearer {AccessToken.for_user(user)}"
+
+        results = {}
+        for mode in modes:
+            port = _free_port()
+            env = {
+                **os.environ,
+                'HTTP_PORT': str(port),
+                'GUNICORN_BIND': f'127.0.0.1:{port}',
+                'GUNICORN_WORKERS': str(options['workers']),
+                'GUNICORN_THREADS': str(options['threads']),
+                'GUNICORN_ACCESS_LOG': '',
+                'WS_BIND_HOST': '127.0.0.1',
+                'WS_PORT': str(_free_port()),
+            }
+            processes = [
+                subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                for command in build_commands(mode, env)
+            ]
+            try:
+                _wait_for_port(port)
+                base_url = f'http://127.0.0.1:{port}'
+                results[(mode, 'webhook')] = self._load(
+                    options, lambda session: session.post(
+                        base_url + WEBHOOK_PATH, json=_webhook_body(options['guest_number']), timeout=30,
+                    ),
+                )
+                if headers:
+                    results[(mode, 'stats')] = self._load(
+                        options, lambda session: session.get(base_url + STATS_PATH, headers=headers, timeout=30),
+                    )
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    try:
+                        process.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['requests']} requests per endpoint, concurrency {options['concurrency']}, "
+            f"split = {options['workers']} gunicorn workers x {options['threads']} threads"
+        ))
+        for (mode, endpoint), (elapsed, latencies, errors) in results.items():
+            latencies.sort()
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+            self.stdout.write(
+                f"  {mode:<7} {endpoint:<8} {len(latencies) / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:6.0f}ms  p95 {p95 * 1000:6.0f}ms  errors {errors}"
+            )
+
+    def _load(self, options, send):
+        local = threading.local()
+        errors = 0
+        lock = threading.Lock()
+
+        def timed(_):
+            nonlocal errors
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            start = time.perf_counter()
+            try:
+                response = send(local.session)
+                failed = response.status_code >= 500
+            except requests.RequestException:
+                failed = True
+            if failed:
+                with lock:
+                    errors += 1
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = list(pool.map(timed, range(options['requests'])))
+        return time.perf_counter() - start, latencies, errors
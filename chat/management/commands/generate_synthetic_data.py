@@ -0,0 +1,67 @@
+import re
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.benchmarks.synthetic import Options, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-scale synthetic data for performance testing: hotels, staff, room '
+        'categories, rooms and a history of guests, bookings, stays, conversations, messages, '
+        'feedback and reminder logs (see chat/benchmarks/synthetic.py). Deterministic from '
+        '--seed. Run against a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=10, help='Hotels to generate (default: 10)')
+        parser.add_argument('--rooms', type=int, default=60,
+                            help='Median rooms per hotel; sizes vary log-normally around it (default: 60)')
+        parser.add_argument('--days', type=int, default=180, help='Days of history per hotel (default: 180)')
+        parser.add_argument('--occupancy', type=float, default=0.68,
+                            help='Average occupancy before weekend and seasonal swings (default: 0.68)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--tag', help='3-digit tag (100-599) in guest numbers and usernames '
+                                          '(default: derived from the seed)')
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Last day of history, YYYY-MM-DD (default: today). Fix it to reproduce a dataset')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create chunk (default: 5000)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes generating hotels in parallel; needs PostgreSQL (default: 1)')
+
+    def handle(self, *args, **options):
+        tag = options['tag'] or str(100 + options['seed'] % 500)
+        if not re.fullmatch(r'[1-5]\d\d', tag):
+            raise CommandError(f"--tag must be 3 digits from 100 to 599, got '{tag}'")
+        if not 0 < options['occupancy'] <= 1:
+            raise CommandError("--occupancy must be between 0 and 1")
+
+        generator_options = Options(
+            hotels=options['hotels'], rooms=options['rooms'], days=options['days'],
+            occupancy=options['occupancy'], seed=options['seed'], tag=tag, until=options['until'],
+            batch_size=options['batch_size'],
+        )
+        started = time.perf_counter()
+
+        def on_hotel(index, counts):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  hotel {index}: {counts['hotel.Room']} rooms, {counts['guest.Stay']} stays, "
+                f"{counts['chat.Message']} messages, {sum(counts.values())} rows ({elapsed:.0f}s)"
+            )
+
+        counts = generate(generator_options, workers=options['workers'], on_hotel=on_hotel)
+        elapsed = time.perf_counter() - started
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s), "
+            f"history up to {generator_options.until}, tag {tag}"
+        ))
+        for label, count in sorted(counts.items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {label:<24}{count:>12}")
+        self.stdout.write(
+            f"Hotel admins are synth_{tag}_<hotel>_admin (e.g. for benchmark_serving --stats-user "
+            f"synth_{tag}_0_admin); guest numbers start with {generator_options.number_prefix}."
+        )
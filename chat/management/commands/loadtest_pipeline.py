@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from chat.loadtest import seed as fixtures
+from chat.loadtest.runner import LoadTestRun
+from chat.loadtest.stubs import GraphAPIStub, fake_ocr
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the WhatsApp -> flow -> reply pipeline in-process: guest journeys against '
+        'GuestConversationTypeView, staff WebSocket clients, a local Graph API stub and a fake OCR '
+        'backend. Reports latency percentiles, throughput, SQL queries and error rates per stage. '
+        'Writes test hotels and guests: run against a disposable database (see chat/loadtest).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=5, help='Hotels to seed (default: 5)')
+        parser.add_argument('--guests-per-hotel', type=int, default=40, help='Guest journeys per hotel (default: 40)')
+        parser.add_argument('--staff-per-hotel', type=int, default=3,
+                            help='Staff WebSocket clients per hotel, spread over Reception, Housekeeping '
+                                 'and Room Service (default: 3)')
+        parser.add_argument('--rooms', type=int, default=20, help='Synthetic rooms per hotel (default: 20)')
+        parser.add_argument('--history-days', type=int, default=0,
+                            help='Days of synthetic stays and conversations to write before the run (default: 0)')
+        parser.add_argument('--mix', default='checkin=1,service=2,feedback=1',
+                            help='Journey weights (default: checkin=1,service=2,feedback=1)')
+        parser.add_argument('--service-messages', type=int, default=2,
+                            help='Requests each service guest sends after picking a department (default: 2)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent webhook requests (default: 16)')
+        parser.add_argument('--think-ms', type=int, default=0, help='Mean pause between a guest\'s messages (default: 0)')
+        parser.add_argument('--graph-latency-ms', type=int, default=50, help='Graph API stub latency (default: 50)')
+        parser.add_argument('--ocr-latency-ms', type=int, default=500, help='Fake OCR latency (default: 500)')
+        parser.add_argument('--ocr-failure-rate', type=float, default=0.0,
+                            help='Share of OCR calls that fail, exercising the fallback path (default: 0)')
+        parser.add_argument('--channel-layer', choices=['memory', 'configured'], default='memory',
+                            help='In-memory channel layer, or the configured one (e.g. Redis) (default: memory)')
+        parser.add_argument('--settle-timeout', type=float, default=15.0,
+                            help='Seconds to wait for outstanding socket deliveries and replies (default: 15)')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for the journey mix and message choice')
+        parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+        parser.add_argument('--keep-data', action='store_true', help='Leave the seeded hotels and guests in place')
+
+    def handle(self, *args, **options):
+        try:
+            mix = fixtures.parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        fixture = fixtures.seed(
+            hotels=options['hotels'],
+            guests_per_hotel=options['guests_per_hotel'],
+            mix=mix,
+            staff_per_hotel=options['staff_per_hotel'],
+            seed=options['seed'],
+            rooms=options['rooms'],
+            history_days=options['history_days'],
+        )
+        journeys = {kind: sum(1 for j in fixture.journeys if j.kind == kind) for kind in mix}
+        self.stdout.write(
+            f"Seeded {len(fixture.hotel_ids)} hotels, {len(fixture.staff)} staff, "
+            f"journeys {journeys} (numbers {fixture.number_prefix}*)"
+        )
+
+        overrides = {
+            'INSTRUMENTATION_ENABLED': False,
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'PHONE_NUMBER_ID': 'load',
+            'WHATSAPP_ACCESS_KEY': 'load',
+            'WHATSAPP_ASYNC_MAX_CONCURRENCY': max(20, options['concurrency']),
+            # ID documents would otherwise be uploaded to the configured (S3) storage
+            'STORAGES': {**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}},
+        }
+        if options['channel_layer'] == 'memory':
+            overrides['CHANNEL_LAYERS'] = {
+                'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer', 'CONFIG': {'capacity': 10000}},
+            }
+
+        run = LoadTestRun(
+            fixture,
+            concurrency=options['concurrency'],
+            service_messages=options['service_messages'],
+            think_time=options['think_ms'] / 1000,
+            settle_timeout=options['settle_timeout'],
+            seed=options['seed'],
+        )
+        with GraphAPIStub(latency=options['graph_latency_ms'] / 1000) as graph, \
+                fake_ocr(latency=options['ocr_latency_ms'] / 1000,
+                         failure_rate=options['ocr_failure_rate'], seed=options['seed']), \
+                override_settings(WHATSAPP_GRAPH_API_BASE_URL=graph.base_url, **overrides):
+            try:
+                elapsed = asyncio.run(run.run())
+            finally:
+                # Still under the overrides: deleting rooms broadcasts room board diffs
+                if not options['keep_data']:
+                    fixtures.cleanup(fixture)
+
+        stages = run.stats.report(elapsed)
+        requests = sum(s['count'] for name, s in stages.items() if name not in ('ws_delivery', 'staff_reply'))
+        self.stdout.write(self.style.SUCCESS(
+            f"{requests} webhook requests in {elapsed:.2f}s ({requests / elapsed if elapsed else 0:.1f} req/s), "
+            f"concurrency {options['concurrency']}, Graph API calls {graph.calls}"
+        ))
+        self.stdout.write(
+            f"  {'stage':<16}{'count':>7}{'errors':>8}{'err %':>7}{'req/s':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'q/req':>7}"
+        )
+        for name, s in stages.items():
+            self.stdout.write(
+                f"  {name:<16}{s['count']:>7}{s['errors']:>8}{s['error_rate'] * 100:>7.1f}{s['throughput']:>8.1f}"
+                f"{self._ms(s['p50_ms'])}{self._ms(s['p95_ms'])}{self._ms(s['p99_ms'])}"
+                f"{s['queries']:>9}{s['queries_per_request']:>7.1f}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({
+                    'elapsed_s': elapsed,
+                    'requests': requests,
+                    'throughput': requests / elapsed if elapsed else 0.0,
+                    'options': {key: options[key] for key in (
+                        'hotels', 'guests_per_hotel', 'staff_per_hotel', 'mix', 'service_messages',
+                        'concurrency', 'think_ms', 'graph_latency_ms', 'ocr_latency_ms', 'channel_layer', 'seed',
+                    )},
+                    'graph_api_calls': graph.calls,
+                    'stages': stages,
+                }, output, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    @staticmethod
+    def _ms(value):
+        return f"{value:>9.0f}" if value is not None else f"{'-':>9}"
@@ -0,0 +1,204 @@
+"""
+Batched writes of flow and system messages.
+
+`save_messages` stores one or more unsaved Messages of a conversation in a fixed number
+of queries, whatever the count:
+
+- one bulk_create for the messages;
+- one bulk_create for the outgoing WebhookAttempt records that deduplicate staff and
+  system messages (Message.save makes one per message);
+- one UPDATE for the conversation's last-message fields, if a preview is given;
+- one record_guest_inbound call for guest messages, which reopens the service window.
+
+bulk_create skips Message.save, so this module does that work itself. With
+broadcast=True, the messages are sent to the department's staff once the transaction
+commits, so staff never see a message that was rolled back.
+
+Flow helpers call `queue_message`. Inside `message_batch()` the messages are kept per
+conversation and saved together when the block exits. handle_incoming_whatsapp_message
+opens a batch for each inbound message, so a flow step's guest message and bot replies
+share one write. Outside a batch, `queue_message` saves straight away.
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from guest.models import Guest, Stay
+from guest.name_utils import get_first_name_from_full_name
+from guest.services_window import record_guest_inbound
+from .models import Conversation, Message, WebhookAttempt
+
+logger = logging.getLogger(__name__)
+
+_batch = contextvars.ContextVar('message_batch', default=None)
+
+
+def _prepare(message, conversation):
+    message.conversation = conversation
+    # What Message.save does for media before the insert
+    if message.media_file:
+        message.media_url = message.media_file.url
+        if not message.media_filename:
+            message.media_filename = message.media_file.name.split('/')[-1]
+
+
+def _guest_whatsapp_number(conversation):
+    if conversation.guest_id is None:
+        return None
+    if Conversation.guest.is_cached(conversation):
+        return conversation.guest.whatsapp_number
+    return Guest.objects.filter(pk=conversation.guest_id).values_list('whatsapp_number', flat=True).first()
+
+
+def _create_outgoing_attempts(conversation, messages):
+    staff_messages = [message for message in messages if message.sender_type == 'staff']
+    if not staff_messages:
+        return
+    whatsapp_number = _guest_whatsapp_number(conversation)
+    if not whatsapp_number:
+        return
+    # Same records as create_outgoing_webhook_attempt, in one insert.
+    now = int(time.time())
+    attempts = [
+        WebhookAttempt(
+            webhook_type='outgoing',
+            whatsapp_message_id=f"outgoing_{now}_{message.id}",
+            whatsapp_number=whatsapp_number,
+            status='success',
+            request_data={'message_content': message.content},
+            message_id=message.id,
+            conversation_id=conversation.id,
+        )
+        for message in staff_messages
+    ]
+    try:
+        with transaction.atomic():
+            WebhookAttempt.objects.bulk_create(attempts)
+    except Exception as e:
+        # Don't fail the messages if deduplication tracking fails
+        logger.warning(f"Failed to track outgoing messages for deduplication: {e}")
+
+
+def message_payload(message, conversation, room_number=None):
+    """The `chat_message` WebSocket payload staff clients receive for a new message."""
+    guest = conversation.guest
+    if message.sender_type == 'guest':
+        sender_name = get_first_name_from_full_name(guest.full_name)
+    elif message.sender_id:
+        sender_name = message.sender.get_full_name() or message.sender.username
+    else:
+        sender_name = 'System'
+    return {
+        'id': message.id,
+        'conversation_id': conversation.id,
+        'sender_type': message.sender_type,
+        'sender_name': sender_name,
+        'sender_id': message.sender_id,
+        'message_type': message.message_type,
+        'content': message.content,
+        'media_url': message.get_media_url,
+        'media_filename': message.media_filename,
+        'is_read': message.is_read,
+        'created_at': message.created_at.isoformat(),
+        'updated_at': message.updated_at.isoformat(),
+        'guest_info': {
+            'id': guest.id,
+            'name': get_first_name_from_full_name(guest.full_name),
+            'whatsapp_number': guest.whatsapp_number,
+            'room_number': room_number,
+        },
+    }
+
+
+def _broadcast(conversation, messages):
+    from .consumers import normalize_department_name
+
+    try:
+        if conversation.guest_id is None:
+            return
+        active_stay = Stay.objects.filter(
+            guest_id=conversation.guest_id, status='active'
+        ).select_related('room').first()
+        room_number = active_stay.room.room_number if active_stay and active_stay.room else None
+        channel_layer = get_channel_layer()
+        department_group_name = f"department_{normalize_department_name(conversation.department)}"
+        for message in messages:
+            async_to_sync(channel_layer.group_send)(
+                department_group_name,
+                {
+                    'type': 'chat_message',
+                    'message': message_payload(message, conversation, room_number),
+                }
+            )
+    except Exception as e:
+        logger.error(f"Failed to broadcast messages of conversation {conversation.id}: {e}", exc_info=True)
+
+
+def save_messages(conversation, messages, preview=None, broadcast=False):
+    """
+    Insert unsaved `messages` into `conversation` and return them with ids set.
+    `preview` becomes the conversation's last-message preview (None leaves it alone).
+    """
+    messages = list(messages)
+    if not messages:
+        return messages
+    for message in messages:
+        _prepare(message, conversation)
+
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        _create_outgoing_attempts(conversation, messages)
+        if preview is not None:
+            conversation.last_message_at = messages[-1].created_at
+            conversation.last_message_preview = preview[:255]
+            Conversation.objects.filter(pk=conversation.pk).update(
+                last_message_at=conversation.last_message_at,
+                last_message_preview=conversation.last_message_preview,
+            )
+
+    guest_messages = [message for message in messages if message.sender_type == 'guest']
+    if guest_messages and conversation.guest_id:
+        # Inbound guest messages (re)open the guest's 24h WhatsApp service window
+        record_guest_inbound(conversation.guest_id, guest_messages[-1].created_at)
+
+    if broadcast:
+        transaction.on_commit(lambda: _broadcast(conversation, messages))
+    return messages
+
+
+@contextmanager
+def message_batch():
+    """
+    Hold messages passed to `queue_message` and save them per conversation when the
+    block exits. Nested batches join the outermost one.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    pending = {}
+    token = _batch.set(pending)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        for conversation, messages, preview in pending.values():
+            try:
+                save_messages(conversation, messages, preview=preview)
+            except Exception:
+                logger.exception("Failed to save messages of conversation %s", conversation.id)
+
+
+def queue_message(conversation, message, preview=None):
+    """Save `message` with the open message_batch, or now when there is none."""
+    pending = _batch.get()
+    if pending is None:
+        save_messages(conversation, [message], preview=preview)
+        return
+    _, messages, current_preview = pending.setdefault(conversation.pk, (conversation, [], None))
+    messages.append(message)
+    pending[conversation.pk] = (conversation, messages, preview if preview is not None else current_preview)
@@ -0,0 +1,69 @@
+# Generated manually
+
+import django.db.models.deletion
+import django.utils.timezone
+import lobbybee.utils.file_url
+from django.conf import settings
+from django.db import migrations, models
+
+
+def partition_archive_table(apps, schema_editor):
+    """On PostgreSQL, recreate the (still empty) archive table range-partitioned by created_at."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE chat_archivedmessage RENAME TO chat_archivedmessage_unpartitioned'
+    )
+    schema_editor.execute(
+        'CREATE TABLE chat_archivedmessage (LIKE chat_archivedmessage_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    schema_editor.execute('DROP TABLE chat_archivedmessage_unpartitioned')
+    # A partitioned table's primary key must include the partition key.
+    schema_editor.execute('ALTER TABLE chat_archivedmessage ADD PRIMARY KEY (id, created_at)')
+    schema_editor.execute(
+        'CREATE INDEX chat_archmsg_conv_created_idx ON chat_archivedmessage (conversation_id, created_at)'
+    )
+    # Monthly partitions are added by chat.archive.ensure_partitions; anything else lands here.
+    schema_editor.execute(
+        'CREATE TABLE chat_archivedmessage_default PARTITION OF chat_archivedmessage DEFAULT'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0021_conversation_created_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('sender_type', models.CharField(choices=[('guest', 'Guest'), ('staff', 'Staff')], max_length=10)),
+                ('message_type', models.CharField(choices=[('text', 'Text'), ('image', 'Image'), ('document', 'Document'), ('video', 'Video'), ('audio', 'Audio'), ('system', 'System')], default='text', max_length=20)),
+                ('content', models.TextField()),
+                ('media_file', models.FileField(blank=True, null=True, upload_to=lobbybee.utils.file_url.upload_to_chat_media)),
+                ('media_filename', models.CharField(blank=True, max_length=255, null=True)),
+                ('media_url', models.URLField(blank=True, null=True)),
+                ('is_read', models.BooleanField(default=False)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('is_flow', models.BooleanField(default=False)),
+                ('flow_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('flow_step', models.IntegerField(blank=True, null=True)),
+                ('is_flow_step_success', models.BooleanField(blank=True, null=True)),
+                ('whatsapp_message_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conversation', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='chat.conversation')),
+                ('sender', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['conversation', 'created_at'], name='chat_archmsg_conv_created_idx')],
+            },
+        ),
+        migrations.RunPython(partition_archive_table, migrations.RunPython.noop),
+    ]
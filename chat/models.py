@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from user.models import User
 from guest.models import Guest
+from guest.services_window import record_guest_inbound
 from hotel.models import Hotel
 from lobbybee.utils.file_url import upload_to_chat_media, upload_to_template_media, upload_to_custom_template_media
 from guest.name_utils import get_first_name_from_full_name
@@ -74,6 +75,7 @@ class Conversation(models.Model):
             models.Index(fields=['hotel', 'department', 'status']),
             models.Index(fields=['hotel', 'conversation_type', 'status']),
             models.Index(fields=['last_message_at']),
+            models.Index(fields=['created_at', 'id'], name='chat_conv_created_id_idx'),
         ]
 
     def __str__(self):
@@ -209,6 +211,10 @@ class Message(models.Model):
 
         super().save(*args, **kwargs)
 
+        # Inbound guest messages (re)open the guest's 24h WhatsApp service window
+        if is_new and self.sender_type == 'guest' and self.conversation.guest_id:
+            record_guest_inbound(self.conversation.guest_id, self.created_at)
+
         # Track outgoing messages for deduplication
         if is_new and self.sender_type == 'staff':
             from .utils.webhook_deduplication import create_outgoing_webhook_attempt
@@ -281,6 +287,75 @@ class WebhookAttempt(models.Model):
         return f"{self.get_webhook_type_display()} - {self.whatsapp_message_id[:20]}... - {self.status}"
 
 
+class ArchivedMessage(models.Model):
+    """
+    A Message moved out of the live table by chat/archive.py after its conversation had
+    been closed for CHAT_ARCHIVE_CONVERSATION_DAYS. Keeps the original id and columns;
+    on PostgreSQL the table is range-partitioned by month of created_at.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name='archived_messages',
+        db_constraint=False, db_index=False,
+    )
+    sender_type = models.CharField(max_length=10, choices=Message.SENDER_CHOICES)
+    sender = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        db_constraint=False, db_index=False,
+    )
+
+    message_type = models.CharField(max_length=20, choices=Message.MESSAGE_TYPE_CHOICES, default='text')
+    content = models.TextField()
+
+    media_file = models.FileField(upload_to=upload_to_chat_media, blank=True, null=True)
+    media_filename = models.CharField(max_length=255, blank=True, null=True)
+    media_url = models.URLField(blank=True, null=True)
+
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    is_flow = models.BooleanField(default=False)
+    flow_id = models.CharField(max_length=50, blank=True, null=True)
+    flow_step = models.IntegerField(blank=True, null=True)
+    is_flow_step_success = models.BooleanField(null=True, blank=True)
+
+    whatsapp_message_id = models.CharField(max_length=100, blank=True, null=True)
+
+    # Original timestamps, copied over as they were
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # Columns copied between Message and ArchivedMessage
+    COPIED_FIELDS = [
+        'id', 'conversation_id', 'sender_type', 'sender_id', 'message_type', 'content',
+        'media_file', 'media_filename', 'media_url', 'is_read', 'read_at',
+        'is_flow', 'flow_id', 'flow_step', 'is_flow_step_success', 'whatsapp_message_id',
+        'created_at', 'updated_at',
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'created_at'], name='chat_archmsg_conv_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived {self.sender_type}: {self.content[:50]}..."
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(**{name: getattr(message, name) for name in cls.COPIED_FIELDS})
+
+    def to_message(self, conversation=None):
+        """An unsaved Message with this row's values, for the serializers and read APIs."""
+        message = Message(**{name: getattr(self, name) for name in self.COPIED_FIELDS})
+        if conversation is not None:
+            message.conversation = conversation
+        if self.sender_id is not None and 'sender' in self._state.fields_cache:
+            message.sender = self.sender
+        return message
+
+
 class ConversationParticipant(models.Model):
     """
     Track which staff members are participating in conversations
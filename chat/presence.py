@@ -0,0 +1,212 @@
+"""
+Staff presence per hotel and department.
+
+Every ChatConsumer connection refreshes its user's presence record in the shared cache
+(Redis in production) on connect and every PRESENCE_HEARTBEAT_INTERVAL seconds; a
+record is online while any of its connections has not expired. Closing a socket only
+shortens that connection's expiry to PRESENCE_DISCONNECT_GRACE, so a phone that drops
+and reconnects a few seconds later never looks offline.
+
+Changes are not broadcast one by one. Each change schedules a flush of the hotel at
+most once per PRESENCE_BROADCAST_INTERVAL (across processes, via cache.add); the flush
+compares who is online with what was last broadcast and sends one `presence_diff` to
+the hotel's `presence_<hotel_id>` group - or nothing, if the net change is nil.
+
+Query API: online_users, online_departments, is_department_online and
+route_departments (which conversation notifications use to reach Reception when
+nobody in the target department is online).
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from lobbybee.utils.instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENDPOINT = 'presence'
+
+_USER_KEY = 'presence:user:{}:{}'
+_INDEX_KEY = 'presence:index:{}'
+_SNAPSHOT_KEY = 'presence:snapshot:{}'
+_FLUSH_KEY = 'presence:flush:{}'
+
+# Flush tasks scheduled from this process (held so they are not garbage collected).
+_tasks = set()
+
+
+def presence_group_name(hotel_id):
+    return f"presence_{hotel_id}"
+
+
+def _normalize(department):
+    return department.lower().replace(' ', '_') if department else department
+
+
+def _record_timeout():
+    return settings.PRESENCE_TTL + settings.PRESENCE_DISCONNECT_GRACE
+
+
+def _alive(record, now):
+    return record is not None and any(expires > now for expires in record['connections'].values())
+
+
+def touch(hotel_id, user, departments, channel_name):
+    """Mark a connection of `user` alive for another PRESENCE_TTL seconds (connect and heartbeat)."""
+    now = time.time()
+    key = _USER_KEY.format(hotel_id, user.pk)
+    record = cache.get(key)
+    connections = {
+        channel: expires for channel, expires in (record or {}).get('connections', {}).items() if expires > now
+    }
+    connections[channel_name] = now + settings.PRESENCE_TTL
+    cache.set(key, {
+        'user_id': user.pk,
+        'user_name': user.get_full_name() or user.username,
+        'departments': list(departments),
+        'connections': connections,
+    }, timeout=_record_timeout())
+
+    # Re-added on every heartbeat, so an id lost to a concurrent write comes back.
+    index_key = _INDEX_KEY.format(hotel_id)
+    index = cache.get(index_key) or []
+    if str(user.pk) not in index:
+        cache.set(index_key, index + [str(user.pk)], timeout=None)
+
+
+def release(hotel_id, user_id, channel_name):
+    """A connection closed: keep it for PRESENCE_DISCONNECT_GRACE seconds in case it comes back."""
+    key = _USER_KEY.format(hotel_id, user_id)
+    record = cache.get(key)
+    if not record or channel_name not in record['connections']:
+        return
+    record['connections'][channel_name] = min(
+        record['connections'][channel_name], time.time() + settings.PRESENCE_DISCONNECT_GRACE,
+    )
+    cache.set(key, record, timeout=_record_timeout())
+
+
+def online_users(hotel_id):
+    """{user_id: {'user_id', 'user_name', 'departments'}} for everyone online at the hotel."""
+    index = cache.get(_INDEX_KEY.format(hotel_id)) or []
+    if not index:
+        return {}
+    records = cache.get_many([_USER_KEY.format(hotel_id, user_id) for user_id in index])
+    now = time.time()
+    online = {}
+    for record in records.values():
+        if _alive(record, now):
+            online[str(record['user_id'])] = {
+                'user_id': record['user_id'],
+                'user_name': record['user_name'],
+                'departments': record['departments'],
+            }
+    return online
+
+
+def in_department(user, department):
+    """Whether an online_users() entry belongs to `department` (names compared normalized)."""
+    return _normalize(department) in {_normalize(dept) for dept in user['departments']}
+
+
+def department_counts(online):
+    """{normalized department: staff count} for an online_users() result."""
+    counts = {}
+    for user in online.values():
+        for department in {_normalize(department) for department in user['departments']}:
+            counts[department] = counts.get(department, 0) + 1
+    return counts
+
+
+def online_departments(hotel_id):
+    """{normalized department: online staff count}."""
+    return department_counts(online_users(hotel_id))
+
+
+def is_department_online(hotel_id, department):
+    return online_departments(hotel_id).get(_normalize(department), 0) > 0
+
+
+def route_departments(hotel_id, department):
+    """
+    Departments to notify about a conversation for `department`: the department itself,
+    plus PRESENCE_FALLBACK_DEPARTMENT when nobody in it is online and someone there is.
+    """
+    fallback = settings.PRESENCE_FALLBACK_DEPARTMENT
+    if not hotel_id or not department or _normalize(department) == _normalize(fallback):
+        return [department]
+    counts = online_departments(hotel_id)
+    if counts.get(_normalize(department)) or not counts.get(_normalize(fallback)):
+        return [department]
+    return [department, fallback]
+
+
+def _prune_index(hotel_id):
+    index_key = _INDEX_KEY.format(hotel_id)
+    index = cache.get(index_key) or []
+    records = cache.get_many([_USER_KEY.format(hotel_id, user_id) for user_id in index])
+    kept = [user_id for user_id in index if _USER_KEY.format(hotel_id, user_id) in records]
+    if len(kept) != len(index):
+        cache.set(index_key, kept, timeout=None)
+
+
+def compute_diff(hotel_id):
+    """
+    Net presence change since the last broadcast for the hotel, or None. Records the
+    current state as broadcast.
+    """
+    online = online_users(hotel_id)
+    snapshot_key = _SNAPSHOT_KEY.format(hotel_id)
+    previous = cache.get(snapshot_key) or {}
+    came_online = [user for user_id, user in online.items() if previous.get(user_id) != user]
+    went_offline = [previous[user_id]['user_id'] for user_id in previous if user_id not in online]
+    _prune_index(hotel_id)
+    if not came_online and not went_offline:
+        return None
+    cache.set(snapshot_key, online, timeout=None)
+    return {
+        'hotel_id': str(hotel_id),
+        'online': came_online,
+        'offline': went_offline,
+        'departments': department_counts(online),
+    }
+
+
+async def _flush_after(hotel_id, delay, claimed):
+    await asyncio.sleep(delay)
+    try:
+        if claimed:
+            # Changes from here on open the next window instead of waiting for this one.
+            await sync_to_async(cache.delete)(_FLUSH_KEY.format(hotel_id))
+        diff = await sync_to_async(compute_diff)(hotel_id)
+        if diff is None:
+            registry.increment(METRICS_ENDPOINT, 'presence_flush_unchanged')
+            return
+        channel_layer = get_channel_layer()
+        await channel_layer.group_send(presence_group_name(hotel_id), {'type': 'presence_diff', 'data': diff})
+        registry.increment(METRICS_ENDPOINT, 'presence_diff_sent')
+    except Exception as e:
+        logger.warning(f"Presence flush failed for hotel {hotel_id}: {e}")
+
+
+def _spawn(coroutine):
+    task = asyncio.get_running_loop().create_task(coroutine)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def schedule_flush(hotel_id, delay=None):
+    """Flush the hotel's presence once the coalescing window closes, unless a flush is already due."""
+    registry.increment(METRICS_ENDPOINT, 'presence_flush_requested')
+    if delay is not None:
+        _spawn(_flush_after(hotel_id, delay, claimed=False))
+        return
+    interval = settings.PRESENCE_BROADCAST_INTERVAL
+    # The claim outlives the window only if its flush never ran (process died).
+    if await sync_to_async(cache.add)(_FLUSH_KEY.format(hotel_id), 1, timeout=interval * 2):
+        _spawn(_flush_after(hotel_id, interval, claimed=True))
@@ -1,10 +1,28 @@
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
 from rest_framework import serializers
-from .models import Conversation, Message, ConversationParticipant, MessageTemplate, CustomMessageTemplate
+from .archive import latest_archived_message
+from .models import ArchivedMessage, Conversation, Message, ConversationParticipant, MessageTemplate, CustomMessageTemplate
 from .utils.phone_utils import normalize_phone_number
 from guest.serializers import GuestSerializer
+from guest.models import Stay
 from user.serializers import UserSerializer
 
 
+def _active_stay_room(guest_id):
+    """Room number and floor of the guest's active stay (the first by id), or (None, None)."""
+    active_stay = Stay.objects.filter(guest_id=guest_id, status='active').select_related('room').order_by('pk').first()
+    if active_stay and active_stay.room:
+        return active_stay.room.room_number, active_stay.room.floor
+    return None, None
+
+
+def _conversation_room(conversation):
+    """(room_number, floor) from ConversationSerializer.annotate_queryset, or a query when not annotated."""
+    if hasattr(conversation, 'active_room_number'):
+        return conversation.active_room_number, conversation.active_room_floor
+    return _active_stay_room(conversation.guest_id)
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     """Serializer for Conversation model"""
     guest_info = serializers.SerializerMethodField()
@@ -23,47 +41,70 @@ class ConversationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at', 'last_message_at', 'last_message_preview', 'fulfilled_at']
 
+    @staticmethod
+    def annotate_queryset(queryset):
+        """
+        Load everything the serializer reads in a fixed number of queries per page:
+        unread guest messages as a filtered Count, the active stay's room and floor as
+        Subqueries and the latest live and latest archived message (with their senders)
+        as sliced Prefetches.
+        """
+        active_stays = Stay.objects.filter(guest=OuterRef('guest'), status='active').order_by('pk')
+        return queryset.select_related('guest', 'hotel').annotate(
+            unread_guest_count=Count(
+                'messages', filter=Q(messages__sender_type='guest', messages__is_read=False)
+            ),
+            active_room_number=Subquery(active_stays.values('room__room_number')[:1]),
+            active_room_floor=Subquery(active_stays.values('room__floor')[:1]),
+        ).prefetch_related(
+            Prefetch(
+                'messages',
+                queryset=Message.objects.select_related('sender').order_by('-created_at', '-id')[:1],
+                to_attr='latest_messages',
+            ),
+            Prefetch(
+                'archived_messages',
+                queryset=ArchivedMessage.objects.select_related('sender').order_by('-created_at', '-id')[:1],
+                to_attr='latest_archived_messages',
+            ),
+        )
+
     def get_unread_count(self, obj):
         """Get unread message count for current user"""
         request = self.context.get('request')
-        if request and request.user:
-            return obj.messages.filter(
-                sender_type='guest',
-                is_read=False
-            ).count()
-        return 0
+        if not (request and request.user):
+            return 0
+        if hasattr(obj, 'unread_guest_count'):
+            return obj.unread_guest_count
+        return obj.messages.filter(sender_type='guest', is_read=False).count()
 
     def get_guest_info(self, obj):
         """Get guest information including room number and floor"""
-        active_stay = obj.guest.stays.filter(status='active').first()
-        if active_stay:
-            return {
-                'id': obj.guest.id,
-                'full_name': obj.guest.full_name,
-                'email': obj.guest.email,
-                'whatsapp_number': obj.guest.whatsapp_number,
-                'date_of_birth': obj.guest.date_of_birth,
-                'nationality': obj.guest.nationality,
-                'status': obj.guest.status,
-                'room_number': active_stay.room.room_number,
-                'floor': active_stay.room.floor,
-            }
-        else:
-            return {
-                'id': obj.guest.id,
-                'full_name': obj.guest.full_name,
-                'email': obj.guest.email,
-                'whatsapp_number': obj.guest.whatsapp_number,
-                'date_of_birth': obj.guest.date_of_birth,
-                'nationality': obj.guest.nationality,
-                'status': obj.guest.status,
-                'room_number': None,
-                'floor': None,
-            }
+        room_number, floor = _conversation_room(obj)
+        return {
+            'id': obj.guest.id,
+            'full_name': obj.guest.full_name,
+            'email': obj.guest.email,
+            'whatsapp_number': obj.guest.whatsapp_number,
+            'date_of_birth': obj.guest.date_of_birth,
+            'nationality': obj.guest.nationality,
+            'status': obj.guest.status,
+            'room_number': room_number,
+            'floor': floor,
+        }
 
     def get_last_message(self, obj):
         """Get last message details"""
-        last_message = obj.messages.order_by('-created_at').first()
+        if hasattr(obj, 'latest_messages'):
+            last_message = obj.latest_messages[0] if obj.latest_messages else None
+        else:
+            last_message = obj.messages.order_by('-created_at').first()
+        if last_message is None and obj.status == 'archived':
+            if hasattr(obj, 'latest_archived_messages'):
+                rows = obj.latest_archived_messages
+                last_message = rows[0].to_message(obj) if rows else None
+            else:
+                last_message = latest_archived_message(obj)
         if last_message:
             return MessageSerializer(last_message, context=self.context).data
         return None
@@ -92,13 +133,13 @@ class MessageSerializer(serializers.ModelSerializer):
 
     def get_guest_info(self, obj):
         """Get guest information for the message"""
-        active_stay = obj.conversation.guest.stays.filter(status='active').first()
+        room_number, floor = _conversation_room(obj.conversation)
         return {
             'id': obj.conversation.guest.id,
             'name': obj.conversation.guest.full_name,
             'whatsapp_number': obj.conversation.guest.whatsapp_number,
-            'room_number': active_stay.room.room_number if active_stay else None,
-            'floor': active_stay.room.floor if active_stay else None
+            'room_number': room_number,
+            'floor': floor
         }
 
     def get_time_ago(self, obj):
@@ -0,0 +1,24 @@
+from celery import shared_task
+import logging
+
+from .archive import archive_conversations, archive_webhook_attempts
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def archive_chat_history():
+    """
+    Move long-closed conversations' messages and expired webhook attempts out of the
+    live tables (see chat/archive.py). Each run is bounded by CHAT_ARCHIVE_MAX_BATCHES;
+    whatever is left is picked up by the next scheduled run.
+    """
+    conversations = archive_conversations()
+    webhook_attempts = archive_webhook_attempts()
+    return {
+        'status': 'success',
+        'conversations': conversations['conversations'],
+        'messages': conversations['messages'],
+        'webhook_attempts': webhook_attempts['webhook_attempts'],
+        'segments': len(webhook_attempts['segments']),
+    }
@@ -942,4 +942,76 @@ class TypingIndicatorViewTest(APITestCase):
         }
         
         response = self.client.post(self.url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ConversationQueryCountTest(APITestCase):
+    """Conversation list/detail run a fixed number of queries however many rows they return"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Query Hotel")
+        self.room_category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Standard Room", base_price=100.00, max_occupancy=2
+        )
+        self.user = User.objects.create_user(
+            username='querystaff',
+            email='querystaff@example.com',
+            password='testpass123',
+            user_type='department_staff',
+            hotel=self.hotel,
+            department=['Reception']
+        )
+        self.client.force_authenticate(user=self.user)
+        self.conversations = [self._create_conversation(n) for n in range(3)]
+
+    def _create_conversation(self, n):
+        guest = Guest.objects.create(whatsapp_number=f"+1555300{n:04d}", full_name=f"Query Guest {n}")
+        room = Room.objects.create(
+            hotel=self.hotel, room_number=f"3{n:02d}", category=self.room_category, floor=3
+        )
+        Stay.objects.create(
+            hotel=self.hotel, guest=guest, room=room, status='active',
+            check_in_date=timezone.now(), check_out_date=timezone.now() + timedelta(days=2),
+        )
+        conversation = Conversation.objects.create(guest=guest, hotel=self.hotel, department='Reception')
+        Message.objects.create(conversation=conversation, sender_type='guest', content='First')
+        Message.objects.create(conversation=conversation, sender_type='guest', content='Second')
+        Message.objects.create(
+            conversation=conversation, sender_type='staff', sender=self.user, content=f'Reply {n}'
+        )
+        return conversation
+
+    def test_list_query_count_is_constant(self):
+        url = reverse('chat:conversation-list')
+        # page count, conversations (with unread count and room), latest live and archived message prefetches
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 3)
+
+        for n in range(3, 8):
+            self._create_conversation(n)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 8)
+
+        row = next(item for item in response.data['results'] if item['id'] == self.conversations[1].id)
+        self.assertEqual(row['unread_count'], 2)
+        self.assertEqual((row['guest_info']['room_number'], row['guest_info']['floor']), ('301', 3))
+        self.assertEqual(row['last_message']['content'], 'Reply 1')
+        self.assertEqual(row['last_message']['guest_info']['room_number'], '301')
+
+    def test_detail_query_count_does_not_grow_with_messages(self):
+        conversation = self.conversations[0]
+        url = reverse('chat:conversation-detail', args=[conversation.id])
+        self.client.get(url)  # joins the conversation as a participant
+
+        # conversation, latest-message prefetches, participant (in a savepoint), messages
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        for n in range(10):
+            Message.objects.create(conversation=conversation, sender_type='guest', content=f'More {n}')
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+
+        self.assertEqual(response.data['conversation']['unread_count'], 12)
+        self.assertEqual(len(response.data['messages']), 13)
+        self.assertEqual({m['guest_info']['room_number'] for m in response.data['messages']}, {'300'})
@@ -0,0 +1,160 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from chat import archive
+from chat.models import ArchivedMessage, Conversation, Message, WebhookAttempt
+from chat.serializers import ConversationSerializer
+from guest.models import Guest
+from hotel.models import Hotel
+from user.models import User
+
+
+def _age(queryset, days):
+    """Backdate rows; auto_now fields cannot be set through save()."""
+    past = timezone.now() - timedelta(days=days)
+    queryset.update(created_at=past, updated_at=past)
+
+
+@override_settings(CHAT_ARCHIVE_CONVERSATION_DAYS=90, CHAT_ARCHIVE_BATCH_SIZE=2, CHAT_ARCHIVE_MAX_BATCHES=50)
+class ArchiveConversationsTests(TestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Archive Hotel")
+        self.guest = Guest.objects.create(whatsapp_number="+15550001111", full_name="Old Guest")
+        self.old = Conversation.objects.create(guest=self.guest, hotel=self.hotel, status='closed')
+        self.recent = Conversation.objects.create(guest=self.guest, hotel=self.hotel, status='closed')
+        self.active = Conversation.objects.create(
+            guest=self.guest, hotel=self.hotel, status='active', conversation_type='service',
+        )
+        for conversation in (self.old, self.recent, self.active):
+            for n in range(3):
+                Message.objects.create(conversation=conversation, sender_type='guest', content=f"message {n}")
+        _age(Message.objects.filter(conversation__in=[self.old, self.active]), 200)
+        _age(Conversation.objects.filter(pk__in=[self.old.pk, self.active.pk]), 200)
+
+    def test_moves_messages_of_long_closed_conversations_only(self):
+        old_ids = set(self.old.messages.values_list('id', flat=True))
+
+        result = archive.archive_conversations()
+
+        self.assertEqual(result, {'conversations': 1, 'messages': 3})
+        self.assertFalse(self.old.messages.exists())
+        self.assertEqual(set(ArchivedMessage.objects.values_list('id', flat=True)), old_ids)
+        self.assertEqual(self.recent.messages.count(), 3)
+        self.assertEqual(self.active.messages.count(), 3)
+
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.status, 'archived')
+        # The closing time survives, so the conversation keeps its place in time.
+        self.assertLess(self.old.updated_at, timezone.now() - timedelta(days=100))
+
+        self.assertEqual(archive.archive_conversations(), {'conversations': 0, 'messages': 0})
+
+    def test_run_stops_after_max_batches_and_resumes(self):
+        with override_settings(CHAT_ARCHIVE_MAX_BATCHES=1):
+            self.assertEqual(archive.archive_conversations(), {'conversations': 0, 'messages': 2})
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.status, 'closed')
+
+        self.assertEqual(archive.archive_conversations(), {'conversations': 1, 'messages': 1})
+
+    def test_conversation_messages_merges_archive_and_live(self):
+        archive.archive_conversations()
+        self.old.refresh_from_db()
+        Message.objects.create(conversation=self.old, sender_type='staff', content="late reply")
+
+        messages = archive.conversation_messages(self.old)
+
+        self.assertEqual([m.content for m in messages], ["message 0", "message 1", "message 2", "late reply"])
+        self.assertTrue(all(m.conversation_id == self.old.id for m in messages))
+
+
+class ArchivedConversationDetailTests(APITestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Archive Hotel")
+        self.staff = User.objects.create_user(
+            username="archive_rec", email="archive_rec@example.com", password="x",
+            user_type="receptionist", hotel=self.hotel, department=["Reception"],
+        )
+        guest = Guest.objects.create(whatsapp_number="+15550002222", full_name="Archived Guest")
+        self.conversation = Conversation.objects.create(
+            guest=guest, hotel=self.hotel, department='Reception', status='closed',
+        )
+        Message.objects.create(conversation=self.conversation, sender_type='guest', content="need towels")
+        Message.objects.create(
+            conversation=self.conversation, sender_type='staff', sender=self.staff, content="on the way",
+        )
+        _age(Conversation.objects.filter(pk=self.conversation.pk), 200)
+        archive.archive_conversations(days=90)
+        self.client.force_authenticate(self.staff)
+
+    def test_detail_reads_archived_messages(self):
+        response = self.client.get(reverse('chat:conversation-detail', args=[self.conversation.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['conversation']['status'], 'archived')
+        self.assertEqual([m['content'] for m in response.data['messages']], ["need towels", "on the way"])
+        self.assertEqual(response.data['messages'][1]['sender'], self.staff.id)
+        self.assertEqual(response.data['conversation']['last_message']['content'], "on the way")
+
+    def test_archived_last_messages_are_prefetched(self):
+        for n in range(3):
+            conversation = Conversation.objects.create(
+                guest=self.conversation.guest, hotel=self.hotel, department='Reception', status='closed',
+            )
+            Message.objects.create(conversation=conversation, sender_type='guest', content=f"late {n}")
+        _age(Conversation.objects.filter(status='closed'), 200)
+        archive.archive_conversations(days=90)
+
+        queryset = ConversationSerializer.annotate_queryset(Conversation.objects.order_by('id'))
+        with self.assertNumQueries(3):
+            rows = ConversationSerializer(queryset, many=True).data
+
+        self.assertEqual([row['last_message']['content'] for row in rows], ["on the way", "late 0", "late 1", "late 2"])
+        self.assertEqual(rows[0]['last_message']['sender'], self.staff.id)
+
+
+class ArchiveWebhookAttemptsTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        storages_override = override_settings(
+            CHAT_ARCHIVE_STORAGE='archive',
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+                'archive': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': self.location},
+                },
+            },
+        )
+        storages_override.enable()
+        self.addCleanup(storages_override.disable)
+
+        for n in range(3):
+            WebhookAttempt.objects.create(
+                webhook_type='guest', whatsapp_message_id=f"wamid.old{n}", whatsapp_number="+15550003333",
+                status='success', request_data={'entry': [{'n': n}]},
+            )
+        _age(WebhookAttempt.objects.all(), 60)
+        self.recent = WebhookAttempt.objects.create(
+            webhook_type='guest', whatsapp_message_id="wamid.new", whatsapp_number="+15550003333",
+        )
+
+    def test_old_attempts_move_to_jsonl_segments(self):
+        result = archive.archive_webhook_attempts(days=30, batch_size=2)
+
+        self.assertEqual(result['webhook_attempts'], 3)
+        self.assertEqual(len(result['segments']), 2)
+        self.assertEqual(list(WebhookAttempt.objects.values_list('id', flat=True)), [self.recent.id])
+
+        rows = [row for name in result['segments'] for row in archive.read_segment(name)]
+        self.assertEqual([row['whatsapp_message_id'] for row in rows], ["wamid.old0", "wamid.old1", "wamid.old2"])
+        self.assertEqual(rows[2]['request_data'], {'entry': [{'n': 2}]})
+        self.assertTrue(result['segments'][0].startswith('webhook_attempts/'))
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from chat.benchmarks import datasets, suite
+from guest.models import Guest
+from hotel.models import Hotel
+
+
+class DatasetTests(SimpleTestCase):
+    def test_same_seed_same_data(self):
+        first = datasets.build(seed=3, hotels=1, rooms_per_hotel=50, samples=20)
+        second = datasets.build(seed=3, hotels=1, rooms_per_hotel=50, samples=20)
+        other = datasets.build(seed=4, hotels=1, rooms_per_hotel=50, samples=20)
+
+        self.assertEqual(first.phone_numbers, second.phone_numbers)
+        self.assertEqual(first.id_texts, second.id_texts)
+        self.assertEqual([g.full_name for g in first.guests], [g.full_name for g in second.guests])
+        self.assertEqual(first.invoices, second.invoices)
+        self.assertNotEqual(first.phone_numbers, other.phone_numbers)
+
+    def test_every_room_is_stayed_in_and_invoiced(self):
+        dataset = datasets.build(seed=1, hotels=2, rooms_per_hotel=30, samples=10)
+
+        self.assertEqual(len(dataset.stays), 60)
+        self.assertEqual(sum(len(lines) for lines, _ in dataset.invoices), 60)
+        self.assertEqual(len({g.whatsapp_number for g in dataset.guests}), 60)
+        self.assertTrue(all(stay.room.category.hotel is stay.hotel for stay in dataset.stays))
+
+
+class CompareTests(SimpleTestCase):
+    def test_flags_changes_beyond_the_threshold(self):
+        baseline = {'cases': {
+            'steady': {'median_us': 10.0, 'relative': 1.0},
+            'slower': {'median_us': 10.0, 'relative': 1.0},
+            'faster': {'median_us': 10.0, 'relative': 1.0},
+        }}
+        results = {'cases': {
+            'steady': {'median_us': 20.0, 'relative': 1.1},
+            'slower': {'median_us': 14.0, 'relative': 1.4},
+            'faster': {'median_us': 5.0, 'relative': 0.5},
+            'added': {'median_us': 1.0, 'relative': 0.1},
+        }}
+
+        statuses = {c.name: c.status for c in suite.compare(results, baseline, threshold=0.25)}
+
+        self.assertEqual(statuses, {'steady': 'ok', 'slower': 'regressed', 'faster': 'faster', 'added': 'new'})
+
+
+class BenchmarkCommandTests(TestCase):
+    def run_command(self, *args):
+        out = StringIO()
+        call_command(
+            'benchmark_hot_paths', '--hotels', '1', '--rooms-per-hotel', '20', '--samples', '10',
+            '--rounds', '2', '--min-time', '0.001', '--baseline', self.baseline, *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def setUp(self):
+        handle, self.baseline = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, self.baseline)
+
+    def test_save_then_compare(self):
+        self.run_command('--save')
+        with open(self.baseline) as f:
+            saved = json.load(f)
+
+        self.assertIn('template._resolve_variables', saved['cases'])
+        self.assertEqual(saved['dataset']['rooms_per_hotel'], 20)
+        # The database cases roll their rows back
+        self.assertFalse(Hotel.objects.exists())
+        self.assertFalse(Guest.objects.exists())
+
+        output = self.run_command('--compare', '--threshold', '1000', '-k', 'phone')
+        self.assertIn('No case regressed', output)
+
+    def test_regression_fails_the_command(self):
+        self.run_command('--save', '--skip-db', '-k', 'invoice')
+        with open(self.baseline) as f:
+            saved = json.load(f)
+        saved['cases']['invoice.compute_totals']['relative'] /= 10
+        with open(self.baseline, 'w') as f:
+            json.dump(saved, f)
+
+        with self.assertRaisesMessage(CommandError, 'invoice.compute_totals'):
+            self.run_command('--compare', '--skip-db', '-k', 'invoice')
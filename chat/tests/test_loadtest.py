@@ -0,0 +1,101 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from chat.loadtest import payloads, seed as fixtures
+from chat.loadtest.runner import Stats, _failed, percentile
+from chat.loadtest.stubs import STUB_JPEG, GraphAPIStub
+from chat.models import Conversation, Message
+from chat.utils.whatsapp_flow_utils import extract_whatsapp_message_data, get_message_type_info
+from chat.utils.whatsapp_utils import download_whatsapp_media
+from guest.models import Guest, Stay
+from hotel.models import Hotel
+
+
+class PayloadTests(SimpleTestCase):
+    def test_payloads_parse_like_meta_webhooks(self):
+        number = "911000000001"
+
+        request = payloads.webhook_request(number, payloads.list_reply(number, "dept_housekeeping", "Housekeeping"))
+        message_data, error = extract_whatsapp_message_data(request['webhook_body'])
+
+        self.assertIsNone(error)
+        self.assertEqual(request['guest_whatsapp_number'], number)
+        self.assertEqual(message_data['from'], number)
+        self.assertTrue(message_data['id'].startswith("wamid."))
+        type_info = get_message_type_info(message_data)
+        self.assertTrue(type_info['is_list_reply'])
+        self.assertEqual(type_info['list_reply_id'], "dept_housekeeping")
+
+        image = payloads.webhook_request(number, payloads.image_message(number, "media-1"))
+        message_data, _ = extract_whatsapp_message_data(image['webhook_body'])
+        self.assertEqual(message_data['media_id'], "media-1")
+
+
+class StatsTests(SimpleTestCase):
+    def test_percentiles_and_error_rates(self):
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+        stats = Stats()
+        for latency in range(1, 11):
+            stats.record('service_message', latency, queries=3, error=latency == 10)
+        stats.error('ws_delivery')
+
+        report = stats.report(elapsed=2.0)
+        self.assertEqual(list(report), ['service_message', 'ws_delivery'])
+        self.assertEqual(report['service_message']['p50_ms'], 5)
+        self.assertEqual(report['service_message']['queries'], 30)
+        self.assertEqual(report['service_message']['error_rate'], 0.1)
+        self.assertEqual(report['service_message']['throughput'], 5.0)
+        self.assertEqual(report['ws_delivery']['error_rate'], 1.0)
+
+    def test_relay_success_is_not_an_error(self):
+        self.assertFalse(_failed(200, {'webhook_error': {'message': 'ok'}, 'webhook_status_code': 201}))
+        self.assertTrue(_failed(200, {'webhook_error': {'error': 'Guest not found'}, 'webhook_status_code': 404}))
+        self.assertTrue(_failed(200, {'webhook_executed': False, 'webhook_error': 'boom'}))
+        self.assertTrue(_failed(400, {'error': 'Invalid webhook data'}))
+
+
+class GraphAPIStubTests(SimpleTestCase):
+    def test_media_download_goes_to_configured_base_url(self):
+        with GraphAPIStub(latency=0) as graph, override_settings(WHATSAPP_GRAPH_API_BASE_URL=graph.base_url):
+            media = download_whatsapp_media("media-42")
+
+        self.assertEqual(media['content'], STUB_JPEG)
+        self.assertEqual(media['message_type'], 'image')
+        self.assertEqual(graph.calls, {'media_info': 1, 'media_download': 1})
+
+
+class SeedTests(TestCase):
+    def test_seed_and_cleanup(self):
+        fixture = fixtures.seed(
+            hotels=2, guests_per_hotel=6, mix={'checkin': 1, 'service': 1, 'feedback': 1},
+            staff_per_hotel=3, seed=7, tag='1234',
+        )
+
+        self.assertEqual(len(fixture.journeys), 12)
+        self.assertEqual(len(fixture.staff), 6)
+        self.assertTrue(all(journey.number.startswith("911234") for journey in fixture.journeys))
+        kinds = {kind: [j for j in fixture.journeys if j.kind == kind] for kind in fixtures.JOURNEYS}
+        self.assertEqual(
+            Stay.objects.filter(status='active', room__isnull=False).count(), len(kinds['service'])
+        )
+        self.assertEqual(
+            Message.objects.filter(
+                conversation__conversation_type='feedback', is_flow=True, flow_step=1,
+            ).count(),
+            len(kinds['feedback']),
+        )
+        # Check-in guests only exist once the flow creates them
+        self.assertFalse(Guest.objects.filter(whatsapp_number__in=[j.number for j in kinds['checkin']]).exists())
+
+        fixtures.cleanup(fixture)
+
+        self.assertFalse(Hotel.objects.exists())
+        self.assertFalse(Guest.objects.exists())
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_parse_mix(self):
+        self.assertEqual(fixtures.parse_mix("checkin=1, service=2.5"), {'checkin': 1.0, 'service': 2.5})
+        with self.assertRaises(ValueError):
+            fixtures.parse_mix("upsell=1")
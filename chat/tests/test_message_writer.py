@@ -0,0 +1,85 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, override_settings
+
+from chat.message_writer import message_batch, queue_message, save_messages
+from chat.models import Conversation, Message, WebhookAttempt
+from guest.models import Guest
+from hotel.models import Hotel
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class MessageWriterTests(TestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Writer Hotel")
+        self.guest = Guest.objects.create(whatsapp_number="+15550004444", full_name="Writer Guest")
+        self.conversation = Conversation.objects.create(
+            guest=self.guest, hotel=self.hotel, department='Reception', conversation_type='checkin',
+        )
+
+    def _flow_messages(self):
+        return [
+            Message(sender_type='guest', content="hi", is_flow=True, flow_id='checkin', flow_step=1),
+            Message(sender_type='staff', message_type='system', content="step one", is_flow=True, flow_id='checkin'),
+            Message(sender_type='staff', message_type='system', content="step two", is_flow=True, flow_id='checkin'),
+        ]
+
+    def test_save_messages_writes_everything_in_one_pass(self):
+        conversation = Conversation.objects.get(pk=self.conversation.pk)  # guest not loaded
+
+        # Messages, guest number, dedup records, conversation, guest inbound - plus savepoints.
+        # Independent of the number of messages.
+        with self.assertNumQueries(9):
+            messages = save_messages(conversation, self._flow_messages(), preview="hi")
+
+        self.assertTrue(all(message.pk for message in messages))
+        self.assertEqual(
+            list(self.conversation.messages.order_by('id').values_list('content', flat=True)),
+            ["hi", "step one", "step two"],
+        )
+        attempts = WebhookAttempt.objects.filter(webhook_type='outgoing', conversation_id=conversation.id)
+        self.assertEqual(
+            sorted(attempts.values_list('message_id', flat=True)), [messages[1].id, messages[2].id]
+        )
+        self.assertEqual(attempts.first().whatsapp_number, self.guest.whatsapp_number)
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_preview, "hi")
+        self.assertEqual(self.conversation.last_message_at, messages[-1].created_at)
+        self.guest.refresh_from_db()
+        self.assertEqual(self.guest.last_inbound_at, messages[0].created_at)
+
+    def test_batch_defers_writes_until_exit(self):
+        with message_batch():
+            queue_message(self.conversation, Message(sender_type='guest', content="1"), preview="1")
+            queue_message(self.conversation, Message(sender_type='staff', message_type='system', content="menu"))
+            self.assertFalse(self.conversation.messages.exists())
+
+        self.assertEqual(self.conversation.messages.count(), 2)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_preview, "1")
+
+    def test_queue_message_without_batch_saves_now(self):
+        queue_message(self.conversation, Message(sender_type='guest', content="now"), preview="now")
+
+        self.assertEqual(self.conversation.messages.get().content, "now")
+
+    @override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+    def test_broadcast_waits_for_commit(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('department_reception', channel_name)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            [message] = save_messages(
+                self.conversation, [Message(sender_type='staff', message_type='system', content="back online")],
+                broadcast=True,
+            )
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        event = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(event['type'], 'chat_message')
+        self.assertEqual(event['message']['id'], message.id)
+        self.assertEqual(event['message']['sender_name'], 'System')
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from chat import presence
+from chat.consumers import ChatConsumer
+from hotel.models import Hotel
+from user.models import User
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(PRESENCE_TTL=60, PRESENCE_DISCONNECT_GRACE=30, PRESENCE_FALLBACK_DEPARTMENT='Reception')
+class PresenceServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Presence Hotel")
+        self.reception = User.objects.create_user(
+            username="presence_rec", email="presence_rec@example.com", password="x",
+            user_type="receptionist", hotel=self.hotel, department=["Reception"],
+        )
+        self.housekeeper = User.objects.create_user(
+            username="presence_hk", email="presence_hk@example.com", password="x",
+            user_type="department_staff", hotel=self.hotel, department=["Housekeeping"],
+        )
+
+    def test_online_sets_and_department_counts(self):
+        presence.touch(self.hotel.id, self.reception, ["Reception"], "chan-1")
+        presence.touch(self.hotel.id, self.reception, ["Reception"], "chan-2")
+        presence.touch(self.hotel.id, self.housekeeper, ["Housekeeping"], "chan-3")
+
+        self.assertEqual(set(presence.online_users(self.hotel.id)), {str(self.reception.id), str(self.housekeeper.id)})
+        self.assertEqual(presence.online_departments(self.hotel.id), {"reception": 1, "housekeeping": 1})
+        self.assertTrue(presence.is_department_online(self.hotel.id, "Housekeeping"))
+
+        with override_settings(PRESENCE_DISCONNECT_GRACE=0):
+            presence.release(self.hotel.id, self.reception.id, "chan-1")
+            # Still online through the second connection
+            self.assertIn(str(self.reception.id), presence.online_users(self.hotel.id))
+            presence.release(self.hotel.id, self.reception.id, "chan-2")
+        self.assertNotIn(str(self.reception.id), presence.online_users(self.hotel.id))
+
+    def test_flaky_reconnect_is_coalesced_away(self):
+        presence.touch(self.hotel.id, self.housekeeper, ["Housekeeping"], "chan-1")
+        diff = presence.compute_diff(self.hotel.id)
+        self.assertEqual([user["user_id"] for user in diff["online"]], [self.housekeeper.id])
+        self.assertEqual(diff["departments"], {"housekeeping": 1})
+
+        # Drops and reconnects within the grace period: nothing to broadcast
+        presence.release(self.hotel.id, self.housekeeper.id, "chan-1")
+        presence.touch(self.hotel.id, self.housekeeper, ["Housekeeping"], "chan-2")
+        self.assertIsNone(presence.compute_diff(self.hotel.id))
+
+        with override_settings(PRESENCE_DISCONNECT_GRACE=0):
+            presence.release(self.hotel.id, self.housekeeper.id, "chan-1")
+            presence.release(self.hotel.id, self.housekeeper.id, "chan-2")
+        diff = presence.compute_diff(self.hotel.id)
+        self.assertEqual(diff["offline"], [self.housekeeper.id])
+        self.assertEqual(diff["online"], [])
+
+    def test_routing_falls_back_to_reception_only_when_department_is_offline(self):
+        self.assertEqual(presence.route_departments(self.hotel.id, "Housekeeping"), ["Housekeeping"])
+
+        presence.touch(self.hotel.id, self.reception, ["Reception"], "chan-1")
+        self.assertEqual(presence.route_departments(self.hotel.id, "Housekeeping"), ["Housekeeping", "Reception"])
+
+        presence.touch(self.hotel.id, self.housekeeper, ["Housekeeping"], "chan-2")
+        self.assertEqual(presence.route_departments(self.hotel.id, "Housekeeping"), ["Housekeeping"])
+
+
+class PresenceViewTests(APITestCase):
+    def test_lists_online_staff_for_callers_hotel(self):
+        cache.clear()
+        hotel = Hotel.objects.create(name="Presence View Hotel")
+        user = User.objects.create_user(
+            username="presence_view", email="presence_view@example.com", password="x",
+            user_type="receptionist", hotel=hotel, department=["Reception"],
+        )
+        presence.touch(hotel.id, user, ["Reception"], "chan-1")
+        self.client.force_authenticate(user=user)
+
+        data = self.client.get("/api/chat/presence/?department=reception").data
+        self.assertEqual([row["user_id"] for row in data["online"]], [user.id])
+        self.assertEqual(data["departments"], {"reception": 1})
+        self.assertEqual(self.client.get("/api/chat/presence/?department=Kitchen").data["online"], [])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, PRESENCE_BROADCAST_INTERVAL=0.05, PRESENCE_HEARTBEAT_INTERVAL=60)
+class PresenceConsumerTests(TestCase):
+    async def test_connect_sends_snapshot_then_one_coalesced_diff(self):
+        await asyncio.to_thread(cache.clear)
+        hotel = await Hotel.objects.acreate(name="Presence Socket Hotel")
+        user = await User.objects.acreate(
+            username="presence_ws", email="presence_ws@example.com",
+            user_type="receptionist", hotel=hotel, department=["Reception"],
+        )
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        snapshot = json.loads(await communicator.receive_from())
+        self.assertEqual(snapshot["type"], "presence_snapshot")
+        self.assertEqual([row["user_id"] for row in snapshot["data"]["online"]], [user.id])
+
+        await communicator.send_to(text_data=json.dumps({"type": "heartbeat"}))
+        diff = json.loads(await communicator.receive_from(timeout=2))
+        self.assertEqual(diff["type"], "presence_diff")
+        self.assertEqual([row["user_id"] for row in diff["data"]["online"]], [user.id])
+        self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+
+        await communicator.disconnect()
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Max
+from django.test import TestCase
+
+from chat.benchmarks import synthetic
+from chat.models import Conversation, Message
+from guest.models import Feedback, Guest, ReminderLog, Stay
+from hotel.models import Hotel
+
+
+class SyntheticDataTests(TestCase):
+    until = date(2026, 1, 10)
+
+    def generate(self, tag):
+        options = synthetic.Options(hotels=2, rooms=8, days=15, seed=5, tag=tag, until=self.until, batch_size=200)
+        return synthetic.generate(options)
+
+    def test_generated_history_is_consistent(self):
+        counts = self.generate('123')
+
+        self.assertEqual(counts['hotel.Hotel'], Hotel.objects.count())
+        self.assertEqual(counts['guest.Stay'], Stay.objects.count())
+        self.assertEqual(counts['chat.Message'], Message.objects.count())
+        self.assertTrue(Feedback.objects.exists())
+        self.assertTrue(ReminderLog.objects.filter(status='sent').exists())
+        self.assertFalse(Guest.objects.exclude(whatsapp_number__startswith='91123').exists())
+
+        # A room never holds two stays at once
+        for room_id in Stay.objects.values_list('room_id', flat=True).distinct():
+            stays = list(Stay.objects.filter(room_id=room_id).order_by('check_in_date'))
+            for previous, stay in zip(stays, stays[1:]):
+                self.assertLessEqual(previous.check_out_date, stay.check_in_date)
+
+        # Timestamps are historical, and auto_now is back on afterwards
+        last_message = Message.objects.aggregate(last=Max('created_at'))['last']
+        self.assertLess(last_message.date(), self.until + timedelta(days=1))
+        self.assertLess(Conversation.objects.order_by('created_at').first().created_at.date(), self.until)
+        self.assertTrue(Message._meta.get_field('created_at').auto_now_add)
+        self.assertFalse(
+            Stay.objects.filter(status='active', check_out_date__date__lt=self.until).exists()
+        )
+
+    def test_same_seed_same_history(self):
+        self.generate('123')
+        self.generate('124')
+
+        def history(tag):
+            return list(
+                Stay.objects.filter(guest__whatsapp_number__startswith=f"91{tag}")
+                .order_by('check_in_date', 'room__room_number')
+                .values_list('room__room_number', 'check_in_date', 'check_out_date', 'status', 'number_of_guests')
+            ), list(
+                Conversation.objects.filter(guest__whatsapp_number__startswith=f"91{tag}")
+                .values('conversation_type', 'department', 'status')
+                .annotate(messages=Count('messages')).order_by('conversation_type', 'department', 'status')
+            )
+
+        self.assertEqual(history('123'), history('124'))
+
+    def test_command_reports_the_admin_and_rejects_bad_tags(self):
+        out = StringIO()
+        call_command(
+            'generate_synthetic_data', '--hotels', '1', '--rooms', '6', '--days', '5',
+            '--until', '2026-01-10', '--tag', '321', stdout=out,
+        )
+        self.assertIn('synth_321_0_admin', out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, '--tag'):
+            call_command('generate_synthetic_data', '--tag', '900', stdout=StringIO())
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from chat.consumers import ChatConsumer
+from chat.models import Conversation
+from chat.typing_indicators import TypingCoalescer
+from guest.models import Guest
+from hotel.models import Hotel
+from lobbybee.utils import instrumentation
+from user.models import User
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(TYPING_EXPIRY_SECONDS=0.2, TYPING_STOP_DEBOUNCE_SECONDS=0.05)
+class TypingCoalescerTests(SimpleTestCase):
+    def setUp(self):
+        instrumentation.registry.reset()
+        self.sent = []
+
+    async def forward(self, conversation_id, is_typing):
+        self.sent.append((conversation_id, is_typing))
+
+    async def test_keystrokes_become_one_start_and_an_expiry_stop(self):
+        coalescer = TypingCoalescer(self.forward)
+        for _ in range(20):
+            await coalescer.update('7', True)
+        self.assertEqual(self.sent, [('7', True)])
+
+        await asyncio.sleep(0.3)
+        self.assertEqual(self.sent, [('7', True), ('7', False)])
+        counters = instrumentation.registry.snapshot()['typing']['counters']
+        self.assertEqual(counters['typing_forwarded'], 2)
+        self.assertEqual(counters['typing_dropped'], 19)
+        self.assertEqual(counters['typing_expired'], 1)
+
+    async def test_stop_start_flapping_sends_nothing_until_a_real_stop(self):
+        coalescer = TypingCoalescer(self.forward)
+        await coalescer.update('7', True)
+        for _ in range(5):
+            await coalescer.update('7', False)
+            await coalescer.update('7', True)
+        await coalescer.update('7', False)
+        self.assertEqual(self.sent, [('7', True)])
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.sent, [('7', True), ('7', False)])
+        self.assertFalse(coalescer.is_typing('7'))
+
+    async def test_close_stops_every_conversation(self):
+        coalescer = TypingCoalescer(self.forward)
+        await coalescer.update('1', True)
+        await coalescer.update('2', True)
+        await coalescer.close()
+        self.assertEqual(sorted(self.sent), [('1', False), ('1', True), ('2', False), ('2', True)])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, TYPING_EXPIRY_SECONDS=5, PRESENCE_HEARTBEAT_INTERVAL=60)
+class TypingConsumerTests(TestCase):
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(json.loads(await communicator.receive_from())["type"], "presence_snapshot")
+        return communicator
+
+    async def _drain(self, communicator):
+        # Presence diffs may arrive at any time; typing is what these tests look at.
+        received = []
+        while not await communicator.receive_nothing(timeout=0.2):
+            received.append(json.loads(await communicator.receive_from()))
+        return [message for message in received if message["type"] == "typing"]
+
+    async def test_typing_reaches_conversation_subscribers_only(self):
+        await asyncio.to_thread(cache.clear)
+        hotel = await Hotel.objects.acreate(name="Typing Hotel")
+        guest = await Guest.objects.acreate(full_name="Typing Guest", whatsapp_number="+15550009999")
+        conversation = await Conversation.objects.acreate(hotel=hotel, guest=guest, department="Reception")
+        users = [
+            await User.objects.acreate(
+                username=f"typing_{n}", email=f"typing_{n}@example.com",
+                user_type="receptionist", hotel=hotel, department=["Reception"],
+            )
+            for n in range(3)
+        ]
+        typist, subscriber, bystander = [await self._connect(user) for user in users]
+        for communicator in (typist, subscriber):
+            await communicator.send_to(text_data=json.dumps({
+                "type": "subscribe_conversation", "conversation_id": conversation.id,
+            }))
+            self.assertEqual(json.loads(await communicator.receive_from())["status"], "subscribed")
+
+        for _ in range(10):
+            await typist.send_to(text_data=json.dumps({
+                "type": "typing", "conversation_id": conversation.id, "is_typing": True,
+            }))
+
+        typing = await self._drain(subscriber)
+        self.assertEqual(len(typing), 1)
+        self.assertEqual(typing[0]["data"]["is_typing"], True)
+        self.assertEqual(typing[0]["data"]["user_id"], users[0].id)
+        self.assertEqual(await self._drain(bystander), [])
+        self.assertEqual(await self._drain(typist), [])
+
+        await typist.disconnect()
+        typing = await self._drain(subscriber)
+        self.assertEqual([message["data"]["is_typing"] for message in typing], [False])
+
+        await subscriber.disconnect()
+        await bystander.disconnect()
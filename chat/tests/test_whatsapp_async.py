@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+
+from chat.utils import whatsapp_async
+
+
+@override_settings(
+    PHONE_NUMBER_ID="12345",
+    WHATSAPP_ACCESS_KEY="token",
+    WHATSAPP_GRAPH_API_BASE_URL="https://graph.example.test/v22.0",
+    WHATSAPP_ASYNC_MAX_CONCURRENCY=2,
+)
+class AsyncWhatsAppClientTests(SimpleTestCase):
+    def _run(self, handler, coro_factory):
+        async def main():
+            whatsapp_async.set_transport(httpx.MockTransport(handler))
+            try:
+                return await coro_factory()
+            finally:
+                await whatsapp_async.aclose()
+        return asyncio.run(main())
+
+    def test_send_text_message_posts_payload(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+        result = self._run(handler, lambda: whatsapp_async.send_text_message("919876543210", "Hello"))
+
+        self.assertEqual(result["messages"][0]["id"], "wamid.1")
+        request = requests_seen[0]
+        self.assertEqual(str(request.url), "https://graph.example.test/v22.0/12345/messages")
+        self.assertEqual(request.headers["Authorization"], "Bearer token")
+        body = json.loads(request.content)
+        self.assertEqual(body["type"], "text")
+        self.assertEqual(body["text"], {"body": "Hello"})
+
+    def test_error_status_raises(self):
+        def handler(request):
+            return httpx.Response(400, json={"error": {"message": "bad"}})
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self._run(handler, lambda: whatsapp_async.send_text_message("919876543210", "Hello"))
+
+    def test_invalid_media_type_rejected_before_sending(self):
+        def handler(request):
+            raise AssertionError("should not send")
+
+        with self.assertRaises(ValueError):
+            self._run(handler, lambda: whatsapp_async.send_media_with_link(
+                "919876543210", "https://cdn.example.com/a.bin", "spreadsheet"
+            ))
+
+    def test_concurrency_is_capped(self):
+        state = {"in_flight": 0, "peak": 0}
+
+        async def handler(request):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            return httpx.Response(200, json={"messages": [{"id": "wamid"}]})
+
+        async def burst():
+            return await asyncio.gather(*(
+                whatsapp_async.send_button_message("91987654321%d" % i, "Continue?", [])
+                for i in range(6)
+            ))
+
+        results = self._run(handler, burst)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(state["peak"], 2)
@@ -0,0 +1,85 @@
+"""
+Typing indicators, coalesced per (user, conversation) at the consumer.
+
+Frontends send `typing` events as often as every keystroke. A connection's
+TypingCoalescer turns them into start/stop transitions: the first is_typing=True
+forwards a start; further ones only push back the server-side expiry
+(TYPING_EXPIRY_SECONDS), after which a stop is forwarded even if the client never
+sends one. An explicit is_typing=False is debounced by TYPING_STOP_DEBOUNCE_SECONDS,
+so a stop immediately followed by a start (keyup / keydown flapping) sends nothing.
+
+Forwarded and dropped events are counted on /api/metrics/
+(lobbybee_typing_forwarded_total, _dropped_total, _expired_total).
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+
+from lobbybee.utils.instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENDPOINT = 'typing'
+
+
+class TypingCoalescer:
+    """
+    Start/stop state per conversation for one connection. `forward` is an async
+    callable (conversation_id, is_typing) that delivers a transition.
+    """
+
+    def __init__(self, forward):
+        self._forward = forward
+        self._typing = set()
+        self._timers = {}
+
+    def is_typing(self, conversation_id):
+        return conversation_id in self._typing
+
+    async def update(self, conversation_id, is_typing):
+        if is_typing:
+            self._schedule_stop(conversation_id, settings.TYPING_EXPIRY_SECONDS, expired=True)
+            if conversation_id in self._typing:
+                registry.increment(METRICS_ENDPOINT, 'typing_dropped')
+                return
+            self._typing.add(conversation_id)
+            await self._send(conversation_id, True)
+            return
+
+        registry.increment(METRICS_ENDPOINT, 'typing_dropped')
+        if conversation_id in self._typing:
+            self._schedule_stop(conversation_id, settings.TYPING_STOP_DEBOUNCE_SECONDS, expired=False)
+
+    async def stop(self, conversation_id):
+        """Forward a stop now if the conversation is in the typing state."""
+        timer = self._timers.pop(conversation_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        if conversation_id in self._typing:
+            self._typing.discard(conversation_id)
+            await self._send(conversation_id, False)
+
+    async def close(self):
+        """Connection closed: stop every conversation still typing."""
+        for conversation_id in list(self._typing | set(self._timers)):
+            await self.stop(conversation_id)
+
+    def _schedule_stop(self, conversation_id, delay, expired):
+        timer = self._timers.pop(conversation_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[conversation_id] = asyncio.ensure_future(self._stop_later(conversation_id, delay, expired))
+
+    async def _stop_later(self, conversation_id, delay, expired):
+        await asyncio.sleep(delay)
+        if expired:
+            registry.increment(METRICS_ENDPOINT, 'typing_expired')
+        await self.stop(conversation_id)
+
+    async def _send(self, conversation_id, is_typing):
+        try:
+            await self._forward(conversation_id, is_typing)
+            registry.increment(METRICS_ENDPOINT, 'typing_forwarded')
+        except Exception as e:
+            logger.warning(f"Typing indicator for conversation {conversation_id} failed: {e}")
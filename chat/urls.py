@@ -10,6 +10,7 @@ from .views import (
     ChatMediaUploadView,
     TemplateMediaUploadView,
     send_typing_indicator,
+    PresenceView,
     MessageTemplateListCreateView,
     MessageTemplateDetailView,
     CustomMessageTemplateListCreateView,
@@ -31,6 +32,9 @@ urlpatterns = [
     path('messages/mark-read/', MarkMessagesReadView.as_view(), name='mark-messages-read'),
     path('messages/typing/', send_typing_indicator, name='send-typing-indicator'),
 
+    # Staff presence
+    path('presence/', PresenceView.as_view(), name='presence'),
+
     # Conversation actions (original views)
     path('conversations/close/', CloseConversationView.as_view(), name='close-conversation'),
 
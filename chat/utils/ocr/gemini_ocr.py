@@ -12,6 +12,8 @@ import google.generativeai as genai
 from PIL import Image
 import io
 
+from lobbybee.utils.instrumentation import track_external
+
 logger = logging.getLogger(__name__)
 
 
@@ -181,13 +183,14 @@ Return the JSON now:"""
             # Call Gemini API
             logger.info(f"GeminiOCRService: Extracting data from document" + 
                        (f" (type: {document_type})" if document_type else " (auto-detecting type)"))
-            response = self.model.generate_content(
-                content,
-                generation_config={
-                    'temperature': 0.1,  # Low temperature for consistent extraction
-                    'max_output_tokens': 2048,
-                }
-            )
+            with track_external('gemini'):
+                response = self.model.generate_content(
+                    content,
+                    generation_config={
+                        'temperature': 0.1,  # Low temperature for consistent extraction
+                        'max_output_tokens': 2048,
+                    }
+                )
 
             # Parse the response
             response_text = response.text.strip()
@@ -393,10 +396,11 @@ def extract_text_from_image(image_path: str) -> str:
         prompt = "Extract all text from this image. Return only the text, preserving line breaks."
 
         # Call Gemini
-        response = gemini_ocr_service.model.generate_content(
-            [prompt, image],
-            generation_config={'temperature': 0.1}
-        )
+        with track_external('gemini'):
+            response = gemini_ocr_service.model.generate_content(
+                [prompt, image],
+                generation_config={'temperature': 0.1}
+            )
 
         return response.text.strip()
 
@@ -468,13 +472,14 @@ Look for:
 Return the JSON now:"""
 
         # Call Gemini
-        response = gemini_ocr_service.model.generate_content(
-            [prompt, image],
-            generation_config={
-                'temperature': 0.1,  # Low temperature for consistent results
-                'max_output_tokens': 500,
-            }
-        )
+        with track_external('gemini'):
+            response = gemini_ocr_service.model.generate_content(
+                [prompt, image],
+                generation_config={
+                    'temperature': 0.1,  # Low temperature for consistent results
+                    'max_output_tokens': 500,
+                }
+            )
 
         # Parse response
         response_text = response.text.strip()
@@ -84,6 +84,7 @@ def _meal_end_time(meal_time) -> str:
 from ..models import MessageTemplate, CustomMessageTemplate
 from guest.models import Guest, Booking
 from hotel.models import Hotel, Room
+from hotel.config_snapshot import get_hotel_config
 from user.models import User
 
 
@@ -591,7 +592,6 @@ def _resolve_variables(
             
             # Get current room information from the guest's active stay
             try:
-                from hotel.models import WiFiCredential
                 active_stay = Stay.objects.filter(guest=guest, status='active').first()
                 room = None
                 if active_stay:
@@ -617,18 +617,11 @@ def _resolve_variables(
                     else:
                         logger.debug(f"No room found for guest {guest.id}")
 
-                # Resolve WiFi credentials for the guest's room.
-                # Mirrors RoomWiFiCredentialSerializer: prefer category-specific
-                # over floor-wide by ordering on room_category__id descending.
-                if room:
-                    from django.db.models import Q
-                    wifi_cred = WiFiCredential.objects.filter(
-                        hotel_id=hotel_id,
-                        floor=room.floor,
-                        is_active=True,
-                    ).filter(
-                        Q(room_category=room.category) | Q(room_category__isnull=True)
-                    ).order_by('-room_category__id').first()
+                # Resolve WiFi credentials for the guest's room (category-specific
+                # over floor-wide), same index as RoomWiFiCredentialSerializer.
+                hotel_config = get_hotel_config(hotel_id) if room and hotel_id else None
+                if hotel_config:
+                    wifi_cred = hotel_config.wifi_for_room(room)
                     if wifi_cred:
                         context['wifi_name'] = wifi_cred.network_name
                         context['wifi_password'] = wifi_cred.password
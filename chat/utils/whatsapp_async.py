@@ -0,0 +1,129 @@
+"""
+Native async WhatsApp Cloud API client for the Channels consumers.
+
+The sync helpers in whatsapp_utils block on `requests`, so the consumers used to push
+every send through `loop.run_in_executor`, tying up a default-executor thread for the
+whole Graph API round trip. This module keeps one pooled `httpx.AsyncClient` per event
+loop and caps in-flight sends with a semaphore, so a burst of staff replies costs
+sockets rather than threads.
+
+Settings:
+    WHATSAPP_GRAPH_API_BASE_URL      (default https://graph.facebook.com/v22.0)
+    WHATSAPP_ASYNC_MAX_CONCURRENCY   max in-flight Graph API requests per loop (default 20)
+    WHATSAPP_ASYNC_TIMEOUT           total request timeout in seconds (default 15)
+    WHATSAPP_ASYNC_CONNECT_TIMEOUT   connect timeout in seconds (default 5)
+"""
+import asyncio
+import logging
+import weakref
+
+import httpx
+from django.conf import settings
+
+from lobbybee.utils.instrumentation import track_external
+
+from .whatsapp_utils import build_button_payload, build_media_link_payload, build_text_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH_API_BASE_URL = "https://graph.facebook.com/v22.0"
+
+# Clients and semaphores are bound to the loop that created them, so keep one per loop.
+_clients = weakref.WeakKeyDictionary()
+
+
+class _LoopClient:
+    __slots__ = ('client', 'semaphore')
+
+    def __init__(self, client, semaphore):
+        self.client = client
+        self.semaphore = semaphore
+
+
+def _build_client(transport=None):
+    max_concurrency = getattr(settings, 'WHATSAPP_ASYNC_MAX_CONCURRENCY', 20)
+    timeout = httpx.Timeout(
+        getattr(settings, 'WHATSAPP_ASYNC_TIMEOUT', 15),
+        connect=getattr(settings, 'WHATSAPP_ASYNC_CONNECT_TIMEOUT', 5),
+    )
+    limits = httpx.Limits(
+        max_connections=max_concurrency,
+        max_keepalive_connections=max_concurrency,
+    )
+    client = httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport)
+    return _LoopClient(client, asyncio.Semaphore(max_concurrency))
+
+
+def _get_loop_client():
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None or entry.client.is_closed:
+        entry = _clients[loop] = _build_client()
+    return entry
+
+
+def set_transport(transport):
+    """Swap the running loop's client for one using `transport` (tests / benchmarks)."""
+    loop = asyncio.get_running_loop()
+    _clients[loop] = _build_client(transport=transport)
+
+
+async def aclose():
+    """Close the running loop's client (worker shutdown, end of a benchmark)."""
+    loop = asyncio.get_running_loop()
+    entry = _clients.pop(loop, None)
+    if entry is not None:
+        await entry.client.aclose()
+
+
+def _messages_url():
+    base_url = getattr(settings, 'WHATSAPP_GRAPH_API_BASE_URL', DEFAULT_GRAPH_API_BASE_URL)
+    return f"{base_url.rstrip('/')}/{settings.PHONE_NUMBER_ID}/messages"
+
+
+async def send_payload(payload: dict):
+    """
+    POST a Messages API payload.
+
+    Returns:
+        The decoded JSON response from WhatsApp API
+
+    Raises:
+        httpx.HTTPError: On timeouts, connection errors and non-2xx responses
+    """
+    entry = _get_loop_client()
+    headers = {
+        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_KEY}",
+        "Content-Type": "application/json",
+    }
+    recipient = payload.get('to')
+    try:
+        async with entry.semaphore:
+            with track_external('graph_api'):
+                response = await entry.client.post(_messages_url(), json=payload, headers=headers)
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Error sending WhatsApp {payload.get('type')} message to {recipient}: {e}")
+        logger.error(f"Response body: {e.response.text}")
+        raise
+    except httpx.HTTPError as e:
+        logger.error(f"Error sending WhatsApp {payload.get('type')} message to {recipient}: {e!r}")
+        raise
+    logger.info(f"WhatsApp {payload.get('type')} message sent to {recipient}")
+    return response.json()
+
+
+async def send_text_message(recipient_number: str, message_text: str):
+    return await send_payload(build_text_payload(recipient_number, message_text))
+
+
+async def send_media_with_link(recipient_number: str, media_url: str, media_type: str,
+                               caption: str = None, filename: str = None):
+    """Raises ValueError for an invalid media type / URL before anything is sent."""
+    return await send_payload(
+        build_media_link_payload(recipient_number, media_url, media_type, caption, filename)
+    )
+
+
+async def send_button_message(recipient_number: str, message_text: str, buttons: list):
+    return await send_payload(build_button_payload(recipient_number, message_text, buttons))
@@ -5,6 +5,7 @@ import mimetypes
 from django.core.files.base import ContentFile
 from urllib.parse import urlparse
 from ..models import Message
+from lobbybee.utils.instrumentation import track_external
 
 
 logger = logging.getLogger(__name__)
@@ -72,7 +73,7 @@ def upload_whatsapp_media(file_field):
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/media"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/media"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -89,7 +90,8 @@ def upload_whatsapp_media(file_field):
             files = {
                 'file': (file_field.name, f.read(), mime_type)
             }
-            response = requests.post(url, headers=headers, data=payload, files=files)
+            with track_external('graph_api'):
+                response = requests.post(url, headers=headers, data=payload, files=files)
             response.raise_for_status()
 
             media_id = response.json().get('id')
@@ -116,11 +118,12 @@ def get_whatsapp_media_info(media_id: str):
         A dictionary containing media info if the ID is valid, otherwise None.
     """
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{media_id}"  # Updated version
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{media_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(url, headers=headers)
+        with track_external('graph_api'):
+            response = requests.get(url, headers=headers)
         # A 404 Not Found error indicates the media ID has expired or is invalid.
         if response.status_code == 404:
             logger.info(f"WhatsApp Media ID {media_id} is expired or invalid.")
@@ -143,7 +146,7 @@ def send_whatsapp_template_message(recipient_number: str, template_name: str, co
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"  # Updated version
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -167,7 +170,8 @@ def send_whatsapp_template_message(recipient_number: str, template_name: str, co
         payload["template"]["components"] = components
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         logger.info(f"WhatsApp message sent to {recipient_number} using template {template_name}")
         return response.json()
@@ -198,12 +202,13 @@ def download_whatsapp_media(media_id: str):
     logger.info(f"download_whatsapp_media: Using phone_number_id: {phone_number_id}")
 
     # Step 1: Get Media URL
-    url = f"https://graph.facebook.com/v22.0/{media_id}"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{media_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
         logger.info(f"download_whatsapp_media: Getting media info from URL: {url}")
-        response = requests.get(url, headers=headers)
+        with track_external('graph_api'):
+            response = requests.get(url, headers=headers)
         logger.info(f"download_whatsapp_media: Media info response status: {response.status_code}")
         response.raise_for_status()
         media_info = response.json()
@@ -227,7 +232,9 @@ def download_whatsapp_media(media_id: str):
             logger.error(f"download_whatsapp_media: Invalid media URL received: {media_url}")
             return None
             
-        download_response = requests.get(media_url, headers=headers, timeout=30)  # Add timeout
+        with track_external('graph_api'):
+            
+            download_response = requests.get(media_url, headers=headers, timeout=30)  # Add timeout
         logger.info(f"download_whatsapp_media: Download response status: {download_response.status_code}, Content-Length: {download_response.headers.get('Content-Length')}")
         download_response.raise_for_status()
         file_content = download_response.content
@@ -305,6 +312,73 @@ def validate_media_url(url: str, media_type: str):
         return False, f"URL validation error: {str(e)}"
 
 
+def build_media_link_payload(recipient_number: str, media_url: str, media_type: str,
+                             caption: str = None, filename: str = None):
+    """
+    Messages API payload for a media message sent by link (shared by the sync and async senders).
+
+    Raises:
+        ValueError: If media_type is invalid or URL validation fails
+    """
+    if media_type not in WHATSAPP_MEDIA_LIMITS:
+        raise ValueError(f"Invalid media type: {media_type}. Must be one of: {list(WHATSAPP_MEDIA_LIMITS.keys())}")
+
+    # Validate URL
+    is_valid, error_msg = validate_media_url(media_url, media_type)
+    if not is_valid:
+        raise ValueError(f"Invalid media URL: {error_msg}")
+
+    # Build media object with link
+    media_object = {"link": media_url}
+
+    # Add optional parameters based on media type
+    if caption and media_type in ['image', 'video', 'document']:
+        media_object["caption"] = caption
+
+    if filename and media_type == 'document':
+        media_object["filename"] = filename
+
+    return {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": recipient_number,
+        "type": media_type,
+        media_type: media_object
+    }
+
+
+def build_text_payload(recipient_number: str, message_text: str):
+    """Messages API payload for a plain text message."""
+    return {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": recipient_number,
+        "type": "text",
+        "text": {
+            "body": message_text
+        }
+    }
+
+
+def build_button_payload(recipient_number: str, message_text: str, buttons: list):
+    """Messages API payload for an interactive reply-button message."""
+    return {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": recipient_number,
+        "type": "interactive",
+        "interactive": {
+            "type": "button",
+            "body": {
+                "text": message_text
+            },
+            "action": {
+                "buttons": buttons
+            }
+        }
+    }
+
+
 def send_whatsapp_media_with_link(recipient_number: str, media_url: str, media_type: str, 
                                  caption: str = None, filename: str = None):
     """
@@ -324,44 +398,20 @@ def send_whatsapp_media_with_link(recipient_number: str, media_url: str, media_t
         ValueError: If media_type is invalid or URL validation fails
         requests.exceptions.RequestException: If API request fails
     """
-    if media_type not in WHATSAPP_MEDIA_LIMITS:
-        raise ValueError(f"Invalid media type: {media_type}. Must be one of: {list(WHATSAPP_MEDIA_LIMITS.keys())}")
-    
-    # Validate URL
-    is_valid, error_msg = validate_media_url(media_url, media_type)
-    if not is_valid:
-        raise ValueError(f"Invalid media URL: {error_msg}")
-    
+    payload = build_media_link_payload(recipient_number, media_url, media_type, caption, filename)
+
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }
 
-    # Build media object with link
-    media_object = {"link": media_url}
-    
-    # Add optional parameters based on media type
-    if caption and media_type in ['image', 'video', 'document']:
-        media_object["caption"] = caption
-    
-    if filename and media_type == 'document':
-        media_object["filename"] = filename
-
-    # Build payload
-    payload = {
-        "messaging_product": "whatsapp",
-        "recipient_type": "individual",
-        "to": recipient_number,
-        "type": media_type,
-        media_type: media_object
-    }
-
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         logger.info(f"WhatsApp media message sent to {recipient_number} using link: {media_url}")
         return response.json()
@@ -494,25 +544,18 @@ def send_whatsapp_text_message(recipient_number: str, message_text: str):
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
     
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }
     
-    payload = {
-        "messaging_product": "whatsapp",
-        "recipient_type": "individual",
-        "to": recipient_number,
-        "type": "text",
-        "text": {
-            "body": message_text
-        }
-    }
-    
+    payload = build_text_payload(recipient_number, message_text)
+
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -532,7 +575,7 @@ def send_whatsapp_payload(payload: dict):
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -540,7 +583,8 @@ def send_whatsapp_payload(payload: dict):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         logger.info("WhatsApp payload sent to %s", payload.get("to", "unknown recipient"))
         return response.json()
@@ -567,7 +611,7 @@ def send_whatsapp_button_message(recipient_number: str, message_text: str, butto
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -575,24 +619,11 @@ def send_whatsapp_button_message(recipient_number: str, message_text: str, butto
     }
 
     # Build interactive message with buttons
-    payload = {
-        "messaging_product": "whatsapp",
-        "recipient_type": "individual",
-        "to": recipient_number,
-        "type": "interactive",
-        "interactive": {
-            "type": "button",
-            "body": {
-                "text": message_text
-            },
-            "action": {
-                "buttons": buttons
-            }
-        }
-    }
+    payload = build_button_payload(recipient_number, message_text, buttons)
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         logger.info(f"WhatsApp button message sent to {recipient_number}")
         return response.json()
@@ -616,7 +647,7 @@ def send_whatsapp_list_message(recipient_number: str, header_text: str, body_tex
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -673,7 +704,8 @@ def send_whatsapp_list_message(recipient_number: str, header_text: str, body_tex
     logger.info(f"===================================")
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         
         # Log response details
         logger.info(f"WhatsApp API Response Status: {response.status_code}")
@@ -714,7 +746,7 @@ def send_whatsapp_message_with_media(recipient_number: str, message_content: str
     """
     phone_number_id = settings.PHONE_NUMBER_ID
     access_token = settings.WHATSAPP_ACCESS_KEY
-    url = f"https://graph.facebook.com/v22.0/{phone_number_id}/messages"
+    url = f"{settings.WHATSAPP_GRAPH_API_BASE_URL}/{phone_number_id}/messages"
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -791,7 +823,8 @@ def send_whatsapp_message_with_media(recipient_number: str, message_content: str
         }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with track_external('graph_api'):
+            response = requests.post(url, json=payload, headers=headers)
         response.raise_for_status()
         logger.info(f"WhatsApp message sent to {recipient_number}")
         return response.json()
@@ -20,6 +20,9 @@ from .media import ChatMediaUploadView, TemplateMediaUploadView
 # Import utility functions
 from .utils import send_typing_indicator
 
+# Import presence lookup
+from .presence import PresenceView
+
 # Import template management views
 from .templates import (
     MessageTemplateListCreateView,
@@ -58,4 +61,7 @@ __all__ = [
     
     # Utility functions
     'send_typing_indicator',
+
+    # Presence
+    'PresenceView',
 ]
\ No newline at end of file
@@ -8,7 +8,6 @@ from .base import (
     status,
     Response,
     logger,
-    User,
     transaction,
     ConversationSerializer,
     MessageSerializer,
@@ -40,10 +39,13 @@ from ..utils.webhook_deduplication import (
     update_webhook_attempt,
 )
 from .webhooks import process_guest_webhook
+from ..archive import conversation_messages
+from ..message_writer import save_messages
 from ..utils.whatsapp_payload_utils import convert_flow_response_to_whatsapp_payload
 from datetime import datetime
 from django.utils import timezone
 from guest.name_utils import get_first_name_from_full_name
+from hotel.config_snapshot import get_hotel_departments
 class ConversationListView(APIView):
     """
     Get conversations for the authenticated user's department
@@ -75,12 +77,11 @@ class ConversationListView(APIView):
         else:
             user_departments = []
             
-        conversations = (
+        conversations = ConversationSerializer.annotate_queryset(
             Conversation.objects.filter(
                 hotel=user.hotel, department__in=user_departments, status="active"
             )
             .exclude(conversation_type__in=['feedback', 'checkin', 'checked_in'])
-            .select_related("guest", "hotel")
             .order_by("-last_message_at")
         )
 
@@ -115,9 +116,9 @@ class ConversationDetailView(APIView):
             )
 
         try:
-            conversation = Conversation.objects.select_related("guest", "hotel").get(
-                id=conversation_id
-            )
+            conversation = ConversationSerializer.annotate_queryset(
+                Conversation.objects.all()
+            ).get(id=conversation_id)
 
             # Validate user can access this conversation
             departments = user.department or []
@@ -139,10 +140,8 @@ class ConversationDetailView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Get messages
-            messages = conversation.messages.select_related("sender").order_by(
-                "created_at"
-            )
+            # Get messages (archived conversations are read back from the archive)
+            messages = conversation_messages(conversation)
 
             # Add user as participant if not already
             with transaction.atomic():
@@ -619,50 +618,7 @@ class GuestConversationTypeView(APIView):
         """
         Resolve departments dynamically from active hotel staff assignments.
         """
-        default_departments = [choice[0] for choice in Conversation.DEPARTMENT_CHOICES]
-        if not hotel:
-            return default_departments
-
-        staff_departments = User.objects.filter(
-            hotel=hotel,
-            is_active_hotel_user=True
-        ).exclude(
-            department__isnull=True
-        ).values_list("department", flat=True)
-
-        resolved_departments = []
-        seen = set()
-
-        for department_value in staff_departments:
-            if isinstance(department_value, str):
-                values_to_check = [department_value]
-            elif isinstance(department_value, list):
-                values_to_check = department_value
-            else:
-                continue
-
-            for raw_department in values_to_check:
-                if not isinstance(raw_department, str):
-                    continue
-
-                raw_department = raw_department.strip()
-                if not raw_department:
-                    continue
-
-                canonical_department = next(
-                    (
-                        dept
-                        for dept in default_departments
-                        if dept.lower() == raw_department.lower()
-                    ),
-                    None,
-                )
-
-                if canonical_department and canonical_department not in seen:
-                    seen.add(canonical_department)
-                    resolved_departments.append(canonical_department)
-
-        return resolved_departments or default_departments
+        return get_hotel_departments(hotel)
 
     def _determine_guest_status(self, guest):
         """
@@ -952,8 +908,7 @@ class GuestConversationTypeView(APIView):
                 conversation.last_message_preview = "Send ID Documents flow started"
                 conversation.save()
                 # Save a marker so the flow handler knows this is a fresh start
-                Message.objects.create(
-                    conversation=conversation,
+                save_messages(conversation, [Message(
                     sender_type='staff',
                     message_type='system',
                     content="__FLOW_INIT__",
@@ -961,7 +916,7 @@ class GuestConversationTypeView(APIView):
                     flow_id='send_id_docs',
                     flow_step=99,
                     is_flow_step_success=True
-                )
+                )])
 
         return {
             **guest_data,
@@ -1135,60 +1090,15 @@ class GuestConversationTypeView(APIView):
                     'message': 'The conversation you are trying to reopen could not be found.'
                 }
 
-            # Create a new message from guest to reactivate conversation
+            # Create a new message from guest to reactivate conversation and
+            # broadcast it to staff via WebSocket once committed
             guest_name = get_first_name_from_full_name(conversation.guest.full_name)
-            guest_message = Message.objects.create(
-                conversation=conversation,
+            content = guest_name + " has reopened the conversation"
+            [guest_message] = save_messages(conversation, [Message(
                 sender_type='guest',
-                content=guest_name + " has reopened the conversation",
+                content=content,
                 message_type='text'
-            )
-
-            # Update conversation's last message timestamp and preview
-            conversation.update_last_message(guest_message.content)
-
-            # Broadcast the "guest reopened conversation" message to staff via WebSocket
-            try:
-                from .base import async_to_sync, get_channel_layer
-                from chat.consumers import normalize_department_name
-                channel_layer = get_channel_layer()
-                department_group_name = f"department_{normalize_department_name(conversation.department)}"
-
-                # Get guest stay info
-                from guest.models import Stay
-                active_stay = Stay.objects.filter(guest=conversation.guest, status='active').first()
-
-                message_data = {
-                    'id': guest_message.id,
-                    'conversation_id': conversation.id,
-                    'sender_type': 'guest',
-                    'sender_name': guest_name,
-                    'sender_id': None,
-                    'message_type': guest_message.message_type,
-                    'content': guest_message.content,
-                    'media_url': guest_message.get_media_url,
-                    'media_filename': guest_message.media_filename,
-                    'is_read': guest_message.is_read,
-                    'created_at': guest_message.created_at.isoformat(),
-                    'updated_at': guest_message.updated_at.isoformat(),
-                    'guest_info': {
-                        'id': conversation.guest.id,
-                        'name': get_first_name_from_full_name(conversation.guest.full_name),
-                        'whatsapp_number': conversation.guest.whatsapp_number,
-                        'room_number': active_stay.room.room_number if active_stay else None
-                    }
-                }
-
-                async_to_sync(channel_layer.group_send)(
-                    department_group_name,
-                    {
-                        'type': 'chat_message',
-                        'message': message_data
-                    }
-                )
-                logger.info(f"Broadcasted guest reopened conversation message to {department_group_name}")
-            except Exception as ws_error:
-                logger.error(f"Failed to broadcast reopened conversation message: {ws_error}", exc_info=True)
+            )], preview=content, broadcast=True)
 
             # Send WhatsApp response
             try:
@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 # Import WhatsApp payload conversion utilities
 from ..utils.whatsapp_payload_utils import create_text_message_payload
 from ..utils.checkin_adapter import adapt_checkin_response_to_whatsapp
+from ..message_writer import message_batch
 
 
 def _get_past_stays_queryset(guest, limit=None):
@@ -35,6 +36,7 @@ def _get_past_stays_queryset(guest, limit=None):
     return stays
 
 
+@message_batch()
 def handle_incoming_whatsapp_message(whatsapp_number, flow_data):
     """
     Main webhook handler for incoming WhatsApp flow messages.
@@ -0,0 +1,34 @@
+"""
+Staff presence lookup (see chat/presence.py).
+"""
+
+from rest_framework.permissions import IsAuthenticated
+from .base import APIView, status, Response
+from .. import presence
+
+
+class PresenceView(APIView):
+    """
+    Who is online at the caller's hotel, and how many per department
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        hotel_id = request.user.hotel_id
+        if not hotel_id:
+            return Response(
+                {'error': 'No hotel associated with this user.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        online = presence.online_users(hotel_id)
+        department = request.query_params.get('department')
+        users = list(online.values())
+        if department:
+            users = [user for user in users if presence.in_department(user, department)]
+
+        return Response({
+            'hotel_id': str(hotel_id),
+            'online': users,
+            'departments': presence.department_counts(online),
+        })
@@ -9,6 +9,7 @@ from .base import (
     Message, Guest, Stay, logger, create_response, ContentFile
 )
 from ..consumers import notify_new_conversation_to_department, normalize_department_name
+from ..message_writer import save_messages
 from ..utils.whatsapp_payload_utils import convert_flow_response_to_whatsapp_payload
 from ..utils.webhook_deduplication import (
     check_and_create_webhook_attempt,
@@ -195,53 +196,16 @@ def process_guest_webhook(request_data, request_headers=None, media_id=None):
 
                     if is_returning_user:
                         logger.info(f"process_guest_webhook: User is returning after {timezone.now() - conversation.last_message_at}")
-                        # Create a service message to notify staff that user is back online
+                        # Create a service message to notify staff that user is back online;
+                        # it reaches department staff once the transaction commits
                         try:
                             guest_display_name = get_first_name_from_full_name(guest.full_name)
-                            return_message = Message.objects.create(
-                                conversation=conversation,
+                            [return_message] = save_messages(conversation, [Message(
                                 sender_type='staff',
                                 content=f"{guest_display_name} is back online",
                                 message_type='system'
-                            )
+                            )], broadcast=True)
                             logger.info(f"process_guest_webhook: Created 'User is back online' service message {return_message.id}")
-
-                            # Broadcast the service message to staff first
-                            try:
-                                channel_layer = get_channel_layer()
-                                department_group_name = f"department_{normalize_department_name(conversation.department)}"
-
-                                service_message_data = {
-                                    'id': return_message.id,
-                                    'conversation_id': conversation.id,
-                                    'sender_type': 'staff',
-                                    'sender_name': 'System',
-                                    'sender_id': None,
-                                    'message_type': return_message.message_type,
-                                    'content': return_message.content,
-                                    'media_url': return_message.get_media_url,
-                                    'media_filename': return_message.media_filename,
-                                    'is_read': return_message.is_read,
-                                    'created_at': return_message.created_at.isoformat(),
-                                    'updated_at': return_message.updated_at.isoformat(),
-                                    'guest_info': {
-                                        'id': guest.id,
-                                        'name': get_first_name_from_full_name(guest.full_name),
-                                        'whatsapp_number': guest.whatsapp_number,
-                                        'room_number': active_stay.room.room_number if active_stay else None
-                                    }
-                                }
-
-                                async_to_sync(channel_layer.group_send)(
-                                    department_group_name,
-                                    {
-                                        'type': 'chat_message',
-                                        'message': service_message_data
-                                    }
-                                )
-                                logger.info(f"process_guest_webhook: Broadcasted 'User is back online' service message")
-                            except Exception as ws_error:
-                                logger.error(f"process_guest_webhook: Failed to broadcast service message: {ws_error}", exc_info=True)
                         except Exception as e:
                             logger.error(f"process_guest_webhook: Failed to create 'User is back online' service message: {e}", exc_info=True)
 
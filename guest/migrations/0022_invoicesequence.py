@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:09
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+INVOICE_NUMBER_RE = re.compile(r'(\d+)$')
+
+
+def seed_invoice_sequences(apps, schema_editor):
+    """Start each hotel's counter after the highest invoice number it has already issued."""
+    Invoice = apps.get_model('guest', 'Invoice')
+    InvoiceSequence = apps.get_model('guest', 'InvoiceSequence')
+
+    last_numbers = {}
+    for hotel_id, invoice_number in Invoice.objects.values_list('hotel_id', 'invoice_number').iterator():
+        match = INVOICE_NUMBER_RE.search(invoice_number or '')
+        n = int(match.group(1)) if match else 0
+        last_numbers[hotel_id] = max(last_numbers.get(hotel_id, 0), n)
+
+    InvoiceSequence.objects.bulk_create([
+        InvoiceSequence(hotel_id=hotel_id, last_number=n)
+        for hotel_id, n in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest', '0021_invoice'),
+        ('hotel', '0032_hotel_logo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('hotel', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_sequence', to='hotel.hotel')),
+            ],
+        ),
+        migrations.RunPython(seed_invoice_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:35
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_inbound_at(apps, schema_editor):
+    Guest = apps.get_model('guest', 'Guest')
+    Message = apps.get_model('chat', 'Message')
+    latest_inbound = Message.objects.filter(
+        conversation__guest=OuterRef('pk'),
+        sender_type='guest',
+    ).order_by('-created_at').values('created_at')[:1]
+    Guest.objects.update(last_inbound_at=Subquery(latest_inbound))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest', '0024_reminderlog_delivery_lease'),
+        ('chat', '0020_update_meal_reminder_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='last_inbound_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_last_inbound_at, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,7 @@ from django.db import transaction
 from django.core.serializers.json import DjangoJSONEncoder
 from user.models import User
 from hotel.models import Hotel, Room
-from lobbybee.utils.file_url import upload_to_guest_documents
+from lobbybee.utils.file_url import upload_to_guest_documents, upload_to_invoice_exports
 from .name_utils import get_first_name_from_full_name
 
 class Booking(models.Model):
@@ -60,6 +60,9 @@ class Guest(models.Model):
     is_whatsapp_active = models.BooleanField(default=True)
     loyalty_points = models.IntegerField(default=0)
     notes = models.TextField(blank=True)
+    # Time of the guest's latest inbound WhatsApp message; opens the 24h customer-service
+    # window. Maintained on write by guest.services_window.record_guest_inbound.
+    last_inbound_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.full_name} ({self.whatsapp_number})"
@@ -168,6 +171,7 @@ class ReminderLog(models.Model):
 
     STATUSES = [
         ('scheduled', 'Scheduled'),
+        ('sending', 'Sending'),
         ('sent', 'Sent'),
         ('skipped', 'Skipped'),
         ('failed', 'Failed'),
@@ -183,6 +187,11 @@ class ReminderLog(models.Model):
     is_test = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
+    # Delivery claim: a worker moves the log to 'sending' until lease_expires_at, sends with
+    # no transaction open, then confirms or fails it. Expired leases are recovered by
+    # guest.tasks.reap_expired_reminder_leases.
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    delivery_attempts = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -228,3 +237,37 @@ class Invoice(models.Model):
 
     def __str__(self):
         return f"{self.invoice_number} ({self.hotel.name})"
+
+
+class InvoiceSequence(models.Model):
+    """Per-hotel invoice counter. One row per hotel, bumped under a row lock on each invoice."""
+    hotel = models.OneToOneField(Hotel, on_delete=models.CASCADE, related_name='invoice_sequence')
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.hotel.name}: {self.last_number}"
+
+
+class InvoiceExportJob(models.Model):
+    """Background render of many invoices into one downloadable ZIP, with progress counters."""
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='invoice_exports')
+    invoice_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to=upload_to_invoice_exports, blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Invoice export {self.id} ({self.status}, {self.processed}/{self.total})"
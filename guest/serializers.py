@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Guest, GuestIdentityDocument, Stay, Booking, Invoice
+from .models import Guest, GuestIdentityDocument, Stay, Booking, Invoice, InvoiceExportJob
 from django.db import transaction
 from hotel.models import Room
 from django.utils import timezone
@@ -413,3 +413,45 @@ class InvoiceUpdateSerializer(serializers.Serializer):
 
 class LockAllInvoicesSerializer(serializers.Serializer):
     date = serializers.DateField()
+
+
+class InvoiceBatchSerializer(serializers.Serializer):
+    """Pick bookings by id list or by check-out date range (one of the two is required)."""
+    booking_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=1000)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    room_rates = serializers.DictField(child=serializers.DecimalField(max_digits=10, decimal_places=2), required=False)
+    gst_rate = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, min_value=0, max_value=100, allow_null=True)
+    regenerate = serializers.BooleanField(required=False, default=False)  # recompute existing unlocked invoices
+    lock = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not attrs.get('booking_ids') and not (attrs.get('date_from') and attrs.get('date_to')):
+            raise serializers.ValidationError("Provide booking_ids or both date_from and date_to.")
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must be on or before date_to.")
+        return attrs
+
+
+class InvoiceExportSerializer(serializers.Serializer):
+    """Pick invoices by id list or by created_at date range (one of the two is required)."""
+    invoice_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('invoice_ids') and not (attrs.get('date_from') and attrs.get('date_to')):
+            raise serializers.ValidationError("Provide invoice_ids or both date_from and date_to.")
+        return attrs
+
+
+class InvoiceExportJobSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InvoiceExportJob
+        fields = ["id", "status", "total", "processed", "file_url", "error", "created_at", "completed_at"]
+        read_only_fields = fields
+
+    def get_file_url(self, obj):
+        return obj.file.url if obj.file else None
@@ -4,15 +4,52 @@ GST is resolved per room line from the hotel's slab table (or a flat override),
 Indian slab depends on the per-night room rate. Discount is split pro-rata across lines pre-tax.
 """
 from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 import math
 
 from django.db import transaction
+from django.db.models import Prefetch
+from django.template import engines
+from django.utils import timezone
 
-from .models import Invoice, Guest
+from hotel.models import default_gst_slabs
+from .models import Guest, Invoice, InvoiceSequence, Stay
 from .serializers import _hotel_local_iso
 
 CENTS = Decimal('0.01')
 
+# Print-ready page for one invoice; browsers "Save as PDF" it without extra server dependencies.
+INVOICE_HTML_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{ invoice.invoice_number }}</title>
+<style>
+body{font-family:Arial,sans-serif;font-size:13px;margin:32px;color:#222}
+table{width:100%;border-collapse:collapse;margin-top:16px}
+th,td{border:1px solid #ccc;padding:6px;text-align:left}
+td.num,th.num{text-align:right}
+</style></head><body>
+{% if ctx.hotel.logo_url %}<img src="{{ ctx.hotel.logo_url }}" alt="" style="max-height:64px">{% endif %}
+<h2>{{ ctx.hotel.name }}</h2>
+<p>{{ ctx.hotel.address }} {{ ctx.hotel.city }} {{ ctx.hotel.state }} {{ ctx.hotel.pincode }}<br>
+{{ ctx.hotel.phone }} {{ ctx.hotel.email }}</p>
+<h3>Invoice {{ invoice.invoice_number }}</h3>
+<p>Date: {{ invoice.created_at|date:"d M Y" }}<br>
+Guest: {{ ctx.guest.full_name }} ({{ ctx.guest.whatsapp_number }})<br>
+Stay: {{ ctx.check_in_date }} to {{ ctx.check_out_date }}</p>
+<table>
+<tr><th>Room</th><th>Type</th><th class="num">Nights</th><th class="num">Rate</th>
+<th class="num">Amount</th><th class="num">GST %</th><th class="num">GST</th></tr>
+{% for line in invoice.line_items %}<tr><td>{{ line.room_number }}</td><td>{{ line.room_type }}</td>
+<td class="num">{{ line.nights }}</td><td class="num">{{ line.rate }}</td><td class="num">{{ line.amount }}</td>
+<td class="num">{{ line.gst_rate }}</td><td class="num">{{ line.gst_amount }}</td></tr>
+{% endfor %}</table>
+<table>
+<tr><td>Subtotal</td><td class="num">{{ invoice.subtotal }}</td></tr>
+<tr><td>Discount</td><td class="num">{{ invoice.discount_amount }}</td></tr>
+<tr><td>GST</td><td class="num">{{ invoice.gst_amount }}</td></tr>
+<tr><th>Total</th><th class="num">{{ invoice.total_amount }}</th></tr>
+</table></body></html>
+"""
+
 
 def _money(value):
     return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
@@ -26,6 +63,32 @@ def _nights(stay):
     return max(1, math.ceil(seconds / 86400))
 
 
+def _invoice_stays(booking):
+    """Stays for a booking, reusing prefetch_invoice_bookings' cache when it is present."""
+    if 'stays' in getattr(booking, '_prefetched_objects_cache', {}):
+        return booking.stays.all()
+    return booking.stays.select_related('room__category', 'guest').all()
+
+
+def prefetch_invoice_bookings(queryset):
+    """Load everything build_invoice_lines/invoice_booking_context touch in a fixed number of queries."""
+    return queryset.select_related('hotel', 'primary_guest').prefetch_related(
+        Prefetch('stays', queryset=Stay.objects.select_related('room__category', 'guest').order_by('id'))
+    )
+
+
+def accompanying_guests_by_id(bookings):
+    """One query for the accompanying guests of many bookings; pass the result to invoice_booking_context."""
+    ids = {gid for b in bookings for gid in (b.accompanying_guest_ids or [])}
+    if not ids:
+        return {}
+    return {
+        g['id']: g for g in Guest.objects.filter(id__in=ids).values(
+            'id', 'full_name', 'whatsapp_number', 'nationality'
+        )
+    }
+
+
 def build_invoice_lines(booking, custom_rates=None):
     """custom_rates maps room CATEGORY id (str) -> nightly rate override. Missing -> base_price.
 
@@ -34,7 +97,7 @@ def build_invoice_lines(booking, custom_rates=None):
     custom_rates = custom_rates or {}
     hotel = booking.hotel
     lines = []
-    for stay in booking.stays.select_related('room__category', 'guest').all():
+    for stay in _invoice_stays(booking):
         if not stay.room:
             continue
         cat = stay.room.category
@@ -60,16 +123,22 @@ def build_invoice_lines(booking, custom_rates=None):
     return lines
 
 
-def invoice_booking_context(booking):
-    """Header data for an invoice: hotel, primary guest, accompanying guests, booking dates."""
+def invoice_booking_context(booking, guests_by_id=None):
+    """Header data for an invoice: hotel, primary guest, accompanying guests, booking dates.
+
+    guests_by_id (from accompanying_guests_by_id) skips the per-booking guest query in batches.
+    """
     hotel = booking.hotel
     primary = booking.primary_guest
     acc_ids = booking.accompanying_guest_ids or []
-    accompanying = list(
-        Guest.objects.filter(id__in=acc_ids).values(
-            'id', 'full_name', 'whatsapp_number', 'nationality'
-        )
-    ) if acc_ids else []
+    if guests_by_id is not None:
+        accompanying = [guests_by_id[gid] for gid in acc_ids if gid in guests_by_id]
+    else:
+        accompanying = list(
+            Guest.objects.filter(id__in=acc_ids).values(
+                'id', 'full_name', 'whatsapp_number', 'nationality'
+            )
+        ) if acc_ids else []
     return {
         'hotel': {
             'id': str(hotel.id), 'name': hotel.name, 'logo_url': hotel.get_logo_url(),
@@ -123,7 +192,94 @@ def compute_totals(lines, discount, slabs, gst_override=None):
     return subtotal, gst_total, total
 
 
+def reserve_invoice_numbers(hotel, count):
+    """Reserve `count` consecutive per-hotel invoice numbers. Call inside an atomic block.
+
+    Locks only the hotel's InvoiceSequence row, so the cost does not grow with invoice history.
+    The bump commits or rolls back with the caller's invoice insert, which keeps numbers gap-free.
+    """
+    seq, _ = InvoiceSequence.objects.select_for_update().get_or_create(hotel=hotel)
+    first = seq.last_number + 1
+    seq.last_number += count
+    seq.save(update_fields=['last_number'])
+    return [f"INV-{n:06d}" for n in range(first, seq.last_number + 1)]
+
+
 def next_invoice_number(hotel):
     """Sequential per-hotel invoice number. Call inside an atomic block."""
-    n = Invoice.objects.select_for_update().filter(hotel=hotel).count() + 1
-    return f"INV-{n:06d}"
+    return reserve_invoice_numbers(hotel, 1)[0]
+
+
+def generate_invoices_batch(hotel, bookings, *, user=None, custom_rates=None, gst_override=None,
+                            regenerate=False, lock=False):
+    """Create (or, with regenerate, recompute unlocked) invoices for many bookings at once.
+
+    `bookings` should come through prefetch_invoice_bookings. New invoices are written with one
+    bulk_create and a single block of reserved numbers; recomputed ones with one bulk_update.
+    Returns {'created': [...], 'updated': [...], 'skipped': [{'booking': id, 'reason': str}]}.
+    """
+    slabs = hotel.gst_slabs or default_gst_slabs()
+    to_create, to_update, skipped = [], [], []
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Locked so a concurrent lock/unlock cannot land between the is_locked check and the write
+        existing = {
+            inv.booking_id: inv
+            for inv in Invoice.objects.select_for_update().filter(
+                hotel=hotel, booking__in=[b.id for b in bookings]
+            )
+        }
+
+        for booking in bookings:
+            invoice = existing.get(booking.id)
+            if invoice is not None and (not regenerate or invoice.is_locked):
+                skipped.append({'booking': booking.id, 'reason': 'locked' if invoice.is_locked else 'exists'})
+                continue
+
+            lines = build_invoice_lines(booking, custom_rates)
+            if not lines:
+                skipped.append({'booking': booking.id, 'reason': 'no_rooms'})
+                continue
+
+            discount = invoice.discount_amount if invoice is not None else Decimal('0')
+            subtotal, gst_total, total = compute_totals(lines, discount, slabs, gst_override)
+            if invoice is None:
+                invoice = Invoice(hotel=hotel, booking=booking, discount_amount=discount, created_by=user)
+                to_create.append(invoice)
+            else:
+                to_update.append(invoice)
+            invoice.line_items = lines
+            invoice.gst_slabs = slabs
+            invoice.subtotal = subtotal
+            invoice.gst_amount = gst_total
+            invoice.total_amount = total
+
+        if lock:
+            for invoice in to_create + to_update:
+                invoice.is_locked = True
+                invoice.locked_at = now
+
+        if to_create:
+            for invoice, number in zip(to_create, reserve_invoice_numbers(hotel, len(to_create))):
+                invoice.invoice_number = number
+            Invoice.objects.bulk_create(to_create)
+        if to_update:
+            for invoice in to_update:
+                invoice.updated_at = now
+            fields = ['line_items', 'gst_slabs', 'subtotal', 'gst_amount', 'total_amount', 'updated_at']
+            if lock:
+                fields += ['is_locked', 'locked_at']
+            Invoice.objects.bulk_update(to_update, fields, batch_size=500)
+
+    return {'created': to_create, 'updated': to_update, 'skipped': skipped}
+
+
+@lru_cache(maxsize=1)
+def _invoice_template():
+    return engines['django'].from_string(INVOICE_HTML_TEMPLATE)
+
+
+def render_invoice_html(invoice, booking_context):
+    """Standalone HTML document for one invoice (booking_context from invoice_booking_context)."""
+    return _invoice_template().render({'invoice': invoice, 'ctx': booking_context})
@@ -0,0 +1,99 @@
+"""
+WhatsApp 24h customer-service window per guest.
+
+A guest's latest inbound message time is kept on Guest.last_inbound_at (authoritative)
+and mirrored into the shared cache, so window checks for one guest or a whole reminder
+sweep cost a cache round trip instead of a "latest guest Message" query per stay.
+The window belongs to the guest's WhatsApp number, not to a hotel: every hotel sends
+from the same business number.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from guest.models import Guest
+
+WHATSAPP_SESSION_WINDOW = timedelta(hours=24)
+
+_CACHE_KEY = 'guest:last_inbound:{}'
+# Cached "no inbound message yet" marker (the cache cannot tell a stored None from a miss).
+_NONE = 0
+
+
+def _cache_key(guest_id):
+    return _CACHE_KEY.format(guest_id)
+
+
+def _to_cache(last_inbound_at):
+    return last_inbound_at.timestamp() if last_inbound_at else _NONE
+
+
+def _from_cache(value):
+    if not value:
+        return None
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def record_guest_inbound(guest_id, at=None):
+    """Move the guest's window forward to `at` (now by default); older timestamps are ignored."""
+    at = at or timezone.now()
+    updated = Guest.objects.filter(id=guest_id).filter(
+        Q(last_inbound_at__isnull=True) | Q(last_inbound_at__lt=at)
+    ).update(last_inbound_at=at)
+    if updated:
+        transaction.on_commit(lambda: cache.set(
+            _cache_key(guest_id), _to_cache(at), timeout=WHATSAPP_SESSION_WINDOW.total_seconds()
+        ))
+    return at
+
+
+def get_last_inbound_at_many(guest_ids):
+    """{guest_id: last inbound datetime or None} - one cache read, then one query and a cache add per miss."""
+    guest_ids = set(guest_ids)
+    if not guest_ids:
+        return {}
+    cached = cache.get_many([_cache_key(guest_id) for guest_id in guest_ids])
+    result = {}
+    missing = []
+    for guest_id in guest_ids:
+        key = _cache_key(guest_id)
+        if key in cached:
+            result[guest_id] = _from_cache(cached[key])
+        else:
+            missing.append(guest_id)
+
+    if missing:
+        loaded = dict(Guest.objects.filter(id__in=missing).values_list('id', 'last_inbound_at'))
+        for guest_id in missing:
+            result[guest_id] = loaded.get(guest_id)
+            # add, not set: a record_guest_inbound that committed after the read above has
+            # already cached a newer time, which this stale one must not overwrite.
+            cache.add(
+                _cache_key(guest_id), _to_cache(result[guest_id]),
+                timeout=WHATSAPP_SESSION_WINDOW.total_seconds(),
+            )
+    return result
+
+
+def get_last_inbound_at(guest_id):
+    return get_last_inbound_at_many([guest_id])[guest_id]
+
+
+def is_window_open(last_inbound_at, now=None):
+    if last_inbound_at is None:
+        return False
+    now = now or timezone.now()
+    return (now - last_inbound_at) <= WHATSAPP_SESSION_WINDOW
+
+
+def window_status_many(guest_ids, now=None):
+    """{guest_id: (window_open, last_inbound_at)} for a batch of guests."""
+    now = now or timezone.now()
+    return {
+        guest_id: (is_window_open(last_inbound_at, now), last_inbound_at)
+        for guest_id, last_inbound_at in get_last_inbound_at_many(guest_ids).items()
+    }
+
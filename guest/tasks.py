@@ -1,14 +1,25 @@
 from celery import shared_task
+from django.core.files import File
 from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 import logging
+import zipfile
+from itertools import batched
 from datetime import date, datetime, time, timedelta, timezone as dt_timezone
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-
-from .models import ReminderLog, Stay
+from tempfile import SpooledTemporaryFile
+
+from .models import Invoice, InvoiceExportJob, ReminderLog, Stay
+from .services_invoice import (
+    accompanying_guests_by_id,
+    invoice_booking_context,
+    prefetch_invoice_bookings,
+    render_invoice_html,
+)
+from .services_window import window_status_many
 from .name_utils import get_first_name_from_full_name
-from chat.models import Message
 from chat.utils.template_util import process_template
+from hotel.config_snapshot import MEAL_TYPES, get_hotel_config, hotel_timezone
 from chat.utils.whatsapp_utils import (
     send_whatsapp_button_message,
     send_whatsapp_template_message,
@@ -20,7 +31,9 @@ logger = logging.getLogger(__name__)
 MEAL_TEMPLATE_NAME = 'meal_reminder'
 CHECKOUT_TEMPLATE_NAME = 'chekout_reminder'
 WHATSAPP_TEMPLATE_LANGUAGE = 'en'
-WHATSAPP_SESSION_WINDOW = timedelta(hours=24)
+# How long a claimed ('sending') reminder log belongs to the worker that claimed it.
+REMINDER_SEND_LEASE = timedelta(minutes=5)
+REMINDER_MAX_DELIVERY_ATTEMPTS = 3
 MEAL_TEXT_TEMPLATE_NAMES = {
     'breakfast': 'lobbybee_breakfast_reminder',
     'lunch': 'lobbybee_lunch_reminder',
@@ -44,11 +57,7 @@ MEAL_TEMPLATE_NAMES = {
 
 
 def _get_hotel_tz(hotel):
-    try:
-        return ZoneInfo(hotel.time_zone or 'UTC')
-    except (ZoneInfoNotFoundError, KeyError):
-        logger.warning(f"Invalid timezone '{hotel.time_zone}' for hotel {hotel.id}, using UTC")
-        return ZoneInfo('UTC')
+    return hotel_timezone(hotel.time_zone)
 
 
 def _checkout_reminder_date(stay):
@@ -151,28 +160,42 @@ def _upsert_reminder_log(
     return log
 
 
-def _get_locked_log(stay, reminder_type, reminder_date, is_test=False):
+def _ensure_reminder_log(stay, reminder_type, reminder_date, is_test=False):
+    """
+    Create the log row if it is missing, outside the claim transaction.
+
+    The claim locks the guest scope in id order; a row inserted inside it would already
+    be locked out of that order.
+    """
+    if ReminderLog.objects.filter(stay=stay, reminder_type=reminder_type, reminder_date=reminder_date).exists():
+        return
     try:
-        return ReminderLog.objects.select_for_update().get(
-            stay=stay,
-            reminder_type=reminder_type,
-            reminder_date=reminder_date,
-        )
-    except ReminderLog.DoesNotExist:
-        try:
-            return ReminderLog.objects.create(
+        with transaction.atomic():
+            ReminderLog.objects.create(
                 stay=stay,
                 reminder_type=reminder_type,
                 reminder_date=reminder_date,
                 status='scheduled',
                 is_test=bool(is_test),
             )
-        except IntegrityError:
-            return ReminderLog.objects.select_for_update().get(
-                stay=stay,
-                reminder_type=reminder_type,
-                reminder_date=reminder_date,
-            )
+    except IntegrityError:
+        pass
+
+
+def _lock_guest_scope(stay, reminder_type, reminder_date):
+    """
+    Lock every log in the guest scope, this stay's included, in one id-ordered query.
+
+    Returns (log, other_logs). Two stays of one guest claiming at once then wait on
+    each other in the same order instead of deadlocking.
+    """
+    logs = list(
+        _guest_scope_logs(stay, reminder_type, reminder_date)
+        .select_for_update(of=('self',))
+        .order_by('id')
+    )
+    log = next(log for log in logs if log.stay_id == stay.id)
+    return log, [other for other in logs if other.id != log.id]
 
 
 def _set_log_status(log, *, status, reason=None, is_test=None, sent_at=None, metadata=None):
@@ -198,6 +221,10 @@ def _set_log_status(log, *, status, reason=None, is_test=None, sent_at=None, met
         log.metadata = metadata
         update_fields.append('metadata')
 
+    if status != 'sending' and log.lease_expires_at is not None:
+        log.lease_expires_at = None
+        update_fields.append('lease_expires_at')
+
     if update_fields:
         update_fields.append('updated_at')
         log.save(update_fields=update_fields)
@@ -223,6 +250,103 @@ def _log_already_sent(log):
     )
 
 
+def _skip_result(status, reason):
+    return {'status': 'error' if status == 'failed' else 'skipped', 'reason': reason}
+
+
+def _claim_reminder_log(stay, reminder_type, reminder_date, *, is_test=None, precheck=None):
+    """
+    Phase one of reminder delivery: claim the log in a short transaction.
+
+    Runs the dedupe checks (this log, then the guest-level scope of _guest_scope_logs,
+    locked as a whole in id order so two stays of one guest cannot both claim) and `precheck`,
+    which returns (status, reason) when the reminder must not go out. A winning claim
+    moves the log to 'sending' with a lease and commits before anything is sent.
+
+    Returns (log, None) when claimed, otherwise (log, task_result).
+    """
+    _ensure_reminder_log(stay, reminder_type, reminder_date, is_test=bool(is_test))
+    now = timezone.now()
+    with transaction.atomic():
+        log, guest_logs = _lock_guest_scope(stay, reminder_type, reminder_date)
+
+        if log.status == 'sent':
+            _log_already_sent(log)
+            return log, {'status': 'skipped', 'reason': 'already_sent'}
+
+        if log.status == 'sending' and log.lease_expires_at and log.lease_expires_at > now:
+            _log_reminder_event(
+                stay_id=log.stay_id,
+                reminder_type=reminder_type,
+                reminder_date=reminder_date,
+                task_id=log.task_id,
+                status=log.status,
+                reason='send_in_progress',
+            )
+            return log, {'status': 'skipped', 'reason': 'send_in_progress'}
+
+        if any(other.status == 'sent' for other in guest_logs):
+            _set_log_status(log, status='skipped', reason='already_sent_for_guest', is_test=is_test)
+            return log, {'status': 'skipped', 'reason': 'already_sent_for_guest'}
+        if any(
+            other.status == 'sending' and other.lease_expires_at and other.lease_expires_at > now
+            for other in guest_logs
+        ):
+            _set_log_status(log, status='skipped', reason='sending_for_guest', is_test=is_test)
+            return log, {'status': 'skipped', 'reason': 'sending_for_guest'}
+
+        rejection = precheck() if precheck else None
+        if rejection:
+            status, reason = rejection
+            _set_log_status(log, status=status, reason=reason, is_test=is_test)
+            return log, _skip_result(status, reason)
+
+        log.status = 'sending'
+        log.reason = None
+        log.lease_expires_at = now + REMINDER_SEND_LEASE
+        log.delivery_attempts += 1
+        update_fields = ['status', 'reason', 'lease_expires_at', 'delivery_attempts', 'updated_at']
+        if is_test is not None:
+            log.is_test = bool(is_test)
+            update_fields.append('is_test')
+        log.save(update_fields=update_fields)
+
+    _log_reminder_event(
+        stay_id=log.stay_id,
+        reminder_type=reminder_type,
+        reminder_date=reminder_date,
+        task_id=log.task_id,
+        status=log.status,
+        reason=f'claimed_attempt_{log.delivery_attempts}',
+    )
+    return log, None
+
+
+def _finish_reminder_delivery(log, *, status, reason=None, is_test=None, sent_at=None, metadata=None):
+    """
+    Phase three: record the outcome of a claimed send in its own short transaction.
+
+    A failure is only written while this worker still holds the lease. A success is always
+    written - the message has gone out - so a log the reaper already recovered is not sent
+    again by the retry.
+    """
+    with transaction.atomic():
+        current = ReminderLog.objects.select_for_update().get(id=log.id)
+        lease_held = current.status == 'sending' and current.lease_expires_at == log.lease_expires_at
+        if status != 'sent' and not lease_held:
+            _log_reminder_event(
+                stay_id=current.stay_id,
+                reminder_type=current.reminder_type,
+                reminder_date=current.reminder_date,
+                task_id=current.task_id,
+                status=current.status,
+                reason='lease_lost',
+            )
+            return current
+        _set_log_status(current, status=status, reason=reason, is_test=is_test, sent_at=sent_at, metadata=metadata)
+    return current
+
+
 def _log_reminder_event(*, stay_id, reminder_type, reminder_date, task_id, status, reason):
     logger.info(
         "reminder_event stay_id=%s reminder_type=%s reminder_date=%s task_id=%s status=%s reason=%s",
@@ -284,27 +408,13 @@ def _build_meal_text_message_from_template(stay, reminder_type):
     return _build_meal_message(stay, reminder_type)
 
 
-def _get_latest_guest_message_at(stay):
-    latest_message = (
-        Message.objects.filter(
-            conversation__guest=stay.guest,
-            conversation__hotel=stay.hotel,
-            sender_type='guest',
-        )
-        .order_by('-created_at')
-        .values_list('created_at', flat=True)
-        .first()
-    )
-    return latest_message
-
-
 def _should_use_whatsapp_template_for_reminder(stay, now=None):
-    now = now or timezone.now()
-    latest_guest_message_at = _get_latest_guest_message_at(stay)
-    if latest_guest_message_at is None:
-        return True, None
-
-    return (now - latest_guest_message_at) > WHATSAPP_SESSION_WINDOW, latest_guest_message_at
+    """
+    Return (use_template, last_guest_message_at). Outside the guest's 24h service window
+    only a paid template may be sent.
+    """
+    window_open, last_guest_message_at = window_status_many([stay.guest_id], now=now)[stay.guest_id]
+    return not window_open, last_guest_message_at
 
 
 def _build_reminder_metadata(*, delivery_mode, template_name=None, last_guest_message_at=None):
@@ -319,7 +429,7 @@ def _build_reminder_metadata(*, delivery_mode, template_name=None, last_guest_me
 def _get_meal_template_time_range(stay, reminder_type):
     hotel_tz = _get_hotel_tz(stay.hotel)
     reminder_date = _resolve_reminder_date(stay, reminder_type)
-    hotel_time = getattr(stay.hotel, f'{reminder_type}_time', None) or MEAL_TEMPLATE_FALLBACK_TIMES[reminder_type]
+    hotel_time = get_hotel_config(stay.hotel_id).meal(reminder_type).meal_time or MEAL_TEMPLATE_FALLBACK_TIMES[reminder_type]
     meal_start = datetime.combine(reminder_date, hotel_time, tzinfo=hotel_tz)
     meal_end = meal_start + timedelta(hours=3)
     return meal_start, meal_end
@@ -386,14 +496,11 @@ def _format_checkout_time_for_guest(stay, hotel_tz):
     return checkout_local.strftime('%d %b %Y, %I:%M %p')
 
 
-def _is_meal_enabled(stay, reminder_type):
-    if reminder_type == 'breakfast':
-        return stay.breakfast_reminder and stay.hotel.breakfast_reminder
-    if reminder_type == 'lunch':
-        return stay.lunch_reminder and stay.hotel.lunch_reminder
-    if reminder_type == 'dinner':
-        return stay.dinner_reminder and stay.hotel.dinner_reminder
-    return False
+def _is_meal_enabled(stay, reminder_type, hotel_config=None):
+    if reminder_type not in MEAL_TYPES:
+        return False
+    hotel_config = hotel_config or get_hotel_config(stay.hotel_id)
+    return bool(getattr(stay, f'{reminder_type}_reminder') and hotel_config.meal(reminder_type).reminder_enabled)
 
 
 def _send_meal_reminder(reminder_type, stay_id, reminder_date_str=None):
@@ -404,55 +511,47 @@ def _send_meal_reminder(reminder_type, stay_id, reminder_date_str=None):
     try:
         stay = Stay.objects.select_related('guest', 'hotel').get(id=stay_id)
         reminder_date = _resolve_reminder_date(stay, reminder_type, reminder_date_str)
-        with transaction.atomic():
-            log = _get_locked_log(stay, reminder_type, reminder_date)
-
-            if log.status == 'sent':
-                _log_already_sent(log)
-                return {'status': 'skipped', 'reason': 'already_sent'}
-
-            if _guest_scope_logs(stay, reminder_type, reminder_date).exclude(id=log.id).filter(status='sent').exists():
-                _set_log_status(log, status='skipped', reason='already_sent_for_guest')
-                return {'status': 'skipped', 'reason': 'already_sent_for_guest'}
 
+        def precheck():
             if stay.status != 'active':
-                _set_log_status(log, status='skipped', reason='stay_not_active')
-                return {'status': 'skipped', 'reason': 'stay_not_active'}
-
+                return 'skipped', 'stay_not_active'
             if not _is_meal_enabled(stay, reminder_type):
-                _set_log_status(log, status='skipped', reason=f'{reminder_type}_reminder_disabled')
-                return {'status': 'skipped', 'reason': f'{reminder_type}_reminder_disabled'}
-
+                return 'skipped', f'{reminder_type}_reminder_disabled'
             if not stay.guest.whatsapp_number:
-                _set_log_status(log, status='failed', reason='no_whatsapp_number')
                 logger.warning(f"Guest {stay.guest.id} has no WhatsApp number")
-                return {'status': 'error', 'reason': 'no_whatsapp_number'}
-
-            use_template, last_guest_message_at = _should_use_whatsapp_template_for_reminder(stay)
-            metadata = None
-            if use_template:
-                send_whatsapp_template_message(
-                    recipient_number=stay.guest.whatsapp_number,
-                    template_name=MEAL_TEMPLATE_NAME,
-                    components=_build_meal_template_components(stay, reminder_type),
-                    language_code=WHATSAPP_TEMPLATE_LANGUAGE,
-                )
-                metadata = _build_reminder_metadata(
-                    delivery_mode='template',
-                    template_name=MEAL_TEMPLATE_NAME,
-                    last_guest_message_at=last_guest_message_at,
-                )
-            else:
-                send_whatsapp_text_message(
-                    recipient_number=stay.guest.whatsapp_number,
-                    message_text=_build_meal_text_message_from_template(stay, reminder_type),
-                )
-                metadata = _build_reminder_metadata(
-                    delivery_mode='session_text',
-                    last_guest_message_at=last_guest_message_at,
-                )
+                return 'failed', 'no_whatsapp_number'
+            return None
+
+        claimed, skipped = _claim_reminder_log(stay, reminder_type, reminder_date, precheck=precheck)
+        if skipped:
+            return skipped
+        log = claimed
+
+        # Phase two: talk to the Graph API with no transaction or row lock held.
+        use_template, last_guest_message_at = _should_use_whatsapp_template_for_reminder(stay)
+        if use_template:
+            send_whatsapp_template_message(
+                recipient_number=stay.guest.whatsapp_number,
+                template_name=MEAL_TEMPLATE_NAME,
+                components=_build_meal_template_components(stay, reminder_type),
+                language_code=WHATSAPP_TEMPLATE_LANGUAGE,
+            )
+            metadata = _build_reminder_metadata(
+                delivery_mode='template',
+                template_name=MEAL_TEMPLATE_NAME,
+                last_guest_message_at=last_guest_message_at,
+            )
+        else:
+            send_whatsapp_text_message(
+                recipient_number=stay.guest.whatsapp_number,
+                message_text=_build_meal_text_message_from_template(stay, reminder_type),
+            )
+            metadata = _build_reminder_metadata(
+                delivery_mode='session_text',
+                last_guest_message_at=last_guest_message_at,
+            )
 
-            _set_log_status(log, status='sent', reason=None, sent_at=timezone.now(), metadata=metadata)
+        _finish_reminder_delivery(log, status='sent', reason=None, sent_at=timezone.now(), metadata=metadata)
 
         logger.info(
             "Sent %s reminder to guest %s (%s)",
@@ -481,7 +580,7 @@ def _send_meal_reminder(reminder_type, stay_id, reminder_date_str=None):
             exc_info=True,
         )
         if log is not None:
-            _set_log_status(log, status='failed', reason='whatsapp_send_failed')
+            _finish_reminder_delivery(log, status='failed', reason='whatsapp_send_failed')
         elif stay is not None and reminder_date is not None:
             _upsert_reminder_log(
                 stay,
@@ -504,119 +603,110 @@ def send_extend_checkin_reminder(self, stay_id, is_test=False, reminder_date=Non
         is_test: Bypasses stale reminder guard when true
         reminder_date: Hotel-local date associated with this reminder
     """
+    log = None
     try:
         stay = Stay.objects.select_related('guest', 'hotel', 'room').get(id=stay_id)
         resolved_reminder_date = _resolve_reminder_date(stay, 'checkout', reminder_date)
-        with transaction.atomic():
-            log = _get_locked_log(stay, 'checkout', resolved_reminder_date, is_test=is_test)
-
-            if log.status == 'sent':
-                _log_already_sent(log)
-                return {'status': 'skipped', 'reason': 'already_sent'}
-
-            if _guest_scope_logs(stay, 'checkout', resolved_reminder_date).exclude(id=log.id).filter(status='sent').exists():
-                _set_log_status(log, status='skipped', reason='already_sent_for_guest', is_test=is_test)
-                return {'status': 'skipped', 'reason': 'already_sent_for_guest'}
+        now = timezone.now()
 
+        def precheck():
             if stay.status != 'active':
-                _set_log_status(log, status='skipped', reason='stay_not_active', is_test=is_test)
-                return {'status': 'skipped', 'reason': 'stay_not_active'}
-
+                return 'skipped', 'stay_not_active'
             if not stay.check_out_date:
-                _set_log_status(log, status='skipped', reason='missing_checkout_date', is_test=is_test)
-                return {'status': 'skipped', 'reason': 'missing_checkout_date'}
-
-            now = timezone.now()
+                return 'skipped', 'missing_checkout_date'
             time_to_checkout = stay.check_out_date - now
             if time_to_checkout <= timedelta(seconds=0):
-                _set_log_status(log, status='skipped', reason='checkout_passed', is_test=is_test)
-                return {'status': 'skipped', 'reason': 'checkout_passed'}
-
+                return 'skipped', 'checkout_passed'
             if (not is_test) and time_to_checkout > timedelta(hours=4, minutes=15):
-                _set_log_status(log, status='skipped', reason='stale_reminder_before_window', is_test=is_test)
-                return {'status': 'skipped', 'reason': 'stale_reminder_before_window'}
-
+                return 'skipped', 'stale_reminder_before_window'
             if not stay.guest.whatsapp_number:
-                _set_log_status(log, status='failed', reason='no_whatsapp_number', is_test=is_test)
                 logger.warning(f"Guest {stay.guest.id} has no WhatsApp number")
-                return {'status': 'error', 'reason': 'no_whatsapp_number'}
-
-            hotel_tz = _get_hotel_tz(stay.hotel)
-            checkout_time_text = _format_checkout_time_for_guest(stay, hotel_tz)
-            guest_name = get_first_name_from_full_name(stay.guest.full_name)
-            active_room_numbers = list(
-                Stay.objects.filter(
-                    guest=stay.guest,
-                    hotel=stay.hotel,
-                    status='active',
-                    room__isnull=False
-                ).values_list('room__room_number', flat=True).distinct()
+                return 'failed', 'no_whatsapp_number'
+            return None
+
+        claimed, skipped = _claim_reminder_log(
+            stay, 'checkout', resolved_reminder_date, is_test=is_test, precheck=precheck
+        )
+        if skipped:
+            return skipped
+        log = claimed
+
+        # Phase two: build and send with no transaction or row lock held.
+        hotel_tz = _get_hotel_tz(stay.hotel)
+        checkout_time_text = _format_checkout_time_for_guest(stay, hotel_tz)
+        guest_name = get_first_name_from_full_name(stay.guest.full_name)
+        active_room_numbers = list(
+            Stay.objects.filter(
+                guest=stay.guest,
+                hotel=stay.hotel,
+                status='active',
+                room__isnull=False
+            ).values_list('room__room_number', flat=True).distinct()
+        )
+        if active_room_numbers:
+            active_room_numbers = sorted(str(room_no) for room_no in active_room_numbers)
+            room_numbers_text = ', '.join(active_room_numbers)
+        else:
+            room_numbers_text = stay.room.room_number if stay.room else 'N/A'
+        message = (
+            f"Dear {guest_name},\n\n"
+            f"Your check-out time for Room No(s) {room_numbers_text} is {checkout_time_text}.\n"
+            "Please settle the bills and return your room keys on time to avoid any additional charges.\n\n"
+            "If you like to continue your stay, Please contact Reception immediately to check availability.\n\n"
+            "Have a great day!!"
+        )
+
+        buttons = [
+            {
+                "type": "reply",
+                "reply": {"id": f"stay_extend_yes_{stay.id}", "title": "Yes, Extend"},
+            },
+            {
+                "type": "reply",
+                "reply": {"id": f"stay_extend_no_{stay.id}", "title": "No, Thanks"},
+            },
+        ]
+
+        use_template, last_guest_message_at = _should_use_whatsapp_template_for_reminder(stay, now=now)
+        if use_template:
+            response = send_whatsapp_template_message(
+                recipient_number=stay.guest.whatsapp_number,
+                template_name=CHECKOUT_TEMPLATE_NAME,
+                components=_build_checkout_template_components(stay, checkout_time_text, room_numbers_text),
+                language_code=WHATSAPP_TEMPLATE_LANGUAGE,
             )
-            if active_room_numbers:
-                active_room_numbers = sorted(str(room_no) for room_no in active_room_numbers)
-                room_numbers_text = ', '.join(active_room_numbers)
-            else:
-                room_numbers_text = stay.room.room_number if stay.room else 'N/A'
-            message = (
-                f"Dear {guest_name},\n\n"
-                f"Your check-out time for Room No(s) {room_numbers_text} is {checkout_time_text}.\n"
-                "Please settle the bills and return your room keys on time to avoid any additional charges.\n\n"
-                "If you like to continue your stay, Please contact Reception immediately to check availability.\n\n"
-                "Have a great day!!"
+            metadata = _build_reminder_metadata(
+                delivery_mode='template',
+                template_name=CHECKOUT_TEMPLATE_NAME,
+                last_guest_message_at=last_guest_message_at,
             )
-
-            buttons = [
-                {
-                    "type": "reply",
-                    "reply": {"id": f"stay_extend_yes_{stay.id}", "title": "Yes, Extend"},
-                },
-                {
-                    "type": "reply",
-                    "reply": {"id": f"stay_extend_no_{stay.id}", "title": "No, Thanks"},
-                },
-            ]
-
-            use_template, last_guest_message_at = _should_use_whatsapp_template_for_reminder(stay, now=now)
-            metadata = None
-            if use_template:
-                response = send_whatsapp_template_message(
-                    recipient_number=stay.guest.whatsapp_number,
-                    template_name=CHECKOUT_TEMPLATE_NAME,
-                    components=_build_checkout_template_components(stay, checkout_time_text, room_numbers_text),
-                    language_code=WHATSAPP_TEMPLATE_LANGUAGE,
-                )
-                metadata = _build_reminder_metadata(
-                    delivery_mode='template',
-                    template_name=CHECKOUT_TEMPLATE_NAME,
-                    last_guest_message_at=last_guest_message_at,
-                )
-            else:
-                response = send_whatsapp_button_message(
-                    recipient_number=stay.guest.whatsapp_number,
-                    message_text=message,
-                    buttons=buttons,
-                )
-                metadata = _build_reminder_metadata(
-                    delivery_mode='session_button',
-                    last_guest_message_at=last_guest_message_at,
-                )
-            if not response:
-                _set_log_status(log, status='failed', reason='whatsapp_send_failed', is_test=is_test)
-                logger.error(
-                    "Failed to send extension reminder button message for stay %s (guest %s)",
-                    stay_id,
-                    stay.guest.whatsapp_number,
-                )
-                return {'status': 'error', 'reason': 'whatsapp_send_failed', 'stay_id': stay_id}
-
-            _set_log_status(
-                log,
-                status='sent',
-                reason=None,
-                is_test=is_test,
-                sent_at=timezone.now(),
-                metadata=metadata,
+        else:
+            response = send_whatsapp_button_message(
+                recipient_number=stay.guest.whatsapp_number,
+                message_text=message,
+                buttons=buttons,
             )
+            metadata = _build_reminder_metadata(
+                delivery_mode='session_button',
+                last_guest_message_at=last_guest_message_at,
+            )
+        if not response:
+            _finish_reminder_delivery(log, status='failed', reason='whatsapp_send_failed', is_test=is_test)
+            logger.error(
+                "Failed to send extension reminder button message for stay %s (guest %s)",
+                stay_id,
+                stay.guest.whatsapp_number,
+            )
+            return {'status': 'error', 'reason': 'whatsapp_send_failed', 'stay_id': stay_id}
+
+        _finish_reminder_delivery(
+            log,
+            status='sent',
+            reason=None,
+            is_test=is_test,
+            sent_at=timezone.now(),
+            metadata=metadata,
+        )
 
         logger.info(
             "Sent extension check-in reminder to guest %s (%s)",
@@ -636,6 +726,11 @@ def send_extend_checkin_reminder(self, stay_id, is_test=False, reminder_date=Non
     except Stay.DoesNotExist:
         logger.error(f"Stay {stay_id} not found")
         return {'status': 'error', 'reason': 'stay_not_found'}
+    except Exception:
+        # Release the claim so the autoretry can claim it again instead of waiting out the lease.
+        if log is not None:
+            _finish_reminder_delivery(log, status='failed', reason='whatsapp_send_failed', is_test=is_test)
+        raise
 
 
 @shared_task
@@ -669,7 +764,7 @@ def schedule_checkin_reminder(stay_id, is_test=False):
         task_id = f"extend_reminder_guest_{stay.guest_id}_{reminder_date.strftime('%Y%m%d')}"
 
         existing_log = _guest_scope_logs(stay, 'checkout', reminder_date).filter(
-            status__in={'scheduled', 'sent'}
+            status__in={'scheduled', 'sending', 'sent'}
         ).order_by('-created_at').first()
         if existing_log and existing_log.status == 'sent':
             _log_already_sent(existing_log)
@@ -679,7 +774,7 @@ def schedule_checkin_reminder(stay_id, is_test=False):
                 'stay_id': stay_id,
                 'reminder_date': reminder_date.isoformat(),
             }
-        if existing_log and existing_log.status == 'scheduled':
+        if existing_log and existing_log.status in {'scheduled', 'sending'}:
             _log_reminder_event(
                 stay_id=stay.id,
                 reminder_type='checkout',
@@ -772,7 +867,8 @@ def schedule_meal_reminders(stay_id):
             logger.warning(f"Stay {stay_id} has no checkout date")
             return {'status': 'error', 'reason': 'no_checkout_date'}
 
-        hotel_tz = _get_hotel_tz(stay.hotel)
+        hotel_config = get_hotel_config(stay.hotel_id)
+        hotel_tz = hotel_config.tz
         now = timezone.now()
         now_local = now.astimezone(hotel_tz)
         checkout_local = stay.check_out_date.astimezone(hotel_tz)
@@ -780,20 +876,20 @@ def schedule_meal_reminders(stay_id):
         meal_configs = [
             {
                 'type': 'breakfast',
-                'enabled': bool(stay.breakfast_reminder and stay.hotel.breakfast_reminder),
-                'meal_time': stay.hotel.breakfast_time or time(6, 0),
+                'enabled': _is_meal_enabled(stay, 'breakfast', hotel_config),
+                'meal_time': hotel_config.meal('breakfast').meal_time or time(6, 0),
                 'task': send_breakfast_reminder,
             },
             {
                 'type': 'lunch',
-                'enabled': bool(stay.lunch_reminder and stay.hotel.lunch_reminder),
-                'meal_time': stay.hotel.lunch_time or time(12, 30),
+                'enabled': _is_meal_enabled(stay, 'lunch', hotel_config),
+                'meal_time': hotel_config.meal('lunch').meal_time or time(12, 30),
                 'task': send_lunch_reminder,
             },
             {
                 'type': 'dinner',
-                'enabled': bool(stay.dinner_reminder and stay.hotel.dinner_reminder),
-                'meal_time': stay.hotel.dinner_time or time(17, 0),
+                'enabled': _is_meal_enabled(stay, 'dinner', hotel_config),
+                'meal_time': hotel_config.meal('dinner').meal_time or time(17, 0),
                 'task': send_dinner_reminder,
             },
         ]
@@ -840,10 +936,10 @@ def schedule_meal_reminders(stay_id):
                     continue
 
                 existing_log = _guest_scope_logs(stay, reminder_type, reminder_date).filter(
-                    status__in={'scheduled', 'sent'}
+                    status__in={'scheduled', 'sending', 'sent'}
                 ).order_by('-created_at').first()
 
-                if existing_log and existing_log.status in {'scheduled', 'sent'}:
+                if existing_log and existing_log.status in {'scheduled', 'sending', 'sent'}:
                     results[f'{reminder_type}_already_present'] += 1
                     _log_reminder_event(
                         stay_id=stay.id,
@@ -892,3 +988,104 @@ def schedule_meal_reminders(stay_id):
     except Exception as e:
         logger.error(f"Error scheduling meal reminders for stay {stay_id}: {str(e)}")
         return {'status': 'error', 'reason': str(e)}
+
+
+def _redispatch_reminder(log):
+    reminder_date = log.reminder_date.isoformat()
+    if log.reminder_type == 'checkout':
+        send_extend_checkin_reminder.apply_async(args=[log.stay_id, log.is_test, reminder_date])
+        return
+    meal_tasks = {
+        'breakfast': send_breakfast_reminder,
+        'lunch': send_lunch_reminder,
+        'dinner': send_dinner_reminder,
+    }
+    meal_tasks[log.reminder_type].apply_async(args=[log.stay_id], kwargs={'reminder_date': reminder_date})
+
+
+@shared_task
+def reap_expired_reminder_leases(batch_size=500):
+    """
+    Recover reminder logs whose delivery claim expired (worker killed or hung mid-send).
+
+    Each expired 'sending' log goes back to 'scheduled' and its send task is re-queued,
+    until REMINDER_MAX_DELIVERY_ATTEMPTS claims have been made; after that it is marked
+    failed. Whether the lost attempt reached WhatsApp is unknown, so a retry may duplicate
+    it - the lease only bounds how long a reminder can stay stuck.
+    """
+    now = timezone.now()
+    requeued = 0
+    failed = 0
+    with transaction.atomic():
+        expired = list(
+            ReminderLog.objects.select_for_update(skip_locked=True)
+            .filter(status='sending', lease_expires_at__lt=now)
+            .order_by('lease_expires_at')[:batch_size]
+        )
+        for log in expired:
+            if log.delivery_attempts >= REMINDER_MAX_DELIVERY_ATTEMPTS:
+                _set_log_status(log, status='failed', reason='lease_expired')
+                failed += 1
+                continue
+            _set_log_status(log, status='scheduled', reason='lease_expired')
+            transaction.on_commit(lambda log=log: _redispatch_reminder(log))
+            requeued += 1
+
+    if expired:
+        logger.warning("Reaped %s expired reminder leases (%s requeued, %s failed)", len(expired), requeued, failed)
+    return {'status': 'success', 'requeued': requeued, 'failed': failed}
+
+
+INVOICE_EXPORT_CHUNK_SIZE = 100
+INVOICE_EXPORT_PROGRESS_EVERY = 25
+
+
+@shared_task
+def render_invoice_export(job_id):
+    """
+    Render an InvoiceExportJob's invoices into one ZIP of HTML documents in storage.
+
+    Invoices are streamed with a prefetching iterator, with one accompanying-guest query
+    per chunk, and written into a spooled temp file, so memory stays flat however many
+    invoices the job covers. Progress is written back to the job every
+    INVOICE_EXPORT_PROGRESS_EVERY invoices.
+    """
+    try:
+        job = InvoiceExportJob.objects.select_related('hotel').get(id=job_id)
+    except InvoiceExportJob.DoesNotExist:
+        logger.error(f"Invoice export job {job_id} not found")
+        return {'status': 'error', 'reason': 'job_not_found'}
+
+    InvoiceExportJob.objects.filter(id=job.id).update(status='running', processed=0)
+    invoices = Invoice.objects.filter(hotel=job.hotel, id__in=job.invoice_ids).order_by('invoice_number').prefetch_related(
+        Prefetch('booking', queryset=prefetch_invoice_bookings(job.hotel.bookings.all()))
+    )
+
+    processed = 0
+    try:
+        with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+            with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for chunk in batched(invoices.iterator(chunk_size=INVOICE_EXPORT_CHUNK_SIZE), INVOICE_EXPORT_CHUNK_SIZE):
+                    guests_by_id = accompanying_guests_by_id([invoice.booking for invoice in chunk])
+                    for invoice in chunk:
+                        html = render_invoice_html(invoice, invoice_booking_context(invoice.booking, guests_by_id))
+                        archive.writestr(f"{invoice.invoice_number}.html", html)
+                        processed += 1
+                        if processed % INVOICE_EXPORT_PROGRESS_EVERY == 0:
+                            InvoiceExportJob.objects.filter(id=job.id).update(processed=processed)
+
+            buffer.seek(0)
+            job.file.save(f"invoices_{job.id}.zip", File(buffer), save=False)
+
+        job.status = 'completed'
+        job.processed = processed
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'status', 'processed', 'completed_at'])
+    except Exception as e:
+        logger.error(f"Error rendering invoice export {job_id}: {str(e)}", exc_info=True)
+        InvoiceExportJob.objects.filter(id=job.id).update(
+            status='failed', processed=processed, error=str(e), completed_at=timezone.now()
+        )
+        return {'status': 'error', 'reason': str(e)}
+
+    return {'status': 'success', 'job_id': job.id, 'processed': processed}
@@ -1,8 +1,24 @@
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from decimal import Decimal
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
 
-from django.test import SimpleTestCase
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
 
-from .services_invoice import resolve_gst, compute_totals
+from hotel.models import Hotel, Room, RoomCategory
+from user.models import User
+from .models import Booking, Guest, Invoice, InvoiceExportJob, InvoiceSequence, Stay
+from .services_invoice import (
+    build_invoice_lines, compute_totals, generate_invoices_batch, next_invoice_number,
+    prefetch_invoice_bookings, resolve_gst,
+)
 
 SLABS = [
     {'id': 1, 'max_rate': 1000, 'gst_value': 0},
@@ -44,3 +60,226 @@ class ComputeTotalsTests(SimpleTestCase):
         subtotal, gst, total = compute_totals(self._lines(), 0, SLABS, gst_override=Decimal('12'))
         self.assertEqual(gst, Decimal('1800.00'))   # 600 + 1200, slab ignored
         self.assertEqual(total, Decimal('16800.00'))
+
+
+class InvoiceFixtureMixin:
+    def _make_hotel(self):
+        self.hotel = Hotel.objects.create(name="Invoice Hotel")
+        self.user = User.objects.create_user(
+            username="invoiceadmin",
+            email="invoiceadmin@example.com",
+            password="password123",
+            user_type="hotel_admin",
+            hotel=self.hotel,
+        )
+        self.category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Deluxe", base_price=1000, max_occupancy=2, amenities=[],
+        )
+
+    def _make_booking(self, n):
+        guest = Guest.objects.create(full_name=f"Guest {n}", whatsapp_number=f"+1555100{n:04d}")
+        room = Room.objects.create(hotel=self.hotel, room_number=f"{100 + n}", category=self.category, floor=1)
+        now = timezone.now()
+        booking = Booking.objects.create(
+            hotel=self.hotel, primary_guest=guest,
+            check_in_date=now - timedelta(days=1), check_out_date=now + timedelta(days=1),
+        )
+        Stay.objects.create(
+            booking=booking, hotel=self.hotel, guest=guest, room=room,
+            check_in_date=booking.check_in_date, check_out_date=booking.check_out_date,
+        )
+        return booking
+
+
+class InvoiceNumberingTests(InvoiceFixtureMixin, APITestCase):
+    def setUp(self):
+        self._make_hotel()
+        self.client.force_authenticate(user=self.user)
+
+    def test_generate_numbers_sequentially_per_hotel(self):
+        numbers = []
+        for n in range(3):
+            response = self.client.post("/api/invoices/generate/", {"booking_id": self._make_booking(n).id}, format="json")
+            self.assertEqual(response.status_code, 201)
+            numbers.append(response.data["data"]["invoice_number"])
+
+        self.assertEqual(numbers, ["INV-000001", "INV-000002", "INV-000003"])
+        self.assertEqual(InvoiceSequence.objects.get(hotel=self.hotel).last_number, 3)
+
+        other_hotel = Hotel.objects.create(name="Other Hotel")
+        with transaction.atomic():
+            self.assertEqual(next_invoice_number(other_hotel), "INV-000001")
+
+    def test_rolled_back_invoice_does_not_consume_a_number(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(next_invoice_number(self.hotel), "INV-000001")
+                raise RuntimeError("invoice insert failed")
+
+        with transaction.atomic():
+            self.assertEqual(next_invoice_number(self.hotel), "INV-000001")
+
+    def test_counter_continues_after_existing_history(self):
+        InvoiceSequence.objects.create(hotel=self.hotel, last_number=41)
+        response = self.client.post("/api/invoices/generate/", {"booking_id": self._make_booking(1).id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["invoice_number"], "INV-000042")
+
+
+class InvoiceBatchTests(InvoiceFixtureMixin, APITestCase):
+    def setUp(self):
+        self._make_hotel()
+        self.client.force_authenticate(user=self.user)
+
+    def test_generate_batch_creates_skips_and_regenerates(self):
+        bookings = [self._make_booking(n) for n in range(5)]
+        self.client.post("/api/invoices/generate/", {"booking_id": bookings[0].id}, format="json")
+
+        response = self.client.post(
+            "/api/invoices/generate-batch/", {"booking_ids": [b.id for b in bookings]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(
+            [i["invoice_number"] for i in data["created"]],
+            ["INV-000002", "INV-000003", "INV-000004", "INV-000005"],
+        )
+        self.assertEqual(data["skipped"], [{"booking": bookings[0].id, "reason": "exists"}])
+
+        response = self.client.post(
+            "/api/invoices/generate-batch/",
+            {"booking_ids": [b.id for b in bookings], "regenerate": True, "gst_rate": "12", "lock": True},
+            format="json",
+        )
+        data = response.data["data"]
+        self.assertEqual(len(data["updated"]), 5)
+        self.assertEqual(Invoice.objects.filter(hotel=self.hotel, is_locked=True).count(), 5)
+        self.assertEqual(Invoice.objects.get(booking=bookings[1]).gst_amount, Decimal('240.00'))  # 2 nights x 1000 @ 12%
+
+        response = self.client.post(
+            "/api/invoices/generate-batch/",
+            {"booking_ids": [bookings[1].id], "regenerate": True},
+            format="json",
+        )
+        self.assertEqual(response.data["data"]["skipped"], [{"booking": bookings[1].id, "reason": "locked"}])
+
+    def test_unlocked_regenerate_keeps_a_lock_taken_meanwhile(self):
+        booking = self._make_booking(0)
+        self.client.post("/api/invoices/generate/", {"booking_id": booking.id}, format="json")
+
+        def lock_then_build(booking, custom_rates=None):
+            Invoice.objects.filter(booking=booking).update(is_locked=True, locked_at=timezone.now())
+            return build_invoice_lines(booking, custom_rates)
+
+        with patch("guest.services_invoice.build_invoice_lines", side_effect=lock_then_build):
+            result = generate_invoices_batch(
+                self.hotel, prefetch_invoice_bookings(self.hotel.bookings.all()), regenerate=True,
+            )
+
+        self.assertEqual(len(result["updated"]), 1)
+        self.assertTrue(Invoice.objects.get(booking=booking).is_locked)
+
+    def test_generate_batch_query_count_does_not_grow_with_bookings(self):
+        today = timezone.now().date()
+        date_range = {"date_from": today, "date_to": today + timedelta(days=1)}
+        InvoiceSequence.objects.create(hotel=self.hotel)
+        for n in range(3):
+            self._make_booking(n)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post("/api/invoices/generate-batch/", date_range, format="json")
+        self.assertEqual(len(response.data["data"]["created"]), 3)
+
+        Invoice.objects.all().delete()
+        for n in range(3, 20):
+            self._make_booking(n)
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.post("/api/invoices/generate-batch/", date_range, format="json")
+        self.assertEqual(len(response.data["data"]["created"]), 20)
+
+    def test_generate_batch_date_range_uses_hotel_local_days(self):
+        self.hotel.time_zone = "Asia/Kolkata"
+        self.hotel.save(update_fields=["time_zone"])
+        ist = ZoneInfo("Asia/Kolkata")
+        # 00:30 IST on Feb 1 is still Jan 31 in UTC
+        check_outs = [datetime(2026, 2, 1, 0, 30, tzinfo=ist), datetime(2026, 1, 31, 23, 0, tzinfo=ist)]
+        bookings = []
+        for n, check_out in enumerate(check_outs):
+            booking = self._make_booking(n)
+            bookings.append(booking)
+            Booking.objects.filter(id=booking.id).update(
+                check_in_date=check_out - timedelta(days=2), check_out_date=check_out,
+            )
+            Stay.objects.filter(booking=booking).update(
+                check_in_date=check_out - timedelta(days=2), check_out_date=check_out,
+            )
+
+        january = self.client.post(
+            "/api/invoices/generate-batch/", {"date_from": "2026-01-01", "date_to": "2026-01-31"}, format="json",
+        )
+        february = self.client.post(
+            "/api/invoices/generate-batch/", {"date_from": "2026-02-01", "date_to": "2026-02-28"}, format="json",
+        )
+
+        self.assertEqual([i["booking"] for i in january.data["data"]["created"]], [bookings[1].id])
+        self.assertEqual([i["booking"] for i in february.data["data"]["created"]], [bookings[0].id])
+
+    def test_export_renders_zip_and_reports_progress(self):
+        bookings = [self._make_booking(n) for n in range(3)]
+        self.client.post("/api/invoices/generate-batch/", {"booking_ids": [b.id for b in bookings]}, format="json")
+
+        media_root = tempfile.mkdtemp()
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        with override_settings(STORAGES=storages, MEDIA_ROOT=media_root), \
+                patch("guest.tasks.render_invoice_export.delay") as mock_delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/invoices/export/", {"invoice_ids": list(
+                    Invoice.objects.values_list("id", flat=True)
+                )}, format="json")
+            self.assertEqual(response.status_code, 202)
+            job_id = response.data["data"]["id"]
+            mock_delay.assert_called_once_with(job_id)
+
+            from .tasks import render_invoice_export
+            render_invoice_export(job_id)
+
+            job = InvoiceExportJob.objects.get(id=job_id)
+            self.assertEqual((job.status, job.processed, job.total), ("completed", 3, 3))
+            with zipfile.ZipFile(job.file.path) as archive:
+                self.assertEqual(
+                    sorted(archive.namelist()), ["INV-000001.html", "INV-000002.html", "INV-000003.html"]
+                )
+                self.assertIn("Invoice Hotel", archive.read("INV-000001.html").decode())
+
+            response = self.client.get(f"/api/invoices/export/{job_id}/")
+            self.assertEqual(response.data["data"]["status"], "completed")
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class InvoiceNumberingConcurrencyTests(InvoiceFixtureMixin, TransactionTestCase):
+    """Parallel generate calls must hand out 1..N exactly once (needs row locks, e.g. Postgres)."""
+    WORKERS = 8
+
+    def setUp(self):
+        self._make_hotel()
+
+    def _generate(self, booking_id):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            return client.post("/api/invoices/generate/", {"booking_id": booking_id}, format="json").status_code
+        finally:
+            connection.close()
+
+    def test_parallel_generate_has_no_duplicates_or_gaps(self):
+        booking_ids = [self._make_booking(n).id for n in range(self.WORKERS * 3)]
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            statuses = list(pool.map(self._generate, booking_ids))
+
+        self.assertEqual(statuses, [201] * len(booking_ids))
+        numbers = sorted(Invoice.objects.filter(hotel=self.hotel).values_list('invoice_number', flat=True))
+        self.assertEqual(numbers, [f"INV-{n:06d}" for n in range(1, len(booking_ids) + 1)])
+        self.assertEqual(InvoiceSequence.objects.get(hotel=self.hotel).last_number, len(booking_ids))
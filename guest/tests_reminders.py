@@ -2,12 +2,16 @@ from datetime import timedelta, time
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 
 from chat.models import Conversation, CustomMessageTemplate, Message, MessageTemplate
 from guest.models import Guest, ReminderLog, Stay
+from guest.services_window import get_last_inbound_at, record_guest_inbound, window_status_many
 from guest.tasks import (
+    REMINDER_MAX_DELIVERY_ATTEMPTS,
+    reap_expired_reminder_leases,
     schedule_checkin_reminder,
     schedule_meal_reminders,
     send_breakfast_reminder,
@@ -19,6 +23,7 @@ from hotel.models import Hotel, Room, RoomCategory
 
 class ReminderTaskTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.hotel_tz = ZoneInfo('Asia/Kolkata')
         self.hotel = Hotel.objects.create(
             name='Reminder Test Hotel',
@@ -81,6 +86,7 @@ class ReminderTaskTests(TestCase):
             content='Need help',
         )
         Message.objects.filter(id=message.id).update(created_at=created_at)
+        Guest.objects.filter(id=self.guest.id).update(last_inbound_at=created_at)
         message.refresh_from_db()
         return message
 
@@ -436,3 +442,137 @@ class ReminderTaskTests(TestCase):
         body_parameters = components[0]['parameters']
         parameter_map = {item['parameter_name']: item['text'] for item in body_parameters}
         self.assertEqual(parameter_map['room_number'], '101, 102')
+
+    @patch('guest.tasks.send_whatsapp_template_message')
+    def test_meal_reminder_is_claimed_before_send_and_confirmed_after(self, mock_template_send):
+        stay = self._create_active_stay(checkout_delta_hours=30)
+        seen = {}
+
+        def capture_log_state(**kwargs):
+            log = ReminderLog.objects.get(stay=stay, reminder_type='breakfast')
+            seen['status'], seen['lease'] = log.status, log.lease_expires_at
+            return {'messages': [{'id': 'wamid-8'}]}
+
+        mock_template_send.side_effect = capture_log_state
+
+        result = send_breakfast_reminder(stay.id)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(seen['status'], 'sending')
+        self.assertGreater(seen['lease'], timezone.now())
+        log = ReminderLog.objects.get(stay=stay, reminder_type='breakfast')
+        self.assertEqual((log.status, log.delivery_attempts), ('sent', 1))
+        self.assertIsNone(log.lease_expires_at)
+
+    @patch('guest.tasks.send_whatsapp_template_message')
+    def test_meal_reminder_send_failure_releases_claim(self, mock_template_send):
+        stay = self._create_active_stay(checkout_delta_hours=30)
+        mock_template_send.side_effect = RuntimeError('graph api down')
+
+        with self.assertRaises(RuntimeError):
+            send_breakfast_reminder(stay.id)
+
+        log = ReminderLog.objects.get(stay=stay, reminder_type='breakfast')
+        self.assertEqual((log.status, log.reason), ('failed', 'whatsapp_send_failed'))
+        self.assertIsNone(log.lease_expires_at)
+
+    @patch('guest.tasks.send_whatsapp_template_message')
+    def test_live_claim_on_other_stay_keeps_one_reminder_per_guest(self, mock_template_send):
+        stay = self._create_active_stay(checkout_delta_hours=30)
+        other_stay = self._create_active_stay(checkout_delta_hours=30)
+        reminder_date = timezone.now().astimezone(self.hotel_tz).date()
+        ReminderLog.objects.create(
+            stay=other_stay,
+            reminder_type='breakfast',
+            reminder_date=reminder_date,
+            status='sending',
+            lease_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        result = send_breakfast_reminder(stay.id, reminder_date=reminder_date.isoformat())
+
+        self.assertEqual(result, {'status': 'skipped', 'reason': 'sending_for_guest'})
+        mock_template_send.assert_not_called()
+
+    @patch('guest.tasks.send_breakfast_reminder.apply_async')
+    def test_reaper_requeues_expired_leases_and_fails_exhausted_ones(self, mock_apply_async):
+        stay = self._create_active_stay(checkout_delta_hours=30)
+        today = timezone.now().astimezone(self.hotel_tz).date()
+        expired = timezone.now() - timedelta(minutes=1)
+        retryable = ReminderLog.objects.create(
+            stay=stay, reminder_type='breakfast', reminder_date=today,
+            status='sending', lease_expires_at=expired, delivery_attempts=1,
+        )
+        exhausted = ReminderLog.objects.create(
+            stay=stay, reminder_type='breakfast', reminder_date=today + timedelta(days=1),
+            status='sending', lease_expires_at=expired, delivery_attempts=REMINDER_MAX_DELIVERY_ATTEMPTS,
+        )
+        live = ReminderLog.objects.create(
+            stay=stay, reminder_type='breakfast', reminder_date=today + timedelta(days=2),
+            status='sending', lease_expires_at=timezone.now() + timedelta(minutes=5), delivery_attempts=1,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = reap_expired_reminder_leases()
+
+        self.assertEqual((result['requeued'], result['failed']), (1, 1))
+        retryable.refresh_from_db()
+        exhausted.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual((retryable.status, retryable.reason), ('scheduled', 'lease_expired'))
+        self.assertEqual((exhausted.status, exhausted.reason), ('failed', 'lease_expired'))
+        self.assertEqual(live.status, 'sending')
+        mock_apply_async.assert_called_once_with(args=[stay.id], kwargs={'reminder_date': today.isoformat()})
+
+
+class GuestServiceWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Window Hotel')
+        self.guests = [
+            Guest.objects.create(whatsapp_number=f'+1000000010{n}', full_name=f'Window Guest {n}')
+            for n in range(3)
+        ]
+
+    def test_inbound_guest_message_moves_window_forward_only(self):
+        conversation = Conversation.objects.create(guest=self.guests[0], hotel=self.hotel)
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(conversation=conversation, sender_type='guest', content='hi')
+            Message.objects.create(conversation=conversation, sender_type='staff', content='hello')
+
+        self.guests[0].refresh_from_db()
+        self.assertEqual(self.guests[0].last_inbound_at, message.created_at)
+        self.assertEqual(get_last_inbound_at(self.guests[0].id), message.created_at)
+
+        record_guest_inbound(self.guests[0].id, message.created_at - timedelta(hours=1))
+        self.guests[0].refresh_from_db()
+        self.assertEqual(self.guests[0].last_inbound_at, message.created_at)
+
+    def test_batch_window_status_is_one_query_then_cached(self):
+        now = timezone.now()
+        Guest.objects.filter(id=self.guests[0].id).update(last_inbound_at=now - timedelta(hours=2))
+        Guest.objects.filter(id=self.guests[1].id).update(last_inbound_at=now - timedelta(hours=30))
+        guest_ids = [guest.id for guest in self.guests]
+
+        with self.assertNumQueries(1):
+            statuses = window_status_many(guest_ids, now=now)
+        with self.assertNumQueries(0):
+            self.assertEqual(window_status_many(guest_ids, now=now), statuses)
+
+        self.assertTrue(statuses[self.guests[0].id][0])
+        self.assertFalse(statuses[self.guests[1].id][0])
+        self.assertEqual(statuses[self.guests[2].id], (False, None))
+
+    def test_cache_miss_does_not_overwrite_a_newer_inbound(self):
+        guest_id = self.guests[0].id
+        stale = timezone.now() - timedelta(hours=30)
+        Guest.objects.filter(id=guest_id).update(last_inbound_at=stale)
+
+        # A record_guest_inbound commits between the miss's read and its cache write
+        with patch('guest.services_window.cache.get_many', return_value={}):
+            with self.captureOnCommitCallbacks(execute=True):
+                fresh = record_guest_inbound(guest_id)
+            Guest.objects.filter(id=guest_id).update(last_inbound_at=stale)  # as the miss saw it
+            get_last_inbound_at(guest_id)
+
+        self.assertEqual(get_last_inbound_at(guest_id), fresh)
@@ -7,22 +7,27 @@ from lobbybee.utils.pagination import StandardizedPagination
 from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from django.contrib.auth import get_user_model
 import threading
 import math
+from datetime import datetime, time, timedelta
 
-from .models import Guest, GuestIdentityDocument, Stay, Booking, Invoice
+from .models import Guest, GuestIdentityDocument, Stay, Booking, Invoice, InvoiceExportJob
 from .serializers import (
     CreateGuestSerializer, CheckinOfflineSerializer, VerifyCheckinSerializer,
     StayListSerializer, BookingListSerializer, GuestResponseSerializer, ExtendStaySerializer,
     CheckoutSerializer, CheckoutBulkSerializer, CheckedInGuestGroupSerializer,
     BookingHistoryGroupSerializer,
-    InvoiceSerializer, InvoiceGenerateSerializer, InvoiceUpdateSerializer, LockAllInvoicesSerializer
+    InvoiceSerializer, InvoiceGenerateSerializer, InvoiceUpdateSerializer, LockAllInvoicesSerializer,
+    InvoiceBatchSerializer, InvoiceExportSerializer, InvoiceExportJobSerializer
 )
 from .services_checkout import checkout_stays_for_guest
-from .services_invoice import build_invoice_lines, compute_totals, next_invoice_number, invoice_booking_context
-from hotel.models import Hotel, Room, WiFiCredential, default_gst_slabs
+from .services_invoice import (
+    build_invoice_lines, compute_totals, next_invoice_number, invoice_booking_context,
+    prefetch_invoice_bookings, generate_invoices_batch,
+)
+from hotel.models import Hotel, Room, default_gst_slabs
 from hotel.permissions import IsHotelStaff, IsSameHotelUser
+from hotel.config_snapshot import get_hotel_config, get_hotel_departments, hotel_timezone
 from user.permissions import IsPlatformAdmin, IsPlatformStaff
 from .permissions import CanManageGuests, CanViewAndManageStays
 from flag_system.services import get_flag_summary_for_guest
@@ -708,77 +713,16 @@ class StayManagementViewSet(viewsets.GenericViewSet):
         """
         Resolve departments dynamically from active hotel staff assignments.
         """
-        default_departments = [choice[0] for choice in Conversation.DEPARTMENT_CHOICES]
-        if not hotel:
-            return default_departments
+        return get_hotel_departments(hotel)
 
-        User = get_user_model()
-        staff_departments = User.objects.filter(
-            hotel=hotel,
-            is_active_hotel_user=True
-        ).exclude(
-            department__isnull=True
-        ).values_list("department", flat=True)
-
-        resolved_departments = []
-        seen = set()
-
-        for department_value in staff_departments:
-            if isinstance(department_value, str):
-                values_to_check = [department_value]
-            elif isinstance(department_value, list):
-                values_to_check = department_value
-            else:
-                continue
-
-            for raw_department in values_to_check:
-                if not isinstance(raw_department, str):
-                    continue
-
-                raw_department = raw_department.strip()
-                if not raw_department:
-                    continue
-
-                canonical_department = next(
-                    (
-                        dept
-                        for dept in default_departments
-                        if dept.lower() == raw_department.lower()
-                    ),
-                    None,
-                )
-
-                if canonical_department and canonical_department not in seen:
-                    seen.add(canonical_department)
-                    resolved_departments.append(canonical_department)
-
-        return resolved_departments or default_departments
-
-    def _get_wifi_credentials_for_stay(self, stay):
+    def _get_wifi_credentials_for_stay(self, stay, hotel_config=None):
         """
         Get WiFi credentials for a stay using room floor + category preference.
         """
         if not stay.room:
             return None
-
-        # Prefer category-specific credentials for the room's floor.
-        credential = WiFiCredential.objects.filter(
-            hotel=stay.hotel,
-            floor=stay.room.floor,
-            room_category=stay.room.category,
-            is_active=True
-        ).first()
-
-        if credential:
-            return credential
-
-        # Fall back to floor-wide credentials.
-        return WiFiCredential.objects.filter(
-            hotel=stay.hotel,
-            floor=stay.room.floor,
-            room_category__isnull=True,
-            is_active=True
-        ).first()
+        hotel_config = hotel_config or get_hotel_config(stay.hotel_id)
+        return hotel_config.wifi_for_room(stay.room) if hotel_config else None
 
     def _build_room_context(self, stays):
         """
@@ -786,12 +730,17 @@ class StayManagementViewSet(viewsets.GenericViewSet):
         """
         room_entries = []
         seen_room_ids = set()
+        hotel_configs = {}
         for current_stay in stays:
             room = getattr(current_stay, 'room', None)
             if not room or room.id in seen_room_ids:
                 continue
             seen_room_ids.add(room.id)
-            wifi_credential = self._get_wifi_credentials_for_stay(current_stay)
+            if current_stay.hotel_id not in hotel_configs:
+                hotel_configs[current_stay.hotel_id] = get_hotel_config(current_stay.hotel_id)
+            wifi_credential = self._get_wifi_credentials_for_stay(
+                current_stay, hotel_configs[current_stay.hotel_id]
+            )
             room_entries.append({
                 'room_number': room.room_number,
                 'room_floor': room.floor,
@@ -1732,6 +1681,9 @@ class InvoiceViewSet(viewsets.GenericViewSet):
       GET    /api/invoices/              — list (filters below)
       GET    /api/invoices/{id}/         — retrieve
       POST   /api/invoices/lock-all/     — freeze invoices created on/before a date
+      POST   /api/invoices/generate-batch/  — generate/regenerate invoices for many bookings
+      POST   /api/invoices/export/          — start a background ZIP render of many invoices
+      GET    /api/invoices/export/{job_id}/ — export progress and download link
 
     List filters (query params, all optional):
       is_locked=true|false|all     booking=<id>         guest_id=<primary guest id>
@@ -1892,6 +1844,89 @@ class InvoiceViewSet(viewsets.GenericViewSet):
 
         return success_response(data={'locked_count': count}, message=f'{count} invoice(s) locked.')
 
+    @action(detail=False, methods=['post'], url_path='generate-batch')
+    def generate_batch(self, request):
+        """
+        Generate invoices for many bookings in one pass (month-end runs).
+
+        Bookings come from booking_ids or a check-out date range (cancelled bookings are
+        skipped). Existing invoices are left alone unless regenerate=true, and locked ones
+        are never touched. lock=true freezes everything this call writes.
+        """
+        serializer = InvoiceBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        hotel = request.user.hotel
+
+        bookings = Booking.objects.filter(hotel=hotel)
+        if data.get('booking_ids'):
+            bookings = bookings.filter(id__in=data['booking_ids'])
+        else:
+            # The range covers the hotel's local days, not UTC ones
+            tz = hotel_timezone(hotel.time_zone)
+            start = datetime.combine(data['date_from'], time.min, tzinfo=tz)
+            end = datetime.combine(data['date_to'] + timedelta(days=1), time.min, tzinfo=tz)
+            bookings = bookings.filter(
+                check_out_date__gte=start, check_out_date__lt=end,
+            ).exclude(status='cancelled')
+        bookings = list(prefetch_invoice_bookings(bookings.order_by('check_out_date', 'id')))
+
+        room_rates = {str(k): v for k, v in (data.get('room_rates') or {}).items()}
+        try:
+            result = generate_invoices_batch(
+                hotel, bookings,
+                user=request.user,
+                custom_rates=room_rates,
+                gst_override=data.get('gst_rate'),
+                regenerate=data['regenerate'],
+                lock=data['lock'],
+            )
+        except Exception as e:
+            logger.error(f"Error generating invoice batch: {str(e)}")
+            return error_response(f'Failed to generate invoices: {str(e)}', status=status.HTTP_400_BAD_REQUEST)
+
+        return success_response(
+            data={
+                'created': InvoiceSerializer(result['created'], many=True).data,
+                'updated': InvoiceSerializer(result['updated'], many=True).data,
+                'skipped': result['skipped'],
+            },
+            message=f"{len(result['created'])} created, {len(result['updated'])} updated, "
+                    f"{len(result['skipped'])} skipped.",
+        )
+
+    @action(detail=False, methods=['post'], url_path='export')
+    def export(self, request):
+        """Queue a ZIP render of the selected invoices; poll export/{job_id}/ for progress."""
+        from .tasks import render_invoice_export
+
+        serializer = InvoiceExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        qs = self.get_queryset()
+        if data.get('invoice_ids'):
+            qs = qs.filter(id__in=data['invoice_ids'])
+        else:
+            qs = qs.filter(created_at__date__gte=data['date_from'], created_at__date__lte=data['date_to'])
+        invoice_ids = list(qs.values_list('id', flat=True))
+        if not invoice_ids:
+            return error_response('No invoices match the selection.', status=status.HTTP_400_BAD_REQUEST)
+
+        job = InvoiceExportJob.objects.create(
+            hotel=request.user.hotel,
+            invoice_ids=invoice_ids,
+            total=len(invoice_ids),
+            created_by=request.user,
+        )
+        transaction.on_commit(lambda: render_invoice_export.delay(job.id))
+        return success_response(data=InvoiceExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<job_id>\d+)')
+    def export_status(self, request, job_id=None):
+        job = get_object_or_404(InvoiceExportJob, id=job_id, hotel=request.user.hotel)
+        return success_response(data=InvoiceExportJobSerializer(job).data)
+
 
 class ScheduleTestReminderView(APIView):
     """
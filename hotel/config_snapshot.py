@@ -0,0 +1,259 @@
+"""
+Read-only per-hotel configuration snapshot.
+
+Flows, reminder tasks and serializers keep asking the same questions about a hotel:
+which departments have active staff, when meals are served and whether their
+reminders are on, which timezone the hotel runs in, which WiFi credentials apply to
+a floor / room category and which payment QR codes are active. `get_hotel_config`
+answers all of them from one immutable `HotelConfig` built in a handful of queries.
+
+Snapshots are cached in process and in the shared cache under a per-hotel version
+stamp. Saving or deleting a Hotel, a staff User, a RoomCategory, a WiFiCredential or a PaymentQRCode
+bumps the stamp (see `hotel.signals`), so the next read rebuilds. A process re-checks
+the stamp at most every HOTEL_CONFIG_LOCAL_TTL seconds; within that window a hit
+costs no query and no cache round trip.
+"""
+import logging
+import time as time_module
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+
+_VERSION_KEY = 'hotel:config_version:{}'
+_SNAPSHOT_KEY = 'hotel:config:{}:{}'
+
+# {hotel_id: (HotelConfig, checked_at)} - per process, re-validated against the version stamp.
+_local = {}
+
+
+@dataclass(frozen=True)
+class MealSchedule:
+    meal_time: Optional[object]
+    reminder_enabled: bool
+
+
+@dataclass(frozen=True)
+class WiFiEntry:
+    network_name: str
+    password: str
+    floor: int
+    room_category_name: Optional[str]  # None for floor-wide credentials
+
+
+@dataclass(frozen=True)
+class PaymentQR:
+    id: str
+    name: str
+    upi_id: str
+    image: str
+
+
+@dataclass(frozen=True)
+class HotelConfig:
+    hotel_id: str
+    version: str
+    time_zone: str
+    check_in_time: object
+    check_out_time: object
+    departments: tuple
+    meals: MappingProxyType
+    wifi: MappingProxyType
+    payment_qr_codes: tuple
+
+    @property
+    def tz(self):
+        return hotel_timezone(self.time_zone)
+
+    def meal(self, meal_type):
+        return self.meals.get(meal_type, MealSchedule(None, False))
+
+    def wifi_for(self, floor, category_id=None):
+        """Most specific active credentials: floor + category first, then floor-wide."""
+        if category_id is not None and (floor, category_id) in self.wifi:
+            return self.wifi[(floor, category_id)]
+        return self.wifi.get((floor, None))
+
+    def wifi_for_room(self, room):
+        if room is None:
+            return None
+        return self.wifi_for(room.floor, room.category_id)
+
+    def wifi_for_rooms(self, rooms):
+        """{room.id: WiFiEntry or None} for any number of rooms of this hotel, without queries."""
+        return {room.id: self.wifi_for_room(room) for room in rooms}
+
+
+@lru_cache(maxsize=None)
+def hotel_timezone(name):
+    """ZoneInfo for a hotel's time_zone value, falling back to UTC when it is invalid."""
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, KeyError, ValueError):
+        logger.warning(f"Invalid hotel timezone '{name}', using UTC")
+        return ZoneInfo('UTC')
+
+
+def default_departments():
+    from chat.models import Conversation
+    return [choice[0] for choice in Conversation.DEPARTMENT_CHOICES]
+
+
+def resolve_departments(department_values):
+    """
+    Canonical conversation departments named by staff `department` JSON values
+    (a string or a list of strings), in first-seen order; all departments when none match.
+    """
+    defaults = default_departments()
+    canonical = {dept.lower(): dept for dept in defaults}
+    resolved = []
+    seen = set()
+
+    for department_value in department_values:
+        if isinstance(department_value, str):
+            values_to_check = [department_value]
+        elif isinstance(department_value, list):
+            values_to_check = department_value
+        else:
+            continue
+
+        for raw_department in values_to_check:
+            if not isinstance(raw_department, str):
+                continue
+            department = canonical.get(raw_department.strip().lower())
+            if department and department not in seen:
+                seen.add(department)
+                resolved.append(department)
+
+    return resolved or defaults
+
+
+def _build_payload(hotel_id):
+    """Plain, picklable description of the hotel's configuration (what goes into the shared cache)."""
+    from hotel.models import Hotel, PaymentQRCode, WiFiCredential
+    from user.models import User
+
+    hotel = Hotel.objects.filter(id=hotel_id).values(
+        'time_zone', 'check_in_time', 'check_out_time',
+        *[f'{meal}_time' for meal in MEAL_TYPES],
+        *[f'{meal}_reminder' for meal in MEAL_TYPES],
+    ).first()
+    if hotel is None:
+        return None
+
+    staff_departments = User.objects.filter(
+        hotel_id=hotel_id,
+        is_active_hotel_user=True,
+    ).exclude(department__isnull=True).values_list('department', flat=True)
+
+    wifi = WiFiCredential.objects.filter(hotel_id=hotel_id, is_active=True).values_list(
+        'floor', 'room_category_id', 'network_name', 'password', 'room_category__name'
+    )
+
+    qr_codes = PaymentQRCode.objects.filter(hotel_id=hotel_id, active=True).order_by('created_at').values_list(
+        'id', 'name', 'upi_id', 'image'
+    )
+
+    return {
+        'time_zone': hotel['time_zone'],
+        'check_in_time': hotel['check_in_time'],
+        'check_out_time': hotel['check_out_time'],
+        'departments': resolve_departments(staff_departments),
+        'meals': {
+            meal: (hotel[f'{meal}_time'], hotel[f'{meal}_reminder']) for meal in MEAL_TYPES
+        },
+        'wifi': [list(row) for row in wifi],
+        'payment_qr_codes': [(str(qr_id), name, upi_id, image) for qr_id, name, upi_id, image in qr_codes],
+    }
+
+
+def _from_payload(hotel_id, version, payload):
+    return HotelConfig(
+        hotel_id=str(hotel_id),
+        version=version,
+        time_zone=payload['time_zone'] or 'UTC',
+        check_in_time=payload['check_in_time'],
+        check_out_time=payload['check_out_time'],
+        departments=tuple(payload['departments']),
+        meals=MappingProxyType({
+            meal: MealSchedule(meal_time, bool(enabled))
+            for meal, (meal_time, enabled) in payload['meals'].items()
+        }),
+        wifi=MappingProxyType({
+            (floor, category_id): WiFiEntry(network_name, password, floor, category_name)
+            for floor, category_id, network_name, password, category_name in payload['wifi']
+        }),
+        payment_qr_codes=tuple(PaymentQR(*qr) for qr in payload['payment_qr_codes']),
+    )
+
+
+def _current_version(hotel_id):
+    key = _VERSION_KEY.format(hotel_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_hotel_config(hotel):
+    """HotelConfig for a Hotel instance or id, or None when the hotel does not exist."""
+    if hotel is None:
+        return None
+    hotel_id = getattr(hotel, 'pk', hotel)
+    local_key = str(hotel_id)
+    now = time_module.monotonic()
+
+    cached = _local.get(local_key)
+    if cached and now - cached[1] < settings.HOTEL_CONFIG_LOCAL_TTL:
+        return cached[0]
+
+    version = _current_version(hotel_id)
+    if cached and cached[0].version == version:
+        _local[local_key] = (cached[0], now)
+        return cached[0]
+
+    snapshot_key = _SNAPSHOT_KEY.format(hotel_id, version)
+    payload = cache.get(snapshot_key)
+    if payload is None:
+        payload = _build_payload(hotel_id)
+        if payload is None:
+            return None
+        cache.set(snapshot_key, payload, timeout=settings.HOTEL_CONFIG_CACHE_TIMEOUT)
+
+    config = _from_payload(hotel_id, version, payload)
+    _local[local_key] = (config, now)
+    return config
+
+
+def get_hotel_departments(hotel):
+    """Departments offered in the guest menu; every department when the hotel is unknown."""
+    config = get_hotel_config(hotel)
+    return list(config.departments) if config else default_departments()
+
+
+def invalidate_hotel_config(hotel_id):
+    """
+    Retire the hotel's current snapshot. The stamp is bumped now (so this transaction reads
+    fresh data) and again on commit (so a reader racing the commit cannot keep a stale
+    snapshot under the new stamp).
+    """
+    if hotel_id is None:
+        return
+
+    def bump():
+        _local.pop(str(hotel_id), None)
+        cache.set(_VERSION_KEY.format(hotel_id), uuid.uuid4().hex, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
@@ -6,6 +6,7 @@ from django.core.exceptions import ValidationError
 
 from user.models import User
 from lobbybee.utils.file_url import upload_to_hotel_documents, upload_to_hotel_logo
+from lobbybee.utils.response_cache import HOTEL_ROOMS, PLATFORM_STATS, invalidate_tags
 
 # Default GST slabs (India, eff. 22 Sep 2025): per room per night —
 # <=1000 -> 0%, 1001-7500 -> 5%, >7500 -> 18%. New hotels start with these; hotels with no slabs
@@ -214,9 +215,12 @@ class RoomManager(models.Manager):
             raise ValidationError("No new rooms to create. They may already exist.")
 
         try:
-            return self.bulk_create(rooms_to_create)
+            rooms = self.bulk_create(rooms_to_create)
         except IntegrityError:
             raise ValidationError("Some rooms already exist in the database. Please check the room numbers.")
+        # bulk_create skips post_save, so hotelstat's rooms_changed receiver never runs
+        invalidate_tags(HOTEL_ROOMS.format(hotel_id=hotel.id), PLATFORM_STATS)
+        return rooms
 
     def get_floors_for_hotel(self, hotel):
         return self.filter(hotel=hotel).values_list('floor', flat=True).distinct().order_by('floor')
@@ -83,7 +83,7 @@ class RoomPermissions(BasePermission):
             return False
 
         # Read access for all hotel staff
-        if view.action in ['list', 'retrieve', 'floors']:
+        if view.action in ['list', 'retrieve', 'floors', 'board']:
             return True
         
         # Allow partial_update and update for status changes by staff
@@ -0,0 +1,188 @@
+"""
+Compact room-state projection ("room board") per hotel.
+
+The front desk renders every room as (id, number, floor, category, status, current
+guest first name). The board is kept in the shared cache and patched on every room
+or stay transition, so polling it costs one cache read; clients send the ETag back
+and get 304 until something changes. Each patch is also pushed as a diff to the
+hotel's `room_board_<hotel_id>` channel group, which front-desk ChatConsumer
+connections join.
+
+Changes are collected per transaction and applied on commit: a checkout that frees
+three rooms re-reads those three rows once, after the data is visible, and sends one
+diff.
+
+Every change bumps a per-hotel generation counter before re-reading rows, and each
+cached board records the generation it was built under. A board whose generation is
+behind the counter is treated as a miss, so a patch or rebuild that raced a newer
+change can never be served.
+"""
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from guest.name_utils import get_first_name_from_full_name
+
+logger = logging.getLogger(__name__)
+
+BOARD_FIELDS = ('id', 'room_number', 'floor', 'category', 'status', 'guest_first_name')
+
+_BOARD_KEY = 'hotel:room_board:{}'
+_LOCK_KEY = 'hotel:room_board_lock:{}'
+_GENERATION_KEY = 'hotel:room_board_generation:{}'
+_BOARD_TIMEOUT = 24 * 60 * 60
+_LOCK_TIMEOUT = 5
+
+# {hotel_id: set(room_id)} waiting for the current transaction to commit.
+_pending = threading.local()
+
+
+def room_board_group_name(hotel_id):
+    return f"room_board_{hotel_id}"
+
+
+def board_etag(board):
+    return f'"{board["version"]}"'
+
+
+def _new_version():
+    return time.time_ns() // 1000
+
+
+def _room_rows(hotel_id, room_ids=None):
+    from guest.models import Stay
+    from hotel.models import Room
+
+    active_guest = Stay.objects.filter(room=OuterRef('pk'), status='active').order_by('pk')
+    rooms = Room.objects.filter(hotel_id=hotel_id)
+    if room_ids is not None:
+        rooms = rooms.filter(id__in=room_ids)
+    rows = rooms.annotate(
+        guest_full_name=Subquery(active_guest.values('guest__full_name')[:1]),
+    ).values_list('id', 'room_number', 'floor', 'category__name', 'status', 'guest_full_name')
+    return {
+        str(room_id): [room_id, number, floor, category, status,
+                       get_first_name_from_full_name(full_name) if full_name else None]
+        for room_id, number, floor, category, status, full_name in rows
+    }
+
+
+def _bump_generation(hotel_id):
+    key = _GENERATION_KEY.format(hotel_id)
+    # Seeded from the clock so a counter lost to eviction restarts above every old value.
+    cache.add(key, _new_version(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        generation = _new_version()
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+def get_room_board(hotel_id):
+    """{'version': int, 'rooms': {room_id: row}} for the hotel, built in one query on a miss."""
+    key = _BOARD_KEY.format(hotel_id)
+    generation_key = _GENERATION_KEY.format(hotel_id)
+    cached = cache.get_many([key, generation_key])
+    board, generation = cached.get(key), cached.get(generation_key)
+    if board is None or generation is None or board.get('generation') != generation:
+        if generation is None:
+            generation = _bump_generation(hotel_id)
+        board = {'version': _new_version(), 'generation': generation, 'rooms': _room_rows(hotel_id)}
+        cache.set(key, board, timeout=_BOARD_TIMEOUT)
+    return board
+
+
+def serialize_board(board):
+    rows = sorted(board['rooms'].values(), key=lambda row: (row[2], str(row[1])))
+    return {'version': board['version'], 'fields': list(BOARD_FIELDS), 'rooms': rows}
+
+
+def mark_rooms_changed(hotel_id, room_ids):
+    """Queue rooms for a board refresh when the current transaction commits (or now, outside one)."""
+    if not hotel_id or not room_ids:
+        return
+    pending = getattr(_pending, 'rooms', None)
+    if pending is None:
+        pending = _pending.rooms = {}
+    pending.setdefault(hotel_id, set()).update(room_ids)
+    # The first callback to run flushes everything queued so far; the rest find nothing.
+    # Rooms queued by a rolled-back transaction ride along with the next flush (a re-read is harmless).
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    pending = getattr(_pending, 'rooms', None) or {}
+    _pending.rooms = None
+    for hotel_id, room_ids in pending.items():
+        try:
+            refresh_rooms(hotel_id, room_ids)
+        except Exception as e:
+            logger.error(f"Room board refresh failed for hotel {hotel_id}: {e}", exc_info=True)
+
+
+def refresh_rooms(hotel_id, room_ids):
+    """Re-read `room_ids`, patch the cached board and broadcast what changed."""
+    room_ids = {int(room_id) for room_id in room_ids}
+    # Bumped before the re-read, so whatever board is cached now is already out of date.
+    generation = _bump_generation(hotel_id)
+    rows = _room_rows(hotel_id, room_ids)
+    key = _BOARD_KEY.format(hotel_id)
+    lock_key = _LOCK_KEY.format(hotel_id)
+
+    board = None
+    if cache.add(lock_key, 1, timeout=_LOCK_TIMEOUT):
+        # Without the lock another worker is patching; the bump alone makes the next read rebuild.
+        try:
+            board = cache.get(key)
+            if board is not None and board.get('generation') != generation - 1:
+                # Built before some other change that has not been patched in: leave it to the rebuild.
+                board = None
+            if board is not None:
+                changed = {
+                    str(room_id): rows.get(str(room_id)) for room_id in room_ids
+                    if board['rooms'].get(str(room_id)) != rows.get(str(room_id))
+                }
+                board['generation'] = generation
+                if not changed:
+                    cache.set(key, board, timeout=_BOARD_TIMEOUT)
+                    return None
+                for room_key, row in changed.items():
+                    if row is None:
+                        board['rooms'].pop(room_key, None)
+                    else:
+                        board['rooms'][room_key] = row
+                board['version'] = max(_new_version(), board['version'] + 1)
+                cache.set(key, board, timeout=_BOARD_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+
+    diff = {
+        'hotel_id': str(hotel_id),
+        'version': board['version'] if board else None,
+        'fields': list(BOARD_FIELDS),
+        'rooms': [rows[str(room_id)] for room_id in sorted(room_ids) if str(room_id) in rows],
+        'removed': sorted(room_id for room_id in room_ids if str(room_id) not in rows),
+    }
+    _broadcast(hotel_id, diff)
+    return diff
+
+
+def _broadcast(hotel_id, diff):
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(
+            room_board_group_name(hotel_id),
+            {'type': 'room_board_update', 'data': diff},
+        )
+    except Exception as e:
+        logger.warning(f"Failed to broadcast room board diff for hotel {hotel_id}: {e}")
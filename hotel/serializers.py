@@ -1,6 +1,6 @@
 from rest_framework import serializers
-from django.db import models
 from .models import Hotel, HotelDocument, Room, RoomCategory, PaymentQRCode, WiFiCredential
+from .config_snapshot import get_hotel_config
 from user.serializers import UserSerializer
 
 class HotelDocumentSerializer(serializers.ModelSerializer):
@@ -254,20 +254,16 @@ class RoomWiFiCredentialSerializer(serializers.ModelSerializer):
         fields = ('id', 'room_number', 'floor', 'category', 'wifi_credentials')
 
     def get_wifi_credentials(self, obj):
-        # Get the most specific WiFi credentials for this room
-        credential = WiFiCredential.objects.filter(
-            hotel=obj.hotel,
-            floor=obj.floor,
-            is_active=True
-        ).filter(
-            models.Q(room_category=obj.category) | models.Q(room_category__isnull=True)
-        ).order_by('-room_category__id').first()  # Prefer room-specific credentials
+        # Most specific active credentials for the room, from the hotel's WiFi index.
+        # Pass context={'hotel_config': ...} when serializing many rooms of one hotel.
+        hotel_config = self.context.get('hotel_config') or get_hotel_config(obj.hotel_id)
+        credential = hotel_config.wifi_for_room(obj) if hotel_config else None
 
         if credential:
             return {
                 'network_name': credential.network_name,
                 'password': credential.password,
                 'floor': credential.floor,
-                'room_category': credential.room_category.name if credential.room_category else 'All categories'
+                'room_category': credential.room_category_name or 'All categories'
             }
         return None
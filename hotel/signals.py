@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from guest.models import Stay
+from .config_snapshot import invalidate_hotel_config
+from .models import Hotel, PaymentQRCode, Room, RoomCategory, WiFiCredential
+from .room_board import mark_rooms_changed
+
+# User fields that feed the hotel config snapshot (department menu).
+_STAFF_CONFIG_FIELDS = {'hotel', 'hotel_id', 'department', 'is_active_hotel_user'}
+# Stay fields that feed the room board (occupant name).
+_STAY_BOARD_FIELDS = {'status', 'room', 'room_id'}
+
+
+@receiver([post_save, post_delete], sender=Hotel)
+def hotel_changed(sender, instance, **kwargs):
+    invalidate_hotel_config(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=WiFiCredential)
+@receiver([post_save, post_delete], sender=RoomCategory)
+@receiver([post_save, post_delete], sender=PaymentQRCode)
+def hotel_setting_changed(sender, instance, **kwargs):
+    invalidate_hotel_config(instance.hotel_id)
+
+
+def _touches_staff_config(update_fields):
+    # update_fields=['last_login'] on every sign-in must not retire the snapshot.
+    return update_fields is None or bool(_STAFF_CONFIG_FIELDS.intersection(update_fields))
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def staff_moving(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and _touches_staff_config(update_fields):
+        previous = sender.objects.filter(pk=instance.pk).values_list('hotel_id', flat=True).first()
+        if previous and previous != instance.hotel_id:
+            invalidate_hotel_config(previous)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def staff_changed(sender, instance, update_fields=None, **kwargs):
+    if _touches_staff_config(update_fields):
+        invalidate_hotel_config(instance.hotel_id)
+
+
+@receiver([post_save, post_delete], sender=Room)
+def room_changed(sender, instance, **kwargs):
+    mark_rooms_changed(instance.hotel_id, [instance.pk])
+
+
+@receiver(post_save, sender=RoomCategory)
+def room_category_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        mark_rooms_changed(instance.hotel_id, list(instance.rooms.values_list('id', flat=True)))
+
+
+@receiver([post_save, post_delete], sender=Stay)
+def stay_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not _STAY_BOARD_FIELDS.intersection(update_fields):
+        return
+    if instance.room_id:
+        mark_rooms_changed(instance.hotel_id, [instance.room_id])
@@ -1,3 +1,237 @@
+from datetime import time, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from guest.models import Guest, Stay
+from user.models import User
+from .config_snapshot import get_hotel_config, get_hotel_departments
+from .models import Hotel, PaymentQRCode, Room, RoomCategory, WiFiCredential
+from .serializers import RoomWiFiCredentialSerializer
+
+
+class HotelConfigSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(
+            name="Snapshot Hotel",
+            time_zone="Asia/Kolkata",
+            breakfast_time=time(7, 30),
+            breakfast_reminder=True,
+        )
+        self.category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Suite", base_price=2000, max_occupancy=2, amenities=[],
+        )
+        self.staff = User.objects.create_user(
+            username="snapstaff", email="snapstaff@example.com", password="password123", user_type="department_staff",
+            hotel=self.hotel, department=["housekeeping", "Room Service "],
+        )
+        User.objects.create_user(
+            username="snapinactive", email="snapinactive@example.com", password="password123", user_type="department_staff",
+            hotel=self.hotel, department="Restaurant", is_active_hotel_user=False,
+        )
+        WiFiCredential.objects.create(hotel=self.hotel, floor=1, network_name="Floor1", password="f1")
+        WiFiCredential.objects.create(
+            hotel=self.hotel, floor=1, room_category=self.category, network_name="Suite1", password="s1",
+        )
+        PaymentQRCode.objects.create(hotel=self.hotel, name="UPI", upi_id="hotel@upi", image="qr.png")
+        PaymentQRCode.objects.create(hotel=self.hotel, name="Old", upi_id="old@upi", image="old.png", active=False)
+
+    def test_snapshot_contents_and_warm_reads_make_no_queries(self):
+        config = get_hotel_config(self.hotel)
+
+        self.assertEqual(config.departments, ("Housekeeping", "Room Service"))
+        self.assertEqual(str(config.tz), "Asia/Kolkata")
+        self.assertEqual(config.meal("breakfast").meal_time, time(7, 30))
+        self.assertTrue(config.meal("breakfast").reminder_enabled)
+        self.assertFalse(config.meal("dinner").reminder_enabled)
+        self.assertEqual(config.wifi_for(1, self.category.id).network_name, "Suite1")
+        self.assertEqual(config.wifi_for(1, self.category.id + 1).network_name, "Floor1")
+        self.assertIsNone(config.wifi_for(2, self.category.id))
+        self.assertEqual([qr.upi_id for qr in config.payment_qr_codes], ["hotel@upi"])
+        with self.assertRaises(TypeError):
+            config.meals["lunch"] = None
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_hotel_config(self.hotel.id), config)
+            self.assertEqual(get_hotel_departments(self.hotel), ["Housekeeping", "Room Service"])
+
+    def test_saves_retire_the_snapshot(self):
+        get_hotel_config(self.hotel)
+
+        self.staff.department = "Reception"
+        self.staff.save()
+        self.assertEqual(get_hotel_config(self.hotel).departments, ("Reception",))
+
+        WiFiCredential.objects.filter(room_category=self.category).get().delete()
+        self.assertEqual(get_hotel_config(self.hotel).wifi_for(1, self.category.id).network_name, "Floor1")
+
+        self.hotel.dinner_reminder = True
+        self.hotel.save()
+        self.assertTrue(get_hotel_config(self.hotel).meal("dinner").reminder_enabled)
+
+    def test_login_timestamp_update_keeps_snapshot(self):
+        config = get_hotel_config(self.hotel)
+
+        self.staff.last_login = timezone.now()
+        self.staff.save(update_fields=["last_login"])
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_hotel_config(self.hotel), config)
+
+    def test_unknown_hotel_falls_back_to_all_departments(self):
+        self.assertIsNone(get_hotel_config(None))
+        self.assertIn("Reception", get_hotel_departments(None))
+
+
+class RoomWiFiResolutionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="WiFi Hotel")
+        self.admin = User.objects.create_user(
+            username="wifiadmin", email="wifiadmin@example.com", password="password123",
+            user_type="hotel_admin", hotel=self.hotel,
+        )
+        self.suite = RoomCategory.objects.create(
+            hotel=self.hotel, name="Suite", base_price=2000, max_occupancy=2, amenities=[],
+        )
+        self.standard = RoomCategory.objects.create(
+            hotel=self.hotel, name="Standard", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        self.floor_wide = WiFiCredential.objects.create(hotel=self.hotel, floor=1, network_name="Floor1", password="f1")
+        self.suite_wifi = WiFiCredential.objects.create(
+            hotel=self.hotel, floor=1, room_category=self.suite, network_name="Suite1", password="s1",
+        )
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, room_number=f"1{n:02d}", floor=1,
+                                category=self.suite if n % 2 else self.standard)
+            for n in range(6)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_many_rooms_resolve_without_queries(self):
+        config = get_hotel_config(self.hotel)
+        with self.assertNumQueries(0):
+            data = RoomWiFiCredentialSerializer(self.rooms, many=True, context={"hotel_config": config}).data
+
+        self.assertEqual(
+            [(room["room_number"], room["wifi_credentials"]["network_name"]) for room in data],
+            [("100", "Floor1"), ("101", "Suite1"), ("102", "Floor1"),
+             ("103", "Suite1"), ("104", "Floor1"), ("105", "Suite1")],
+        )
+        self.assertEqual(data[0]["wifi_credentials"]["room_category"], "All categories")
+        self.assertEqual(data[1]["wifi_credentials"]["room_category"], "Suite")
+
+    def test_viewset_writes_refresh_room_lookup(self):
+        url = f"/api/wifi-credentials/by-room/{self.rooms[1].id}/"
+        self.assertEqual(self.client.get(url).data["data"]["wifi_credentials"]["network_name"], "Suite1")
+
+        response = self.client.put(
+            f"/api/wifi-credentials/{self.suite_wifi.id}/",
+            {"floor": 1, "room_category": self.suite.id, "network_name": "Suite1-5G", "password": "s5"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url).data["data"]["wifi_credentials"]["network_name"], "Suite1-5G")
+
+        self.client.post(f"/api/wifi-credentials/{self.suite_wifi.id}/toggle-active/")
+        self.assertEqual(self.client.get(url).data["data"]["wifi_credentials"]["network_name"], "Floor1")
+
+        self.client.delete(f"/api/wifi-credentials/{self.floor_wide.id}/")
+        self.assertIsNone(self.client.get(url).data["data"]["wifi_credentials"])
+
+
+class RoomBoardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Board Hotel")
+        self.receptionist = User.objects.create_user(
+            username="boarddesk", email="boarddesk@example.com", password="password123",
+            user_type="receptionist", hotel=self.hotel,
+        )
+        self.category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Deluxe", base_price=1500, max_occupancy=2, amenities=[],
+        )
+        self.room_a = Room.objects.create(hotel=self.hotel, room_number="201", category=self.category, floor=2)
+        self.room_b = Room.objects.create(hotel=self.hotel, room_number="101", category=self.category, floor=1)
+        self.guest = Guest.objects.create(whatsapp_number="+15554000001", full_name="Asha Menon")
+        self.client.force_authenticate(user=self.receptionist)
+
+    def _board(self, **headers):
+        return self.client.get("/api/rooms/board/", **headers)
+
+    def test_board_is_compact_and_supports_conditional_get(self):
+        response = self._board()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["fields"], ["id", "room_number", "floor", "category", "status", "guest_first_name"])
+        self.assertEqual(data["rooms"], [
+            [self.room_b.id, "101", 1, "Deluxe", "available", None],
+            [self.room_a.id, "201", 2, "Deluxe", "available", None],
+        ])
+
+        with self.assertNumQueries(0):
+            not_modified = self._board(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    @patch("hotel.room_board._broadcast")
+    def test_checkin_and_checkout_patch_board_and_push_diffs(self, mock_broadcast):
+        etag = self._board()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stay = Stay.objects.create(
+                hotel=self.hotel, guest=self.guest, room=self.room_a, status="active",
+                check_in_date=timezone.now(), check_out_date=timezone.now() + timedelta(days=1),
+            )
+            self.room_a.status = "occupied"
+            self.room_a.save()
+
+        hotel_id, diff = mock_broadcast.call_args[0]
+        self.assertEqual(hotel_id, self.hotel.id)
+        self.assertIn([self.room_a.id, "201", 2, "Deluxe", "occupied", "Asha"], diff["rooms"])
+        response = self._board(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["version"], diff["version"])
+        self.assertIn([self.room_a.id, "201", 2, "Deluxe", "occupied", "Asha"], response.data["data"]["rooms"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stay.status = "completed"
+            stay.save(update_fields=["status"])
+            self.room_a.status = "cleaning"
+            self.room_a.save()
+
+        self.assertEqual(mock_broadcast.call_args[0][1]["rooms"], [[self.room_a.id, "201", 2, "Deluxe", "cleaning", None]])
+
+    @patch("hotel.room_board._broadcast")
+    def test_board_patched_under_a_held_lock_is_not_served_stale(self, mock_broadcast):
+        key = f"hotel:room_board:{self.hotel.id}"
+        self._board()
+        before_change = cache.get(key)
+
+        # Another worker holds the patch lock, then writes back the board it built before this change
+        cache.add(f"hotel:room_board_lock:{self.hotel.id}", 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room_b.status = "maintenance"
+            self.room_b.save()
+        cache.set(key, before_change)
+
+        self.assertEqual(self._board().data["data"]["rooms"][0][4], "maintenance")
+
+    @patch("hotel.room_board._broadcast")
+    def test_status_update_through_viewset_and_delete(self, mock_broadcast):
+        self._board()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/rooms/{self.room_b.id}/", {"status": "maintenance"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._board().data["data"]["rooms"][0][4], "maintenance")
 
-# Create your tests here.
+        room_id = self.room_b.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room_b.delete()
+        self.assertEqual(mock_broadcast.call_args[0][1]["removed"], [room_id])
+        self.assertEqual([row[0] for row in self._board().data["data"]["rooms"]], [self.room_a.id])
@@ -1,4 +1,4 @@
-from django.http import Http404
+from django.http import Http404, HttpResponseNotModified
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status, generics, filters
 from rest_framework.exceptions import PermissionDenied, ValidationError
@@ -34,6 +34,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 # Set up logger
 logger = logging.getLogger(__name__)
 from .filters import RoomFilter
+from .room_board import board_etag, get_room_board, mark_rooms_changed, serialize_board
 
 
 class IsVerifiedUser(permissions.BasePermission):
@@ -500,6 +501,8 @@ class RoomViewSet(viewsets.ModelViewSet):
                 all_created_rooms.extend(created_rooms)
 
             self._log_rooms_added(all_created_rooms)
+            # bulk_create skips post_save, so the room board is told directly.
+            mark_rooms_changed(request.user.hotel_id, [room.pk for room in all_created_rooms])
             return created_response(
                 message=f"{len(all_created_rooms)} rooms created successfully."
             )
@@ -541,6 +544,22 @@ class RoomViewSet(viewsets.ModelViewSet):
         floors = Room.objects.get_floors_for_hotel(request.user.hotel)
         return success_response(data={"floors": list(floors)})
 
+    @action(detail=False, methods=['get'], url_path='board')
+    def board(self, request):
+        """
+        Compact room board: one row per room with the current guest's first name.
+        Send the ETag back in If-None-Match to get 304 until a room changes;
+        live diffs arrive over the chat WebSocket as `room_board_diff`.
+        """
+        board = get_room_board(request.user.hotel_id)
+        etag = board_etag(board)
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = success_response(data=serialize_board(board))
+        response['ETag'] = etag
+        return response
+
 
 class PaymentQRCodeViewSet(viewsets.ModelViewSet):
     """
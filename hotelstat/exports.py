@@ -0,0 +1,276 @@
+"""
+Report filters shared by the history views and their streamed CSV / JSONL exports.
+
+The `*_queryset` builders hold the filtering the guest-history, room-history,
+conversation-history and feedback-analytics views apply, so an export of a report
+always contains exactly the rows the report shows. `EXPORT_REPORTS` describes each
+export as flat `values()` rows which are read with `iterator(chunk_size=...)` and
+encoded one row at a time, so neither the streamed response nor the background
+job ever hold the full result in memory.
+"""
+import csv
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from chat.models import ArchivedMessage, Conversation, Message
+from guest.models import Feedback, Guest, Stay
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class ReportFilterError(ValueError):
+    """Invalid report filter; the message is safe to return to the client."""
+
+
+def parse_report_filters(params, allowed):
+    """Parse the report query params named in `allowed` the same way the report views do."""
+    filters = {}
+    try:
+        for name in ('start_date', 'end_date'):
+            if name in allowed and params.get(name):
+                filters[name] = datetime.strptime(params.get(name), '%Y-%m-%d').date()
+    except ValueError:
+        raise ReportFilterError("Invalid date format. Use YYYY-MM-DD.")
+
+    if 'room_id' in allowed and params.get('room_id'):
+        try:
+            filters['room_id'] = int(params.get('room_id'))
+        except ValueError:
+            raise ReportFilterError("Invalid room_id format.")
+
+    for name in ('guest_whatsapp', 'search'):
+        if name in allowed and params.get(name):
+            filters[name] = params.get(name)
+    return filters
+
+
+def _guest_search_q(search, prefix=''):
+    return (
+        Q(**{f'{prefix}full_name__icontains': search}) |
+        Q(**{f'{prefix}whatsapp_number__icontains': search}) |
+        Q(**{f'{prefix}identity_documents__document_number__icontains': search})
+    )
+
+
+def history_stays_queryset(hotel, start_date=None, end_date=None, guest_whatsapp=None, room_id=None):
+    """Stays of `hotel` annotated with effective check-in/out, limited to those overlapping the range."""
+    stays = Stay.objects.filter(hotel=hotel).annotate(
+        effective_check_in=Coalesce('actual_check_in', 'check_in_date'),
+        effective_check_out=Coalesce('actual_check_out', 'check_out_date')
+    )
+    if start_date:
+        stays = stays.filter(effective_check_out__date__gte=start_date)
+    if end_date:
+        stays = stays.filter(effective_check_in__date__lte=end_date)
+    if guest_whatsapp:
+        stays = stays.filter(guest__whatsapp_number=guest_whatsapp)
+    if room_id:
+        stays = stays.filter(room_id=room_id)
+    return stays
+
+
+def guest_history_queryset(hotel, start_date=None, end_date=None, guest_whatsapp=None, search=None):
+    """Guests who stayed at `hotel` (during the range, when given)."""
+    guests = Guest.objects.filter(stays__hotel=hotel).distinct()
+    if start_date or end_date:
+        guests = guests.filter(
+            stays__in=history_stays_queryset(hotel, start_date=start_date, end_date=end_date)
+        ).distinct()
+    if guest_whatsapp:
+        guests = guests.filter(whatsapp_number=guest_whatsapp)
+    if search:
+        guests = guests.filter(_guest_search_q(search)).distinct()
+    return guests
+
+
+def conversation_history_queryset(hotel, start_date=None, end_date=None):
+    conversations = Conversation.objects.filter(hotel=hotel)
+    if start_date:
+        conversations = conversations.filter(created_at__gte=start_date)
+    if end_date:
+        conversations = conversations.filter(created_at__lte=end_date)
+    return conversations.order_by('-created_at')
+
+
+def feedback_analytics_queryset(hotel, start_date=None, end_date=None, room_id=None, guest_whatsapp=None, search=None):
+    feedback = Feedback.objects.filter(stay__hotel=hotel)
+    # Day-inclusive; __date avoids naive midnight comparisons that can hide same-day data.
+    if start_date:
+        feedback = feedback.filter(created_at__date__gte=start_date)
+    if end_date:
+        feedback = feedback.filter(created_at__date__lte=end_date)
+    if room_id:
+        feedback = feedback.filter(stay__room_id=room_id)
+    if guest_whatsapp:
+        feedback = feedback.filter(guest__whatsapp_number=guest_whatsapp)
+    if search:
+        feedback = feedback.filter(_guest_search_q(search, prefix='guest__')).distinct()
+    return feedback.order_by('-created_at')
+
+
+def _guest_history_rows(hotel, search=None, **filters):
+    stays = history_stays_queryset(hotel, **filters)
+    if search:
+        stays = stays.filter(guest__in=guest_history_queryset(hotel, search=search, **filters))
+    return stays.order_by('guest_id', '-effective_check_in')
+
+
+def _room_history_rows(hotel, **filters):
+    return history_stays_queryset(hotel, **filters).filter(room__isnull=False).order_by(
+        'room__room_number', '-effective_check_in'
+    )
+
+
+def conversation_message_count():
+    """Live plus archived messages of the conversation, as an annotation (archived ones have left `messages`)."""
+    live = Message.objects.filter(
+        conversation=OuterRef('pk')
+    ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+    archived = ArchivedMessage.objects.filter(
+        conversation=OuterRef('pk')
+    ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(live), 0) + Coalesce(Subquery(archived), 0)
+
+
+def _conversation_history_rows(hotel, **filters):
+    active_stays = Stay.objects.filter(guest=OuterRef('guest'), hotel=hotel, status='active')
+    return conversation_history_queryset(hotel, **filters).annotate(
+        message_count=conversation_message_count(),
+        room_number=Subquery(active_stays.values('room__room_number')[:1]),
+    )
+
+
+class ExportReport:
+    """One exportable report: accepted filters, row source and (column, values() key) pairs."""
+
+    def __init__(self, name, filters, rows, columns):
+        self.name = name
+        self.filters = filters
+        self.rows = rows
+        self.columns = columns
+
+    def queryset(self, hotel, filters):
+        return self.rows(hotel, **filters).values(*[key for _, key in self.columns])
+
+    def iter_rows(self, hotel, filters, chunk_size=None):
+        chunk_size = chunk_size or getattr(settings, 'HOTELSTAT_EXPORT_CHUNK_SIZE', 2000)
+        for values in self.queryset(hotel, filters).iterator(chunk_size=chunk_size):
+            yield {column: values[key] for column, key in self.columns}
+
+
+EXPORT_REPORTS = {
+    report.name: report for report in (
+        ExportReport(
+            'guest-history',
+            filters=('start_date', 'end_date', 'guest_whatsapp', 'search'),
+            rows=_guest_history_rows,
+            columns=[
+                ('guest_id', 'guest_id'),
+                ('guest_name', 'guest__full_name'),
+                ('whatsapp_number', 'guest__whatsapp_number'),
+                ('email', 'guest__email'),
+                ('nationality', 'guest__nationality'),
+                ('stay_id', 'id'),
+                ('register_number', 'register_number'),
+                ('check_in_date', 'effective_check_in'),
+                ('check_out_date', 'effective_check_out'),
+                ('status', 'status'),
+                ('room_number', 'room__room_number'),
+                ('room_floor', 'room__floor'),
+                ('room_category', 'room__category__name'),
+                ('number_of_guests', 'number_of_guests'),
+                ('total_amount', 'total_amount'),
+            ],
+        ),
+        ExportReport(
+            'room-history',
+            filters=('start_date', 'end_date', 'room_id', 'guest_whatsapp'),
+            rows=_room_history_rows,
+            columns=[
+                ('room_id', 'room_id'),
+                ('room_number', 'room__room_number'),
+                ('floor', 'room__floor'),
+                ('category', 'room__category__name'),
+                ('stay_id', 'id'),
+                ('register_number', 'register_number'),
+                ('guest_name', 'guest__full_name'),
+                ('guest_whatsapp', 'guest__whatsapp_number'),
+                ('check_in_date', 'effective_check_in'),
+                ('check_out_date', 'effective_check_out'),
+                ('status', 'status'),
+                ('number_of_guests', 'number_of_guests'),
+                ('total_amount', 'total_amount'),
+            ],
+        ),
+        ExportReport(
+            'conversation-history',
+            filters=('start_date', 'end_date'),
+            rows=_conversation_history_rows,
+            columns=[
+                ('conversation_id', 'id'),
+                ('guest_id', 'guest_id'),
+                ('guest_name', 'guest__full_name'),
+                ('whatsapp_number', 'guest__whatsapp_number'),
+                ('room_number', 'room_number'),
+                ('department', 'department'),
+                ('conversation_type', 'conversation_type'),
+                ('status', 'status'),
+                ('message_count', 'message_count'),
+                ('created_at', 'created_at'),
+                ('last_message_at', 'last_message_at'),
+                ('is_fulfilled', 'is_request_fulfilled'),
+            ],
+        ),
+        ExportReport(
+            'feedback',
+            filters=('start_date', 'end_date', 'room_id', 'guest_whatsapp', 'search'),
+            rows=feedback_analytics_queryset,
+            columns=[
+                ('feedback_id', 'id'),
+                ('rating', 'rating'),
+                ('note', 'note'),
+                ('created_at', 'created_at'),
+                ('stay_id', 'stay_id'),
+                ('register_number', 'stay__register_number'),
+                ('room_number', 'stay__room__room_number'),
+                ('guest_id', 'guest_id'),
+                ('guest_name', 'guest__full_name'),
+                ('whatsapp_number', 'guest__whatsapp_number'),
+                ('nationality', 'guest__nationality'),
+            ],
+        ),
+    )
+}
+
+
+class _LineBuffer:
+    """File-like target for csv.writer that hands back each written line."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_export_lines(report, rows, file_format):
+    """Encode `rows` (dicts from ExportReport.iter_rows) as CSV or JSONL text, one line at a time."""
+    if file_format == 'csv':
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow([column for column, _ in report.columns])
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row.values()])
+    else:
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
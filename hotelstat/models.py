@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+from hotel.models import Hotel
+from lobbybee.utils.file_url import upload_to_report_exports
+from user.models import User
+
+
+class ReportExportJob(models.Model):
+    """Background CSV / JSONL export of a hotelstat report, written to storage for download."""
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    FORMATS = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='report_exports')
+    report = models.CharField(max_length=50)
+    file_format = models.CharField(max_length=10, choices=FORMATS, default='csv')
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    row_count = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to=upload_to_report_exports, blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.report} export {self.id} ({self.status}, {self.row_count} rows)"
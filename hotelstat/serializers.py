@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from .models import ReportExportJob
+
+
+class ReportExportJobSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExportJob
+        fields = ["id", "report", "file_format", "filters", "status", "row_count", "file_url", "error", "created_at", "completed_at"]
+        read_only_fields = fields
+
+    def get_file_url(self, obj):
+        return obj.file.url if obj.file else None
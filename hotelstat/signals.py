@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from guest.models import Booking, Invoice, Stay
+from hotel.models import Hotel, Room
+from lobbybee.utils.response_cache import HOTEL_ROOMS, HOTEL_STAYS, PLATFORM_STATS, invalidate_tags
+from payments.models import HotelSubscription, Transaction
+
+
+@receiver([post_save, post_delete], sender=Stay)
+@receiver([post_save, post_delete], sender=Booking)
+@receiver([post_save, post_delete], sender=Invoice)
+def stays_changed(sender, instance, **kwargs):
+    invalidate_tags(HOTEL_STAYS.format(hotel_id=instance.hotel_id), PLATFORM_STATS)
+
+
+@receiver([post_save, post_delete], sender=Room)
+def rooms_changed(sender, instance, **kwargs):
+    invalidate_tags(HOTEL_ROOMS.format(hotel_id=instance.hotel_id), PLATFORM_STATS)
+
+
+@receiver([post_save, post_delete], sender=Hotel)
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=HotelSubscription)
+def platform_changed(sender, instance, **kwargs):
+    invalidate_tags(PLATFORM_STATS)
@@ -0,0 +1,63 @@
+from celery import shared_task
+from django.core.files import File
+from django.utils import timezone
+import logging
+from tempfile import SpooledTemporaryFile
+
+from .exports import EXPORT_REPORTS, iter_export_lines, parse_report_filters
+from .models import ReportExportJob
+
+logger = logging.getLogger(__name__)
+
+REPORT_EXPORT_PROGRESS_EVERY = 5000
+
+
+@shared_task
+def render_report_export(job_id):
+    """
+    Write a ReportExportJob's rows to storage as CSV / JSONL.
+
+    Rows come from the same iterator the streamed endpoint uses and are encoded into a
+    spooled temp file, so memory stays flat for any report size. row_count is written
+    back every REPORT_EXPORT_PROGRESS_EVERY rows.
+    """
+    try:
+        job = ReportExportJob.objects.select_related('hotel').get(id=job_id)
+    except ReportExportJob.DoesNotExist:
+        logger.error(f"Report export job {job_id} not found")
+        return {'status': 'error', 'reason': 'job_not_found'}
+
+    ReportExportJob.objects.filter(id=job.id).update(status='running', row_count=0)
+    report = EXPORT_REPORTS[job.report]
+
+    row_count = 0
+
+    def counted(rows):
+        nonlocal row_count
+        for row in rows:
+            yield row
+            row_count += 1
+            if row_count % REPORT_EXPORT_PROGRESS_EVERY == 0:
+                ReportExportJob.objects.filter(id=job.id).update(row_count=row_count)
+
+    try:
+        filters = parse_report_filters(job.filters, report.filters)
+        rows = counted(report.iter_rows(job.hotel, filters))
+        with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+            for line in iter_export_lines(report, rows, job.file_format):
+                buffer.write(line.encode('utf-8'))
+            buffer.seek(0)
+            job.file.save(f"{job.report}_{job.id}.{job.file_format}", File(buffer), save=False)
+
+        job.status = 'completed'
+        job.row_count = row_count
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'status', 'row_count', 'completed_at'])
+    except Exception as e:
+        logger.error(f"Error rendering report export {job_id}: {str(e)}", exc_info=True)
+        ReportExportJob.objects.filter(id=job.id).update(
+            status='failed', row_count=row_count, error=str(e), completed_at=timezone.now()
+        )
+        return {'status': 'error', 'reason': str(e)}
+
+    return {'status': 'success', 'job_id': job.id, 'row_count': row_count}
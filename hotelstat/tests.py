@@ -1,3 +1,375 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from chat.archive import archive_conversations
+from chat.models import Conversation, Message
+from guest.models import Booking, Feedback, Guest, Invoice, Stay
+from hotel.models import Hotel, Room, RoomCategory
+from lobbybee.utils import instrumentation
+from user.models import User
+from .models import ReportExportJob
+from .trends import build_trends
+from .views import HotelStatsViewSet
+
+
+class ReportExportTests(APITestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Export Hotel")
+        self.user = User.objects.create_user(
+            username="exportadmin",
+            email="exportadmin@example.com",
+            password="password123",
+            user_type="hotel_admin",
+            hotel=self.hotel,
+        )
+        self.category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Deluxe", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        now = timezone.now()
+        self.stays = []
+        for n in range(3):
+            guest = Guest.objects.create(full_name=f"Export Guest {n}", whatsapp_number=f"+1555200{n:04d}")
+            room = Room.objects.create(hotel=self.hotel, room_number=f"{200 + n}", category=self.category, floor=2)
+            stay = Stay.objects.create(
+                hotel=self.hotel, guest=guest, room=room, status="completed", total_amount=1000,
+                check_in_date=now - timedelta(days=30 * n + 2), check_out_date=now - timedelta(days=30 * n),
+            )
+            Feedback.objects.create(stay=stay, guest=guest, rating=5 - n)
+            self.stays.append(stay)
+        self.client.force_authenticate(user=self.user)
+
+    def _streamed(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_guest_history_csv_streams_filtered_rows(self):
+        start = (timezone.now() - timedelta(days=5)).date().isoformat()
+        response = self.client.get(f"/api/hotel_stat/export/guest-history/?start_date={start}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self._streamed(response))))
+        self.assertEqual([row["stay_id"] for row in rows], [str(self.stays[0].id)])
+        self.assertEqual(rows[0]["guest_name"], "Export Guest 0")
+
+    def test_feedback_jsonl_matches_report_filters(self):
+        response = self.client.get(
+            f"/api/hotel_stat/export/feedback/?file_format=jsonl&room_id={self.stays[1].room_id}"
+        )
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self._streamed(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["rating"], rows[0]["room_number"]), (4, "201"))
+
+        report = self.client.get(f"/api/hotel_stat/feedback-analytics/?room_id={self.stays[1].room_id}")
+        self.assertEqual([f["id"] for f in report.data["data"]["feedbacks"]], [rows[0]["feedback_id"]])
+
+    def test_conversation_history_counts_archived_messages(self):
+        guest = self.stays[0].guest
+        archived = Conversation.objects.create(guest=guest, hotel=self.hotel, department="Reception", status="closed")
+        live = Conversation.objects.create(guest=guest, hotel=self.hotel, department="Reception")
+        for conversation, count in ((archived, 3), (live, 2)):
+            for n in range(count):
+                Message.objects.create(conversation=conversation, sender_type="guest", content=f"message {n}")
+        past = timezone.now() - timedelta(days=200)
+        Conversation.objects.filter(pk=archived.pk).update(updated_at=past)
+        archive_conversations(days=90)
+
+        report = self.client.get("/api/hotel_stat/conversation-history/").data["data"]
+        counts = {row["id"]: row["message_count"] for row in report["conversations"]}
+        self.assertEqual(counts, {archived.id: 3, live.id: 2})
+        self.assertEqual(report["summary"]["total_messages"], 5)
+        self.assertEqual(
+            report["summary"]["department_breakdown"],
+            [{"department": "Reception", "count": 2, "total_messages": 5}],
+        )
+
+        response = self.client.get("/api/hotel_stat/export/conversation-history/?file_format=jsonl")
+        rows = [json.loads(line) for line in self._streamed(response).splitlines()]
+        self.assertEqual({row["conversation_id"]: row["message_count"] for row in rows}, counts)
+
+    def test_invalid_report_and_filters_rejected(self):
+        self.assertEqual(self.client.get("/api/hotel_stat/export/invoices/").status_code, 400)
+        self.assertEqual(self.client.get("/api/hotel_stat/export/feedback/?room_id=abc").status_code, 400)
+        self.assertEqual(self.client.get("/api/hotel_stat/export/feedback/?file_format=xml").status_code, 400)
+
+    @override_settings(HOTELSTAT_EXPORT_STREAM_MAX_ROWS=2)
+    def test_large_export_runs_as_background_job(self):
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        with override_settings(STORAGES=storages, MEDIA_ROOT=tempfile.mkdtemp()), \
+                patch("hotelstat.tasks.render_report_export.delay") as mock_delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get("/api/hotel_stat/export/room-history/?file_format=jsonl")
+            self.assertEqual(response.status_code, 202)
+            job_id = response.data["data"]["id"]
+            mock_delay.assert_called_once_with(job_id)
+
+            from .tasks import render_report_export
+            render_report_export(job_id)
+
+            job = ReportExportJob.objects.get(id=job_id)
+            self.assertEqual((job.status, job.row_count), ("completed", 3))
+            with job.file.open("rb") as fh:
+                self.assertEqual(len(fh.read().decode().splitlines()), 3)
+
+            status_response = self.client.get(f"/api/hotel_stat/export-jobs/{job_id}/")
+            self.assertEqual(status_response.data["data"]["status"], "completed")
+            self.assertTrue(status_response.data["data"]["file_url"])
+
+            # Same hotel resolution as the export itself: superusers go through the admin endpoints.
+            superuser = User.objects.create_superuser(
+                username="exportroot", email="exportroot@example.com", password="password123", hotel=self.hotel,
+            )
+            self.client.force_authenticate(user=superuser)
+            self.assertEqual(self.client.get(f"/api/hotel_stat/export-jobs/{job_id}/").status_code, 400)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.registry.reset()
+        self.hotel = Hotel.objects.create(name="Cached Hotel")
+        self.manager = User.objects.create_user(
+            username="cachemanager", email="cachemanager@example.com", password="password123",
+            user_type="manager", hotel=self.hotel,
+        )
+        self.category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Deluxe", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        self.room = Room.objects.create(hotel=self.hotel, room_number="301", category=self.category, floor=3)
+        self.client.force_authenticate(user=self.manager)
+
+    def _overview(self, **headers):
+        return self.client.get("/api/hotel_stat/overview/", **headers)
+
+    def test_overview_hits_cache_and_answers_conditional_get(self):
+        first = self._overview()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            second = self._overview()
+            not_modified = self._overview(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.assertNotEqual(self.client.get("/api/hotel_stat/overview/?date=2024-01-01")["X-Cache"], "HIT")
+        counters = instrumentation.registry.snapshot()["hotel_stats.overview"]["counters"]
+        self.assertEqual(counters, {
+            "response_cache_miss": 2, "response_cache_hit": 2, "response_cache_not_modified": 1,
+        })
+        self.assertIn(
+            'lobbybee_response_cache_hit_total{endpoint="hotel_stats.overview"} 2',
+            instrumentation.render_prometheus(),
+        )
+
+    def test_writes_invalidate_overview(self):
+        etag = self._overview()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.hotel, room_number="302", category=self.category, floor=3)
+        response = self._overview(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        etag = response["ETag"]
+
+        guest = Guest.objects.create(full_name="Cache Guest", whatsapp_number="+15553000001")
+        with self.captureOnCommitCallbacks(execute=True):
+            Stay.objects.create(
+                hotel=self.hotel, guest=guest, room=self.room, status="active", total_amount=1000,
+                check_in_date=timezone.now(), check_out_date=timezone.now() + timedelta(days=1),
+            )
+        self.assertEqual(self._overview(HTTP_IF_NONE_MATCH=etag)["X-Cache"], "MISS")
+
+    def test_bulk_room_creation_invalidates_overview(self):
+        etag = self._overview()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.bulk_create_rooms(
+                hotel=self.hotel, category=self.category, floor=5, start_number_str="501", end_number_str="503",
+            )
+        response = self._overview(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_cached_platform_stats_are_not_served_to_other_roles(self):
+        superuser = User.objects.create_superuser(
+            username="cacheroot", email="cacheroot@example.com", password="password123",
+        )
+        self.client.force_authenticate(user=superuser)
+        self.assertEqual(self.client.get("/api/hotel_stat/admin/platform/").status_code, 200)
+
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(self.client.get("/api/hotel_stat/admin/platform/").status_code, 403)
+
+
+class TrendTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Trend Hotel", time_zone="Asia/Kolkata")
+        self.manager = User.objects.create_user(
+            username="trendmanager", email="trendmanager@example.com", password="password123",
+            user_type="manager", hotel=self.hotel,
+        )
+        category = RoomCategory.objects.create(
+            hotel=self.hotel, name="Deluxe", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, room_number=f"40{n}", category=category, floor=4) for n in range(2)
+        ]
+        self.guest = Guest.objects.create(full_name="Trend Guest", whatsapp_number="+15557000001")
+        self.tz = ZoneInfo("Asia/Kolkata")
+        # Room 0: nights of Mar 3 and 4. Room 1: nights of Mar 4 and 5, checked in 01:30 IST (Mar 3 UTC).
+        self.stays = [
+            self._stay(self.rooms[0], "completed", datetime(2025, 3, 3, 12, tzinfo=self.tz),
+                       datetime(2025, 3, 5, 11, tzinfo=self.tz)),
+            self._stay(self.rooms[1], "active", datetime(2025, 3, 4, 1, 30, tzinfo=self.tz),
+                       datetime(2025, 3, 6, 11, tzinfo=self.tz)),
+        ]
+        booking = Booking.objects.create(
+            hotel=self.hotel, primary_guest=self.guest,
+            check_in_date=self.stays[0].check_in_date, check_out_date=self.stays[0].check_out_date,
+        )
+        invoice = Invoice.objects.create(hotel=self.hotel, booking=booking, invoice_number="INV-1", total_amount=2500)
+        Invoice.objects.filter(id=invoice.id).update(created_at=datetime(2025, 3, 5, 10, tzinfo=self.tz))
+        feedback = Feedback.objects.create(stay=self.stays[0], guest=self.guest, rating=4)
+        Feedback.objects.filter(id=feedback.id).update(created_at=datetime(2025, 3, 5, 12, tzinfo=self.tz))
+        self.client.force_authenticate(user=self.manager)
+
+    def _stay(self, room, stay_status, check_in, check_out):
+        return Stay.objects.create(
+            hotel=self.hotel, guest=self.guest, room=room, status=stay_status,
+            check_in_date=check_in, check_out_date=check_out, actual_check_in=check_in,
+        )
+
+    def test_daily_series_are_gap_filled_in_hotel_time(self):
+        with self.assertNumQueries(6):
+            trend = build_trends(self.hotel, "day", date(2025, 3, 2), date(2025, 3, 6))
+
+        self.assertEqual(trend["buckets"], ["2025-03-02", "2025-03-03", "2025-03-04", "2025-03-05", "2025-03-06"])
+        self.assertEqual(trend["series"]["occupancy"], [0, 50.0, 100.0, 50.0, 0])
+        self.assertEqual(trend["series"]["checkins"], [0, 1, 1, 0, 0])
+        self.assertEqual(trend["series"]["revenue"], [0, 0, 0, 2500.0, 0])
+        self.assertEqual(trend["series"]["feedback"], [None, None, None, 4.0, None])
+
+    def test_weekly_and_monthly_buckets(self):
+        weekly = build_trends(self.hotel, "week", date(2025, 3, 1), date(2025, 3, 9), ["occupancy", "checkins"])
+        self.assertEqual(weekly["buckets"], ["2025-02-24", "2025-03-03"])
+        # Week of Mar 3: 4 room-nights over 2 rooms x 7 days.
+        self.assertEqual(weekly["series"]["occupancy"], [0, round(4 / 14 * 100, 2)])
+        self.assertEqual(weekly["series"]["checkins"], [0, 2])
+
+        monthly = HotelStatsViewSet()._get_monthly_occupancy_trend(self.hotel, 2025)
+        self.assertEqual(len(monthly), 12)
+        self.assertEqual(monthly[2], {"month": "Mar", "occupancy_rate": round(4 / 62 * 100, 2)})
+        self.assertEqual(monthly[0]["occupancy_rate"], 0)
+
+    def test_trends_action(self):
+        response = self.client.get(
+            "/api/hotel_stat/trends/?granularity=day&metrics=checkins,revenue&date_from=2025-03-03&date_to=2025-03-04"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["data"]["series"]), {"checkins", "revenue"})
+        self.assertEqual(response.data["data"]["time_zone"], "Asia/Kolkata")
+
+        self.assertEqual(self.client.get("/api/hotel_stat/trends/?granularity=hour").status_code, 400)
+        self.assertEqual(self.client.get("/api/hotel_stat/trends/?metrics=bogus").status_code, 400)
+
+
+class HotelComparisonTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.superuser = User.objects.create_superuser(
+            username="compareroot", email="compareroot@example.com", password="password123",
+        )
+        self.hotels = [self._hotel(n) for n in range(3)]
+        self.client.force_authenticate(user=self.superuser)
+
+    def _hotel(self, n):
+        hotel = Hotel.objects.create(name=f"Compare Hotel {n}")
+        category = RoomCategory.objects.create(
+            hotel=hotel, name="Standard", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        for r in range(n + 1):
+            Room.objects.create(hotel=hotel, room_number=f"{n}0{r}", category=category, floor=1,
+                                status="occupied" if r == 0 else "available")
+        User.objects.create_user(
+            username=f"comparedesk{n}", email=f"comparedesk{n}@example.com", password="password123",
+            user_type="receptionist", hotel=hotel, department=["Reception"],
+        )
+        return hotel
+
+    def _compare(self, hotels, stat_type):
+        query = "&".join(f"hotels={hotel.id}" for hotel in hotels)
+        return self.client.get(f"/api/hotel_stat/compare/?{query}&stat_type={stat_type}")
+
+    def test_overview_keeps_shape_and_query_count_is_flat(self):
+        with CaptureQueriesContext(connection) as single:
+            self._compare(self.hotels[:1], "overview")
+        with CaptureQueriesContext(connection) as many:
+            response = self._compare(self.hotels, "overview")
+
+        self.assertEqual(len(many), len(single))
+        data = response.data["data"]
+        self.assertEqual(set(data), {f"hotel_{hotel.id}" for hotel in self.hotels})
+        key = f"hotel_{self.hotels[2].id}"
+        self.assertTrue(data[key]["success"])
+        stats = data[key]["data"][key]
+        self.assertEqual(stats["rooms"]["total"], 3)
+        self.assertEqual(stats["rooms"]["occupied"], 1)
+        self.assertEqual(stats["occupancy_rate"], 33.33)
+        self.assertEqual(stats["staff"], {"receptionist": 1})
+
+    @override_settings(HOTELSTAT_COMPARISON_WORKERS=1)
+    def test_several_stat_types(self):
+        response = self._compare(self.hotels, "rooms,staff")
+
+        key = f"hotel_{self.hotels[1].id}"
+        entry = response.data["data"][key]
+        self.assertEqual(set(entry), {"rooms", "staff"})
+        self.assertEqual(entry["rooms"]["data"][key]["total_rooms"], 2)
+        self.assertEqual(entry["staff"]["data"][key]["staff_by_department"][0], {"department": "Reception", "count": 1})
+
+        everything = self._compare(self.hotels, "overview,occupancy,guests,rooms,staff,performance").data["data"][key]
+        self.assertTrue(all(result["success"] for result in everything.values()))
+        self.assertEqual(everything["occupancy"]["data"][key]["floor_occupancy"][0]["occupancy_rate"], 50.0)
+
+        self.assertEqual(self._compare(self.hotels, "rooms,bogus").status_code, 400)
+
+
+class HotelComparisonThreadedTests(TransactionTestCase):
+    def test_stat_types_computed_in_threads(self):
+        cache.clear()
+        superuser = User.objects.create_superuser(
+            username="threadroot", email="threadroot@example.com", password="password123",
+        )
+        hotel = Hotel.objects.create(name="Threaded Hotel")
+        category = RoomCategory.objects.create(
+            hotel=hotel, name="Standard", base_price=1000, max_occupancy=2, amenities=[],
+        )
+        Room.objects.create(hotel=hotel, room_number="101", category=category, floor=1)
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+
+        response = client.get(f"/api/hotel_stat/compare/?hotels={hotel.id}&stat_type=overview,rooms,performance")
+
+        entry = response.data["data"][f"hotel_{hotel.id}"]
+        self.assertEqual(set(entry), {"overview", "rooms", "performance"})
+        self.assertEqual(entry["rooms"]["data"][f"hotel_{hotel.id}"]["total_rooms"], 1)
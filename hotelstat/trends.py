@@ -0,0 +1,256 @@
+"""
+Time-bucketed series for hotel statistics.
+
+Every series is computed with one grouped query per hotel: a `Trunc` GROUP BY on the
+event timestamp in the hotel's time zone, or for occupancy (a stay spans many buckets)
+one generate_series join on PostgreSQL. Buckets are then gap-filled, so a 30-day daily
+series always has 30 points whether or not anything happened on a given day.
+
+    build_trends(hotel, 'week', date(2025, 1, 1), date(2025, 3, 31), ['revenue', 'occupancy'])
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Avg, Count, DateField, Sum
+from django.db.models.functions import Coalesce, Trunc
+
+from chat.models import Conversation
+from guest.models import Feedback, Invoice, Stay
+from hotel.config_snapshot import hotel_timezone
+from hotel.models import Room
+
+GRANULARITIES = ('day', 'week', 'month')
+METRICS = ('occupancy', 'checkins', 'revenue', 'conversations', 'feedback')
+MAX_BUCKETS = 400
+
+# Stays that held a room on a night, for occupancy.
+OCCUPYING_STAY_STATUSES = ('active', 'completed')
+
+
+class TrendError(ValueError):
+    """Invalid trend request (unknown metric / granularity, empty or oversized range)."""
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday, like TruncWeek
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket_start(start, granularity):
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=7 if granularity == 'week' else 1)
+
+
+def bucket_starts(date_from, date_to, granularity):
+    """Start dates of every bucket touching [date_from, date_to], in order."""
+    starts = []
+    current = bucket_start(date_from, granularity)
+    while current <= date_to:
+        starts.append(current)
+        current = next_bucket_start(current, granularity)
+    return starts
+
+
+def _bucket_days(start, date_from, date_to, granularity):
+    """Days of the bucket starting at `start` that fall inside the requested range."""
+    first = max(start, date_from)
+    last = min(next_bucket_start(start, granularity) - timedelta(days=1), date_to)
+    return (last - first).days + 1
+
+
+def _local_bounds(tz, date_from, date_to):
+    """Aware datetimes covering the local days date_from..date_to in the hotel's zone."""
+    start = datetime.combine(date_from, time.min, tzinfo=tz)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+    return start, end
+
+
+def _grouped(queryset, field, granularity, tz, start, end, **aggregate):
+    """{bucket date: aggregate value} with one Trunc GROUP BY."""
+    rows = queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end}).annotate(
+        bucket=Trunc(field, granularity, output_field=DateField(), tzinfo=tz),
+    ).order_by().values('bucket').annotate(**aggregate).values_list('bucket', *aggregate)
+    return {bucket: value for bucket, value in rows}
+
+
+def checkins_series(hotel_id, granularity, tz, start, end):
+    return _grouped(
+        Stay.objects.filter(hotel_id=hotel_id, actual_check_in__isnull=False),
+        'actual_check_in', granularity, tz, start, end, value=Count('id'),
+    )
+
+
+def revenue_series(hotel_id, granularity, tz, start, end):
+    return _grouped(
+        Invoice.objects.filter(hotel_id=hotel_id),
+        'created_at', granularity, tz, start, end, value=Sum('total_amount'),
+    )
+
+
+def conversations_series(hotel_id, granularity, tz, start, end):
+    return _grouped(
+        Conversation.objects.filter(hotel_id=hotel_id),
+        'created_at', granularity, tz, start, end, value=Count('id'),
+    )
+
+
+def feedback_series(hotel_id, granularity, tz, start, end):
+    return _grouped(
+        Feedback.objects.filter(stay__hotel_id=hotel_id),
+        'created_at', granularity, tz, start, end, value=Avg('rating'),
+    )
+
+
+def _occupied_room_nights_postgres(hotel_id, granularity, tz, date_from, date_to):
+    stay_table = Stay._meta.db_table
+    sql = f"""
+        SELECT date_trunc(%s, nights.night)::date AS bucket,
+               COUNT(DISTINCT (stay.room_id, nights.night)) AS room_nights
+        FROM generate_series(%s::date, %s::date, interval '1 day') AS nights(night)
+        JOIN {stay_table} AS stay
+          ON stay.hotel_id = %s
+         AND stay.room_id IS NOT NULL
+         AND stay.status = ANY(%s)
+         AND (COALESCE(stay.actual_check_in, stay.check_in_date) AT TIME ZONE %s)::date <= nights.night
+         AND (COALESCE(stay.actual_check_out, stay.check_out_date) AT TIME ZONE %s)::date > nights.night
+        GROUP BY 1
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            granularity, date_from, date_to, hotel_id,
+            list(OCCUPYING_STAY_STATUSES), str(tz), str(tz),
+        ])
+        return dict(cursor.fetchall())
+
+
+def _occupied_room_nights_python(hotel_id, granularity, tz, date_from, date_to):
+    # Other backends: one query for the overlapping stays, nights expanded here.
+    start, end = _local_bounds(tz, date_from, date_to)
+    stays = Stay.objects.filter(
+        hotel_id=hotel_id, room__isnull=False, status__in=OCCUPYING_STAY_STATUSES,
+    ).annotate(
+        effective_in=Coalesce('actual_check_in', 'check_in_date'),
+        effective_out=Coalesce('actual_check_out', 'check_out_date'),
+    ).filter(effective_in__lt=end, effective_out__gt=start).values_list('room_id', 'effective_in', 'effective_out')
+
+    nights = set()
+    for room_id, checked_in, checked_out in stays.iterator():
+        night = max(checked_in.astimezone(tz).date(), date_from)
+        last = min(checked_out.astimezone(tz).date() - timedelta(days=1), date_to)
+        while night <= last:
+            nights.add((room_id, night))
+            night += timedelta(days=1)
+
+    room_nights = {}
+    for _, night in nights:
+        bucket = bucket_start(night, granularity)
+        room_nights[bucket] = room_nights.get(bucket, 0) + 1
+    return room_nights
+
+
+def occupancy_series(hotel_id, granularity, tz, date_from, date_to):
+    """
+    {bucket: occupancy %} - occupied room-nights over available room-nights (current room
+    count x days of the bucket inside the range). A stay occupies its room on the nights
+    from its local check-in date up to the night before its local check-out date.
+    """
+    total_rooms = Room.objects.filter(hotel_id=hotel_id).count()
+    if not total_rooms:
+        return {}
+    if connection.vendor == 'postgresql':
+        room_nights = _occupied_room_nights_postgres(hotel_id, granularity, tz, date_from, date_to)
+    else:
+        room_nights = _occupied_room_nights_python(hotel_id, granularity, tz, date_from, date_to)
+    return {
+        bucket: round(nights / (total_rooms * _bucket_days(bucket, date_from, date_to, granularity)) * 100, 2)
+        for bucket, nights in room_nights.items()
+    }
+
+
+_EVENT_SERIES = {
+    'checkins': (checkins_series, 0),
+    'revenue': (revenue_series, Decimal('0')),
+    'conversations': (conversations_series, 0),
+    'feedback': (feedback_series, None),  # no feedback is not a 0 rating
+}
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def build_trends(hotel, granularity, date_from, date_to, metrics=METRICS):
+    """
+    {'granularity', 'time_zone', 'date_from', 'date_to', 'buckets': [...], 'series': {metric: [...]}}
+    with one value per bucket for every requested metric.
+    """
+    if granularity not in GRANULARITIES:
+        raise TrendError(f"Invalid granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}")
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise TrendError(f"Invalid metric(s): {', '.join(unknown)}. Use any of: {', '.join(METRICS)}")
+    if date_from > date_to:
+        raise TrendError("date_from must not be after date_to")
+    buckets = bucket_starts(date_from, date_to, granularity)
+    if len(buckets) > MAX_BUCKETS:
+        raise TrendError(f"Range too large: {len(buckets)} {granularity} buckets (max {MAX_BUCKETS})")
+
+    tz = hotel_timezone(hotel.time_zone)
+    start, end = _local_bounds(tz, date_from, date_to)
+    series = {}
+    for metric in metrics:
+        if metric == 'occupancy':
+            values, empty = occupancy_series(hotel.id, granularity, tz, date_from, date_to), 0
+        else:
+            series_fn, empty = _EVENT_SERIES[metric]
+            values = series_fn(hotel.id, granularity, tz, start, end)
+        series[metric] = [_json_value(values.get(bucket, empty)) for bucket in buckets]
+
+    return {
+        'granularity': granularity,
+        'time_zone': str(tz),
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'buckets': [bucket.isoformat() for bucket in buckets],
+        'series': series,
+    }
+
+
+def auto_granularity(date_from, date_to):
+    """Finest granularity that keeps a range readable: days up to ~2 months, then weeks, then months."""
+    days = (date_to - date_from).days + 1
+    if days <= 62:
+        return 'day'
+    if days <= 366:
+        return 'week'
+    return 'month'
+
+
+def default_range(granularity, today):
+    """Last 30 days, 12 weeks or 12 months ending today."""
+    if granularity == 'week':
+        return bucket_start(today, 'week') - timedelta(weeks=11), today
+    if granularity == 'month':
+        first = today.replace(day=1)
+        for _ in range(11):
+            first = (first - timedelta(days=1)).replace(day=1)
+        return first, today
+    return today - timedelta(days=29), today
+
+
+def monthly_occupancy_trend(hotel, year):
+    """[{'month': 'Jan', 'occupancy_rate': ...}, ...] for a calendar year, in one series query."""
+    trend = build_trends(hotel, 'month', date(year, 1, 1), date(year, 12, 31), ['occupancy'])
+    return [
+        {'month': datetime.fromisoformat(bucket).strftime('%b'), 'occupancy_rate': rate}
+        for bucket, rate in zip(trend['buckets'], trend['series']['occupancy'])
+    ]
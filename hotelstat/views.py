@@ -2,17 +2,68 @@ from rest_framework import viewsets, permissions, status, views, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from hotel.models import Hotel, Room, RoomCategory
+from lobbybee.utils.response_cache import HOTEL_ROOMS, HOTEL_STAYS, PLATFORM_STATS, cache_response
 from lobbybee.utils.responses import success_response, error_response, forbidden_response
-from guest.models import Guest, Stay, Booking, Feedback, Invoice
-from chat.models import Conversation, Message
+from guest.models import Guest, Stay, Booking, Invoice
+from hotel.config_snapshot import hotel_timezone
 from user.models import User
 from user.permissions import IsHotelManagerOrAdmin, IsHotelStaffOrAdmin
-from django.db.models import Count, Q, Avg, Sum, F, ExpressionWrapper, DecimalField, DurationField, Max, Min
+from .exports import (
+    EXPORT_FORMATS,
+    EXPORT_REPORTS,
+    ReportFilterError,
+    conversation_history_queryset,
+    conversation_message_count,
+    feedback_analytics_queryset,
+    guest_history_queryset,
+    history_stays_queryset,
+    iter_export_lines,
+    parse_report_filters,
+)
+from .models import ReportExportJob
+from .trends import (
+    MAX_BUCKETS,
+    METRICS,
+    TrendError,
+    auto_granularity,
+    build_trends,
+    bucket_starts,
+    default_range,
+    monthly_occupancy_trend,
+)
+from .serializers import ReportExportJobSerializer
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db.models import Count, Q, Avg, Sum, F, ExpressionWrapper, DurationField, Min
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
-import calendar
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _grouped_counts(queryset, field=None):
+    """
+    Row counts per hotel in one GROUP BY: {hotel_id: count}, or {hotel_id: {value: count}}
+    when `field` is given.
+    """
+    if field is None:
+        return dict(queryset.order_by().values('hotel_id').annotate(
+            count=Count('id')
+        ).values_list('hotel_id', 'count'))
+    counts = defaultdict(dict)
+    for hotel_id, value, count in queryset.order_by().values('hotel_id', field).annotate(
+        count=Count('id')
+    ).values_list('hotel_id', field, 'count'):
+        counts[hotel_id][value] = count
+    return dict(counts)
+
+
+def _rate(part, total):
+    return round((part / total * 100) if total > 0 else 0, 2)
 
 
 class HotelStatsViewSet(viewsets.ViewSet):
@@ -126,49 +177,54 @@ class HotelStatsViewSet(viewsets.ViewSet):
 
     def get_overview_stats(self, hotels, target_date, date_from=None, date_to=None):
         """
-        Overview statistics for dashboard
+        Overview statistics for dashboard, for every hotel in `hotels` with one grouped query per figure
         """
+        hotels = list(hotels)
+        hotel_ids = [hotel.id for hotel in hotels]
+
+        # Room statistics
+        room_counts = _grouped_counts(Room.objects.filter(hotel_id__in=hotel_ids), 'status')
+
+        # Guest statistics
+        active_stays = _grouped_counts(Stay.objects.filter(
+            hotel_id__in=hotel_ids,
+            status='active',
+        ).filter(
+            Q(actual_check_in__date__lte=target_date) |
+            Q(actual_check_in__isnull=True, check_in_date__date__lte=target_date)
+        ).filter(
+            Q(actual_check_out__date__gte=target_date) |
+            Q(actual_check_out__isnull=True, check_out_date__date__gte=target_date)
+        ))
+
+        # Booking statistics
+        expected_checkins = _grouped_counts(Booking.objects.filter(
+            hotel_id__in=hotel_ids,
+            check_in_date=target_date,
+            status='confirmed',
+        ))
+        expected_checkouts = _grouped_counts(Stay.objects.filter(
+            hotel_id__in=hotel_ids,
+            status='active',
+            check_out_date=target_date
+        ))
+
+        # Staff statistics (for hotel admins and managers)
+        staff_counts = _grouped_counts(User.objects.filter(hotel_id__in=hotel_ids, is_active=True), 'user_type')
+
         stats = {}
-        
         for hotel in hotels:
-            # Room statistics
-            rooms = Room.objects.filter(hotel=hotel)
-            room_stats = {
-                'total': rooms.count(),
-                'available': rooms.filter(status='available').count(),
-                'occupied': rooms.filter(status='occupied').count(),
-                'cleaning': rooms.filter(status='cleaning').count(),
-                'maintenance': rooms.filter(status='maintenance').count(),
-                'out_of_order': rooms.filter(status='out_of_order').count(),
-            }
-            
+            by_status = room_counts.get(hotel.id, {})
+            room_stats = {'total': sum(by_status.values())}
+            for room_status in ('available', 'occupied', 'cleaning', 'maintenance', 'out_of_order'):
+                room_stats[room_status] = by_status.get(room_status, 0)
+
             # Calculate occupancy rate
             if room_stats['total'] > 0:
                 occupancy_rate = (room_stats['occupied'] / room_stats['total']) * 100
             else:
                 occupancy_rate = 0
-            
-            # Guest statistics
-            active_stays = Stay.objects.filter(
-                hotel=hotel, 
-                status='active',
-            ).filter(
-                Q(actual_check_in__date__lte=target_date) |
-                Q(actual_check_in__isnull=True, check_in_date__date__lte=target_date)
-            ).filter(
-                Q(actual_check_out__date__gte=target_date) |
-                Q(actual_check_out__isnull=True, check_out_date__date__gte=target_date)
-            )
-            
-            # Booking statistics
-            bookings_today = Booking.objects.filter(
-                hotel=hotel,
-                check_in_date=target_date
-            )
-            
-            # Staff statistics (for hotel admins and managers)
-            staff_stats = self._get_staff_count(hotel)
-            
+
             hotel_stats = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
@@ -176,20 +232,16 @@ class HotelStatsViewSet(viewsets.ViewSet):
                 'is_verified': hotel.is_verified,
                 'rooms': room_stats,
                 'occupancy_rate': round(occupancy_rate, 2),
-                'active_stays': active_stays.count(),
-                'expected_checkins': bookings_today.filter(status='confirmed').count(),
-                'expected_checkouts': Stay.objects.filter(
-                    hotel=hotel,
-                    status='active',
-                    check_out_date=target_date
-                ).count(),
-                'staff': staff_stats,
+                'active_stays': active_stays.get(hotel.id, 0),
+                'expected_checkins': expected_checkins.get(hotel.id, 0),
+                'expected_checkouts': expected_checkouts.get(hotel.id, 0),
+                'staff': staff_counts.get(hotel.id, {}),
             }
-            
+
             if date_from and date_to:
                 # Add date range statistics
                 hotel_stats.update(self._get_date_range_stats(hotel, date_from, date_to))
-            
+
             stats[f"hotel_{hotel.id}"] = hotel_stats
 
         return success_response(data=stats)
@@ -198,163 +250,157 @@ class HotelStatsViewSet(viewsets.ViewSet):
         """
         Detailed occupancy statistics
         """
+        hotels = list(hotels)
+        hotel_ids = [hotel.id for hotel in hotels]
+
+        # Current occupancy by room category
+        category_occupancy = defaultdict(list)
+        categories = RoomCategory.objects.filter(hotel_id__in=hotel_ids).annotate(
+            total_rooms=Count('rooms'),
+            occupied_rooms=Count('rooms', filter=Q(rooms__status='occupied')),
+            available_rooms=Count('rooms', filter=Q(rooms__status='available')),
+        ).order_by('id').values('hotel_id', 'name', 'base_price', 'total_rooms', 'occupied_rooms', 'available_rooms')
+        for category in categories:
+            category_occupancy[category['hotel_id']].append({
+                'category_name': category['name'],
+                'total_rooms': category['total_rooms'],
+                'occupied_rooms': category['occupied_rooms'],
+                'available_rooms': category['available_rooms'],
+                'occupancy_rate': _rate(category['occupied_rooms'], category['total_rooms']),
+                'base_rate': float(category['base_price']),
+            })
+
+        # Floor-wise occupancy
+        floor_occupancy = defaultdict(list)
+        floors = Room.objects.filter(hotel_id__in=hotel_ids).values('hotel_id', 'floor').annotate(
+            total_rooms=Count('id'),
+            occupied_rooms=Count('id', filter=Q(status='occupied')),
+        ).order_by('floor')
+        for floor in floors:
+            floor_occupancy[floor['hotel_id']].append({
+                'floor_number': floor['floor'],
+                'total_rooms': floor['total_rooms'],
+                'occupied_rooms': floor['occupied_rooms'],
+                'occupancy_rate': _rate(floor['occupied_rooms'], floor['total_rooms']),
+            })
+
         stats = {}
-        
         for hotel in hotels:
-            # Current occupancy by room category
-            category_occupancy = []
-            categories = RoomCategory.objects.filter(hotel=hotel)
-            
-            for category in categories:
-                category_rooms = Room.objects.filter(hotel=hotel, category=category)
-                occupied_rooms = category_rooms.filter(status='occupied')
-                
-                category_data = {
-                    'category_name': category.name,
-                    'total_rooms': category_rooms.count(),
-                    'occupied_rooms': occupied_rooms.count(),
-                    'available_rooms': category_rooms.filter(status='available').count(),
-                    'occupancy_rate': round(
-                        (occupied_rooms.count() / category_rooms.count() * 100) if category_rooms.count() > 0 else 0, 
-                        2
-                    ),
-                    'base_rate': float(category.base_price),
-                }
-                category_occupancy.append(category_data)
-            
-            # Floor-wise occupancy
-            floors = Room.objects.filter(hotel=hotel).values_list('floor', flat=True).distinct().order_by('floor')
-            floor_occupancy = []
-            
-            for floor in floors:
-                floor_rooms = Room.objects.filter(hotel=hotel, floor=floor)
-                occupied_rooms = floor_rooms.filter(status='occupied')
-                
-                floor_data = {
-                    'floor_number': floor,
-                    'total_rooms': floor_rooms.count(),
-                    'occupied_rooms': occupied_rooms.count(),
-                    'occupancy_rate': round(
-                        (occupied_rooms.count() / floor_rooms.count() * 100) if floor_rooms.count() > 0 else 0, 
-                        2
-                    ),
-                }
-                floor_occupancy.append(floor_data)
-            
-            # Monthly occupancy trend
-            monthly_trend = self._get_monthly_occupancy_trend(hotel, target_date.year)
-            
             stats[f"hotel_{hotel.id}"] = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
-                'category_occupancy': category_occupancy,
-                'floor_occupancy': floor_occupancy,
-                'monthly_trend': monthly_trend,
+                'category_occupancy': category_occupancy[hotel.id],
+                'floor_occupancy': floor_occupancy[hotel.id],
+                # Monthly occupancy trend
+                'monthly_trend': self._get_monthly_occupancy_trend(hotel, target_date.year),
             }
-        
-        return success_response(data=stats)
 
-    
+        return success_response(data=stats)
 
     def get_guest_stats(self, hotels, target_date, date_from=None, date_to=None):
         """
         Guest-related statistics
         """
+        hotels = list(hotels)
+        hotel_ids = [hotel.id for hotel in hotels]
+        hotel_stays = Stay.objects.filter(hotel_id__in=hotel_ids).order_by()
+        active_stays = hotel_stays.filter(status='active')
+
+        # Current guests
+        current_guests = dict(active_stays.values('hotel_id').annotate(
+            count=Count('guest', distinct=True)
+        ).values_list('hotel_id', 'count'))
+
+        # New guests today
+        new_guests_today = dict(hotel_stays.filter(
+            guest__first_contact_date__date=target_date
+        ).values('hotel_id').annotate(
+            count=Count('guest', distinct=True)
+        ).values_list('hotel_id', 'count'))
+
+        # Guest distribution by status
+        guest_status_dist = defaultdict(list)
+        for row in active_stays.values('hotel_id', 'guest__status').annotate(count=Count('guest', distinct=True)):
+            guest_status_dist[row['hotel_id']].append({'status': row['guest__status'], 'count': row['count']})
+
+        # Guest nationality distribution
+        nationality_dist = defaultdict(list)
+        for row in active_stays.values('hotel_id', 'guest__nationality').annotate(count=Count('guest', distinct=True)):
+            nationality_dist[row['hotel_id']].append({'nationality': row['guest__nationality'], 'count': row['count']})
+
+        # Loyalty points statistics (each current guest counted once per hotel)
+        loyalty_points = defaultdict(list)
+        for hotel_id, _, points in active_stays.values_list('hotel_id', 'guest_id', 'guest__loyalty_points').distinct():
+            loyalty_points[hotel_id].append(points)
+
+        # Repeat guests (guests with multiple stays)
+        repeat_guests = defaultdict(int)
+        for hotel_id in hotel_stays.values('hotel_id', 'guest_id').annotate(
+            stay_count=Count('id')
+        ).filter(stay_count__gt=1).values_list('hotel_id', flat=True):
+            repeat_guests[hotel_id] += 1
+
         stats = {}
-        
         for hotel in hotels:
-            # Current guests
-            current_guests = Guest.objects.filter(
-                stays__hotel=hotel,
-                stays__status='active'
-            ).distinct()
-            
-            # New guests today
-            new_guests_today = Guest.objects.filter(
-                first_contact_date__date=target_date,
-                stays__hotel=hotel
-            ).distinct()
-            
-            # Guest distribution by status
-            guest_status_dist = current_guests.values('status').annotate(
-                count=Count('id')
-            )
-            
-            # Guest nationality distribution
-            nationality_dist = current_guests.values('nationality').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
-            
-            # Loyalty points statistics
-            loyalty_stats = current_guests.aggregate(
-                total_points=Sum('loyalty_points'),
-                avg_points=Avg('loyalty_points'),
-                max_points=Coalesce(Max('loyalty_points'), 0)
-            )
-            
-            # Repeat guests (guests with multiple stays)
-            repeat_guests = Guest.objects.filter(
-                stays__hotel=hotel
-            ).annotate(
-                stay_count=Count('stays')
-            ).filter(stay_count__gt=1).distinct()
-            
+            points = loyalty_points[hotel.id]
             stats[f"hotel_{hotel.id}"] = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
-                'current_guests': current_guests.count(),
-                'new_guests_today': new_guests_today.count(),
-                'repeat_guests': repeat_guests.count(),
-                'guest_status_distribution': list(guest_status_dist),
-                'nationality_distribution': list(nationality_dist),
+                'current_guests': current_guests.get(hotel.id, 0),
+                'new_guests_today': new_guests_today.get(hotel.id, 0),
+                'repeat_guests': repeat_guests[hotel.id],
+                'guest_status_distribution': guest_status_dist[hotel.id],
+                'nationality_distribution': sorted(
+                    nationality_dist[hotel.id], key=lambda row: -row['count']
+                )[:10],
                 'loyalty_stats': {
-                    'total_points': loyalty_stats['total_points'] or 0,
-                    'avg_points': round(loyalty_stats['avg_points'] or 0, 2),
-                    'max_points': loyalty_stats['max_points'],
+                    'total_points': sum(points),
+                    'avg_points': round(sum(points) / len(points), 2) if points else 0,
+                    'max_points': max(points, default=0),
                 }
             }
-        
+
         return success_response(data=stats)
 
     def get_room_stats(self, hotels, target_date, date_from=None, date_to=None):
         """
         Room-related statistics
         """
+        hotels = list(hotels)
+        rooms = Room.objects.filter(hotel_id__in=[hotel.id for hotel in hotels])
+
+        # Basic room statistics
+        room_status_dist = _grouped_counts(rooms, 'status')
+
+        # Room category distribution
+        category_dist = _grouped_counts(rooms, 'category__name')
+
+        # Floor distribution
+        floor_dist = _grouped_counts(rooms, 'floor')
+
         stats = {}
-        
         for hotel in hotels:
-            rooms = Room.objects.filter(hotel=hotel)
-            
-            # Basic room statistics
-            room_status_dist = rooms.values('status').annotate(
-                count=Count('id')
-            )
-            
-            # Room category distribution
-            category_dist = rooms.values('category__name').annotate(
-                count=Count('id')
-            )
-            
-            # Floor distribution
-            floor_dist = rooms.values('floor').annotate(
-                count=Count('id')
-            ).order_by('floor')
-            
-            # Maintenance statistics
-            maintenance_rooms = rooms.filter(status='maintenance')
-            cleaning_rooms = rooms.filter(status='cleaning')
-            
+            by_status = room_status_dist.get(hotel.id, {})
             stats[f"hotel_{hotel.id}"] = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
-                'total_rooms': rooms.count(),
-                'room_status_distribution': list(room_status_dist),
-                'category_distribution': list(category_dist),
-                'floor_distribution': list(floor_dist),
-                'maintenance_rooms': maintenance_rooms.count(),
-                'cleaning_rooms': cleaning_rooms.count(),
+                'total_rooms': sum(by_status.values()),
+                'room_status_distribution': [
+                    {'status': room_status, 'count': count} for room_status, count in by_status.items()
+                ],
+                'category_distribution': [
+                    {'category__name': name, 'count': count}
+                    for name, count in category_dist.get(hotel.id, {}).items()
+                ],
+                'floor_distribution': [
+                    {'floor': floor, 'count': count}
+                    for floor, count in sorted(floor_dist.get(hotel.id, {}).items())
+                ],
+                # Maintenance statistics
+                'maintenance_rooms': by_status.get('maintenance', 0),
+                'cleaning_rooms': by_status.get('cleaning', 0),
             }
-        
+
         return success_response(data=stats)
 
     def get_staff_stats(self, hotels, target_date, user):
@@ -365,144 +411,147 @@ class HotelStatsViewSet(viewsets.ViewSet):
         if not (user.is_superuser or 
                 user.user_type in ['hotel_admin', 'manager']):
             return forbidden_response("Access denied for staff statistics.")
-        
+
+        hotels = list(hotels)
+        recent_cutoff = timezone.make_aware(datetime.combine(target_date - timedelta(days=7), datetime.min.time()))
+
+        staff = defaultdict(list)
+        for row in User.objects.filter(
+            hotel_id__in=[hotel.id for hotel in hotels],
+            is_active=True
+        ).values_list('hotel_id', 'user_type', 'department', 'last_login'):
+            staff[row[0]].append(row[1:])
+
         stats = {}
-        
         for hotel in hotels:
+            members = staff[hotel.id]
+
             # Staff distribution by user type
-            staff_by_type = User.objects.filter(
-                hotel=hotel,
-                is_active=True
-            ).values('user_type').annotate(
-                count=Count('id')
-            )
-            
-            # Staff by department
+            by_type = defaultdict(int)
+            for user_type, _, _ in members:
+                by_type[user_type] += 1
+
+            # Staff by department (department is a name or a list of names)
             staff_by_department = []
             for dept in ['Reception', 'Housekeeping', 'Room Service', 'Restaurant', 'Management']:
-                dept_count = User.objects.filter(
-                    hotel=hotel,
-                    is_active=True,
-                    department__contains=[dept]
-                ).count()
-                
                 staff_by_department.append({
                     'department': dept,
-                    'count': dept_count
+                    'count': sum(
+                        1 for _, department, _ in members
+                        if department == dept or (isinstance(department, list) and dept in department)
+                    ),
                 })
-            
-            # Recently active staff
-            recent_active = User.objects.filter(
-                hotel=hotel,
-                is_active=True,
-                last_login__gte=target_date - timedelta(days=7)
-            ).count()
-            
+
             stats[f"hotel_{hotel.id}"] = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
-                'total_staff': User.objects.filter(hotel=hotel, is_active=True).count(),
-                'staff_by_type': list(staff_by_type),
+                'total_staff': len(members),
+                'staff_by_type': [{'user_type': user_type, 'count': count} for user_type, count in by_type.items()],
                 'staff_by_department': staff_by_department,
-                'recently_active': recent_active,
+                # Recently active staff
+                'recently_active': sum(
+                    1 for _, _, last_login in members if last_login and last_login >= recent_cutoff
+                ),
             }
-        
+
         return success_response(data=stats)
 
     def get_performance_stats(self, hotels, target_date, date_from=None, date_to=None):
         """
         Performance metrics and KPIs
         """
+        hotels = list(hotels)
+        hotel_ids = [hotel.id for hotel in hotels]
+        completed = Stay.objects.filter(hotel_id__in=hotel_ids, status='completed').order_by()
+
+        # Average stay duration
+        avg_stay_duration = dict(completed.values('hotel_id').annotate(
+            avg_duration=Avg(
+                ExpressionWrapper(
+                    F('actual_check_out') - F('actual_check_in'),
+                    output_field=DurationField()
+                )
+            )
+        ).values_list('hotel_id', 'avg_duration'))
+
+        # Check-in to check-out conversion rate
+        total_bookings = _grouped_counts(Booking.objects.filter(hotel_id__in=hotel_ids))
+        completed_stays = _grouped_counts(completed)
+
+        # Room turnover time (simplified - could be enhanced with actual cleaning times)
+        rooms_turned_over_today = _grouped_counts(Room.objects.filter(
+            hotel_id__in=hotel_ids,
+            status='cleaning',
+            updated_at__date=target_date
+        ))
+
         stats = {}
-        
         for hotel in hotels:
-            # Average stay duration
-            avg_stay_duration = Stay.objects.filter(
-                hotel=hotel,
-                status='completed'
-            ).aggregate(
-                avg_duration=Avg(
-                    ExpressionWrapper(
-                        F('actual_check_out') - F('actual_check_in'),
-                        output_field=DecimalField()
-                    )
-                )
-            )['avg_duration'] or 0
-            
-            # Check-in to check-out conversion rate
-            total_bookings = Booking.objects.filter(hotel=hotel).count()
-            completed_stays = Stay.objects.filter(hotel=hotel, status='completed').count()
-            conversion_rate = (completed_stays / total_bookings * 100) if total_bookings > 0 else 0
-            
-            # Room turnover time (simplified - could be enhanced with actual cleaning times)
-            rooms_turned_over_today = Room.objects.filter(
-                hotel=hotel,
-                status='cleaning',
-                updated_at__date=target_date
-            ).count()
-            
+            duration = avg_stay_duration.get(hotel.id)
+            bookings = total_bookings.get(hotel.id, 0)
+            conversion_rate = (completed_stays.get(hotel.id, 0) / bookings * 100) if bookings > 0 else 0
             stats[f"hotel_{hotel.id}"] = {
                 'hotel_id': str(hotel.id),
                 'hotel_name': hotel.name,
-                'avg_stay_duration_days': float(avg_stay_duration.days) if hasattr(avg_stay_duration, 'days') else 0,
+                'avg_stay_duration_days': float(duration.days) if hasattr(duration, 'days') else 0,
                 'booking_conversion_rate': round(conversion_rate, 2),
-                'rooms_turned_over_today': rooms_turned_over_today,
+                'rooms_turned_over_today': rooms_turned_over_today.get(hotel.id, 0),
             }
-        
+
         return success_response(data=stats)
 
     # Helper methods
-    def _get_staff_count(self, hotel):
-        """Get staff count by user type for a hotel"""
-        staff_counts = User.objects.filter(
-            hotel=hotel,
-            is_active=True
-        ).values('user_type').annotate(count=Count('id'))
-        
-        return dict(staff_counts)
 
     def _get_monthly_occupancy_trend(self, hotel, year):
         """Get monthly occupancy trend for a given year"""
-        monthly_data = []
-        
-        for month in range(1, 13):
-            month_start = datetime(year, month, 1).date()
-            month_end = datetime(year, month, calendar.monthrange(year, month)[1]).date()
-            
-            total_rooms = Room.objects.filter(hotel=hotel).count()
-            if total_rooms == 0:
-                occupancy_rate = 0
-            else:
-                occupied_rooms = Stay.objects.filter(
-                    hotel=hotel,
-                    status='active',
-                ).filter(
-                    Q(actual_check_in__date__lte=month_end) |
-                    Q(actual_check_in__isnull=True, check_in_date__date__lte=month_end)
-                ).filter(
-                    Q(actual_check_out__date__gte=month_start) |
-                    Q(actual_check_out__isnull=True, check_out_date__date__gte=month_start)
-                ).values('room').distinct().count()
-                
-                occupancy_rate = (occupied_rooms / total_rooms) * 100
-            
-            monthly_data.append({
-                'month': calendar.month_abbr[month],
-                'occupancy_rate': round(occupancy_rate, 2)
-            })
-        
-        return monthly_data
+        return monthly_occupancy_trend(hotel, year)
 
     def _get_date_range_stats(self, hotel, date_from, date_to):
         """Get statistics for a date range"""
-        # This could include trends, comparisons, etc.
+        granularity = auto_granularity(date_from, date_to)
+        if date_from > date_to or len(bucket_starts(date_from, date_to, granularity)) > MAX_BUCKETS:
+            trends = None
+        else:
+            trends = build_trends(hotel, granularity, date_from, date_to)
         return {
-            'date_range_stats': True,
+            'date_range_stats': trends,
             'date_from': date_from.isoformat(),
             'date_to': date_to.isoformat(),
         }
 
-    
+    def _trends_response(self, request, hotel):
+        """Gap-filled series for the `trends` actions (see hotelstat.trends)."""
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        metrics = [metric for metric in params.get('metrics', '').split(',') if metric] or list(METRICS)
+        try:
+            today = timezone.now().astimezone(hotel_timezone(hotel.time_zone)).date()
+            date_from, date_to = default_range(granularity, today)
+            if params.get('date_from'):
+                date_from = datetime.strptime(params['date_from'], '%Y-%m-%d').date()
+            if params.get('date_to'):
+                date_to = datetime.strptime(params['date_to'], '%Y-%m-%d').date()
+            data = build_trends(hotel, granularity, date_from, date_to, metrics)
+        except TrendError as e:
+            return error_response(str(e), status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return error_response("Invalid date format. Use YYYY-MM-DD.", status=status.HTTP_400_BAD_REQUEST)
+        data['hotel_id'] = str(hotel.id)
+        return success_response(data=data)
+
+    @action(detail=True, methods=['get'], url_path='trends')
+    def trends(self, request, pk=None):
+        """Daily / weekly / monthly series for one accessible hotel."""
+        try:
+            hotel = self.get_accessible_hotels(request.user, pk).first()
+            if not hotel:
+                return forbidden_response("Access denied or no hotel associated.")
+            return self._trends_response(request, hotel)
+        except Exception as e:
+            return error_response(
+                f"Failed to retrieve hotel trends: {str(e)}",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
 
 class HotelUserStatsViewSet(viewsets.ViewSet):
@@ -574,6 +623,31 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
         """Get performance metrics for user's hotel"""
         return self._get_stat_type(request, 'performance')
 
+    @action(detail=False, methods=['get'], url_path='trends')
+    @cache_response('hotel_stats.trends', scope='hotel', tags=(HOTEL_STAYS, HOTEL_ROOMS),
+                    ttl=settings.RESPONSE_CACHE_STATS_TTL)
+    def trends(self, request):
+        """
+        Time series for user's hotel: ?granularity=day|week|month&metrics=occupancy,revenue
+        &date_from=&date_to= (defaults: every metric over the last 30 days / 12 weeks / 12 months)
+        """
+        try:
+            user = request.user
+            hotel = self.get_hotel_for_user(user)
+            if not hotel:
+                if user.is_superuser:
+                    return error_response(
+                        "Superusers should use /api/hotel_stat/admin/hotels/<hotel_id>/trends/.",
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                return forbidden_response("No hotel associated with user.")
+            return HotelStatsViewSet()._trends_response(request, hotel)
+        except Exception as e:
+            return error_response(
+                f"Failed to get trends: {str(e)}",
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'], url_path='guest-history')
     def guest_history(self, request):
         try:
@@ -606,53 +680,22 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get guests who have stayed at this hotel
-            guests = Guest.objects.filter(
-                stays__hotel=hotel
-            ).distinct()
-            
-            # Apply date filters - include guests who were present during the period
-            if start_date or end_date:
-                filtered_stays = Stay.objects.filter(hotel=hotel).annotate(
-                    effective_check_in=Coalesce('actual_check_in', 'check_in_date'),
-                    effective_check_out=Coalesce('actual_check_out', 'check_out_date')
-                )
-                
-                # Find stays that overlap with the date range
-                if start_date:
-                    filtered_stays = filtered_stays.filter(effective_check_out__date__gte=start_date)
-                if end_date:
-                    filtered_stays = filtered_stays.filter(effective_check_in__date__lte=end_date)
-                    
-                guests = guests.filter(stays__in=filtered_stays).distinct()
-            
-            # Filter by specific guest WhatsApp number if provided
-            if guest_whatsapp:
-                guests = guests.filter(whatsapp_number=guest_whatsapp)
-
-            # Search by guest name, phone number, or ID document number
-            if search_term:
-                guests = guests.filter(
-                    Q(full_name__icontains=search_term) |
-                    Q(whatsapp_number__icontains=search_term) |
-                    Q(identity_documents__document_number__icontains=search_term)
-                ).distinct()
+            # Guests who stayed at this hotel, narrowed by the date range / WhatsApp / search filters
+            guests = guest_history_queryset(
+                hotel,
+                start_date=start_date,
+                end_date=end_date,
+                guest_whatsapp=guest_whatsapp,
+                search=search_term,
+            )
             
             # Prepare response data
             guest_data = []
             for guest in guests:
-                # Get all stays for this guest, then optionally filter by overlapping dates for display
-                guest_stays = Stay.objects.filter(guest=guest, hotel=hotel).annotate(
-                    effective_check_in=Coalesce('actual_check_in', 'check_in_date'),
-                    effective_check_out=Coalesce('actual_check_out', 'check_out_date')
-                ).order_by('-effective_check_in')
-                
-                # Apply date filters for display purposes - include overlapping stays
-                if start_date or end_date:
-                    if start_date:
-                        guest_stays = guest_stays.filter(effective_check_out__date__gte=start_date)
-                    if end_date:
-                        guest_stays = guest_stays.filter(effective_check_in__date__lte=end_date)
+                # Stays for this guest overlapping the date range (all stays when no range is given)
+                guest_stays = history_stays_queryset(
+                    hotel, start_date=start_date, end_date=end_date
+                ).filter(guest=guest).order_by('-effective_check_in')
                 
                 stays_data = []
                 for stay in guest_stays:
@@ -760,24 +803,10 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
             # Prepare response data
             room_data = []
             for room in rooms_queryset:
-                # Get all stays for this room, then optionally filter by overlapping dates for display
-                room_stays = Stay.objects.filter(room=room).annotate(
-                    effective_check_in=Coalesce('actual_check_in', 'check_in_date'),
-                    effective_check_out=Coalesce('actual_check_out', 'check_out_date')
-                )
-                
-                # Apply date filters for display purposes - include overlapping stays
-                if start_date or end_date:
-                    if start_date:
-                        room_stays = room_stays.filter(effective_check_out__date__gte=start_date)
-                    if end_date:
-                        room_stays = room_stays.filter(effective_check_in__date__lte=end_date)
-                
-                # Apply guest WhatsApp filter if provided
-                if guest_whatsapp:
-                    room_stays = room_stays.filter(guest__whatsapp_number=guest_whatsapp)
-                
-                room_stays = room_stays.order_by('-effective_check_in')
+                # Stays for this room overlapping the date range, optionally for one guest
+                room_stays = history_stays_queryset(
+                    hotel, start_date=start_date, end_date=end_date, guest_whatsapp=guest_whatsapp
+                ).filter(room=room).order_by('-effective_check_in')
                 
                 stays_data = []
                 for stay in room_stays:
@@ -861,20 +890,14 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
                 )
             
             # Get conversations for this hotel
-            conversations_queryset = Conversation.objects.filter(hotel=hotel)
-            
-            # Apply date filters
-            if start_date:
-                conversations_queryset = conversations_queryset.filter(created_at__gte=start_date)
-            if end_date:
-                conversations_queryset = conversations_queryset.filter(created_at__lte=end_date)
+            conversations_queryset = conversation_history_queryset(hotel, start_date=start_date, end_date=end_date)
             
             # Get message counts for each conversation
             conversations_data = []
             total_messages = 0
             
-            for conversation in conversations_queryset.order_by('-created_at'):
-                message_count = Message.objects.filter(conversation=conversation).count()
+            for conversation in conversations_queryset.annotate(message_count=conversation_message_count()):
+                message_count = conversation.message_count
                 total_messages += message_count
                 
                 # Get guest information
@@ -924,8 +947,8 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
             
             # Department breakdown
             dept_breakdown = conversations_queryset.values('department').annotate(
-                count=Count('id'),
-                total_messages=Count('messages')
+                count=Count('id', distinct=True),
+                total_messages=Count('messages', distinct=True) + Count('archived_messages', distinct=True)
             ).order_by('-count')
             
             summary['department_breakdown'] = list(dept_breakdown)
@@ -980,40 +1003,25 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get feedback for this hotel
-            feedback_queryset = Feedback.objects.filter(stay__hotel=hotel)
-            
-            # Apply date filters (day-inclusive).
-            # Using __date avoids naive midnight comparisons that can hide same-day data.
-            if start_date:
-                feedback_queryset = feedback_queryset.filter(created_at__date__gte=start_date)
-            if end_date:
-                feedback_queryset = feedback_queryset.filter(created_at__date__lte=end_date)
-            
             # Apply room filter
             if room_id:
                 try:
-                    feedback_queryset = feedback_queryset.filter(stay__room_id=int(room_id))
+                    room_id = int(room_id)
                 except ValueError:
                     return error_response(
                         "Invalid room_id format.", 
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # Apply guest WhatsApp filter
-            if guest_whatsapp:
-                feedback_queryset = feedback_queryset.filter(guest__whatsapp_number=guest_whatsapp)
-
-            # Search by guest name, phone number, or ID document number
-            if search_term:
-                feedback_queryset = feedback_queryset.filter(
-                    Q(guest__full_name__icontains=search_term) |
-                    Q(guest__whatsapp_number__icontains=search_term) |
-                    Q(guest__identity_documents__document_number__icontains=search_term)
-                ).distinct()
-            
-            # Order by most recent
-            feedback_queryset = feedback_queryset.order_by('-created_at')
+            # Feedback for this hotel, filtered and ordered most recent first
+            feedback_queryset = feedback_analytics_queryset(
+                hotel,
+                start_date=start_date,
+                end_date=end_date,
+                room_id=room_id,
+                guest_whatsapp=guest_whatsapp,
+                search=search_term,
+            )
             
             # Prepare feedback data
             feedback_data = []
@@ -1139,7 +1147,87 @@ class HotelUserStatsViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<report>[a-z-]+)')
+    def export(self, request, report=None):
+        """
+        Export a report (guest-history, room-history, conversation-history, feedback) as
+        CSV or JSONL with the same filters as the report endpoint.
+
+        Query params: file_format=csv|jsonl (default csv), background=true to force a
+        background job. Exports above HOTELSTAT_EXPORT_STREAM_MAX_ROWS rows are always
+        written to storage by a background job (202 + job); poll export-jobs/{id}/ for
+        the download link. Smaller exports stream back row by row.
+        """
+        from .tasks import render_report_export
+
+        user = request.user
+        hotel = self.get_hotel_for_user(user)
+        if not hotel:
+            if user.is_superuser:
+                return error_response(
+                    "Superusers should use /api/hotel_stat/admin/hotels/ endpoints with hotel_id parameter for exports.",
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return forbidden_response("No hotel associated with user.")
+
+        export_report = EXPORT_REPORTS.get(report)
+        if not export_report:
+            return error_response(
+                f"Invalid report: {report}. Must be one of: {', '.join(EXPORT_REPORTS)}",
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return error_response(
+                f"Invalid file_format: {file_format}. Must be one of: {', '.join(EXPORT_FORMATS)}",
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            filters = parse_report_filters(request.query_params, export_report.filters)
+        except ReportFilterError as e:
+            return error_response(str(e), status=status.HTTP_400_BAD_REQUEST)
+
+        background = request.query_params.get('background', '').lower() in ('1', 'true', 'yes')
+        if not background:
+            max_rows = getattr(settings, 'HOTELSTAT_EXPORT_STREAM_MAX_ROWS', 50000)
+            background = export_report.queryset(hotel, filters).count() > max_rows
+
+        if background:
+            job = ReportExportJob.objects.create(
+                hotel=hotel,
+                report=report,
+                file_format=file_format,
+                filters={name: request.query_params.get(name) for name in export_report.filters
+                         if request.query_params.get(name)},
+                created_by=user,
+            )
+            transaction.on_commit(lambda: render_report_export.delay(job.id))
+            return success_response(data=ReportExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        lines = iter_export_lines(export_report, export_report.iter_rows(hotel, filters), file_format)
+        response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[file_format])
+        filename = f"{report}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path=r'export-jobs/(?P<job_id>\d+)')
+    def export_job(self, request, job_id=None):
+        """Status and download link of a background report export."""
+        user = request.user
+        hotel = self.get_hotel_for_user(user)
+        if not hotel:
+            if user.is_superuser:
+                return error_response(
+                    "Superusers should use /api/hotel_stat/admin/hotels/ endpoints with hotel_id parameter for exports.",
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return forbidden_response("No hotel associated with user.")
+        job = get_object_or_404(ReportExportJob, id=job_id, hotel=hotel)
+        return success_response(data=ReportExportJobSerializer(job).data)
+
     @action(detail=False, methods=['get'], url_path='overview')
+    @cache_response('hotel_stats.overview', scope='hotel', tags=(HOTEL_STAYS, HOTEL_ROOMS),
+                    ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def overview(self, request):
         try:
             """Get key hotel metrics: Total Guests, Total Rooms, Occupancy Rate, Total Revenue"""
@@ -1426,6 +1514,8 @@ class PlatformStatsViewSet(HotelStatsViewSet):
                 return Hotel.objects.none()
         return Hotel.objects.all()
 
+    @cache_response('platform_stats.list', scope='platform', tags=(PLATFORM_STATS,),
+                    ttl=settings.RESPONSE_CACHE_STATS_TTL)
     def list(self, request):
         try:
             """Get platform-wide overview statistics"""
@@ -1518,9 +1608,21 @@ class PlatformStatsViewSet(HotelStatsViewSet):
             )
 
 
+# stat_type -> HotelStatsViewSet method, for HotelComparisonView
+COMPARISON_STAT_TYPES = {
+    'overview': 'get_overview_stats',
+    'occupancy': 'get_occupancy_stats',
+    'guests': 'get_guest_stats',
+    'rooms': 'get_room_stats',
+    'staff': 'get_staff_stats',
+    'performance': 'get_performance_stats',
+}
+
+
 class HotelComparisonView(views.APIView):
     """
     Compare statistics between multiple hotels (for hotel managers, hotel admins, and superusers)
+    ?hotels=<id>&hotels=<id>&stat_type=overview  or  stat_type=overview,rooms,... for several at once
     """
     permission_classes = [permissions.IsAuthenticated, IsHotelManagerOrAdmin]
 
@@ -1543,8 +1645,8 @@ class HotelComparisonView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            hotels = Hotel.objects.filter(id__in=hotel_ids)
-            if hotels.count() != len(hotel_ids):
+            hotels = list(Hotel.objects.filter(id__in=hotel_ids))
+            if len(hotels) != len(hotel_ids):
                 return error_response(
                     "One or more hotel IDs are invalid.", 
                     status=status.HTTP_400_BAD_REQUEST
@@ -1571,48 +1673,46 @@ class HotelComparisonView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Use the main stats viewset to get individual hotel data
+            stat_types = [name.strip() for name in stat_type.split(',') if name.strip()]
+            invalid = [name for name in stat_types if name not in COMPARISON_STAT_TYPES]
+            if invalid or not stat_types:
+                return error_response(f"Invalid stat type: {stat_type}", status=status.HTTP_400_BAD_REQUEST)
+
+            # Every stat type is computed once for all hotels (grouped by hotel_id); several
+            # stat types run side by side, each thread on its own DB connection.
             stats_viewset = HotelStatsViewSet()
-            
-            # Get stats for each hotel
+            def compute(name):
+                if name == 'staff':
+                    return stats_viewset.get_staff_stats(hotels, target_date, user)
+                method = getattr(stats_viewset, COMPARISON_STAT_TYPES[name])
+                return method(hotels, target_date, date_from, date_to)
+
+            workers = min(len(stat_types), settings.HOTELSTAT_COMPARISON_WORKERS)
+            if workers > 1:
+                def compute_in_thread(name):
+                    try:
+                        return compute(name)
+                    finally:
+                        connection.close()
+
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    responses = dict(zip(stat_types, pool.map(compute_in_thread, stat_types)))
+            else:
+                responses = {name: compute(name) for name in stat_types}
+
+            # Same per-hotel entries as one single-hotel stats call each:
+            # {"hotel_<id>": {"success": true, "data": {"hotel_<id>": {...}}}}
             comparison_data = {}
             for hotel in hotels:
-                # Create a mock request object
-                class MockRequest:
-                    def __init__(self, query_params):
-                        self.query_params = query_params
-                        self.user = user  # Add user to mock request for checks
-                
-                mock_query_params = request.query_params.copy()
-                mock_query_params['stat_type'] = stat_type
-                
-                # Get the hotel statistics
-                # Note: We need to handle potential recursion or method calls carefully.
-                # Since we are calling retrieve, which calls get_accessible_hotels, we need to ensure permissions work.
-                # However, for comparison view, we've already checked permissions at the top level.
-                
-                # Direct method call approach (cleaner than mocking request for retrieve)
-                if stat_type == 'overview':
-                    response_data = stats_viewset.get_overview_stats([hotel], target_date, date_from, date_to)
-                elif stat_type == 'occupancy':
-                    response_data = stats_viewset.get_occupancy_stats([hotel], target_date, date_from, date_to)
-                elif stat_type == 'guests':
-                    response_data = stats_viewset.get_guest_stats([hotel], target_date, date_from, date_to)
-                elif stat_type == 'rooms':
-                    response_data = stats_viewset.get_room_stats([hotel], target_date, date_from, date_to)
-                elif stat_type == 'staff':
-                    response_data = stats_viewset.get_staff_stats([hotel], target_date, user)
-                elif stat_type == 'performance':
-                    response_data = stats_viewset.get_performance_stats([hotel], target_date, date_from, date_to)
-                else:
-                    return error_response(f"Invalid stat type: {stat_type}", status=status.HTTP_400_BAD_REQUEST)
-                
-                if hasattr(response_data, 'data'):
-                    comparison_data[f"hotel_{hotel.id}"] = response_data.data
-                else:
-                    # If response_data is not a DRF Response (e.g. error response dict from helper)
-                     comparison_data[f"hotel_{hotel.id}"] = response_data
-            
+                key = f"hotel_{hotel.id}"
+                entries = {}
+                for name, response in responses.items():
+                    if response.status_code == status.HTTP_200_OK:
+                        entries[name] = {**response.data, 'data': {key: response.data['data'][key]}}
+                    else:
+                        entries[name] = response.data
+                comparison_data[key] = entries[stat_types[0]] if len(stat_types) == 1 else entries
+
             return success_response(data=comparison_data)
         except Exception as e:
             return error_response(
@@ -79,12 +79,81 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache for hot lookups (e.g. the guest 24h WhatsApp service window).
+# Point REDIS_CACHE_URL at Redis wherever more than one process serves traffic;
+# without it each process keeps its own in-memory cache.
+REDIS_CACHE_URL = env('REDIS_CACHE_URL', default='')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'lobbybee',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Per-hotel config snapshot (hotel/config_snapshot.py): seconds a process trusts its
+# copy before re-checking the version stamp, and lifetime of a snapshot in the shared cache.
+HOTEL_CONFIG_LOCAL_TTL = env.float('HOTEL_CONFIG_LOCAL_TTL', default=5.0)
+HOTEL_CONFIG_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Dashboard response cache (lobbybee/utils/response_cache.py). Writes invalidate by tag;
+# the TTL bounds staleness of data that is not tagged (message / conversation counts).
+RESPONSE_CACHE_ENABLED = env.bool('RESPONSE_CACHE_ENABLED', default=True)
+RESPONSE_CACHE_DEFAULT_TTL = env.int('RESPONSE_CACHE_DEFAULT_TTL', default=60)
+RESPONSE_CACHE_STATS_TTL = env.int('RESPONSE_CACHE_STATS_TTL', default=30)
+
+# JWT principal cache (user/principal_cache.py) shared by REST and WebSocket auth.
+# User / hotel writes and logout invalidate; the TTL bounds everything else.
+PRINCIPAL_CACHE_ENABLED = env.bool('PRINCIPAL_CACHE_ENABLED', default=True)
+PRINCIPAL_CACHE_TTL = env.int('PRINCIPAL_CACHE_TTL', default=60)
+
+# Staff activity writes (user/activity.py): bulk_create batch size, and the bounded
+# buffer / flush interval of the background flusher used by activity_batch(background=True).
+ACTIVITY_LOG_BATCH_SIZE = env.int('ACTIVITY_LOG_BATCH_SIZE', default=500)
+ACTIVITY_LOG_BUFFER_SIZE = env.int('ACTIVITY_LOG_BUFFER_SIZE', default=10000)
+ACTIVITY_LOG_FLUSH_INTERVAL = env.float('ACTIVITY_LOG_FLUSH_INTERVAL', default=1.0)
+
+# Staff presence (chat/presence.py). Connections heartbeat every HEARTBEAT_INTERVAL and
+# expire after TTL; a closed socket counts as online for DISCONNECT_GRACE more seconds,
+# and presence diffs go out at most once per BROADCAST_INTERVAL per hotel.
+PRESENCE_TTL = env.int('PRESENCE_TTL', default=60)
+PRESENCE_HEARTBEAT_INTERVAL = env.int('PRESENCE_HEARTBEAT_INTERVAL', default=20)
+PRESENCE_DISCONNECT_GRACE = env.int('PRESENCE_DISCONNECT_GRACE', default=15)
+PRESENCE_BROADCAST_INTERVAL = env.float('PRESENCE_BROADCAST_INTERVAL', default=5.0)
+PRESENCE_FALLBACK_DEPARTMENT = env('PRESENCE_FALLBACK_DEPARTMENT', default='Reception')
+
+# Typing indicators (chat/typing_indicators.py): a start with no follow-up stops after
+# EXPIRY seconds; an explicit stop waits STOP_DEBOUNCE seconds for a new start.
+TYPING_EXPIRY_SECONDS = env.float('TYPING_EXPIRY_SECONDS', default=6.0)
+TYPING_STOP_DEBOUNCE_SECONDS = env.float('TYPING_STOP_DEBOUNCE_SECONDS', default=1.5)
+
+# Chat archival (chat/archive.py): messages of conversations closed for CONVERSATION_DAYS
+# move to ArchivedMessage, webhook attempts older than WEBHOOK_DAYS to gzipped JSONL
+# segments in the CHAT_ARCHIVE_STORAGE storage. A run moves at most MAX_BATCHES batches.
+CHAT_ARCHIVE_CONVERSATION_DAYS = env.int('CHAT_ARCHIVE_CONVERSATION_DAYS', default=90)
+CHAT_ARCHIVE_WEBHOOK_DAYS = env.int('CHAT_ARCHIVE_WEBHOOK_DAYS', default=30)
+CHAT_ARCHIVE_BATCH_SIZE = env.int('CHAT_ARCHIVE_BATCH_SIZE', default=1000)
+CHAT_ARCHIVE_MAX_BATCHES = env.int('CHAT_ARCHIVE_MAX_BATCHES', default=50)
+CHAT_ARCHIVE_STORAGE = env('CHAT_ARCHIVE_STORAGE', default='archive')
+
+# Threads HotelComparisonView uses to compute several requested stat types side by side.
+HOTELSTAT_COMPARISON_WORKERS = env.int('HOTELSTAT_COMPARISON_WORKERS', default=4)
+
 AUTHENTICATION_BACKENDS = [
     'user.auth_backends.EmailOrUsernameModelBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
 MIDDLEWARE = [
+    'lobbybee.middleware.RequestInstrumentationMiddleware',
+    'lobbybee.middleware.ActivityLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -96,9 +165,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request/consumer instrumentation (query counts, DB/external time, latency).
+# Exported at /api/metrics/ in Prometheus format; see lobbybee/utils/instrumentation.py.
+INSTRUMENTATION_ENABLED = env.bool('INSTRUMENTATION_ENABLED', default=False)
+INSTRUMENTATION_METRICS_TOKEN = env('INSTRUMENTATION_METRICS_TOKEN', default='')
+INSTRUMENTATION_STRICT_BUDGETS = env.bool('INSTRUMENTATION_STRICT_BUDGETS', default=False)
+# Shared directory that lets one scrape cover every worker process (gunicorn); empty = per process.
+INSTRUMENTATION_MULTIPROCESS_DIR = env('INSTRUMENTATION_MULTIPROCESS_DIR', default='')
+INSTRUMENTATION_FLUSH_INTERVAL = env.float('INSTRUMENTATION_FLUSH_INTERVAL', default=1.0)
+# {'<url name>' or '<METHOD url-name>': max_queries}
+INSTRUMENTATION_QUERY_BUDGETS = {}
+
+# hotelstat report exports: larger exports are written to storage by a background job
+HOTELSTAT_EXPORT_STREAM_MAX_ROWS = env.int('HOTELSTAT_EXPORT_STREAM_MAX_ROWS', default=50000)
+HOTELSTAT_EXPORT_CHUNK_SIZE = 2000
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.auth_backends.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -194,6 +278,11 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
     },
+    # Chat archive segments (chat/archive.py); outside MEDIA_ROOT so they are never served.
+    "archive": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": os.path.join(BASE_DIR, 'archive')},
+    },
 }
 
 # Media files (User uploads)
@@ -216,6 +305,11 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 
 WHATSAPP_ACCESS_KEY = env('WHATSAPP_ACCESS_KEY')
+# Graph API base URL for the WhatsApp clients (chat/utils/whatsapp_utils.py, whatsapp_async.py)
+WHATSAPP_GRAPH_API_BASE_URL = env('WHATSAPP_GRAPH_API_BASE_URL', default='https://graph.facebook.com/v22.0')
+WHATSAPP_ASYNC_MAX_CONCURRENCY = env.int('WHATSAPP_ASYNC_MAX_CONCURRENCY', default=20)
+WHATSAPP_ASYNC_TIMEOUT = env.float('WHATSAPP_ASYNC_TIMEOUT', default=15.0)
+WHATSAPP_ASYNC_CONNECT_TIMEOUT = env.float('WHATSAPP_ASYNC_CONNECT_TIMEOUT', default=5.0)
 GOOGLE_GEMINI_API_KEY = env('GOOGLE_GEMINI_API_KEY')
 
 # Celery Configuration
@@ -226,6 +320,16 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_ENABLE_UTC = True
+CELERY_BEAT_SCHEDULE = {
+    'reap-expired-reminder-leases': {
+        'task': 'guest.tasks.reap_expired_reminder_leases',
+        'schedule': 120.0,
+    },
+    'archive-chat-history': {
+        'task': 'chat.tasks.archive_chat_history',
+        'schedule': 60 * 60.0,
+    },
+}
 
 from datetime import timedelta
 
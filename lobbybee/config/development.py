@@ -32,6 +32,9 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
     },
+    "archive": {
+        "BACKEND": "lobbybee.utils.storage_backends.ArchiveStorage",
+    },
 }
 
 # File Upload Settings
@@ -33,6 +33,10 @@ if DISABLE_S3:
         "staticfiles": {
             "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
         },
+        "archive": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": '/app/archive'},
+        },
     }
     STATIC_URL = '/static/'
     STATIC_ROOT = '/app/static'
@@ -62,12 +66,24 @@ else:
         "staticfiles": {
             "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
         },
+        "archive": {
+            "BACKEND": "lobbybee.utils.storage_backends.ArchiveStorage",
+        },
     }
 
     # URLs for static and media files
     STATIC_URL = '/static/'
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/media/'
 
+# Shared Redis cache for production (separate DB from the Celery broker)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('REDIS_CACHE_URL', default=f'redis://{REDIS_HOST}:6379/1'),
+        'KEY_PREFIX': 'lobbybee',
+    },
+}
+
 # Celery Configuration for production
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://redis:6379/0')
 CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://redis:6379/0')
@@ -0,0 +1,68 @@
+"""
+gunicorn settings for the HTTP tier.
+
+    gunicorn -c lobbybee/gunicorn.conf.py lobbybee.wsgi:application
+
+REST traffic (webhooks, dashboards, stats) runs here on several sync worker processes,
+each with a few threads, so one slow request no longer holds up every other request in
+the process. WebSockets are not served here: they run on daphne (see lobbybee/serve.py).
+Every value can be overridden from the environment. Each worker keeps its own metrics
+registry; set INSTRUMENTATION_MULTIPROCESS_DIR so /api/metrics/ scrapes see all of them.
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{_env_int('HTTP_PORT', 8000)}")
+
+# WEB_CONCURRENCY is the conventional name most hosts set.
+workers = _env_int('GUNICORN_WORKERS', _env_int('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = _env_int('GUNICORN_THREADS', 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers now and then so slow leaks (OCR, PDF rendering) cannot build up.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# nginx terminates TLS and sets X-Forwarded-* headers.
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+
+# With INSTRUMENTATION_MULTIPROCESS_DIR set, workers share their metrics through that
+# directory (lobbybee/utils/instrumentation.py) and any worker can answer a scrape.
+def on_starting(server):
+    directory = os.environ.get('INSTRUMENTATION_MULTIPROCESS_DIR')
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith('metrics_'):
+                os.remove(os.path.join(directory, name))
+
+
+def worker_exit(server, worker):
+    # Runs in the worker: keep what it counted since its last periodic flush.
+    if os.environ.get('INSTRUMENTATION_MULTIPROCESS_DIR'):
+        from lobbybee.utils.instrumentation import registry
+        registry.flush()
+
+
+def child_exit(server, worker):
+    # Runs in the master, after worker_exit and before the pid can be handed out again:
+    # fold the worker's totals into the dead-process file, as prometheus_client's
+    # mark_process_dead does. Also covers workers killed on timeout.
+    directory = os.environ.get('INSTRUMENTATION_MULTIPROCESS_DIR')
+    if directory:
+        from lobbybee.utils.instrumentation import mark_process_dead
+        mark_process_dead(worker.pid, directory)
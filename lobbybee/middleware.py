@@ -2,32 +2,36 @@ from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from urllib.parse import parse_qs
 import logging
+import time
+
+from lobbybee.utils import instrumentation
+from user.activity import activity_batch
+from user.principal_cache import resolve
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 @database_sync_to_async
 def get_user_from_token(token_string):
-    """Validate JWT token and return user"""
+    """Validate JWT token and return user (through the principal cache shared with REST auth)"""
     try:
         # Decode and validate the token
         access_token = AccessToken(token_string)
-        user_id = access_token['user_id']
 
-        # Get the user from database
-        user = User.objects.get(id=user_id)
+        user = resolve(access_token)
+        if user is None:
+            logger.error(f"User not found for token")
+            return AnonymousUser()
         logger.info(f"JWT Auth successful for user: {user}")
         return user
     except (InvalidToken, TokenError) as e:
         logger.error(f"Invalid token: {e}")
         return AnonymousUser()
-    except User.DoesNotExist:
-        logger.error(f"User not found for token")
-        return AnonymousUser()
     except Exception as e:
         logger.error(f"Unexpected error in JWT auth: {e}")
         return AnonymousUser()
@@ -67,3 +71,87 @@ class JWTAuthMiddleware(BaseMiddleware):
 def JWTAuthMiddlewareStack(inner):
     """Helper function to wrap the inner ASGI application with JWT auth"""
     return JWTAuthMiddleware(inner)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Per-endpoint query count, DB time, external HTTP time and latency for HTTP requests.
+    Only loaded when INSTRUMENTATION_ENABLED is set; see lobbybee.utils.instrumentation.
+    """
+
+    def __init__(self, get_response):
+        if not instrumentation.is_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with instrumentation.measure() as measurement:
+            response = self.get_response(request)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        endpoint = f"{request.method} {view_name or 'unresolved'}"
+        budget = instrumentation.resolve_budget(endpoint, match.func if match else None, view_name)
+        try:
+            exceeded = instrumentation.check_budget(endpoint, measurement, budget)
+        finally:
+            instrumentation.registry.record(
+                endpoint,
+                measurement,
+                latency_ms,
+                error=response.status_code >= 500,
+                budget_exceeded=budget is not None and measurement.queries > budget,
+            )
+        if exceeded:
+            response['X-Query-Budget-Exceeded'] = f"{measurement.queries}/{budget}"
+        return response
+
+
+class ActivityLogMiddleware:
+    """
+    Writes the staff activity records a request produced (user/activity.py) in one
+    bulk_create once its transactions have committed, instead of a row per action.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with activity_batch():
+            return self.get_response(request)
+
+
+class InstrumentedConsumerMixin:
+    """
+    Channels counterpart of RequestInstrumentationMiddleware: measures every message a
+    consumer dispatches (websocket.receive, group events) as "ws <Consumer>.<type>".
+    Queries run through database_sync_to_async are counted too, since the measurement
+    rides on a contextvar that asgiref copies into the worker thread.
+    """
+
+    async def dispatch(self, message):
+        if not instrumentation.is_enabled():
+            return await super().dispatch(message)
+
+        endpoint = f"ws {type(self).__name__}.{message.get('type', 'unknown')}"
+        start = time.perf_counter()
+        error = False
+        with instrumentation.measure() as measurement:
+            try:
+                return await super().dispatch(message)
+            except Exception:
+                error = True
+                raise
+            finally:
+                budget = instrumentation.resolve_budget(endpoint, self)
+                instrumentation.registry.record(
+                    endpoint,
+                    measurement,
+                    (time.perf_counter() - start) * 1000,
+                    error=error,
+                    budget_exceeded=budget is not None and measurement.queries > budget,
+                )
+                if not error:
+                    instrumentation.check_budget(endpoint, measurement, budget)
@@ -0,0 +1,107 @@
+"""
+Process launcher for the serving tiers.
+
+    python -m lobbybee.serve http     # gunicorn, WSGI, HTTP_PORT (8000)
+    python -m lobbybee.serve ws       # daphne, ASGI, WS_PORT (8001)
+    python -m lobbybee.serve split    # both of the above, supervised together
+    python -m lobbybee.serve single   # one daphne for HTTP and WebSockets (the old layout)
+
+HTTP requests go to gunicorn workers, so a burst of webhooks or a slow stats query never
+competes with the event loop that holds every open WebSocket. In production the tiers
+run as separate containers (docker-compose.prod.yml `web` and `ws`); `split` runs both in
+one container for single-host installs. nginx sends /ws/ to the daphne tier and everything
+else to gunicorn. gunicorn sizing lives in lobbybee/gunicorn.conf.py. The WebSocket tier
+is one daphne per container; scale it with more `ws` replicas
+(`docker compose up --scale ws=N`), which nginx's `ws` upstream resolves to on start.
+"""
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+MODES = ('http', 'ws', 'split', 'single')
+
+GUNICORN_CONFIG = Path(__file__).resolve().with_name('gunicorn.conf.py')
+
+
+def _env_int(env, name, default):
+    value = env.get(name)
+    return int(value) if value else default
+
+
+def gunicorn_command(env):
+    return [
+        sys.executable, '-m', 'gunicorn',
+        '-c', str(GUNICORN_CONFIG),
+        'lobbybee.wsgi:application',
+    ]
+
+
+def daphne_command(env, port):
+    return [
+        sys.executable, '-m', 'daphne',
+        '-b', env.get('WS_BIND_HOST', '0.0.0.0'),
+        '-p', str(port),
+        '--proxy-headers',
+        'lobbybee.asgi:application',
+    ]
+
+
+def build_commands(mode, env=None):
+    """argv of every process `mode` starts."""
+    env = os.environ if env is None else env
+    if mode == 'http':
+        return [gunicorn_command(env)]
+    if mode == 'ws':
+        return [daphne_command(env, _env_int(env, 'WS_PORT', 8001))]
+    if mode == 'split':
+        return [gunicorn_command(env), daphne_command(env, _env_int(env, 'WS_PORT', 8001))]
+    if mode == 'single':
+        return [daphne_command(env, _env_int(env, 'HTTP_PORT', 8000))]
+    raise ValueError(f"Unknown serving mode '{mode}'. Use one of: {', '.join(MODES)}")
+
+
+def supervise(commands):
+    """
+    Run `commands` side by side until one exits, then stop the rest. SIGTERM/SIGINT are
+    forwarded so gunicorn and daphne both shut down gracefully on `docker stop`.
+    """
+    processes = [subprocess.Popen(command) for command in commands]
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    exit_code = 0
+    try:
+        finished = os.wait()
+        exit_code = os.waitstatus_to_exitcode(finished[1])
+    except ChildProcessError:
+        pass
+    finally:
+        forward(signal.SIGTERM, None)
+        for process in processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return exit_code
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    mode = argv[0] if argv else os.environ.get('SERVE_MODE', 'split')
+    commands = build_commands(mode)
+    if len(commands) == 1:
+        # One process: become it, so signals and exit codes need no forwarding.
+        os.execv(commands[0][0], commands[0])
+    return supervise(commands)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from hotel.models import Hotel
+from lobbybee.utils import instrumentation
+from user.models import User
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_METRICS_TOKEN='')
+class RequestInstrumentationTests(APITestCase):
+    def setUp(self):
+        instrumentation.registry.reset()
+        self.hotel = Hotel.objects.create(name="Metrics Hotel")
+        self.user = User.objects.create_user(
+            username="metricsadmin",
+            email="metricsadmin@example.com",
+            password="password123",
+            user_type="hotel_admin",
+            hotel=self.hotel,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_records_queries_and_latency_per_endpoint(self):
+        self.client.get("/api/invoices/")
+        self.client.get("/api/invoices/")
+
+        entry = instrumentation.registry.snapshot()["GET invoice-list"]
+        self.assertEqual(entry["requests"], 2)
+        self.assertGreater(entry["queries"], 0)
+        self.assertGreater(entry["latency_ms"], 0)
+
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('lobbybee_requests_total{endpoint="GET invoice-list"} 2', body)
+        self.assertIn('lobbybee_request_latency_seconds_count{endpoint="GET invoice-list"} 2', body)
+
+    @override_settings(INSTRUMENTATION_QUERY_BUDGETS={'invoice-list': 0}, INSTRUMENTATION_STRICT_BUDGETS=True)
+    def test_strict_budget_fails_over_budget_request(self):
+        with self.assertRaises(instrumentation.QueryBudgetExceeded):
+            self.client.get("/api/invoices/")
+        self.assertEqual(instrumentation.registry.snapshot()["GET invoice-list"]["budget_exceeded"], 1)
+
+    @override_settings(INSTRUMENTATION_QUERY_BUDGETS={'invoice-list': 0})
+    def test_lenient_budget_flags_response(self):
+        response = self.client.get("/api/invoices/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("X-Query-Budget-Exceeded", response)
+
+    @override_settings(INSTRUMENTATION_METRICS_TOKEN='scrape-me')
+    def test_metrics_token_required_when_configured(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        response = self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN='scrape-me')
+        self.assertEqual(response.status_code, 200)
+
+    def test_scrape_sums_every_worker_sharing_the_multiprocess_dir(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'metrics_1.json'), 'w') as f:
+            json.dump({"GET invoice-list": {
+                "requests": 3, "errors": 1, "queries": 9, "db_ms": 1.0, "latency_ms": 30.0,
+                "latency_buckets": [3] + [0] * 9, "external_ms": {}, "external_calls": {},
+                "budget_exceeded": 0, "counters": {"cache_hit": 2},
+            }}, f)
+
+        with override_settings(INSTRUMENTATION_MULTIPROCESS_DIR=directory):
+            self.client.get("/api/invoices/")
+            instrumentation.registry.increment("GET invoice-list", "cache_hit")
+            instrumentation.registry.flush()
+            body = self.client.get("/api/metrics/").content.decode()
+
+        self.assertIn('lobbybee_requests_total{endpoint="GET invoice-list"} 4', body)
+        self.assertIn('lobbybee_request_errors_total{endpoint="GET invoice-list"} 1', body)
+        self.assertIn('lobbybee_cache_hit_total{endpoint="GET invoice-list"} 3', body)
+        self.assertTrue(os.path.exists(os.path.join(directory, f'metrics_{os.getpid()}.json')))
+
+    def test_dead_worker_totals_survive_pid_reuse(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        def worker_file(pid, requests):
+            with open(os.path.join(directory, f'metrics_{pid}.json'), 'w') as f:
+                json.dump({"GET invoice-list": {"requests": requests, "counters": {}}}, f)
+
+        def scraped_requests():
+            with override_settings(INSTRUMENTATION_MULTIPROCESS_DIR=directory):
+                return instrumentation.registry.collect()["GET invoice-list"]["requests"]
+
+        worker_file(7, requests=5)
+        instrumentation.mark_process_dead(7, directory)
+        instrumentation.mark_process_dead(8, directory)  # exited before its first flush
+        self.assertFalse(os.path.exists(os.path.join(directory, 'metrics_7.json')))
+        self.assertEqual(scraped_requests(), 5)
+
+        # A new worker that gets pid 7 starts counting from zero
+        worker_file(7, requests=1)
+        self.assertEqual(scraped_requests(), 6)
+        instrumentation.mark_process_dead(7, directory)
+        self.assertEqual(scraped_requests(), 6)
+
+
+class InstrumentationHelperTests(TestCase):
+    def test_track_external_and_queries_inside_measure(self):
+        with instrumentation.measure() as measurement:
+            with instrumentation.track_external('graph_api'):
+                Hotel.objects.count()
+        self.assertEqual(measurement.queries, 1)
+        self.assertIn('graph_api', measurement.external_ms)
+
+    def test_track_external_outside_measure_is_a_no_op(self):
+        with instrumentation.track_external('graph_api'):
+            pass
+
+    def test_metrics_endpoint_hidden_when_disabled(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+
+
+class ServeLauncherTests(TestCase):
+    def test_split_runs_gunicorn_and_daphne(self):
+        from lobbybee.serve import build_commands
+
+        commands = build_commands('split', {'WS_PORT': '9001'})
+
+        self.assertEqual(len(commands), 2)
+        self.assertIn('gunicorn', commands[0])
+        self.assertIn('lobbybee.wsgi:application', commands[0])
+        self.assertEqual(commands[1][commands[1].index('-p') + 1], '9001')
+        self.assertIn('lobbybee.asgi:application', commands[1])
+
+    def test_single_serves_everything_from_daphne(self):
+        from lobbybee.serve import build_commands
+
+        commands = build_commands('single', {'HTTP_PORT': '8100'})
+
+        self.assertEqual(len(commands), 1)
+        self.assertIn('daphne', commands[0])
+        self.assertIn('8100', commands[0])
+        with self.assertRaises(ValueError):
+            build_commands('threads', {})
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from lobbybee.utils.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,6 +31,7 @@ urlpatterns = [
     path('api/', include('notifications.urls')),
     path('api/chat/', include('chat.urls')),
     path('api/admin_stat/', include('admin_stat.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
     # path('api/context/', include('context_manager.urls')),
     # path('api/message_manager/', include('message_manager.urls')),
 ]
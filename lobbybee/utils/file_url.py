@@ -46,3 +46,17 @@ def upload_to_custom_template_media(instance, filename):
     ext = filename.split('.')[-1]
     filename = f"{uuid.uuid4()}.{ext}"
     return f"templates/hotel_{instance.hotel.id}/{filename}"
+
+
+def upload_to_invoice_exports(instance, filename):
+    """Generate upload path for batch invoice export archives"""
+    ext = filename.split('.')[-1]
+    filename = f"{uuid.uuid4()}.{ext}"
+    return f"hotels/{instance.hotel.id}/invoice_exports/{filename}"
+
+
+def upload_to_report_exports(instance, filename):
+    """Generate upload path for hotelstat report exports"""
+    ext = filename.split('.')[-1]
+    filename = f"{uuid.uuid4()}.{ext}"
+    return f"hotels/{instance.hotel.id}/report_exports/{filename}"
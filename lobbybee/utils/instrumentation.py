@@ -0,0 +1,379 @@
+"""
+Opt-in request / consumer instrumentation.
+
+Records, per endpoint: request count, SQL query count, DB time, external HTTP time
+(Graph API, Gemini, ...) and total latency. Data lives in a per-process registry and is
+exported in Prometheus text format by `metrics_view` (see lobbybee/urls.py).
+
+Under several worker processes (gunicorn, lobbybee/gunicorn.conf.py) one scrape only
+reaches one of them. Set INSTRUMENTATION_MULTIPROCESS_DIR to a directory the processes
+share: each writes its cumulative counters there as metrics_<pid>.json (at most every
+INSTRUMENTATION_FLUSH_INTERVAL seconds, and on worker exit), and the scrape sums every
+file, the same way prometheus_client's multiprocess mode does. When a worker exits, the
+gunicorn master folds its file into metrics_dead.json (`mark_process_dead`), so counters
+never go backwards, recycled workers leave no files behind and a new worker that reuses
+the pid starts from an empty file. The master clears the directory on start. Processes
+that do not share the directory (another container) are scraped apart.
+
+Enable with INSTRUMENTATION_ENABLED=True. Pieces:
+    RequestInstrumentationMiddleware   (lobbybee.middleware) - Django HTTP requests
+    InstrumentedConsumerMixin          (lobbybee.middleware) - Channels consumer messages
+    track_external('graph_api')        - wrap outbound HTTP calls
+    query_budget(n)                    - per-view budget decorator / class attribute
+
+Query budgets can also be set in settings.INSTRUMENTATION_QUERY_BUDGETS
+({'<url name or endpoint label>': max_queries}). With INSTRUMENTATION_STRICT_BUDGETS=True
+an over-budget request raises QueryBudgetExceeded, which is what tests should use.
+"""
+import contextvars
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, Http404
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = contextvars.ContextVar('lobbybee_instrumentation', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (in strict mode) when an endpoint runs more SQL queries than its budget."""
+
+
+def is_enabled():
+    return getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+
+
+class Measurement:
+    """Counters for one request or consumer message. Shared by every thread it fans out to."""
+
+    __slots__ = ('queries', 'db_ms', 'external_ms', '_lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.external_ms = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, elapsed_ms):
+        with self._lock:
+            self.queries += 1
+            self.db_ms += elapsed_ms
+
+    def add_external(self, service, elapsed_ms):
+        with self._lock:
+            self.external_ms[service] = self.external_ms.get(service, 0.0) + elapsed_ms
+
+
+DEAD_PROCESSES_FILE = 'metrics_dead.json'
+
+
+def multiprocess_dir():
+    return getattr(settings, 'INSTRUMENTATION_MULTIPROCESS_DIR', '') or None
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    """flock on the directory's lock file: folds take it exclusively, scrapes shared."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'metrics.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Skipping unreadable metrics file %s: %s", path, e)
+        return {}
+
+
+def _write_snapshot(path, snapshot):
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _merge_entry(total, entry):
+    for key, value in entry.items():
+        if isinstance(value, dict):
+            merged = total.setdefault(key, {})
+            for name, amount in value.items():
+                merged[name] = merged.get(name, 0) + amount
+        elif isinstance(value, list):
+            merged = total.setdefault(key, [0] * len(value))
+            for i, amount in enumerate(value):
+                merged[i] += amount
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def merge_snapshots(snapshots):
+    """Sum per-process snapshots into one."""
+    merged = {}
+    for snapshot in snapshots:
+        for endpoint, entry in snapshot.items():
+            _merge_entry(merged.setdefault(endpoint, {}), entry)
+    return merged
+
+
+class MetricsRegistry:
+    """Thread-safe, per-process aggregate of Measurements keyed by endpoint label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._flushed_at = 0.0
+
+    def _entry(self, endpoint):
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {
+                'requests': 0,
+                'errors': 0,
+                'queries': 0,
+                'db_ms': 0.0,
+                'latency_ms': 0.0,
+                'latency_buckets': [0] * len(LATENCY_BUCKETS_MS),
+                'external_ms': {},
+                'external_calls': {},
+                'budget_exceeded': 0,
+                'counters': {},
+            }
+        return entry
+
+    def increment(self, endpoint, counter, amount=1):
+        """Bump a named per-endpoint counter (exported as lobbybee_<counter>_total)."""
+        with self._lock:
+            counters = self._entry(endpoint)['counters']
+            counters[counter] = counters.get(counter, 0) + amount
+        self._maybe_flush()
+
+    def record(self, endpoint, measurement, latency_ms, *, error=False, budget_exceeded=False):
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['requests'] += 1
+            entry['errors'] += int(error)
+            entry['queries'] += measurement.queries
+            entry['db_ms'] += measurement.db_ms
+            entry['latency_ms'] += latency_ms
+            entry['budget_exceeded'] += int(budget_exceeded)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency_ms <= bound:
+                    entry['latency_buckets'][i] += 1
+            for service, ms in measurement.external_ms.items():
+                entry['external_ms'][service] = entry['external_ms'].get(service, 0.0) + ms
+                entry['external_calls'][service] = entry['external_calls'].get(service, 0) + 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    **entry,
+                    'latency_buckets': list(entry['latency_buckets']),
+                    'external_ms': dict(entry['external_ms']),
+                    'external_calls': dict(entry['external_calls']),
+                    'counters': dict(entry['counters']),
+                }
+                for endpoint, entry in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def _maybe_flush(self):
+        if multiprocess_dir() is None:
+            return
+        now = time.monotonic()
+        if now - self._flushed_at < getattr(settings, 'INSTRUMENTATION_FLUSH_INTERVAL', 1.0):
+            return
+        self._flushed_at = now
+        self.flush()
+
+    def flush(self):
+        """Write this process's counters to the multiprocess directory (no-op without one)."""
+        directory = multiprocess_dir()
+        if directory is None:
+            return
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            _write_snapshot(path, self.snapshot())
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", path, e)
+
+    def collect(self):
+        """Snapshot to export: this process alone, or every process sharing the multiprocess directory."""
+        directory = multiprocess_dir()
+        if directory is None:
+            return self.snapshot()
+        own = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        snapshots = [self.snapshot()]
+        # Shared lock: a fold in progress would otherwise be read half-applied.
+        with _directory_lock(directory, exclusive=False):
+            for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+                if path != own:
+                    snapshots.append(_read_snapshot(path))
+        return merge_snapshots(snapshots)
+
+
+registry = MetricsRegistry()
+
+
+def mark_process_dead(pid, directory=None):
+    """Fold an exited process's file into DEAD_PROCESSES_FILE and remove it (gunicorn child_exit)."""
+    directory = directory or multiprocess_dir()
+    if directory is None:
+        return
+    path = os.path.join(directory, f'metrics_{pid}.json')
+    with _directory_lock(directory, exclusive=True):
+        if not os.path.exists(path):
+            return
+        dead = os.path.join(directory, DEAD_PROCESSES_FILE)
+        previous = _read_snapshot(dead) if os.path.exists(dead) else {}
+        _write_snapshot(dead, merge_snapshots([previous, _read_snapshot(path)]))
+        os.remove(path)
+
+
+def _record_query(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.add_query((time.perf_counter() - start) * 1000)
+
+
+def _install_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+# New connections (including the per-thread ones sync_to_async opens) get the wrapper on creation.
+connection_created.connect(_install_wrapper, dispatch_uid='lobbybee_instrumentation_wrapper')
+
+
+@contextmanager
+def measure():
+    """Collect queries / external time for the enclosed block into a fresh Measurement."""
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(connection)
+    measurement = Measurement()
+    token = _current.set(measurement)
+    try:
+        yield measurement
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def track_external(service):
+    """Attribute the wall time of the enclosed outbound call to `service` on the current request."""
+    measurement = _current.get()
+    if measurement is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        measurement.add_external(service, (time.perf_counter() - start) * 1000)
+
+
+def query_budget(max_queries):
+    """Set a query budget on a view function or class (DRF views/viewsets included)."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def resolve_budget(endpoint, view=None, view_name=None):
+    """Settings entry (by endpoint label, then URL name) wins over a query_budget attribute."""
+    budgets = getattr(settings, 'INSTRUMENTATION_QUERY_BUDGETS', {}) or {}
+    for key in (endpoint, view_name):
+        if key and key in budgets:
+            return budgets[key]
+    view_class = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', None)
+    return budget if budget is not None else getattr(view, 'query_budget', None)
+
+
+def check_budget(endpoint, measurement, budget):
+    """Return True when over budget; in strict mode raise QueryBudgetExceeded instead."""
+    if budget is None or measurement.queries <= budget:
+        return False
+    message = f"{endpoint} ran {measurement.queries} queries (budget {budget})"
+    if getattr(settings, 'INSTRUMENTATION_STRICT_BUDGETS', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning("query_budget_exceeded %s", message)
+    return True
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(snapshot=None):
+    snapshot = registry.collect() if snapshot is None else snapshot
+    lines = [
+        '# TYPE lobbybee_requests_total counter',
+        '# TYPE lobbybee_request_errors_total counter',
+        '# TYPE lobbybee_db_queries_total counter',
+        '# TYPE lobbybee_db_seconds_total counter',
+        '# TYPE lobbybee_query_budget_exceeded_total counter',
+        '# TYPE lobbybee_external_seconds_total counter',
+        '# TYPE lobbybee_external_calls_total counter',
+        '# TYPE lobbybee_request_latency_seconds histogram',
+    ]
+    counter_names = sorted({name for entry in snapshot.values() for name in entry.get('counters', {})})
+    lines.extend(f'# TYPE lobbybee_{name}_total counter' for name in counter_names)
+    for endpoint, entry in sorted(snapshot.items()):
+        ep = f'endpoint="{_label(endpoint)}"'
+        lines.append(f'lobbybee_requests_total{{{ep}}} {entry["requests"]}')
+        lines.append(f'lobbybee_request_errors_total{{{ep}}} {entry["errors"]}')
+        lines.append(f'lobbybee_db_queries_total{{{ep}}} {entry["queries"]}')
+        lines.append(f'lobbybee_db_seconds_total{{{ep}}} {entry["db_ms"] / 1000:.6f}')
+        lines.append(f'lobbybee_query_budget_exceeded_total{{{ep}}} {entry["budget_exceeded"]}')
+        for service in sorted(entry['external_ms']):
+            svc = f'{ep},service="{_label(service)}"'
+            lines.append(f'lobbybee_external_seconds_total{{{svc}}} {entry["external_ms"][service] / 1000:.6f}')
+            lines.append(f'lobbybee_external_calls_total{{{svc}}} {entry["external_calls"][service]}')
+        for bound, count in zip(LATENCY_BUCKETS_MS, entry['latency_buckets']):
+            lines.append(f'lobbybee_request_latency_seconds_bucket{{{ep},le="{bound / 1000}"}} {count}')
+        lines.append(f'lobbybee_request_latency_seconds_bucket{{{ep},le="+Inf"}} {entry["requests"]}')
+        lines.append(f'lobbybee_request_latency_seconds_sum{{{ep}}} {entry["latency_ms"] / 1000:.6f}')
+        lines.append(f'lobbybee_request_latency_seconds_count{{{ep}}} {entry["requests"]}')
+        for name, value in sorted(entry.get('counters', {}).items()):
+            lines.append(f'lobbybee_{name}_total{{{ep}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. 404 unless instrumentation is enabled; when
+    INSTRUMENTATION_METRICS_TOKEN is set the scraper must send it as X-Metrics-Token.
+    """
+    if not is_enabled():
+        raise Http404()
+    token = getattr(settings, 'INSTRUMENTATION_METRICS_TOKEN', '')
+    if token and request.headers.get('X-Metrics-Token') != token:
+        return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -1,3 +1,10 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from rest_framework.pagination import PageNumberPagination
 from lobbybee.utils.responses import paginated_response
 
@@ -19,3 +26,62 @@ class StandardizedPagination(PageNumberPagination):
                 'results': data
             }
         )
+
+
+class InvalidCursor(ValueError):
+    """Raised for a `cursor` query param that KeysetPaginator did not issue."""
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a values() queryset, newest first on (order_field, id).
+
+    Each page is one range query on an indexed (order_field, id) pair - no OFFSET and no
+    COUNT - read with iterator() so no queryset result cache is kept. Memory per request
+    is bounded by the page size, however wide the filtered range is.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def __init__(self, order_field):
+        self.order_field = order_field
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        position = [row[self.order_field].isoformat(), str(row['id'])]
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(value), pk
+        except (TypeError, ValueError, binascii.Error) as e:
+            raise InvalidCursor("Invalid cursor") from e
+
+    def paginate(self, queryset, request):
+        """(rows of the requested page, cursor of the next page or None)."""
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{self.order_field}', '-id')
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{self.order_field}__lt': value}) | Q(**{self.order_field: value, 'id__lt': pk})
+                )
+            except (ValueError, ValidationError) as e:
+                raise InvalidCursor("Invalid cursor") from e
+
+        rows = list(queryset[:page_size + 1].iterator(chunk_size=page_size + 1))
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            return rows, self.encode_cursor(rows[-1])
+        return rows, None
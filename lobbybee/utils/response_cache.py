@@ -0,0 +1,151 @@
+"""
+Short-lived response caching for polled dashboard endpoints.
+
+`cache_response` wraps a DRF handler (APIView.get, a viewset action or list). A 200
+response body is stored in the shared cache under a key built from the endpoint, the
+caller's scope (user, hotel or platform), the query params and the current version
+of each invalidation tag. Writes bump tag versions (`invalidate_tags`, wired to model
+signals in hotelstat/user/notifications `signals.py`), which retires every cached
+response built under the old versions without having to find them. TTLs stay short
+so data that is not tagged (e.g. message counts) is never far behind.
+
+Responses carry an ETag; a matching If-None-Match gets 304. Hits and misses are
+counted per endpoint in the instrumentation registry
+(lobbybee_response_cache_hit_total / _miss_total / _not_modified_total on /api/metrics/).
+"""
+import hashlib
+import json
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponseNotModified
+from rest_framework.response import Response
+
+from .instrumentation import registry
+
+# Invalidation tags. Formatted with hotel_id / user_id of the request or the written row.
+HOTEL_STAYS = 'hotel:{hotel_id}:stays'
+HOTEL_ROOMS = 'hotel:{hotel_id}:rooms'
+HOTEL_ACTIVITY = 'hotel:{hotel_id}:activity'
+HOTEL_NOTIFICATIONS = 'hotel:{hotel_id}:notifications'
+USER_NOTIFICATIONS = 'user:{user_id}:notifications'
+PLATFORM_STATS = 'platform:stats'
+PLATFORM_NOTIFICATIONS = 'platform:notifications'
+
+SCOPES = ('user', 'hotel', 'platform')
+
+_TAG_KEY = 'respcache:tag:{}'
+_RESPONSE_KEY = 'respcache:{}:{}:{}'
+
+
+def _tag_versions(tags):
+    keys = [_TAG_KEY.format(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A missing version must never fall back to one a stale response was built under.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def invalidate_tags(*tags):
+    """
+    Retire every cached response built under any of `tags`: now, and again on commit so a
+    request racing the commit cannot leave a stale response under the new versions.
+    """
+    keys = [_TAG_KEY.format(tag) for tag in tags if tag]
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _scope_key(request, scope):
+    """
+    Callers sharing a scope key share cached responses. Role is always part of it, so a
+    handler that checks the role in its body (not in permission_classes) never serves
+    one role's response to another.
+    """
+    user = request.user
+    role = f'{getattr(user, "user_type", None)}:{int(user.is_superuser)}'
+    if scope == 'user':
+        return f'u{user.pk}:h{getattr(user, "hotel_id", None)}:{role}'
+    if scope == 'hotel':
+        return f'h{getattr(user, "hotel_id", None)}:{role}'
+    return f'platform:{role}'
+
+
+def _digest(value):
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+
+def _etag(body):
+    return f'"{_digest(body)}"'
+
+
+def _not_modified(request, etag):
+    return etag in request.headers.get('If-None-Match', '')
+
+
+def _cached_response(data, status, etag, hit):
+    response = Response(data, status=status)
+    response['ETag'] = etag
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def cache_response(endpoint, *, scope='hotel', tags=(), ttl=None):
+    """
+    Cache a DRF handler's 200 responses for `ttl` seconds (RESPONSE_CACHE_DEFAULT_TTL by default).
+    `tags` are invalidation tag templates formatted with the caller's hotel_id / user_id.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown cache scope '{scope}'")
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return handler(view, request, *args, **kwargs)
+
+            user = request.user
+            resolved_tags = [
+                tag.format(hotel_id=getattr(user, 'hotel_id', None), user_id=user.pk) for tag in tags
+            ]
+            params = json.dumps(sorted(request.query_params.lists()))
+            variant = _digest('|'.join([params, *map(str, kwargs.values()), *_tag_versions(resolved_tags)]))
+            key = _RESPONSE_KEY.format(endpoint, _scope_key(request, scope), variant)
+
+            cached = cache.get(key)
+            if cached is not None:
+                registry.increment(endpoint, 'response_cache_hit')
+                data, status, etag = cached
+                if _not_modified(request, etag):
+                    registry.increment(endpoint, 'response_cache_not_modified')
+                    return HttpResponseNotModified(headers={'ETag': etag})
+                return _cached_response(data, status, etag, hit=True)
+
+            registry.increment(endpoint, 'response_cache_miss')
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code != 200 or not isinstance(response, Response):
+                return response
+
+            etag = _etag(json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True))
+            timeout = ttl if ttl is not None else settings.RESPONSE_CACHE_DEFAULT_TTL
+            cache.set(key, (response.data, response.status_code, etag), timeout=timeout)
+            if _not_modified(request, etag):
+                return HttpResponseNotModified(headers={'ETag': etag})
+            response['ETag'] = etag
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -17,3 +17,12 @@ class StaticStorage(S3Boto3Storage):
     location = 'static'
     default_acl = None
     file_overwrite = False
+
+
+class ArchiveStorage(S3Boto3Storage):
+    """Private storage for chat archive segments (guest data: never public, signed URLs only)"""
+    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+    location = 'archive'
+    default_acl = 'private'
+    file_overwrite = True
+    querystring_auth = True
@@ -2,18 +2,35 @@
 WSGI config for lobbybee project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Served by gunicorn for the HTTP tier (see lobbybee/gunicorn.conf.py and
+lobbybee/serve.py); WebSockets stay on the ASGI app in lobbybee/asgi.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 '''
 
 import os
-from django.core.wsgi import get_wsgi_application
+import environ
+from pathlib import Path
+
+# Initialize environ
+environ_config = environ.Env(DEBUG=(bool, False))
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Read .env file
+environ.Env.read_env(BASE_DIR / '.env')
 
-# Get the environment from an environment variable
-env = os.environ.get('DJANGO_ENV', 'development')
+# Pick the settings module the same way asgi.py does, so both tiers agree
+django_env = environ_config('DJANGO_ENV', default='development')
 
-# Set the settings module to use the settings switcher
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lobbybee.settings')
+if django_env == 'production':
+    settings_module = 'lobbybee.config.production'
+else:
+    settings_module = 'lobbybee.config.development'
+
+os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+
+from django.core.wsgi import get_wsgi_application
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
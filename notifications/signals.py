@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from lobbybee.utils.response_cache import (
+    HOTEL_NOTIFICATIONS,
+    PLATFORM_NOTIFICATIONS,
+    USER_NOTIFICATIONS,
+    invalidate_tags,
+)
+from .models import Notification
+
+
+def notification_tags(notification):
+    """Response cache tags of every inbox the notification appears in."""
+    if notification.group_type == 'hotel_staff':
+        return [HOTEL_NOTIFICATIONS.format(hotel_id=notification.hotel_id)]
+    if notification.group_type == 'platform_user':
+        return [PLATFORM_NOTIFICATIONS]
+    return [USER_NOTIFICATIONS.format(user_id=notification.user_id)]
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    invalidate_tags(*notification_tags(instance))
@@ -1,6 +1,13 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from lobbybee.utils.response_cache import (
+    HOTEL_NOTIFICATIONS,
+    PLATFORM_NOTIFICATIONS,
+    USER_NOTIFICATIONS,
+    cache_response,
+    invalidate_tags,
+)
 from lobbybee.utils.responses import success_response, error_response, not_found_response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Notification
@@ -33,6 +40,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return get_user_notifications(user, include_group_notifications=True)
 
+    @cache_response(
+        'notifications.list', scope='user',
+        tags=(USER_NOTIFICATIONS, HOTEL_NOTIFICATIONS, PLATFORM_NOTIFICATIONS),
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """
         Handle creating notifications with automatic hotel assignment and permission checks
@@ -101,6 +115,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
             # Get all unread notifications for the user (including group notifications)
             notifications = self.get_queryset().filter(is_read=False)
             notifications.update(is_read=True)
+            # Queryset updates skip the post_save receivers in notifications.signals.
+            user = request.user
+            invalidate_tags(
+                USER_NOTIFICATIONS.format(user_id=user.pk),
+                HOTEL_NOTIFICATIONS.format(hotel_id=user.hotel_id),
+                PLATFORM_NOTIFICATIONS,
+            )
 
             return success_response(message='All notifications marked as read')
         except Exception as e:
@@ -50,6 +50,11 @@ class Transaction(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='pay_txn_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"Transaction {self.transaction_id} for {self.hotel.name}"
@@ -1,17 +1,191 @@
+"""
+Staff activity records (the hotel's "recent activity" feed).
+
+`log_activity` never writes inside the caller's transaction. The entry is handed over
+on commit, so a rolled-back action leaves no trace, and is then:
+
+- collected into the open `activity_batch` (ActivityLogMiddleware opens one per HTTP
+  request) and written with a single bulk_create when the batch closes;
+- or, inside `activity_batch(background=True)` - for high-volume producers such as
+  imports and Celery tasks - passed to the background `buffer`, a bounded queue a
+  daemon thread drains in batches;
+- or, outside any batch, written straight away.
+
+bulk_create skips post_save, so every write bumps HOTEL_ACTIVITY itself. The buffer
+counts what it writes and drops on /api/metrics/ (lobbybee_activity_log_*_total).
+"""
+import atexit
+import contextvars
 import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import partial
 
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from lobbybee.utils.instrumentation import registry
+from lobbybee.utils.response_cache import HOTEL_ACTIVITY, invalidate_tags
 from .models import ActivityLog
 
 logger = logging.getLogger(__name__)
 
+METRICS_ENDPOINT = 'activity-log'
+
+MESSAGE_MAX_LENGTH = ActivityLog._meta.get_field('message').max_length
+
+_batch = contextvars.ContextVar('activity_batch', default=None)
+
+
+def _write_one_by_one(entries):
+    # One bad row must not cost the rest of the batch.
+    written = []
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                ActivityLog.objects.bulk_create([entry])
+            written.append(entry)
+        except Exception:
+            registry.increment(METRICS_ENDPOINT, 'activity_log_failed')
+            logger.exception("activity log failed for %s", entry.action)
+    return written
+
+
+def write_entries(entries):
+    """bulk_create unsaved ActivityLog rows and retire the cached feeds they belong to."""
+    if not entries:
+        return
+    try:
+        with transaction.atomic():
+            ActivityLog.objects.bulk_create(entries, batch_size=settings.ACTIVITY_LOG_BATCH_SIZE)
+    except Exception:
+        entries = _write_one_by_one(entries)
+    registry.increment(METRICS_ENDPOINT, 'activity_log_written', len(entries))
+    invalidate_tags(*{HOTEL_ACTIVITY.format(hotel_id=entry.hotel_id) for entry in entries})
+
+
+class ActivityLogBuffer:
+    """
+    Bounded queue drained by a daemon thread. `offer` never blocks: when the queue is
+    full the entry is dropped and counted. The thread drains every
+    ACTIVITY_LOG_FLUSH_INTERVAL seconds, or early once a full batch is waiting.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # A forked worker (gunicorn, Celery) starts its own thread and queue.
+            self._queue = queue.Queue(maxsize=settings.ACTIVITY_LOG_BUFFER_SIZE)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-log-flusher', daemon=True)
+            self._thread.start()
+
+    def offer(self, entry):
+        """Queue an entry for the flusher; False if it was dropped because the buffer is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            registry.increment(METRICS_ENDPOINT, 'activity_log_dropped')
+            logger.warning("activity log buffer full, dropped %s for hotel %s", entry.action, entry.hotel_id)
+            return False
+        registry.increment(METRICS_ENDPOINT, 'activity_log_buffered')
+        if self._queue.qsize() >= settings.ACTIVITY_LOG_BATCH_SIZE:
+            self._wake.set()
+        return True
+
+    def _take(self):
+        entries = []
+        try:
+            while len(entries) < settings.ACTIVITY_LOG_BATCH_SIZE:
+                entries.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return entries
+
+    def flush(self):
+        """Write everything queued so far from the calling thread (the flusher, shutdown, tests)."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        while True:
+            entries = self._take()
+            if not entries:
+                return
+            try:
+                write_entries(entries)
+            except Exception:
+                logger.exception("activity log flush failed (%s entries)", len(entries))
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.ACTIVITY_LOG_FLUSH_INTERVAL)
+            self._wake.clear()
+            if not self._queue.empty():
+                close_old_connections()
+                self.flush()
+
+
+buffer = ActivityLogBuffer()
+atexit.register(buffer.flush)
+
+
+@contextmanager
+def activity_batch(background=False):
+    """
+    Collect committed log_activity entries and write them together when the block
+    exits; with background=True they go to the background buffer instead. Nested
+    batches join the outermost one.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    entries = []
+    token = _batch.set(entries)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        if background:
+            for entry in entries:
+                buffer.offer(entry)
+        else:
+            try:
+                write_entries(entries)
+            except Exception:
+                logger.exception("activity log failed")
+
+
+def _committed(entry):
+    entries = _batch.get()
+    if entries is not None:
+        entries.append(entry)
+        return
+    try:
+        write_entries([entry])
+    except Exception:
+        logger.exception("activity log failed")
+
 
 def log_activity(actor, hotel, action, message, **metadata):
-    """Fire-and-forget staff activity record. Never breaks the request."""
+    """Fire-and-forget staff activity record, written after commit. Never breaks the request."""
     try:
         if hotel is None:
             return
-        ActivityLog.objects.create(
-            actor=actor, hotel=hotel, action=action, message=message, metadata=metadata
+        entry = ActivityLog(
+            actor=actor, hotel=hotel, action=action, message=message[:MESSAGE_MAX_LENGTH], metadata=metadata,
         )
+        transaction.on_commit(partial(_committed, entry))
     except Exception:
         logger.exception("activity log failed")
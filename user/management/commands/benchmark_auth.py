@@ -0,0 +1,76 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from hotel.models import Hotel
+from lobbybee.middleware import get_user_from_token
+from user.models import User
+
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-auth'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Queries and time per authenticated request with and without the JWT principal cache, '
+        'for REST requests (a cached dashboard endpoint by default) and WebSocket connects. '
+        'Seeds a hotel user and deletes it afterwards (Channels closes connections inside a transaction). '
+        'Runs against a private in-memory cache, never the configured one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per run (default: 500)')
+        parser.add_argument('--path', default='/api/hotel_stat/trends/',
+                            help='Endpoint requested with the token (default: /api/hotel_stat/trends/)')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        results = []
+        hotel = Hotel.objects.create(name='Benchmark Hotel')
+        try:
+            user = User.objects.create_user(
+                username='benchmark-auth', email='benchmark-auth@example.com', password='benchmark',
+                user_type='hotel_admin', hotel=hotel, department=['front_desk'],
+            )
+            token = str(AccessToken.for_user(user))
+            for label, enabled in (('no principal cache', False), ('principal cache', True)):
+                # cache.clear() on RedisCache is a FLUSHDB of the shared cache database
+                with override_settings(PRINCIPAL_CACHE_ENABLED=enabled, ALLOWED_HOSTS=['*'], CACHES=BENCHMARK_CACHES):
+                    cache.clear()
+                    results.append((f'REST {label}', *self._measure(
+                        lambda: self._rest(options['path'], token, count))))
+                    cache.clear()
+                    results.append((f'WS connect {label}', *self._measure(
+                        lambda: self._websocket(token, count))))
+        finally:
+            hotel.delete()
+
+        self.stdout.write(self.style.SUCCESS(f"{count} requests per run, {options['path']}"))
+        for label, elapsed, queries in results:
+            self.stdout.write(
+                f"  {label:<30} {queries / count:6.2f} queries/req  "
+                f"{elapsed / count * 1000:7.2f} ms/req  {count / elapsed:8.1f} req/s"
+            )
+
+    def _measure(self, fn):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def _rest(self, path, token, count):
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for _ in range(count):
+            client.get(path)
+
+    def _websocket(self, token, count):
+        for _ in range(count):
+            async_to_sync(get_user_from_token)(token)
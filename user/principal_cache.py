@@ -0,0 +1,148 @@
+"""
+Short-lived cache of the authenticated principal behind a JWT.
+
+REST (`CachedJWTAuthentication`) and WebSocket (`lobbybee.middleware.get_user_from_token`)
+authentication both resolve tokens through `resolve`. An entry is keyed by user id and
+token id (jti, or iat for tokens without one), and holds a compact principal: the
+PRINCIPAL_USER_FIELDS of the user and PRINCIPAL_HOTEL_FIELDS of its hotel as plain
+value tuples. A hit rebuilds `request.user` with `user.hotel` already loaded, at no
+query cost; any other field is deferred and loads on first access. The password hash
+never enters the shared cache: with CHECK_REVOKE_TOKEN the entry carries only the md5
+digest simplejwt compares against the token (see `password_hash`).
+
+Entries are stamped with a per-user version. `invalidate_users` bumps the version, wired
+to User/Hotel saves in user/signals.py and to LogoutView, which retires every cached
+token of that user at once. PRINCIPAL_CACHE_TTL bounds how long any entry can live.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from hotel.models import Hotel
+from lobbybee.utils.instrumentation import registry
+from .models import User
+
+_VERSION_KEY = 'principal:ver:{}'
+_ENTRY_KEY = 'principal:{}:{}'
+METRICS_ENDPOINT = 'jwt-auth'
+
+# What authentication, permissions and the views read off request.user
+PRINCIPAL_USER_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'user_type', 'department', 'hotel_id',
+    'is_active', 'is_staff', 'is_superuser', 'is_active_hotel_user', 'is_verified',
+)
+PRINCIPAL_HOTEL_FIELDS = ('id', 'name', 'time_zone', 'status', 'is_verified', 'is_active')
+
+
+def _model_order(model, names):
+    # Model.from_db takes a partial row in concrete-field order
+    return tuple(field.attname for field in model._meta.concrete_fields if field.attname in names)
+
+
+_USER_COLUMNS = _model_order(User, PRINCIPAL_USER_FIELDS)
+_HOTEL_COLUMNS = _model_order(Hotel, PRINCIPAL_HOTEL_FIELDS)
+
+
+def _token_id(validated_token):
+    return validated_token.get(api_settings.JTI_CLAIM) or validated_token.get('iat')
+
+
+def _row(instance, fields):
+    return tuple(getattr(instance, field) for field in fields)
+
+
+def _from_row(model, fields, row):
+    if row is None or len(row) != len(fields):
+        return None  # cached with another field list
+    return model.from_db(DEFAULT_DB_ALIAS, list(fields), row)
+
+
+def _rebuild(user_row, hotel_row, password_digest):
+    user = _from_row(User, _USER_COLUMNS, user_row)
+    if user is None:
+        return None
+    user._principal_password_digest = password_digest
+    if user.hotel_id is None:
+        return user
+    hotel = _from_row(Hotel, _HOTEL_COLUMNS, hotel_row)
+    if hotel is None:
+        return None
+    user.hotel = hotel
+    return user
+
+
+def password_hash(user):
+    """get_md5_hash_password(user.password), from the cache entry when the user came from one."""
+    digest = getattr(user, '_principal_password_digest', None)
+    return digest if digest is not None else get_md5_hash_password(user.password)
+
+
+def _load(user_id):
+    try:
+        return User.objects.select_related('hotel').get(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+
+
+def _current_version(version_key, version):
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def resolve(validated_token):
+    """The User a validated access token belongs to (hotel preloaded), or None if it no longer exists."""
+    user_id = validated_token[api_settings.USER_ID_CLAIM]
+    if not getattr(settings, 'PRINCIPAL_CACHE_ENABLED', True):
+        return _load(user_id)
+
+    version_key = _VERSION_KEY.format(user_id)
+    entry_key = _ENTRY_KEY.format(user_id, _token_id(validated_token))
+    found = cache.get_many([version_key, entry_key])
+    version = found.get(version_key)
+    entry = found.get(entry_key)
+
+    if entry is not None and version is not None and len(entry) == 4 and entry[0] == version:
+        user = _rebuild(*entry[1:])
+        if user is not None:
+            registry.increment(METRICS_ENDPOINT, 'principal_cache_hit')
+            return user
+
+    registry.increment(METRICS_ENDPOINT, 'principal_cache_miss')
+    # Read the version before the row: an invalidation racing this load leaves the
+    # entry stamped with a retired version instead of caching stale data as current.
+    version = _current_version(version_key, version)
+    user = _load(user_id)
+    if user is None:
+        return None
+    hotel_row = _row(user.hotel, _HOTEL_COLUMNS) if user.hotel_id is not None else None
+    password_digest = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None
+    cache.set(
+        entry_key,
+        (version, _row(user, _USER_COLUMNS), hotel_row, password_digest),
+        timeout=settings.PRINCIPAL_CACHE_TTL,
+    )
+    return user
+
+
+def invalidate_users(*user_ids):
+    """Drop every cached principal of these users: now, and again on commit."""
+    keys = [_VERSION_KEY.format(user_id) for user_id in user_ids if user_id is not None]
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_hotel(hotel_id):
+    """Drop the cached principals of every user of a hotel (their cached hotel row is stale)."""
+    invalidate_users(*User.objects.filter(hotel_id=hotel_id).values_list('id', flat=True))
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from hotel.models import Hotel
+from lobbybee.utils.response_cache import HOTEL_ACTIVITY, invalidate_tags
+from .models import ActivityLog, User
+from .principal_cache import invalidate_hotel, invalidate_users
+
+
+@receiver([post_save, post_delete], sender=ActivityLog)
+def activity_changed(sender, instance, **kwargs):
+    invalidate_tags(HOTEL_ACTIVITY.format(hotel_id=instance.hotel_id))
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_users(instance.pk)
+
+
+@receiver(post_save, sender=Hotel)
+def hotel_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_hotel(instance.pk)
@@ -1,3 +1,82 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
 
-# Create your tests here.
+from hotel.models import Hotel
+from lobbybee.middleware import get_user_from_token
+from .models import User
+from .principal_cache import PRINCIPAL_USER_FIELDS, password_hash, resolve
+
+
+class PrincipalCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Principal Hotel")
+        self.user = User.objects.create_user(
+            username="principal", email="principal@example.com", password="password123",
+            user_type="hotel_admin", hotel=self.hotel, department=["front_desk"],
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def test_rest_requests_reuse_cached_principal(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(self.client.get("/api/hotel_stat/trends/").status_code, 200)
+
+        # Auth and the (cached) stats response need no queries at all.
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/hotel_stat/trends/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_cached_principal_carries_hotel_and_departments(self):
+        resolve(self.token)
+        with self.assertNumQueries(0):
+            user = resolve(self.token)
+            self.assertEqual(user.hotel.name, "Principal Hotel")
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.department, ["front_desk"])
+        self.assertEqual(user.user_type, "hotel_admin")
+
+    def test_entry_holds_a_compact_principal_without_the_password(self):
+        resolve(self.token)
+        entry = cache.get(f"principal:{self.user.pk}:{self.token['jti']}")
+
+        self.assertNotIn(self.user.password, entry)
+        self.assertEqual(len(entry[1]), len(PRINCIPAL_USER_FIELDS))
+        user = resolve(self.token)
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertEqual(password_hash(user), get_md5_hash_password(self.user.password))
+
+    def test_user_and_hotel_changes_invalidate(self):
+        resolve(self.token)
+        self.user.user_type = "receptionist"
+        self.user.save()
+        self.assertEqual(resolve(self.token).user_type, "receptionist")
+
+        self.hotel.name = "Renamed Hotel"
+        self.hotel.save()
+        self.assertEqual(resolve(self.token).hotel.name, "Renamed Hotel")
+
+    def test_logout_invalidates(self):
+        resolve(self.token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        response = self.client.post("/api/logout/", {"refresh": str(RefreshToken.for_user(self.user))})
+        self.assertEqual(response.status_code, 205)
+
+        with self.assertNumQueries(1):
+            resolve(self.token)
+
+
+class WebSocketPrincipalCacheTests(TestCase):
+    def test_websocket_auth_uses_principal_cache(self):
+        cache.clear()
+        user = User.objects.create_user(username="wsprincipal", email="wsprincipal@example.com", password="x")
+        token = str(AccessToken.for_user(user))
+
+        self.assertEqual(async_to_sync(get_user_from_token)(token).pk, user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(async_to_sync(get_user_from_token)(token).pk, user.pk)
+        self.assertTrue(async_to_sync(get_user_from_token)("garbage").is_anonymous)
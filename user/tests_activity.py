@@ -1,7 +1,12 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
-from hotel.models import Hotel
-from .activity import log_activity
+from hotel.models import Hotel, RoomCategory
+from lobbybee.utils import instrumentation
+from .activity import ActivityLogBuffer, activity_batch, log_activity
 from .models import ActivityLog, User
 
 
@@ -19,7 +24,8 @@ class ActivityLogTests(APITestCase):
         )
 
     def test_log_activity_creates_one_scoped_row(self):
-        log_activity(self.user_a, self.hotel_a, 'checked_out', 'Checked out John', guest_id=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            log_activity(self.user_a, self.hotel_a, 'checked_out', 'Checked out John', guest_id=7)
         self.assertEqual(ActivityLog.objects.count(), 1)
         row = ActivityLog.objects.get()
         self.assertEqual(row.hotel, self.hotel_a)
@@ -28,12 +34,14 @@ class ActivityLogTests(APITestCase):
 
     def test_log_activity_never_raises(self):
         # None hotel is a no-op, not an error.
-        log_activity(self.user_a, None, 'x', 'y')
+        with self.captureOnCommitCallbacks(execute=True):
+            log_activity(self.user_a, None, 'x', 'y')
         self.assertEqual(ActivityLog.objects.count(), 0)
 
     def test_endpoint_filters_by_hotel(self):
-        log_activity(self.user_a, self.hotel_a, 'checked_in', 'A action')
-        log_activity(self.user_b, self.hotel_b, 'checked_in', 'B action')
+        with self.captureOnCommitCallbacks(execute=True):
+            log_activity(self.user_a, self.hotel_a, 'checked_in', 'A action')
+            log_activity(self.user_b, self.hotel_b, 'checked_in', 'B action')
 
         self.client.force_authenticate(self.user_a)
         resp = self.client.get('/api/recent-activity/')
@@ -42,9 +50,10 @@ class ActivityLogTests(APITestCase):
         self.assertEqual(messages, ['A action'])
 
     def test_filters(self):
-        log_activity(self.user_a, self.hotel_a, 'checked_in', 'Checked in Alice')
-        log_activity(self.user_a, self.hotel_a, 'checked_out', 'Checked out Alice')
-        log_activity(self.user_a, self.hotel_a, 'room_status', 'Room 1: a → b')
+        with self.captureOnCommitCallbacks(execute=True):
+            log_activity(self.user_a, self.hotel_a, 'checked_in', 'Checked in Alice')
+            log_activity(self.user_a, self.hotel_a, 'checked_out', 'Checked out Alice')
+            log_activity(self.user_a, self.hotel_a, 'room_status', 'Room 1: a → b')
         self.client.force_authenticate(self.user_a)
 
         def msgs(query):
@@ -57,3 +66,61 @@ class ActivityLogTests(APITestCase):
         # actor by username
         self.assertEqual(len(msgs('?actor=recep_a')), 3)
         self.assertEqual(len(msgs('?actor=recep_b')), 0)
+
+
+class ActivityPipelineTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.registry.reset()
+        self.hotel = Hotel.objects.create(name='Pipeline Hotel')
+        self.user = User.objects.create_user(
+            username='pipeline_admin', email='pipeline@x.com', password='pw',
+            user_type='hotel_admin', hotel=self.hotel, is_verified=True,
+        )
+
+    def test_batch_writes_committed_entries_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            with activity_batch():
+                with self.captureOnCommitCallbacks(execute=True):
+                    for n in range(5):
+                        log_activity(self.user, self.hotel, 'room_status', f'Room {n}: a → b')
+                self.assertEqual(ActivityLog.objects.count(), 0)
+                with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+                    with transaction.atomic():
+                        log_activity(self.user, self.hotel, 'checked_in', 'Rolled back')
+                        raise RuntimeError
+
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "user_activitylog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.count(), 5)
+        self.assertFalse(ActivityLog.objects.filter(message='Rolled back').exists())
+
+    def test_bulk_room_creation_is_logged_and_feed_refreshed(self):
+        category = RoomCategory.objects.create(hotel=self.hotel, name='Deluxe', base_price=100, max_occupancy=2)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/recent-activity/').data['data']['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/rooms/bulk-create/', {
+                'category': category.id, 'floor': 1, 'start_number': '100', 'end_number': '199',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        rows = self.client.get('/api/recent-activity/').data['data']['results']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['action'], 'rooms_created')
+        self.assertEqual(len(rows[0]['message']), 255)  # 100 room numbers, truncated to fit
+
+    @override_settings(ACTIVITY_LOG_BUFFER_SIZE=2, ACTIVITY_LOG_FLUSH_INTERVAL=3600)
+    def test_background_buffer_is_bounded_and_counts_drops(self):
+        buffer = ActivityLogBuffer()
+        entries = [ActivityLog(actor=self.user, hotel=self.hotel, action='imported', message=f'Row {n}')
+                   for n in range(3)]
+        self.assertEqual([buffer.offer(entry) for entry in entries], [True, True, False])
+
+        buffer.flush()
+
+        self.assertEqual(ActivityLog.objects.count(), 2)
+        counters = instrumentation.registry.snapshot()['activity-log']['counters']
+        self.assertEqual(counters['activity_log_dropped'], 1)
+        self.assertEqual(counters['activity_log_written'], 2)
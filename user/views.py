@@ -1,5 +1,6 @@
 from rest_framework import generics, status, views, viewsets, serializers
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from lobbybee.utils.response_cache import HOTEL_ACTIVITY, cache_response
 from lobbybee.utils.responses import success_response, error_response, created_response, not_found_response, forbidden_response
 from django.core.mail import send_mail
 from django.conf import settings
@@ -11,6 +12,7 @@ from django.core.exceptions import ValidationError
 from rest_framework.exceptions import PermissionDenied
 from .models import User, OTP, ActivityLog
 from .activity import log_activity
+from . import principal_cache
 from .serializers import UserSerializer
 from hotel.permissions import IsHotelAdmin, IsHotelStaff
 from .permissions import IsSuperUser, IsPlatformAdmin, IsPlatformStaff, CanManageHotelUsers
@@ -68,6 +70,10 @@ class RecentActivityView(generics.ListAPIView):
 
         return qs
 
+    @cache_response('recent_activity.list', scope='hotel', tags=(HOTEL_ACTIVITY,))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 class PlatformUserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
 
@@ -132,6 +138,7 @@ class LogoutView(views.APIView):
         try:
             token = RefreshToken(refresh_token)
             token.blacklist()
+            principal_cache.invalidate_users(request.user.pk)
             return success_response(message="Successfully logged out", status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return error_response(